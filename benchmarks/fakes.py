@@ -0,0 +1,321 @@
+"""
+Локальні замінники зовнішніх сервісів для навантажувального тесту.
+
+FakeOpenMeteo — справжній HTTP-сервер (aiohttp в окремому потоці) з API геокодування
+та прогнозу Open-Meteo і заданою затримкою відповіді. Бот ходить до нього звичайним
+httpx-клієнтом, тож у вимір потрапляють пули з'єднань, кеші та single-flight. З
+касетою (weather_agent.cassette) сервер віддає записані справжні відповіді, а для
+незаписаних запитів — згенеровані.
+
+FakeTelegramRequest — транспорт Bot API для python-telegram-bot: getMe, sendMessage,
+editMessageText тощо відповідають локально із затримкою, а надіслані тексти
+зберігаються для підрахунку помилок.
+
+FakeToolModel — чат-модель для create_agent: на запит користувача викликає
+get_weather, на результат tool відповідає порадою; кожен хід — із затримкою. Уміє
+й потокову генерацію (STREAMING_ENABLED): відповідь приходить по словах.
+"""
+
+import asyncio
+import json
+import random
+import re
+import socket
+import threading
+import time
+import zlib
+from typing import Any
+
+from aiohttp import web
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from telegram.request import BaseRequest, RequestData
+
+from weather_agent.cassette import Cassette, CassetteMiss, http_key
+
+# Хости справжнього API: ключі записаних у касету запитів містять саме їх
+OPEN_METEO_HOSTS = {
+    "/v1/search": "geocoding-api.open-meteo.com",
+    "/v1/forecast": "api.open-meteo.com",
+}
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "Weather", "username": "weather_bench_bot"}
+
+
+def _coords(name: str) -> tuple[float, float]:
+    """Стабільні координати для назви (у межах України)."""
+    h = zlib.crc32(name.encode())
+    return 44.5 + (h % 700) / 100, 22.5 + (h // 700 % 1700) / 100
+
+
+class FakeOpenMeteo:
+    """Geocoding (/v1/search) і Forecast (/v1/forecast) API із затримкою та помилками."""
+
+    def __init__(
+        self,
+        geocode_latency: float = 0.05,
+        forecast_latency: float = 0.08,
+        error_rate: float = 0.0,
+        seed: int = 0,
+        cassette: Cassette | None = None,
+    ) -> None:
+        self.cassette = cassette
+        self.geocode_latency = geocode_latency
+        self.forecast_latency = forecast_latency
+        self.error_rate = error_rate
+        self.requests = {"geocode": 0, "forecast": 0, "errors": 0, "recorded": 0}
+        self._random = random.Random(seed)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._runner: web.AppRunner | None = None
+        self._thread: threading.Thread | None = None
+        self.base_url = ""
+
+    @property
+    def geocoding_url(self) -> str:
+        return f"{self.base_url}/v1/search"
+
+    @property
+    def forecast_url(self) -> str:
+        return f"{self.base_url}/v1/forecast"
+
+    def _recorded(self, request: web.Request) -> web.Response | None:
+        """Записана відповідь на такий самий запит до справжнього API або None."""
+        if self.cassette is None:
+            return None
+        url = f"https://{OPEN_METEO_HOSTS[request.path]}{request.path_qs}"
+        try:
+            entry = self.cassette.lookup("http", http_key("GET", url))
+        except CassetteMiss:
+            return None
+        if entry is None:
+            return None
+        self.requests["recorded"] += 1
+        if "json" in entry:
+            return web.json_response(entry["json"], status=entry["status"])
+        return web.Response(status=entry["status"], text=entry.get("text", ""))
+
+    def _failed(self) -> bool:
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.requests["errors"] += 1
+            return True
+        return False
+
+    async def _geocode(self, request: web.Request) -> web.Response:
+        self.requests["geocode"] += 1
+        await asyncio.sleep(self.geocode_latency)
+        if self._failed():
+            return web.Response(status=503)
+        recorded = self._recorded(request)
+        if recorded is not None:
+            return recorded
+        name = request.query.get("name", "").strip()
+        lat, lon = _coords(name.lower())
+        return web.json_response(
+            {
+                "results": [
+                    {"name": name, "latitude": lat, "longitude": lon, "timezone": "Europe/Kyiv"}
+                ]
+            }
+        )
+
+    async def _forecast(self, request: web.Request) -> web.Response:
+        self.requests["forecast"] += 1
+        await asyncio.sleep(self.forecast_latency)
+        if self._failed():
+            return web.Response(status=503)
+        recorded = self._recorded(request)
+        if recorded is not None:
+            return recorded
+        lats = request.query.get("latitude", "").split(",")
+        lons = request.query.get("longitude", "").split(",")
+        now = time.strftime("%Y-%m-%dT%H:%M", time.gmtime())
+        items = []
+        for lat, lon in zip(lats, lons):
+            h = zlib.crc32(f"{lat},{lon}".encode())
+            temperature = (h % 400) / 10 - 10
+            items.append(
+                {
+                    "latitude": float(lat),
+                    "longitude": float(lon),
+                    "timezone": "Europe/Kyiv",
+                    "current": {
+                        "time": now,
+                        "interval": 900,
+                        "temperature_2m": temperature,
+                        "apparent_temperature": temperature - 2,
+                        "relative_humidity_2m": h % 60 + 30,
+                        "weather_code": (0, 3, 61, 71)[h % 4],
+                        "wind_speed_10m": h % 25,
+                    },
+                }
+            )
+        return web.json_response(items[0] if len(items) == 1 else items)
+
+    def start(self) -> "FakeOpenMeteo":
+        """Запускає сервер на випадковому порту 127.0.0.1 у фоновому потоці."""
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        self.base_url = f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+        async def serve() -> None:
+            app = web.Application()
+            app.router.add_get("/v1/search", self._geocode)
+            app.router.add_get("/v1/forecast", self._forecast)
+            self._runner = web.AppRunner(app, access_log=None)
+            await self._runner.setup()
+            await web.SockSite(self._runner, sock).start()
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="fake-open-meteo")
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(serve(), self._loop).result()
+        return self
+
+    def stop(self) -> None:
+        if self._loop is None:
+            return
+        if self._runner is not None:
+            asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+
+class FakeTelegramRequest(BaseRequest):
+    """Bot API без мережі: відповіді формуються локально, надіслані тексти зберігаються."""
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        # message_id → (chat_id, останній текст повідомлення)
+        self.messages: dict[int, tuple[int, str]] = {}
+        self.calls: dict[str, int] = {}
+        self._next_id = 0
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    @property
+    def read_timeout(self) -> float | None:
+        return None
+
+    def _message(self, message_id: int, chat_id: int, text: str) -> dict[str, Any]:
+        self.messages[message_id] = (chat_id, text)
+        return {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": BOT_USER,
+            "text": text,
+        }
+
+    async def do_request(
+        self, url: str, method: str, request_data: RequestData | None = None, **kwargs: Any
+    ) -> tuple[int, bytes]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        api_method = url.rsplit("/", 1)[-1]
+        self.calls[api_method] = self.calls.get(api_method, 0) + 1
+        params = request_data.parameters if request_data is not None else {}
+        if api_method == "getMe":
+            result: Any = BOT_USER
+        elif api_method == "sendMessage":
+            self._next_id += 1
+            result = self._message(self._next_id, int(params["chat_id"]), params["text"])
+        elif api_method == "editMessageText":
+            result = self._message(
+                int(params["message_id"]), int(params["chat_id"]), params["text"]
+            )
+        else:
+            result = True
+        return 200, json.dumps({"ok": True, "result": result}).encode()
+
+
+# «Що одягнути ввечері в Бенчграді-7?» → «Бенчграді-7»
+_CITY = re.compile(r"\s(?:в|у)\s+(?P<city>[^?]+)\??\s*$")
+
+
+def _text(message: BaseMessage) -> str:
+    content = message.content
+    return content if isinstance(content, str) else str(content)
+
+
+class FakeToolModel(BaseChatModel):
+    """
+    Модель із двома ходами: запит користувача → виклик get_weather для міста з тексту,
+    результат tool → коротка порада. delay — секунди на кожен хід (імітація LLM).
+    """
+
+    delay: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-tool-model"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _reply(self, messages: list[BaseMessage]) -> AIMessage:
+        last = messages[-1]
+        prompt_tokens = sum(len(_text(m)) for m in messages) // 4
+        if isinstance(last, ToolMessage):
+            text = f"Зараз так: {_text(last)[:80]} Раджу вдягнутися за погодою."
+            usage = {"input_tokens": prompt_tokens, "output_tokens": len(text) // 4}
+            usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+            return AIMessage(text, usage_metadata=usage)
+        match = _CITY.search(_text(last))
+        city = match.group("city").strip() if match else _text(last).strip()
+        usage = {
+            "input_tokens": prompt_tokens,
+            "output_tokens": 20,
+            "total_tokens": prompt_tokens + 20,
+        }
+        call_id = f"call-{zlib.crc32(f'{city}{time.perf_counter_ns()}'.encode())}"
+        return AIMessage(
+            "",
+            tool_calls=[{"name": "get_weather", "args": {"city": city}, "id": call_id}],
+            usage_metadata=usage,
+        )
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.delay:
+            time.sleep(self.delay)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    def _chunks(self, message: AIMessage) -> list[AIMessageChunk]:
+        """Повідомлення по частинах, як у потоці OpenAI; usage — в останньому чанку."""
+        if message.tool_calls:
+            tool_call_chunks = [
+                {"name": c["name"], "args": json.dumps(c["args"]), "id": c["id"], "index": i}
+                for i, c in enumerate(message.tool_calls)
+            ]
+            return [
+                AIMessageChunk(
+                    content="",
+                    tool_call_chunks=tool_call_chunks,
+                    usage_metadata=message.usage_metadata,
+                )
+            ]
+        words = [word for word in re.split(r"(\s)", message.content) if word]
+        chunks = [AIMessageChunk(content=word) for word in words]
+        chunks[-1].usage_metadata = message.usage_metadata
+        return chunks
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        for chunk in self._chunks(self._reply(messages)):
+            if run_manager and chunk.content:
+                await run_manager.on_llm_new_token(
+                    chunk.content, chunk=ChatGenerationChunk(message=chunk)
+                )
+            yield ChatGenerationChunk(message=chunk)
@@ -0,0 +1,276 @@
+"""
+Навантажувальний тест бота: синтетичні оновлення Telegram із заданою частотою.
+
+Оновлення проходять через обробники build_application (черга чату, агент, tool-и,
+кеші, admission control) так само, як у продакшені. Зовнішні сервіси замінено
+(benchmarks/fakes.py): Open-Meteo — локальний HTTP-сервер із затримкою, Telegram —
+локальний транспорт Bot API, LLM — модель, що викликає get_weather із затримкою.
+
+Навантаження відкрите (open-loop): оновлення надходять рівно --rate на секунду
+незалежно від того, чи встигає бот, тож перевантаження видно в затримці й помилках.
+
+    python -m benchmarks.load_test --rate 20 --duration 30 --llm-delay 0.4
+    python -m benchmarks.load_test --rate 20 --duration 30 --json after.json --compare before.json
+    python -m benchmarks.load_test --cassette tests/cassettes/test_task_completion/<тест>.json
+
+З --cassette Open-Meteo віддає записані справжні відповіді, а запити задаються про
+міста з цієї касети.
+
+Налаштування бота (AGENT_MAX_INFLIGHT, RESPONSE_CACHE_ENABLED, STREAMING_ENABLED тощо)
+беруться зі змінних середовища, як і при звичайному запуску.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import sys
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_ROOT / "src"))
+
+from benchmarks.fakes import FakeOpenMeteo, FakeTelegramRequest, FakeToolModel
+
+# Відповіді бота, що означають збій запиту (а не пораду)
+ERROR_PREFIXES = (
+    "Виникла помилка",
+    "Зараз забагато запитів",
+    "Не вдалося отримати відповідь",
+    "Відповідь порожня",
+)
+
+
+class LoadConfig(NamedTuple):
+    """Параметри прогону: навантаження та затримки фейкових сервісів (секунди)."""
+
+    rate: float = 10.0
+    requests: int = 100
+    cities: int = 50
+    chats: int = 0
+    debounce: float = 0.0
+    llm_delay: float = 0.3
+    geocode_latency: float = 0.05
+    forecast_latency: float = 0.08
+    telegram_latency: float = 0.01
+    upstream_error_rate: float = 0.0
+    cassette: str | None = None
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Перцентиль за nearest-rank (q від 0 до 100); 0.0 для порожнього списку."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _update(update_id: int, chat_id: int, text: str) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Bench"},
+            "text": text,
+        },
+    }
+
+
+def synthetic_updates(config: LoadConfig, cities: list[str] | None = None) -> list[dict]:
+    """
+    Запити «ввечері» (їх не бере fast path — відповідає агент) про config.cities міст
+    по колу: частина запитів повторює місто і влучає в кеші. cities — справжні назви
+    (з касети) замість вигаданих.
+    """
+    chats = config.chats or config.requests
+    names = cities or [f"Бенчграді-{n}" for n in range(config.cities)]
+    return [
+        _update(i + 1, 10_000 + i % chats, f"Що одягнути ввечері в {names[i % len(names)]}?")
+        for i in range(config.requests)
+    ]
+
+
+async def _drive(application, updates: list[dict], rate: float) -> tuple[list[float], float]:
+    """Подає оновлення з частотою rate; повертає затримки обробки (с) і загальний час."""
+    from telegram import Update
+
+    latencies: list[float] = []
+    loop = asyncio.get_running_loop()
+
+    async def one(data: dict) -> None:
+        started = loop.time()
+        await application.process_update(Update.de_json(data, application.bot))
+        latencies.append(loop.time() - started)
+
+    begin = loop.time()
+    tasks = []
+    for i, data in enumerate(updates):
+        delay = begin + i / rate - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(data)))
+    await asyncio.gather(*tasks)
+    return latencies, loop.time() - begin
+
+
+async def run_load(config: LoadConfig) -> dict:
+    """Піднімає фейкові сервіси, проганяє навантаження і повертає звіт."""
+    from langchain.agents import create_agent
+
+    from weather_agent import agent, bot, weather
+    from weather_agent.cassette import Cassette, recorded_cities
+    from weather_agent.chat_queue import ChatQueue
+    from weather_agent.http_client import aclose_clients
+    from weather_agent.llm_callbacks import LLMCallbackHandler
+    from weather_agent.metrics import LLM_SECONDS, UPSTREAM_SECONDS
+    from weather_agent.prompts import get_system_prompt
+
+    cassette = Cassette(config.cassette, mode="replay") if config.cassette else None
+    cities = recorded_cities(cassette)[: config.cities] if cassette else None
+    open_meteo = FakeOpenMeteo(
+        config.geocode_latency,
+        config.forecast_latency,
+        config.upstream_error_rate,
+        cassette=cassette,
+    ).start()
+    telegram = FakeTelegramRequest(config.telegram_latency)
+    urls = weather.GEOCODING_URL, weather.FORECAST_URL
+    weather.GEOCODING_URL, weather.FORECAST_URL = open_meteo.geocoding_url, open_meteo.forecast_url
+    agent._agent = create_agent(
+        FakeToolModel(delay=config.llm_delay, callbacks=[LLMCallbackHandler()]),
+        tools=[weather.get_weather, weather.get_weather_many],
+        system_prompt=get_system_prompt(),
+    )
+    bot._chats = ChatQueue(config.debounce)
+    weather.clear_caches()
+    application = bot.build_application("0:bench", metrics_port=0, request=telegram)
+    llm_before = LLM_SECONDS.count()
+    try:
+        await application.initialize()
+        latencies, elapsed = await _drive(
+            application, synthetic_updates(config, cities), config.rate
+        )
+    finally:
+        await application.shutdown()
+        await aclose_clients()
+        open_meteo.stop()
+        weather.GEOCODING_URL, weather.FORECAST_URL = urls
+        agent._agent = None
+
+    replies = [text for _chat, text in telegram.messages.values()]
+    errors = sum(1 for text in replies if text.startswith(ERROR_PREFIXES))
+    # Без спільних чатів кожне оновлення має отримати рівно одну відповідь
+    unanswered = max(0, len(latencies) - len(replies)) if not config.chats else 0
+    return {
+        "config": config._asdict(),
+        "requests": len(latencies),
+        "replies": len(replies),
+        "errors": errors + unanswered,
+        "error_rate": (errors + unanswered) / len(latencies) if latencies else 0.0,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "p50": percentile(latencies, 50) * 1000,
+            "p95": percentile(latencies, 95) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+            "mean": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+            "max": max(latencies, default=0.0) * 1000,
+        },
+        "open_meteo_requests": {
+            "geocode": open_meteo.requests["geocode"],
+            "forecast": open_meteo.requests["forecast"],
+            "errors": open_meteo.requests["errors"],
+            "recorded": open_meteo.requests["recorded"],
+        },
+        "upstream_calls": {
+            endpoint: UPSTREAM_SECONDS.count(endpoint=endpoint)
+            for endpoint in ("geocode", "forecast", "forecast_batch")
+        },
+        "llm_calls": LLM_SECONDS.count() - llm_before,
+    }
+
+
+# Показники для порівняння прогонів: (шлях у звіті, «менше — краще»)
+_COMPARED = (
+    (("latency_ms", "p50"), True),
+    (("latency_ms", "p95"), True),
+    (("latency_ms", "p99"), True),
+    (("throughput_rps",), False),
+    (("error_rate",), True),
+)
+
+
+def _get(report: dict, path: tuple[str, ...]) -> float:
+    for key in path:
+        report = report[key]
+    return report
+
+
+def format_report(report: dict, baseline: dict | None = None) -> str:
+    """Звіт у вигляді таблиці; з baseline — ще стовпці «до» та зміна у відсотках."""
+    summary = (
+        f"запитів: {report['requests']}, відповідей: {report['replies']}, "
+        f"помилок: {report['errors']}, викликів LLM: {report['llm_calls']}, "
+        f"Open-Meteo: {report['open_meteo_requests']}"
+    )
+    lines = [summary]
+    for path, lower_is_better in _COMPARED:
+        name = ".".join(path)
+        value = _get(report, path)
+        line = f"{name:<16} {value:>10.3f}"
+        if baseline is not None:
+            before = _get(baseline, path)
+            change = (value - before) / before * 100 if before else 0.0
+            worse = change > 0 if lower_is_better else change < 0
+            mark = "гірше" if worse and abs(change) >= 5 else ""
+            line += f"   до: {before:>10.3f}  {change:+7.1f}% {mark}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    defaults = LoadConfig()
+    parser.add_argument("--rate", type=float, default=defaults.rate, help="оновлень за секунду")
+    parser.add_argument("--duration", type=float, default=None, help="секунд (замість --requests)")
+    parser.add_argument("--requests", type=int, default=defaults.requests)
+    parser.add_argument("--cities", type=int, default=defaults.cities, help="різних міст")
+    parser.add_argument("--chats", type=int, default=defaults.chats, help="0 — чат на оновлення")
+    parser.add_argument("--debounce", type=float, default=defaults.debounce)
+    parser.add_argument("--llm-delay", type=float, default=defaults.llm_delay)
+    parser.add_argument("--geocode-latency", type=float, default=defaults.geocode_latency)
+    parser.add_argument("--forecast-latency", type=float, default=defaults.forecast_latency)
+    parser.add_argument("--telegram-latency", type=float, default=defaults.telegram_latency)
+    parser.add_argument("--upstream-error-rate", type=float, default=defaults.upstream_error_rate)
+    parser.add_argument("--cassette", default=None, help="касета з відповідями Open-Meteo")
+    parser.add_argument("--json", type=Path, default=None, help="зберегти звіт у файл")
+    parser.add_argument("--compare", type=Path, default=None, help="звіт попереднього прогону")
+    args = parser.parse_args()
+
+    requests = round(args.rate * args.duration) if args.duration else args.requests
+    config = LoadConfig(
+        rate=args.rate,
+        requests=requests,
+        cities=args.cities,
+        chats=args.chats,
+        debounce=args.debounce,
+        llm_delay=args.llm_delay,
+        geocode_latency=args.geocode_latency,
+        forecast_latency=args.forecast_latency,
+        telegram_latency=args.telegram_latency,
+        upstream_error_rate=args.upstream_error_rate,
+        cassette=args.cassette,
+    )
+    report = asyncio.run(run_load(config))
+    baseline = json.loads(args.compare.read_text(encoding="utf-8")) if args.compare else None
+    print(format_report(report, baseline))
+    if args.json:
+        args.json.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
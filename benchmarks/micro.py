@@ -0,0 +1,329 @@
+"""
+Мікробенчмарки гарячого шляху tool get_weather з базовими значеннями та перевіркою регресій.
+
+Кожен виклик get_weather нормалізує назву, розбирає JSON Open-Meteo, перетворює WMO-код
+на текст і форматує речення. Кейси міряють ці кроки окремо й увесь tool разом
+(HTTP — через httpx.MockTransport у тому ж процесі, без мережі).
+
+Вимір у стилі pyperf: кількість повторів у серії підбирається так, щоб серія тривала
+не менше --min-time секунд; серій --repeat, у звіт іде найкраща (мінімум найменше
+залежить від фонового шуму). Разом із кейсами міряється еталонний цикл на чистому
+Python, і порівнюються відношення кейс/еталон — так збережені базові значення
+придатні й на іншій машині.
+
+    python -m benchmarks.micro                 # звіт
+    python -m benchmarks.micro --save          # записати базові значення
+    python -m benchmarks.micro --check         # код виходу 1, якщо кейс повільніший за поріг
+
+Поріг відносний (--threshold) і абсолютний (--noise-floor, нс): кейс на пару
+мікросекунд легко «сповільнюється» на 30% від шуму. Кейси коротші за GATE_MIN_NS
+лише показуються у звіті.
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_ROOT / "src"))
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "micro.json"
+# Допустиме сповільнення відносно базового значення (0.25 — на 25%)
+DEFAULT_THRESHOLD = 0.25
+# Регресія — лише якщо кейс повільніший ще й на стільки наносекунд: у кейсах на
+# одиниці мікросекунд шум між прогонами сягає десятків відсотків
+DEFAULT_NOISE_FLOOR_NS = 2000.0
+# Кейси, швидші за це в базових значеннях, лише показуються у звіті й не валять --check
+GATE_MIN_NS = 1000.0
+# Власні пороги кейсів, шумніших за решту: повний get_weather іде через пул потоків,
+# MockTransport і алокації httpx, і між прогонами на тій самій машині гуляє на ±35%
+CASE_THRESHOLDS = {"get_weather_cold": 0.5, "get_weather_cached": 0.5}
+# Скільки прогонів об'єднує --save (найкращий час кожного кейсу)
+SAVE_RUNS = 3
+
+GEOCODE_BODY = json.dumps(
+    {
+        "results": [
+            {
+                "id": 703448,
+                "name": "Київ",
+                "latitude": 50.45466,
+                "longitude": 30.5238,
+                "elevation": 187.0,
+                "feature_code": "PPLC",
+                "country_code": "UA",
+                "timezone": "Europe/Kyiv",
+                "population": 2797553,
+                "country": "Україна",
+                "admin1": "Київ",
+            }
+        ],
+        "generationtime_ms": 0.6,
+    },
+    ensure_ascii=False,
+).encode()
+FORECAST_BODY = json.dumps(
+    {
+        "latitude": 50.45,
+        "longitude": 30.52,
+        "generationtime_ms": 0.05,
+        "utc_offset_seconds": 10800,
+        "timezone": "Europe/Kyiv",
+        "timezone_abbreviation": "EEST",
+        "elevation": 187.0,
+        "current_units": {
+            "time": "iso8601",
+            "interval": "seconds",
+            "temperature_2m": "°C",
+            "apparent_temperature": "°C",
+            "relative_humidity_2m": "%",
+            "weather_code": "wmo code",
+            "wind_speed_10m": "km/h",
+        },
+        "current": {
+            "time": "2026-10-16T12:00",
+            "interval": 900,
+            "temperature_2m": 11.4,
+            "apparent_temperature": 8.9,
+            "relative_humidity_2m": 71,
+            "weather_code": 61,
+            "wind_speed_10m": 14.3,
+        },
+    }
+).encode()
+
+
+def _calibration() -> int:
+    """Еталон: фіксована робота на чистому Python (словники, рядки, арифметика)."""
+    total = 0
+    items = {}
+    for i in range(200):
+        items[f"k{i}"] = i * 3
+        total += len(str(i)) + items[f"k{i}"] % 7
+    return total
+
+
+def _transport():
+    import httpx
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = GEOCODE_BODY if request.url.path.endswith("/search") else FORECAST_BODY
+        return httpx.Response(200, content=body, headers={"Content-Type": "application/json"})
+
+    return httpx.MockTransport(handler)
+
+
+def build_cases() -> dict[str, Callable[[], object]]:
+    """Назва кейсу → функція без аргументів, яку міряємо."""
+    import httpx
+
+    from weather_agent import weather
+
+    current = json.loads(FORECAST_BODY)["current"]
+
+    def parse_geocode() -> object:
+        return weather._parse_geocode(httpx.Response(200, content=GEOCODE_BODY).json())
+
+    def parse_forecast() -> object:
+        return httpx.Response(200, content=FORECAST_BODY).json()["current"]
+
+    def get_weather_cold() -> object:
+        # Без кешів: нормалізація, два HTTP-запити через MockTransport, розбір, форматування
+        weather.clear_caches()
+        return weather.get_weather.invoke({"city": " Бенчград "})
+
+    def get_weather_cached() -> object:
+        return weather.get_weather.invoke({"city": " Бенчград "})
+
+    return {
+        "weather_code_known": lambda: weather.weather_code_to_text(61),
+        "weather_code_fallback": lambda: weather.weather_code_to_text(64),
+        "parse_geocode": parse_geocode,
+        "parse_forecast": parse_forecast,
+        "format_current": lambda: weather.format_current(current),
+        "get_weather_cold": get_weather_cold,
+        "get_weather_cached": get_weather_cached,
+    }
+
+
+def measure(func: Callable[[], object], min_time: float, repeat: int) -> float:
+    """Найкращий час одного виклику (нс) з repeat серій тривалістю не менше min_time."""
+    # Підбір кількості повторів заодно прогріває кеші, алокатор і ліниві імпорти
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+        loops *= 2 if elapsed < min_time / 4 else 1 + int(min_time / max(elapsed, 1e-9))
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        timings.append((time.perf_counter() - started) / loops)
+    return min(timings) * 1e9
+
+
+def run(min_time: float = 0.2, repeat: int = 7, only: list[str] | None = None) -> dict[str, object]:
+    """Міряє еталон і кейси; повертає {"calibration_ns": ..., "cases": {назва: нс}}."""
+    from weather_agent import weather
+    from weather_agent.http_client import use_transport
+
+    cases = build_cases()
+    if only:
+        unknown = set(only) - set(cases)
+        if unknown:
+            raise SystemExit(f"Невідомі кейси: {', '.join(sorted(unknown))}")
+        cases = {name: cases[name] for name in only}
+
+    gazetteer = weather.GAZETTEER_ENABLED
+    # Вигадане місто й вимкнений газетир — щоб get_weather ішов через HTTP і кеші
+    weather.GAZETTEER_ENABLED = False
+    use_transport(_transport())
+    try:
+        calibration = measure(_calibration, min_time, repeat)
+        results = {name: measure(func, min_time, repeat) for name, func in cases.items()}
+        # Еталон ще раз після кейсів: частота процесора могла змінитися за прогін
+        calibration = min(calibration, measure(_calibration, min_time, repeat))
+    finally:
+        use_transport(None)
+        weather.clear_caches()
+        weather.GAZETTEER_ENABLED = gazetteer
+    return {"calibration_ns": calibration, "cases": results}
+
+
+def compare(
+    report: dict,
+    baseline: dict,
+    threshold: float = DEFAULT_THRESHOLD,
+    noise_floor: float = DEFAULT_NOISE_FLOOR_NS,
+) -> list[tuple[str, float, bool]]:
+    """
+    (кейс, зміна відносно базового значення, регресія?) для кейсів, що є в обох звітах.
+    Зміна рахується з поправкою на еталон: 0.3 — на 30% повільніше на тій самій машині.
+    Регресія — зміна понад threshold (для шумних кейсів — CASE_THRESHOLDS) і водночас
+    понад noise_floor нс; кейси, що в базових значеннях коротші за GATE_MIN_NS,
+    регресією не вважаються ніколи.
+    """
+    speed = report["calibration_ns"] / baseline["calibration_ns"]
+    rows = []
+    for name, value in report["cases"].items():
+        before = baseline["cases"].get(name)
+        if not before:
+            continue
+        expected = before * speed
+        change = value / expected - 1
+        limit = max(threshold, CASE_THRESHOLDS.get(name, 0.0))
+        regressed = before >= GATE_MIN_NS and change > limit and value - expected > noise_floor
+        rows.append((name, change, regressed))
+    return rows
+
+
+def _merge_best(report: dict, again: dict) -> None:
+    """Лишає в report найкращий (найменший) час еталону й кожного кейсу з again."""
+    report["calibration_ns"] = min(report["calibration_ns"], again["calibration_ns"])
+    for name, value in again["cases"].items():
+        report["cases"][name] = min(report["cases"][name], value)
+
+
+def confirm(
+    report: dict,
+    baseline: dict,
+    threshold: float,
+    min_time: float,
+    repeat: int,
+    attempts: int = 2,
+    noise_floor: float = DEFAULT_NOISE_FLOOR_NS,
+) -> list[tuple[str, float, bool]]:
+    """
+    Порівняння з базовими значеннями; кейси з регресією переміряються до attempts разів
+    (лишається найкращий результат), щоб одиничний сплеск шуму не валив перевірку.
+    """
+    rows = compare(report, baseline, threshold, noise_floor)
+    for _ in range(attempts):
+        regressed = [name for name, _change, slow in rows if slow]
+        if not regressed:
+            break
+        _merge_best(report, run(min_time, repeat, regressed))
+        rows = compare(report, baseline, threshold, noise_floor)
+    return rows
+
+
+def format_report(report: dict, rows: list[tuple[str, float, bool]] | None = None) -> str:
+    changes = {name: (change, regressed) for name, change, regressed in rows or []}
+    lines = [f"{'еталон':<24} {report['calibration_ns']:>12,.0f} нс"]
+    for name, value in report["cases"].items():
+        line = f"{name:<24} {value:>12,.0f} нс"
+        if name in changes:
+            change, regressed = changes[name]
+            line += f"  {change:+7.1%}" + ("  РЕГРЕСІЯ" if regressed else "")
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--min-time", type=float, default=0.2, help="секунд на серію")
+    parser.add_argument("--repeat", type=int, default=7, help="кількість серій")
+    parser.add_argument("--only", nargs="+", default=None, help="лише ці кейси")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="записати звіт як базові значення")
+    parser.add_argument("--check", action="store_true", help="код виходу 1 при регресії")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument(
+        "--noise-floor",
+        type=float,
+        default=DEFAULT_NOISE_FLOOR_NS,
+        help="мінімальне сповільнення в нс, що вважається регресією",
+    )
+    args = parser.parse_args()
+
+    report = run(args.min_time, args.repeat, args.only)
+    if args.save:
+        # Базові значення — найкращі з кількох прогонів: один шумний прогін не має
+        # ставати еталоном для всіх наступних перевірок
+        for _ in range(SAVE_RUNS - 1):
+            _merge_best(report, run(args.min_time, args.repeat, args.only))
+    rows = None
+    if args.baseline.exists() and not args.save:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        rows = (
+            confirm(
+                report,
+                baseline,
+                args.threshold,
+                args.min_time,
+                args.repeat,
+                noise_floor=args.noise_floor,
+            )
+            if args.check
+            else compare(report, baseline, args.threshold, args.noise_floor)
+        )
+    print(format_report(report, rows))
+
+    if args.save:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"Базові значення записано в {args.baseline}")
+    if args.check:
+        if rows is None:
+            print(f"Немає базових значень: {args.baseline}", file=sys.stderr)
+            return 1
+        regressions = [name for name, _change, regressed in rows if regressed]
+        if regressions:
+            print(
+                f"Повільніше за поріг {args.threshold:.0%}: {', '.join(regressions)}",
+                file=sys.stderr,
+            )
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,8 @@
-"""Точка входу: завантаження .env, перевірка конфігу, запуск Telegram-бота."""
+"""Точка входу: завантаження .env, перевірка конфігу, запуск Telegram-бота (polling або webhook)."""
 
 import logging
 import sys
+import time
 from pathlib import Path
 
 # Дозволити імпорт weather_agent при запуску з кореня проєкту (без pip install -e .)
@@ -12,8 +13,12 @@ if _src.exists() and str(_src) not in sys.path:
 
 from dotenv import load_dotenv
 
+# Час імпорту застосунку (LangChain тут не імпортується — його довантажує прогрів агента)
+_import_started = time.perf_counter()
 from weather_agent.bot import build_application
-from weather_agent.config import require_openai_key, require_telegram_token
+from weather_agent.config import BOT_MODE, BOT_WORKERS, require_openai_key, require_telegram_token
+
+IMPORT_SECONDS = time.perf_counter() - _import_started
 
 logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
@@ -24,11 +29,25 @@ logging.basicConfig(
 
 def main() -> None:
     load_dotenv()
+    logging.getLogger(__name__).info("Імпорт weather_agent: %.2f с", IMPORT_SECONDS)
 
     token = require_telegram_token()
     require_openai_key()
-    app = build_application(token)
-    app.run_polling(allowed_updates=["message"])
+    if BOT_WORKERS > 1:
+        # Головний процес лише приймає оновлення й розподіляє їх між обробниками за chat_id
+        from weather_agent.shards import ShardRouter, build_dispatcher
+
+        router = ShardRouter(token, BOT_WORKERS)
+        router.start()
+        app = build_dispatcher(token, router)
+    else:
+        app = build_application(token)
+    if BOT_MODE == "webhook":
+        from weather_agent.webhook import run_webhook
+
+        run_webhook(app)
+    else:
+        app.run_polling(allowed_updates=["message"])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,65 @@
+"""
+Збирає офлайн-індекс міст src/weather_agent/data/gazetteer.tsv з data/places.csv.
+
+Кожна назва (українська, англійська, відмінкові форми з колонки aliases)
+нормалізується тим самим normalize_city, що й під час пошуку, а рядки
+сортуються за ключем — weather_agent.gazetteer шукає в них бінарним пошуком.
+Результат детермінований: однаковий CSV дає байт-у-байт однаковий індекс.
+
+Запуск з кореня проєкту:
+    python scripts/build_gazetteer.py [--source data/places.csv] [--output ...]
+"""
+
+import argparse
+import csv
+import sys
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_ROOT / "src"))
+
+from weather_agent.cities import normalize_city
+from weather_agent.gazetteer import DEFAULT_PATH
+
+DEFAULT_SOURCE = _ROOT / "data" / "places.csv"
+
+
+def build_rows(source: Path) -> list[tuple[str, str, str, str, str]]:
+    """Рядки індексу (ключ, lat, lon, timezone, назва), відсортовані за ключем."""
+    rows: dict[str, tuple[str, str, str, str, str]] = {}
+    with source.open(encoding="utf-8", newline="") as f:
+        for line_no, record in enumerate(csv.DictReader(f), start=2):
+            lat, lon = float(record["latitude"]), float(record["longitude"])
+            if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+                raise SystemExit(f"{source}:{line_no}: координати поза межами: {lat}, {lon}")
+            name = record["name_uk"].strip()
+            names = [name, record["name_en"]] + (record.get("aliases") or "").split(";")
+            for raw in names:
+                key = normalize_city(raw)
+                if not key:
+                    continue
+                row = (key, f"{lat:.4f}", f"{lon:.4f}", record["timezone"].strip(), name)
+                if key in rows and rows[key][4] != name:
+                    raise SystemExit(
+                        f"{source}:{line_no}: ключ «{key}» вже належить «{rows[key][4]}»"
+                    )
+                rows[key] = row
+    return [rows[key] for key in sorted(rows)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--source", type=Path, default=DEFAULT_SOURCE)
+    parser.add_argument("--output", type=Path, default=DEFAULT_PATH)
+    args = parser.parse_args()
+
+    rows = build_rows(args.source)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with args.output.open("w", encoding="utf-8", newline="\n") as f:
+        for row in rows:
+            f.write("\t".join(row) + "\n")
+    print(f"{args.output}: {len(rows)} ключів")
+
+
+if __name__ == "__main__":
+    main()
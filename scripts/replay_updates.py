@@ -0,0 +1,69 @@
+"""
+Локальна заміна Telegram для webhook-режиму: надсилає записані оновлення POST-запитами.
+
+Кожен рядок JSONL-файлу — одне оновлення у форматі Bot API (як його шле Telegram).
+Корисно, щоб перевірити BOT_MODE=webhook без публічної адреси:
+
+    BOT_MODE=webhook python main.py
+    python scripts/replay_updates.py [--url http://127.0.0.1:8080/telegram] [--secret ...]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import httpx
+
+_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_ROOT / "src"))
+
+from weather_agent.webhook import SECRET_HEADER
+
+DEFAULT_UPDATES = _ROOT / "data" / "sample_updates.jsonl"
+
+
+def load_updates(path: Path) -> list[dict]:
+    """Оновлення з JSONL-файлу (порожні рядки пропускаються)."""
+    with path.open(encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def replay(
+    url: str,
+    updates: list[dict],
+    secret: str | None = None,
+    client: httpx.AsyncClient | None = None,
+) -> list[int]:
+    """Надсилає оновлення по черзі, як Telegram; повертає HTTP-статуси відповідей."""
+    headers = {SECRET_HEADER: secret} if secret else {}
+    owned = client is None
+    client = client or httpx.AsyncClient(timeout=10.0)
+    try:
+        statuses = []
+        for update in updates:
+            response = await client.post(url, json=update, headers=headers)
+            statuses.append(response.status_code)
+        return statuses
+    finally:
+        if owned:
+            await client.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://127.0.0.1:8080/telegram")
+    parser.add_argument("--updates", type=Path, default=DEFAULT_UPDATES)
+    parser.add_argument("--secret", default=None)
+    args = parser.parse_args()
+
+    statuses = asyncio.run(replay(args.url, load_updates(args.updates), args.secret))
+    for status in statuses:
+        print(status)
+    if any(status != 200 for status in statuses):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+"""
+Оцінювання якості агента на наборі випадків: паралельно, з дисковим кешем, з підсумком.
+
+Кожен рядок JSONL-набору (data/eval_cases.jsonl) — один випадок:
+
+    {"id": "kyiv", "input": "Що одягнути в Києві?",
+     "expected_tools": ["get_weather"],        # tool-и, які агент має викликати
+     "keywords": ["куртк", "тепл"],            # хоча б одне слово у відповіді
+     "forbidden": ["system_prompt"],           # жодного з цих рядків у відповіді
+     "judge": ["answer_relevancy"],            # метрики DeepEval з LLM-суддею
+     "expected_output": "..."}                 # еталон для судді (опційно)
+
+Агент викликається для до --concurrency випадків одночасно. Відповіді агента
+кешуються на диску за (input, версія й текст промпта, модель), вердикти судді — за
+(метрика, модель судді, input, відповідь, еталон). Тож повторний прогін звертається
+до OpenAI лише для випадків, у яких щось змінилося. --force ігнорує кеш.
+
+    python scripts/run_evals.py [--cases data/eval_cases.jsonl] [--concurrency 4]
+    python scripts/run_evals.py --only kyiv-relevancy --force
+
+Код виходу 1, якщо хоча б одна метрика не пройшла.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any, NamedTuple
+
+_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_ROOT / "src"))
+
+from weather_agent.agent import agent_errors
+from weather_agent.disk_cache import DiskCache
+
+DEFAULT_CASES = _ROOT / "data" / "eval_cases.jsonl"
+DEFAULT_CACHE = _ROOT / ".eval_cache.sqlite"
+JUDGE_THRESHOLD = 0.5
+
+AgentFn = Callable[[str], Awaitable[tuple[str, list[str]]]]
+
+
+class EvalCase(NamedTuple):
+    """Один випадок набору; порожні поля — метрика для випадку не рахується."""
+
+    id: str
+    input: str
+    expected_output: str | None = None
+    expected_tools: tuple[str, ...] = ()
+    keywords: tuple[str, ...] = ()
+    forbidden: tuple[str, ...] = ()
+    judge: tuple[str, ...] = ()
+
+
+class MetricResult(NamedTuple):
+    metric: str
+    score: float
+    passed: bool
+    reason: str
+    seconds: float
+    cached: bool
+
+
+class CaseResult(NamedTuple):
+    case: EvalCase
+    output: str
+    tools: list[str]
+    error: str | None
+    seconds: float
+    cached: bool
+    metrics: list[MetricResult]
+
+
+def load_cases(path: Path) -> list[EvalCase]:
+    """Випадки з JSONL-файлу (порожні рядки пропускаються); id мають бути унікальні."""
+    cases = []
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            for field in ("expected_tools", "keywords", "forbidden", "judge"):
+                data[field] = tuple(data.get(field) or ())
+            cases.append(EvalCase(**data))
+    ids = [case.id for case in cases]
+    duplicates = {i for i in ids if ids.count(i) > 1}
+    if duplicates:
+        raise SystemExit(f"Повторювані id у {path}: {', '.join(sorted(duplicates))}")
+    return cases
+
+
+def _digest(payload: Any) -> str:
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class EvalCache:
+    """Відповіді агента й вердикти судді в SQLite (DiskCache), ключ — хеш вхідних даних."""
+
+    def __init__(self, path: Path) -> None:
+        self._disk = DiskCache(path, flush_interval=0)
+        self._entries = {
+            namespace: {key: value for key, value, _expires in self._disk.load(namespace)}
+            for namespace in ("agent", "judge")
+        }
+
+    def get(self, namespace: str, key: str) -> Any:
+        return self._entries[namespace].get(key)
+
+    def put(self, namespace: str, key: str, value: Any) -> None:
+        self._entries[namespace][key] = value
+        self._disk.put(namespace, key, value, math.inf)
+
+    def close(self) -> None:
+        self._disk.close()
+
+
+# --- Метрики без LLM: (випадок, відповідь, tool-и) → (оцінка 0..1, пояснення) ---
+
+
+def _keywords(case: EvalCase, output: str, tools: list[str]) -> tuple[float, str]:
+    text = output.lower()
+    found = [word for word in case.keywords if word.lower() in text]
+    return (1.0, f"знайдено «{found[0]}»") if found else (0.0, "жодного ключового слова")
+
+
+def _forbidden(case: EvalCase, output: str, tools: list[str]) -> tuple[float, str]:
+    text = output.lower()
+    leaked = [word for word in case.forbidden if word.lower() in text]
+    return (0.0, f"є «{leaked[0]}»") if leaked else (1.0, "заборонених рядків немає")
+
+
+def _tools(case: EvalCase, output: str, tools: list[str]) -> tuple[float, str]:
+    missing = [name for name in case.expected_tools if name not in tools]
+    score = 1 - len(missing) / len(case.expected_tools)
+    reason = f"не викликано {', '.join(missing)}" if missing else f"викликано {', '.join(tools)}"
+    return score, reason
+
+
+LOCAL_METRICS: dict[str, tuple[str, Callable[..., tuple[float, str]]]] = {
+    # назва метрики → (поле випадку, що її вмикає, функція)
+    "keywords": ("keywords", _keywords),
+    "forbidden": ("forbidden", _forbidden),
+    "tools": ("expected_tools", _tools),
+}
+
+
+def _answer_relevancy():
+    from deepeval.metrics import AnswerRelevancyMetric
+
+    return AnswerRelevancyMetric(threshold=JUDGE_THRESHOLD, async_mode=True)
+
+
+# Метрики DeepEval з LLM-суддею; новий екземпляр на кожне вимірювання (вони мають стан)
+JUDGE_METRICS: dict[str, Callable[[], Any]] = {"answer_relevancy": _answer_relevancy}
+
+
+async def _judge(metric_name: str, case: EvalCase, output: str, tools: list[str]):
+    """(оцінка, пройдено, пояснення, модель судді) від метрики DeepEval."""
+    from deepeval.test_case import LLMTestCase, ToolCall
+
+    metric = JUDGE_METRICS[metric_name]()
+    test_case = LLMTestCase(
+        input=case.input,
+        actual_output=output,
+        expected_output=case.expected_output,
+        tools_called=[ToolCall(name=name) for name in tools],
+        expected_tools=[ToolCall(name=name) for name in case.expected_tools],
+    )
+    await metric.a_measure(test_case, _show_indicator=False)
+    return metric.score, metric.is_successful(), metric.reason or "", metric.evaluation_model
+
+
+def _judge_errors() -> tuple[type[Exception], ...]:
+    """Збої судді: ті самі, що в агента (мережа, API OpenAI), DeepEval і його відсутність."""
+    errors = (*agent_errors(), ImportError)
+    try:
+        from deepeval.errors import DeepEvalError
+    except ImportError:
+        return errors
+    return (*errors, DeepEvalError)
+
+
+def agent_key(case: EvalCase) -> str:
+    """Ключ відповіді агента: input, версія й текст системного промпта, модель."""
+    from weather_agent.config import DEFAULT_MODEL, PROMPT_VERSION
+    from weather_agent.prompts import get_system_prompt
+
+    prompt = get_system_prompt()
+    return _digest(
+        {
+            "input": case.input.strip(),
+            "prompt_version": PROMPT_VERSION,
+            "prompt": hashlib.sha256(prompt.encode()).hexdigest(),
+            "model": DEFAULT_MODEL,
+        }
+    )
+
+
+async def _run_case(
+    case: EvalCase,
+    agent: AgentFn,
+    cache: EvalCache | None,
+    slots: asyncio.Semaphore,
+    force: bool,
+) -> CaseResult:
+    key = agent_key(case)
+    hit = None if force or cache is None else cache.get("agent", key)
+    started = time.perf_counter()
+    error = None
+    if hit is not None:
+        output, tools = hit["output"], hit["tools"]
+    else:
+        async with slots:
+            try:
+                output, tools = await agent(case.input)
+            except agent_errors() as e:
+                output, tools, error = "", [], f"{type(e).__name__}: {e}"
+        if error is None and cache is not None:
+            cache.put("agent", key, {"output": output, "tools": tools})
+    seconds = time.perf_counter() - started
+
+    metrics = []
+    for name, (field, measure) in LOCAL_METRICS.items():
+        if getattr(case, field):
+            score, reason = measure(case, output, tools)
+            metrics.append(MetricResult(name, score, score >= 1.0, reason, 0.0, False))
+    for name in case.judge:
+        metrics.append(await _run_judge(name, case, output, tools, cache, slots, force, error))
+    return CaseResult(case, output, tools, error, seconds, hit is not None, metrics)
+
+
+async def _run_judge(
+    name: str,
+    case: EvalCase,
+    output: str,
+    tools: list[str],
+    cache: EvalCache | None,
+    slots: asyncio.Semaphore,
+    force: bool,
+    error: str | None,
+) -> MetricResult:
+    if error is not None:
+        return MetricResult(name, 0.0, False, "агент не відповів", 0.0, False)
+    key = _digest(
+        {
+            "metric": name,
+            "threshold": JUDGE_THRESHOLD,
+            "input": case.input.strip(),
+            "output": output,
+            "expected_output": case.expected_output,
+            "tools": tools,
+            "expected_tools": list(case.expected_tools),
+        }
+    )
+    hit = None if force or cache is None else cache.get("judge", key)
+    if hit is not None:
+        return MetricResult(name, hit["score"], hit["passed"], hit["reason"], 0.0, True)
+    started = time.perf_counter()
+    async with slots:
+        try:
+            score, passed, reason, judge_model = await _judge(name, case, output, tools)
+        except _judge_errors() as e:
+            return MetricResult(
+                name, 0.0, False, f"{type(e).__name__}: {e}", time.perf_counter() - started, False
+            )
+    if cache is not None:
+        cache.put(
+            "judge",
+            key,
+            {"score": score, "passed": passed, "reason": reason, "judge": str(judge_model)},
+        )
+    return MetricResult(name, score, passed, reason, time.perf_counter() - started, False)
+
+
+async def run_evals(
+    cases: list[EvalCase],
+    agent: AgentFn | None = None,
+    cache: EvalCache | None = None,
+    concurrency: int = 4,
+    force: bool = False,
+) -> list[CaseResult]:
+    """Проганяє випадки (агент і судді — не більше concurrency одночасно)."""
+    if agent is None:
+        from weather_agent.agent import run_agent_traced
+
+        agent = run_agent_traced
+    slots = asyncio.Semaphore(max(1, concurrency))
+    return list(
+        await asyncio.gather(*(_run_case(case, agent, cache, slots, force) for case in cases))
+    )
+
+
+def summarize(results: list[CaseResult]) -> dict[str, dict[str, float]]:
+    """Підсумок за метрикою: випадки, пройдено, середня оцінка, із кешу, секунди."""
+    summary: dict[str, dict[str, float]] = {
+        "agent": {
+            "cases": len(results),
+            "passed": sum(1 for r in results if r.error is None),
+            "mean": 0.0,
+            "cached": sum(1 for r in results if r.cached),
+            "seconds": sum(r.seconds for r in results if not r.cached),
+        }
+    }
+    scores: dict[str, list[float]] = {}
+    for result in results:
+        for m in result.metrics:
+            row = summary.setdefault(
+                m.metric, {"cases": 0, "passed": 0, "mean": 0.0, "cached": 0, "seconds": 0.0}
+            )
+            row["cases"] += 1
+            row["passed"] += m.passed
+            row["cached"] += m.cached
+            row["seconds"] += m.seconds
+            scores.setdefault(m.metric, []).append(m.score or 0.0)
+    for name, values in scores.items():
+        summary[name]["mean"] = sum(values) / len(values)
+    summary["agent"]["mean"] = summary["agent"]["passed"] / len(results) if results else 0.0
+    return summary
+
+
+def format_summary(results: list[CaseResult], wall_seconds: float) -> str:
+    lines = []
+    for result in results:
+        failed = [m for m in result.metrics if not m.passed]
+        if result.error or failed:
+            lines.append(f"ПРОВАЛ {result.case.id}: {result.error or ''}")
+            lines.extend(f"    {m.metric}: {m.score:.2f} — {m.reason}" for m in failed)
+    lines.append(
+        f"{'метрика':<18} {'випадків':>8} {'пройдено':>9} {'оцінка':>7} {'з кешу':>7} {'час, с':>8}"
+    )
+    for name, row in summarize(results).items():
+        lines.append(
+            f"{name:<18} {row['cases']:>8} {row['passed']:>9} {row['mean']:>7.2f} "
+            f"{row['cached']:>7} {row['seconds']:>8.2f}"
+        )
+    evaluated = sum(1 for r in results if not r.cached)
+    lines.append(f"Прогнано агентом {evaluated} з {len(results)} випадків за {wall_seconds:.2f} с")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cases", type=Path, default=DEFAULT_CASES)
+    parser.add_argument("--cache", type=Path, default=DEFAULT_CACHE)
+    parser.add_argument("--no-cache", action="store_true", help="не читати й не писати кеш")
+    parser.add_argument("--force", action="store_true", help="переоцінити все, оновивши кеш")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--only", nargs="+", default=None, help="лише випадки з цими id")
+    args = parser.parse_args()
+
+    cases = load_cases(args.cases)
+    if args.only:
+        cases = [case for case in cases if case.id in set(args.only)]
+    cache = None if args.no_cache else EvalCache(args.cache)
+    started = time.perf_counter()
+    try:
+        results = asyncio.run(
+            run_evals(cases, cache=cache, concurrency=args.concurrency, force=args.force)
+        )
+    finally:
+        if cache is not None:
+            cache.close()
+    print(format_summary(results, time.perf_counter() - started))
+    if any(r.error or not all(m.passed for m in r.metrics) for r in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Звіт про токени промпта на один запит за версіями промпта й форматом результату tool-ів.
+
+Типовий запит — два виклики моделі: (1) системний промпт, схема tool-ів і запит
+користувача → виклик get_weather; (2) те саме плюс виклик tool і його результат →
+відповідь. Скрипт рахує токени кожної частини для всіх prompts/system_prompt_v*.txt і
+обох форматів результату tool-ів (text, compact) на запитах з data/eval_cases.jsonl.
+
+З --metrics звіт додатково читає виміряне в роботі: гістограму
+weather_agent_prompt_tokens з /metrics бота (середнє на виклик моделі за версією).
+
+    python scripts/token_report.py [--json]
+    python scripts/token_report.py --metrics http://127.0.0.1:9100/metrics
+"""
+
+import argparse
+import json
+import re
+import statistics
+import sys
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_ROOT / "src"))
+
+from weather_agent import tokens
+from weather_agent.prompts import get_system_prompt
+from weather_agent.weather import compact_current, format_current
+
+DEFAULT_CASES = _ROOT / "data" / "eval_cases.jsonl"
+PROMPTS_DIR = _ROOT / "src" / "weather_agent" / "prompts"
+# Типовий блок current Open-Meteo — результат get_weather у другому виклику моделі
+SAMPLE_CURRENT = {
+    "temperature_2m": 3.4,
+    "apparent_temperature": -0.6,
+    "weather_code": 61,
+    "wind_speed_10m": 18.0,
+    "relative_humidity_2m": 87,
+}
+FORMATS = {"text": format_current, "compact": compact_current}
+PARTS = ("system", "tools", "history", "user", "tool_results")
+
+
+def prompt_versions() -> list[str]:
+    """Версії промпта, для яких є файл system_prompt_v<N>.txt."""
+    versions = [p.stem.removeprefix("system_prompt_v") for p in PROMPTS_DIR.glob("*.txt")]
+    return sorted(versions, key=lambda v: (len(v), v))
+
+
+def _questions(path: Path) -> list[str]:
+    with path.open(encoding="utf-8") as f:
+        return [json.loads(line)["input"] for line in f if line.strip()]
+
+
+def _tool_schemas() -> list[dict]:
+    from langchain_core.utils.function_calling import convert_to_openai_tool
+
+    from weather_agent.agent import _agent_tools
+
+    return [convert_to_openai_tool(tool) for tool in _agent_tools()]
+
+
+def request_tokens(
+    system_prompt: str, tools: list[dict], question: str, tool_result: str
+) -> dict[str, int]:
+    """Токени частин промпта, підсумовані за двома викликами моделі одного запиту."""
+    first = [{"role": "system", "content": system_prompt}, {"role": "user", "content": question}]
+    second = [
+        *first,
+        {
+            "role": "assistant",
+            "content": "",
+            "tool_calls": [{"name": "get_weather", "args": {"city": "Київ"}}],
+        },
+        {"role": "tool", "content": tool_result},
+    ]
+    calls = [tokens.prompt_breakdown(messages, tools) for messages in (first, second)]
+    total = {part: sum(getattr(call, part) for call in calls) for part in PARTS}
+    total["total"] = sum(call.total for call in calls)
+    return total
+
+
+def build_report(questions: list[str], versions: list[str] | None = None) -> list[dict]:
+    """Рядок на кожну пару (версія промпта, формат tool-ів): середні токени на запит."""
+    tools = _tool_schemas()
+    rows = []
+    for version in versions or prompt_versions():
+        system_prompt = get_system_prompt(version=version)
+        for fmt, render in FORMATS.items():
+            result = render(SAMPLE_CURRENT)
+            per_request = [request_tokens(system_prompt, tools, q, result) for q in questions]
+            row = {"prompt_version": version, "tool_output": fmt}
+            for key in (*PARTS, "total"):
+                row[key] = round(statistics.mean(r[key] for r in per_request), 1)
+            rows.append(row)
+    return rows
+
+
+_SAMPLE = re.compile(
+    r'^weather_agent_prompt_tokens_(sum|count)\{part="(\w+)",prompt_version="([^"]*)"\} (\S+)$'
+)
+
+
+def parse_metrics(text: str) -> dict[str, dict[str, float]]:
+    """
+    Середні токени на виклик моделі за версією промпта й частиною з тексту /metrics:
+    {версія: {частина: середнє, ..., "calls": кількість викликів}}.
+    """
+    sums: dict[tuple[str, str], dict[str, float]] = {}
+    for line in text.splitlines():
+        match = _SAMPLE.match(line)
+        if match:
+            kind, part, version, value = match.groups()
+            sums.setdefault((version, part), {})[kind] = float(value)
+    report: dict[str, dict[str, float]] = {}
+    for (version, part), values in sorted(sums.items()):
+        count = values.get("count", 0)
+        if count:
+            row = report.setdefault(version, {"calls": count})
+            row[part] = round(values.get("sum", 0) / count, 1)
+    return report
+
+
+def format_report(rows: list[dict], measured: dict[str, dict[str, float]] | None = None) -> str:
+    header = f"{'промпт':>6} {'tool-и':>8} " + " ".join(f"{p:>12}" for p in PARTS)
+    lines = [
+        f"Токени на запит (2 виклики моделі), токенізатор: {tokens.encoder_name()}",
+        header + f" {'разом':>8}",
+    ]
+    for row in rows:
+        parts = " ".join(f"{row[p]:>12.1f}" for p in PARTS)
+        lines.append(
+            f"{'v' + row['prompt_version']:>6} {row['tool_output']:>8} {parts} {row['total']:>8.1f}"
+        )
+    if measured:
+        lines += ["", "Виміряно (/metrics), середнє на виклик моделі:"]
+        for version, values in measured.items():
+            parts = ", ".join(f"{p} {values[p]:.0f}" for p in PARTS if p in values)
+            lines.append(f"  v{version}: {parts} (викликів: {values['calls']:.0f})")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cases", type=Path, default=DEFAULT_CASES, help="запити для оцінки")
+    parser.add_argument("--versions", nargs="+", default=None, help="лише ці версії промпта")
+    parser.add_argument("--metrics", default=None, help="URL /metrics бота для виміряних даних")
+    parser.add_argument("--json", action="store_true", help="вивести звіт у JSON")
+    args = parser.parse_args()
+
+    tokens.load_encoder()
+    rows = build_report(_questions(args.cases), args.versions)
+    measured = None
+    if args.metrics:
+        import httpx
+
+        measured = parse_metrics(httpx.get(args.metrics, timeout=10).text)
+    if args.json:
+        report = {"encoder": tokens.encoder_name(), "estimated": rows, "measured": measured}
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(format_report(rows, measured))
+
+
+if __name__ == "__main__":
+    main()
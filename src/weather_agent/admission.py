@@ -0,0 +1,132 @@
+"""
+Обмеження одночасних викликів LLM (admission control).
+
+Не більше max_inflight викликів виконуються одночасно; решта чекають у черзі FIFO
+довжиною до max_queue не довше queue_timeout секунд. Якщо черга повна або час
+очікування вичерпано — AdmissionRejected, і бот одразу відповідає «зайнято»,
+замість того щоб упертися в rate limit OpenAI і віддати помилку всім. Час очікування
+в черзі й відмови йдуть і в /metrics (weather_agent_llm_queue_wait_seconds,
+weather_agent_llm_rejected_total).
+
+    async with controller.slot():
+        result = await agent.ainvoke(...)
+"""
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from weather_agent.metrics import LLM_QUEUE_WAIT_SECONDS, LLM_REJECTED
+
+
+class AdmissionRejected(Exception):
+    """Запит не допущено: reason — "queue_full" або "timeout"."""
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
+
+
+class AdmissionController:
+    """Семафор з обмеженою чергою, таймаутом очікування та метриками (max_inflight=0 — без обмеження)."""
+
+    def __init__(
+        self,
+        max_inflight: int,
+        max_queue: int,
+        queue_timeout: float,
+        clock=time.monotonic,
+    ) -> None:
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._clock = clock
+        self._inflight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self._admitted = 0
+        self._queued = 0
+        self._rejected_full = 0
+        self._rejected_timeout = 0
+        self._peak_queue = 0
+        self._wait_count = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    async def acquire(self) -> None:
+        """Займає слот або чекає в черзі; AdmissionRejected, якщо черга повна чи таймаут."""
+        unlimited = self.max_inflight <= 0
+        if unlimited or (self._inflight < self.max_inflight and not self._waiters):
+            self._inflight += 1
+            self._admitted += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self._rejected_full += 1
+            LLM_REJECTED.inc(reason="full")
+            raise AdmissionRejected("queue_full")
+
+        started = self._clock()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._queued += 1
+        self._peak_queue = max(self._peak_queue, len(self._waiters))
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # Слот уже передали цьому запиту — віддаємо його наступному в черзі
+                self.release()
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                self._rejected_timeout += 1
+                LLM_REJECTED.inc(reason="timeout")
+                LLM_QUEUE_WAIT_SECONDS.observe(self._clock() - started, result="timeout")
+                raise AdmissionRejected("timeout") from None
+            raise
+        self._admitted += 1
+        waited = self._clock() - started
+        self._wait_count += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        LLM_QUEUE_WAIT_SECONDS.observe(waited, result="admitted")
+
+    def release(self) -> None:
+        """Звільняє слот: передає його першому живому запиту в черзі або зменшує лічильник."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._inflight -= 1
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Контекст-менеджер: acquire на вході, release на виході."""
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> dict[str, float]:
+        """
+        inflight і queue_depth — поточний стан; peak_queue_depth, admitted, queued
+        (скільки запитів ставали в чергу), rejected_full, rejected_timeout — лічильники;
+        wait_avg/wait_max — секунди очікування серед допущених із черги.
+        """
+        return {
+            "inflight": self._inflight,
+            "queue_depth": sum(1 for w in self._waiters if not w.done()),
+            "peak_queue_depth": self._peak_queue,
+            "admitted": self._admitted,
+            "queued": self._queued,
+            "rejected_full": self._rejected_full,
+            "rejected_timeout": self._rejected_timeout,
+            "wait_avg": self._wait_total / self._wait_count if self._wait_count else 0.0,
+            "wait_max": self._wait_max,
+        }
@@ -1,56 +1,542 @@
-"""LangChain-агент з tool погоди та обгортка для бота."""
+"""
+LangChain-агент з tool погоди та обгортка для бота.
 
-from langchain.agents import create_agent
-from langchain_openai import ChatOpenAI
+langchain.agents і langchain_openai імпортуються ліниво в _get_agent (разом це
+секунди на старті), тож бот відповідає на /start, /help і прості запити одразу;
+async-шлях будує агента в потоці (_aget_agent), не зупиняючи event loop.
+prewarm() будує агента й відкриває HTTP-пули у фоні відразу після запуску.
+"""
 
-from weather_agent.config import DEFAULT_MODEL, require_openai_key
+import asyncio
+import logging
+import threading
+import time
+from collections.abc import AsyncIterator, Iterator, Sequence
+from contextlib import contextmanager
+
+from weather_agent.admission import AdmissionController, AdmissionRejected
+from weather_agent.config import (
+    AGENT_MAX_INFLIGHT,
+    AGENT_QUEUE_SIZE,
+    AGENT_QUEUE_TIMEOUT,
+    DEFAULT_MODEL,
+    FAST_PATH_ENABLED,
+    GAZETTEER_ENABLED,
+    PROMPT_VERSION,
+    require_openai_key,
+)
+from weather_agent.gazetteer import get_gazetteer
+from weather_agent.http_client import get_async_client, get_client
+from weather_agent.metrics import (
+    AGENT_IN_FLIGHT,
+    AGENT_SECONDS,
+    HISTORY_TRIMMED,
+    record_error,
+    record_tokens,
+    register_collector,
+)
+from weather_agent.outfit import format_outfit_answer
 from weather_agent.prompts import get_system_prompt
-from weather_agent.weather import get_weather
+from weather_agent.response_cache import bypass_response_cache, response_cache
+from weather_agent.router import OutfitQuery, match_outfit_question
+from weather_agent.tokens import (
+    encoder_name,
+    fit_history,
+    load_encoder,
+    message_tokens,
+    tools_tokens,
+)
+from weather_agent.tracing import span
+from weather_agent.weather import alookup_current, format_current, lookup_current
+
+logger = logging.getLogger(__name__)
 
 _agent = None
+_agent_lock = threading.Lock()
+# Касета для викликів моделі (use_cassette): тести й бенчмарки без OpenAI
+_cassette = None
+
+# Не більше AGENT_MAX_INFLIGHT одночасних викликів LLM з async-шляху, решта — у черзі
+_llm_slots = AdmissionController(AGENT_MAX_INFLIGHT, AGENT_QUEUE_SIZE, AGENT_QUEUE_TIMEOUT)
+
+# Токени системного промпта й схеми tool-ів за назвою токенізатора (див. _fixed_prompt_tokens)
+_fixed_tokens: dict[str, int] = {}
+
+# Лічильники fast path: hits — відповіли без LLM, fallthrough — передали агенту
+_fast_path_counts = {"hits": 0, "fallthrough": 0}
+
+
+def _chat_model():
+    """ChatOpenAI; з касетою (use_cassette) — обгорнута в CassetteChatModel."""
+    from weather_agent.llm_callbacks import LLMCallbackHandler
+
+    callbacks = [LLMCallbackHandler()]
+    cassette = _cassette
+    if cassette is not None and cassette.offline:
+        from weather_agent.cassette_model import CassetteChatModel
+
+        # Лише відтворення: ні мережі, ні OPENAI_API_KEY
+        return CassetteChatModel(cassette=cassette, callbacks=callbacks)
+
+    require_openai_key()
+    from langchain_openai import ChatOpenAI
+
+    # stream_usage: токени рахуються й для потокових відповідей (метрики вартості)
+    model = ChatOpenAI(
+        model=DEFAULT_MODEL,
+        temperature=0,
+        stream_usage=True,
+        callbacks=None if cassette is not None else callbacks,
+    )
+    if cassette is None:
+        return model
+    from weather_agent.cassette_model import CassetteChatModel
+
+    return CassetteChatModel(cassette=cassette, inner=model, callbacks=callbacks)
 
 
 def _get_agent():
-    """Лінива ініціалізація агента (потрібен OPENAI_API_KEY)."""
+    """Лінива ініціалізація агента (потрібен OPENAI_API_KEY, крім відтворення з касети)."""
     global _agent
-    if _agent is None:
-        require_openai_key()
-        model = ChatOpenAI(model=DEFAULT_MODEL, temperature=0)
-        _agent = create_agent(
-            model,
-            tools=[get_weather],
-            system_prompt=get_system_prompt(),
-        )
+    if _agent is not None:
+        return _agent
+    with _agent_lock:
+        if _agent is None:
+            from langchain.agents import create_agent
+
+            from weather_agent.cache_middleware import ResponseCacheMiddleware
+
+            _agent = create_agent(
+                _chat_model(),
+                tools=_agent_tools(),
+                system_prompt=get_system_prompt(),
+                middleware=[ResponseCacheMiddleware()],
+            )
     return _agent
 
 
-def ask_agent(user_text: str) -> str:
+async def _aget_agent():
     """
-    Відправляє запит користувача агенту й повертає текст відповіді.
-    При помилці повертає повідомлення про збій українською.
+    _get_agent для event loop: перша побудова (імпорт LangChain, очікування на
+    _agent_lock, поки агента будує prewarm) — у потоці, щоб не блокувати інші чати.
     """
-    if not user_text or not user_text.strip():
-        return "Напишіть, для якого міста потрібна порада (наприклад: Що одягнути в Києві?)."
+    if _agent is None:
+        return await asyncio.to_thread(_get_agent)
+    return _get_agent()
+
+
+def _agent_tools() -> list:
+    from weather_agent.weather import get_forecast, get_weather, get_weather_many
+
+    return [get_weather, get_weather_many, get_forecast]
+
+
+def _fixed_prompt_tokens() -> int:
+    """Токени системного промпта та схеми tool-ів — незмінна частина кожного виклику моделі."""
+    key = encoder_name()
+    if key not in _fixed_tokens:
+        from langchain_core.utils.function_calling import convert_to_openai_tool
+
+        tools = [convert_to_openai_tool(tool) for tool in _agent_tools()]
+        system = {"role": "system", "content": get_system_prompt()}
+        _fixed_tokens[key] = message_tokens(system) + tools_tokens(tools)
+    return _fixed_tokens[key]
+
+
+def use_cassette(cassette) -> None:
+    """
+    Виклики моделі через касету (cassette.Cassette) — запис або відтворення відповідей
+    OpenAI; None — звичайна модель. Агент перебудовується при наступному запиті.
+    """
+    global _agent, _cassette
+    with _agent_lock:
+        _cassette = cassette
+        _agent = None
 
+
+def _timed(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def _prewarm_blocking() -> dict[str, float]:
+    timings = {}
+
+    def import_langchain():
+        import langchain.agents  # noqa: F401
+        import langchain_openai  # noqa: F401
+
+    timings["imports"] = _timed(import_langchain)
+    timings["agent"] = _timed(_get_agent)
+    timings["http"] = _timed(get_client)
+    timings["tokenizer"] = _timed(load_encoder)
+    if GAZETTEER_ENABLED:
+        timings["gazetteer"] = _timed(get_gazetteer)
+    return timings
+
+
+async def prewarm() -> dict[str, float]:
+    """
+    Імпортує LangChain, будує агента, відкриває HTTP-пули, завантажує токенізатор і
+    газетир у фоновому потоці, щоб перший запит користувача не платив за це. Повертає
+    тривалість кожного кроку в секундах; помилки лише логуються.
+    """
     try:
-        agent = _get_agent()
-        result = agent.invoke({"messages": [{"role": "user", "content": user_text.strip()}]})
-        messages = result.get("messages") or []
-        if not messages:
-            return "Не вдалося отримати відповідь. Спробуйте ще раз."
-
-        last = messages[-1]
-        content = getattr(last, "content", None) or (
-            last.get("content") if isinstance(last, dict) else None
-        )
-        if isinstance(content, list):
-            # Деякі моделі повертають content як список частин
-            text_parts = [p.get("text", p) if isinstance(p, dict) else str(p) for p in content]
-            content = "".join(str(t) for t in text_parts)
-        if content:
-            return content.strip()
+        timings = await asyncio.to_thread(_prewarm_blocking)
+    except (SystemExit, ImportError, *agent_errors()) as e:
+        # Немає OPENAI_API_KEY, не завантажився токенізатор чи газетир тощо
+        logger.warning("Прогрів агента не вдався: %s", e)
+        return {}
+    get_async_client()
+    logger.info(
+        "Агент прогріто: %s",
+        ", ".join(f"{step} {seconds:.2f} с" for step, seconds in timings.items()),
+    )
+    return timings
+
+
+def _match(user_text: str) -> OutfitQuery | None:
+    """Простий запит про одне місто (для fast path) або None."""
+    if not FAST_PATH_ENABLED:
+        return None
+    gazetteer = get_gazetteer() if GAZETTEER_ENABLED else None
+    return match_outfit_question(user_text, gazetteer)
+
+
+def _fast_answer(
+    query: OutfitQuery | None, found: tuple[tuple[float, float, str], dict] | None
+) -> str | None:
+    """Відповідь fast path без LLM або None (тоді відповідає агент)."""
+    if not FAST_PATH_ENABLED:
+        return None
+    if query is None or found is None:
+        # Складний запит, місто не знайдено або погода недоступна — відповідає агент
+        _fast_path_counts["fallthrough"] += 1
+        return None
+    _fast_path_counts["hits"] += 1
+    _coords, current = found
+    return format_outfit_answer(
+        query.place, format_current(current), current, warm=PROMPT_VERSION != "1"
+    )
+
+
+def _route(user_text: str) -> str | None:
+    query = _match(user_text)
+    return _fast_answer(query, lookup_current(query.city) if query else None)
+
+
+async def _aroute(user_text: str) -> str | None:
+    query = _match(user_text)
+    return _fast_answer(query, await alookup_current(query.city) if query else None)
+
+
+def fast_path_stats() -> dict[str, float]:
+    """Скільки запитів оброблено без LLM і частка таких запитів."""
+    hits, fallthrough = _fast_path_counts["hits"], _fast_path_counts["fallthrough"]
+    total = hits + fallthrough
+    return {
+        "hits": hits,
+        "fallthrough": fallthrough,
+        "hit_rate": hits / total if total else 0.0,
+    }
+
+
+def response_cache_stats() -> dict[str, int]:
+    """Розмір кешу відповідей, влучання/промахи, витіснення та прострочення."""
+    return response_cache.stats()
+
+
+def admission_stats() -> dict[str, float]:
+    """Одночасні виклики LLM, глибина черги, відмови та час очікування (див. AdmissionController)."""
+    return _llm_slots.stats()
+
+
+def _collect_metrics():
+    """
+    Кеш відповідей, fast path і поточний стан admission control — для /metrics
+    (відмови й час у черзі admission.py пише сам).
+    """
+    cache = response_cache.stats()
+    yield (
+        "weather_agent_cache_hits_total",
+        "counter",
+        "Влучання в кеш",
+        [({"cache": "response"}, cache["hits"])],
+    )
+    yield (
+        "weather_agent_cache_misses_total",
+        "counter",
+        "Промахи кешу",
+        [({"cache": "response"}, cache["misses"])],
+    )
+    yield (
+        "weather_agent_fast_path_total",
+        "counter",
+        "Прості запити: відповідь без LLM (hit) або передані агенту (fallthrough)",
+        [({"result": result}, count) for result, count in _fast_path_counts.items()],
+    )
+    slots = _llm_slots.stats()
+    yield (
+        "weather_agent_llm_in_flight",
+        "gauge",
+        "Одночасні виклики LLM",
+        [({}, slots["inflight"])],
+    )
+    yield (
+        "weather_agent_llm_queue_depth",
+        "gauge",
+        "Запити в черзі до LLM",
+        [({}, slots["queue_depth"])],
+    )
+
+
+register_collector(_collect_metrics)
+
+
+EMPTY_INPUT_REPLY = "Напишіть, для якого міста потрібна порада (наприклад: Що одягнути в Києві?)."
+BUSY_REPLY = "Зараз забагато запитів. Спробуйте, будь ласка, за хвилину."
+
+
+def _user_messages(user_text: str, history: Sequence = ()) -> dict:
+    """
+    Вхід агента: історія розмови ({"role", "content"} або повідомлення LangChain; може
+    починатися з системного підсумку старішої розмови) і запит. Найстаріші
+    повідомлення історії відкидаються, щоб промпт разом із системним промптом і
+    схемою tool-ів уклався в MAX_CONTEXT_TOKENS.
+    """
+    user = {"role": "user", "content": user_text.strip()}
+    if not history:
+        return {"messages": [user]}
+    kept, dropped = fit_history(history, reserved=_fixed_prompt_tokens() + message_tokens(user))
+    if dropped:
+        HISTORY_TRIMMED.inc(dropped)
+    return {"messages": [*kept, user]}
+
+
+def agent_errors() -> tuple[type[Exception], ...]:
+    """
+    Збої, на які користувач отримує «Виникла помилка…»: мережа й таймаути, API моделі,
+    LangChain/LangGraph (зокрема ліміт кроків агента), промах касети. Помилки в коді
+    пролітають далі, до обробника бота. Кортеж будується в момент винятку, тож openai
+    не імпортується на старті.
+    """
+    import httpx
+    import openai
+    from langchain_core.exceptions import LangChainException
+
+    return (
+        OSError,
+        RuntimeError,
+        ValueError,
+        LookupError,
+        httpx.HTTPError,
+        openai.OpenAIError,
+        LangChainException,
+    )
+
+
+def _content_text(content) -> str:
+    """Текст з content повідомлення (рядок або список частин)."""
+    if isinstance(content, list):
+        # Деякі моделі повертають content як список частин
+        text_parts = [p.get("text", p) if isinstance(p, dict) else str(p) for p in content]
+        return "".join(str(t) for t in text_parts)
+    return content or ""
+
+
+def _reply_text(result: dict) -> str | None:
+    """Текст останнього повідомлення з результату агента або None."""
+    messages = result.get("messages") or []
+    if not messages:
+        return None
+
+    last = messages[-1]
+    content = getattr(last, "content", None) or (
+        last.get("content") if isinstance(last, dict) else None
+    )
+    content = _content_text(content)
+    return content.strip() if content and content.strip() else None
+
+
+@contextmanager
+def _observe(outcome: dict | None = None) -> Iterator[dict]:
+    """
+    Span ask_agent і тривалість відповіді агента в weather_agent_ask_agent_seconds;
+    маршрут (route) блок уточнює в словнику, що повертається: fast_path, cache, llm,
+    busy або error. answered — чи користувач отримав справжню відповідь (а не текст
+    помилки чи відмови). outcome — словник виклику, який треба заповнити.
+    """
+    outcome = {} if outcome is None else outcome
+    outcome.update(route="llm", answered=False)
+    started = time.perf_counter()
+    with AGENT_IN_FLIGHT.track(), span("ask_agent") as current:
+        try:
+            yield outcome
+        finally:
+            current.set(route=outcome["route"])
+            AGENT_SECONDS.observe(time.perf_counter() - started, route=outcome["route"])
+
+
+def _add_usage(total: dict[str, int], message) -> None:
+    usage = getattr(message, "usage_metadata", None)
+    # UsageMetadata — TypedDict; у повідомленнях без даних про токени його немає
+    if isinstance(usage, dict):
+        for kind in ("input_tokens", "output_tokens"):
+            total[kind] = total.get(kind, 0) + usage.get(kind, 0)
+
+
+def _record_usage(result: dict) -> None:
+    """Токени всіх викликів моделі за запит (usage_metadata повідомлень відповіді)."""
+    total: dict[str, int] = {}
+    for message in result.get("messages") or []:
+        _add_usage(total, message)
+    if total:
+        record_tokens(total)
+
+
+def _finish(result: dict, outcome: dict) -> str:
+    """Відповідь користувачу з результату агента."""
+    if not (result.get("messages") or []):
+        return "Не вдалося отримати відповідь. Спробуйте ще раз."
+    text = _reply_text(result)
+    if not text:
         return "Відповідь порожня. Спробуйте переформулювати запит."
-    except SystemExit:
-        raise
-    except Exception as e:
-        return f"Виникла помилка: {e!s}. Спробуйте пізніше."
+    outcome["answered"] = True
+    return text
+
+
+def ask_agent(user_text: str, history: Sequence = (), outcome: dict | None = None) -> str:
+    """
+    Відправляє запит користувача агенту й повертає текст відповіді. history —
+    попередні повідомлення розмови (обрізаються під MAX_CONTEXT_TOKENS).
+    При збої з agent_errors() (мережа, API моделі, LangChain) повертає повідомлення
+    про збій українською; інші винятки (помилки в коді) пролітають далі. У словник
+    outcome (якщо переданий) записуються маршрут (route) і чи це справжня відповідь
+    (answered).
+    """
+    if not user_text or not user_text.strip():
+        return EMPTY_INPUT_REPLY
+
+    with _observe(outcome) as state:
+        try:
+            reply = _route(user_text)
+            if reply is not None:
+                state.update(route="fast_path", answered=True)
+                return reply
+            agent = _get_agent()
+            result = agent.invoke(_user_messages(user_text, history))
+            _record_usage(result)
+            return _finish(result, state)
+        except agent_errors() as e:
+            state["route"] = "error"
+            record_error("agent", e)
+            return f"Виникла помилка: {e!s}. Спробуйте пізніше."
+
+
+async def run_agent_traced(user_text: str) -> tuple[str, list[str]]:
+    """
+    (відповідь агента, назви викликаних tool-ів по порядку) — для оцінювання якості.
+    Завжди йде в LLM (без fast path і кешу відповідей); помилки пролітають далі.
+    """
+    with bypass_response_cache():
+        agent = await _aget_agent()
+        result = await agent.ainvoke(_user_messages(user_text))
+    _record_usage(result)
+    tools = [
+        call["name"]
+        for message in result.get("messages") or []
+        for call in getattr(message, "tool_calls", None) or []
+    ]
+    return _reply_text(result) or "", tools
+
+
+async def ask_agent_async(
+    user_text: str, history: Sequence = (), outcome: dict | None = None
+) -> str:
+    """
+    Асинхронний ask_agent: agent.ainvoke та async get_weather, без потоку на розмову.
+    Поведінка та тексти помилок ті самі, що й у ask_agent; виклик LLM проходить
+    admission control, і якщо черга переповнена — одразу BUSY_REPLY.
+    """
+    if not user_text or not user_text.strip():
+        return EMPTY_INPUT_REPLY
+
+    with _observe(outcome) as state:
+        try:
+            reply = await _aroute(user_text)
+            if reply is not None:
+                state.update(route="fast_path", answered=True)
+                return reply
+            agent = await _aget_agent()
+            async with _llm_slots.slot():
+                result = await agent.ainvoke(_user_messages(user_text, history))
+            _record_usage(result)
+            return _finish(result, state)
+        except AdmissionRejected:
+            state["route"] = "busy"
+            return BUSY_REPLY
+        except agent_errors() as e:
+            state["route"] = "error"
+            record_error("agent", e)
+            return f"Виникла помилка: {e!s}. Спробуйте пізніше."
+
+
+async def stream_agent(
+    user_text: str, history: Sequence = (), outcome: dict | None = None
+) -> AsyncIterator[str]:
+    """
+    Потоковий ask_agent_async: віддає текст відповіді в міру генерації — щоразу весь
+    текст поточного повідомлення моделі, а не лише нову частину. Fast path, кеш
+    відповідей і тексти помилок ті самі, що й у ask_agent_async.
+    """
+    if not user_text or not user_text.strip():
+        yield EMPTY_INPUT_REPLY
+        return
+
+    with _observe(outcome) as state:
+        text = ""
+        usage: dict[str, int] = {}
+        try:
+            reply = await _aroute(user_text)
+            if reply is not None:
+                state.update(route="fast_path", answered=True)
+                yield reply
+                return
+            agent = await _aget_agent()
+            from langchain_core.messages import AIMessage, AIMessageChunk
+
+            message_id = None
+            async with _llm_slots.slot():
+                async for chunk, _metadata in agent.astream(
+                    _user_messages(user_text, history), stream_mode="messages"
+                ):
+                    # Результати tool та чанки з самими викликами tool користувачу не показуємо
+                    if not isinstance(chunk, AIMessage):
+                        continue
+                    _add_usage(usage, chunk)
+                    if chunk.id != message_id or not isinstance(chunk, AIMessageChunk):
+                        # Нове повідомлення моделі (після виклику tool) або ціле повідомлення
+                        # з кешу відповідей — відповідь пишеться заново
+                        message_id, text = chunk.id, ""
+                    piece = _content_text(chunk.content)
+                    if piece:
+                        text += piece
+                        yield text
+        except AdmissionRejected:
+            state["route"] = "busy"
+            yield BUSY_REPLY
+            return
+        except agent_errors() as e:
+            state["route"] = "error"
+            record_error("agent", e)
+            yield f"Виникла помилка: {e!s}. Спробуйте пізніше."
+            return
+
+        if usage:
+            record_tokens(usage)
+        text = text.strip()
+        if not text:
+            yield "Відповідь порожня. Спробуйте переформулювати запит."
+            return
+        state["answered"] = True
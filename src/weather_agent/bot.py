@@ -5,12 +5,42 @@ import logging
 
 from telegram import Update
 from telegram.constants import ChatAction
+from telegram.error import BadRequest, RetryAfter
 from telegram.ext import Application, CommandHandler, ContextTypes, MessageHandler, filters
+from telegram.request import BaseRequest
 
-from weather_agent.agent import ask_agent
+from weather_agent.agent import ask_agent_async, prewarm, stream_agent
+from weather_agent.chat_queue import ChatQueue
+from weather_agent.config import (
+    AGENT_PREWARM,
+    BOT_CONCURRENT_UPDATES,
+    CHAT_DEBOUNCE,
+    METRICS_HOST,
+    METRICS_PORT,
+    STREAM_EDIT_INTERVAL,
+    STREAMING_ENABLED,
+)
+from weather_agent.http_client import aclose_clients
+from weather_agent.memory import close_chat_memory, get_chat_memory, open_chat_memory
+from weather_agent.metrics import (
+    MESSAGE_SECONDS,
+    MESSAGES_IN_FLIGHT,
+    METRICS_PATH,
+    record_error,
+    register_collector,
+    start_metrics_server,
+)
+from weather_agent.tracing import setup_tracing, shutdown_tracing, span
+from weather_agent.weather import close_disk_cache, warm_caches
 
 logger = logging.getLogger(__name__)
 
+# Повідомлення одного чату обробляються по черзі, швидкі повідомлення поспіль зливаються
+_chats = ChatQueue(CHAT_DEBOUNCE)
+
+# Фонові задачі (прогрів агента): посилання, щоб задачу не зібрав GC
+_background: set[asyncio.Task] = set()
+
 WELCOME_TEXT = (
     "Привіт! Я допоможу підібрати одяг за погодою. "
     "Напиши місто або запитай, наприклад: Що одягнути в Києві?"
@@ -58,8 +88,73 @@ async def _typing_loop(
             continue
 
 
+def _retry_seconds(error: RetryAfter) -> float:
+    retry_after = error.retry_after
+    return retry_after.total_seconds() if hasattr(retry_after, "total_seconds") else retry_after
+
+
+async def _edit(message, text: str, final: bool = False) -> float | None:
+    """
+    Редагує надіслане повідомлення. Повертає, скільки секунд Telegram просить зачекати,
+    або None, якщо відредаговано. Фінальне редагування після RetryAfter повторюється один раз.
+    """
+    try:
+        await message.edit_text(text)
+    except RetryAfter as e:
+        if not final:
+            return _retry_seconds(e)
+        await asyncio.sleep(_retry_seconds(e))
+        await message.edit_text(text)
+    except BadRequest as e:
+        # Текст не змінився — не помилка
+        if "not modified" not in str(e).lower():
+            raise
+    return None
+
+
+async def _stream_reply(
+    message, user_text: str, done: asyncio.Event, history: list[dict[str, str]], outcome: dict
+) -> str:
+    """
+    Надсилає відповідь агента частинами: перше повідомлення — щойно з'явився текст,
+    далі edit_text не частіше ніж раз на STREAM_EDIT_INTERVAL секунд (ліміти Telegram
+    на редагування), останнє редагування — повний текст. Повертає надісланий текст.
+    """
+    loop = asyncio.get_running_loop()
+    sent = None
+    shown = text = ""
+    next_edit = 0.0
+    async for text in stream_agent(user_text, history, outcome):
+        text = text.strip()
+        if not text or text == shown:
+            continue
+        if sent is None:
+            sent = await message.reply_text(text)
+            # Користувач уже бачить відповідь — індикатор набору більше не потрібен
+            done.set()
+        elif loop.time() >= next_edit:
+            wait = await _edit(sent, text)
+            if wait is not None:
+                next_edit = loop.time() + wait
+                continue
+        else:
+            continue
+        shown = text
+        next_edit = loop.time() + STREAM_EDIT_INTERVAL
+
+    if sent is None:
+        text = text or "Відповідь порожня. Спробуйте переформулювати запит."
+        await message.reply_text(text)
+    elif text and text != shown:
+        await _edit(sent, text, final=True)
+    return text
+
+
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Обробляє текстове повідомлення: викликає агента й відправляє відповідь."""
+    """
+    Обробляє текстове повідомлення: ставить його в чергу чату (debounce і злиття
+    швидких повідомлень поспіль) і відповідає на об'єднаний запит.
+    """
     if not update.message or not update.message.text:
         return
 
@@ -68,17 +163,79 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     if not chat_id:
         return
 
+    # Кореневий span: кожне оновлення — окремий trace_id
+    with (
+        span("handle_message", update_id=update.update_id, chat_id=chat_id) as current,
+        MESSAGES_IN_FLIGHT.track(),
+        MESSAGE_SECONDS.time(),
+    ):
+        answered = await _chats.run(
+            chat_id, user_text, lambda text: _answer(update, context, chat_id, text)
+        )
+        # False — текст злито з новішим повідомленням, відповідь у його трасі
+        current.set(answered=answered)
+
+
+def chat_queue_stats() -> dict[str, int]:
+    """Оброблені запити, злиті й скасовані повідомлення, чати з чергою."""
+    return _chats.stats()
+
+
+def _collect_metrics():
+    """Злиті й скасовані повідомлення черги чатів — для /metrics."""
+    stats = chat_queue_stats()
+    yield (
+        "weather_agent_chat_messages_total",
+        "counter",
+        "Повідомлення черги чатів: processed, merged, cancelled",
+        [({"result": key}, stats[key]) for key in ("processed", "merged", "cancelled")],
+    )
+    yield (
+        "weather_agent_active_chats",
+        "gauge",
+        "Чати з непорожньою чергою",
+        [({}, stats["active_chats"])],
+    )
+
+
+register_collector(_collect_metrics)
+
+
+async def _remember(memory, chat_id: int, user_text: str, reply: str, outcome: dict) -> None:
+    if memory is not None and outcome.get("answered"):
+        await memory.aadd_turn(chat_id, user_text, reply)
+
+
+async def _answer(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, chat_id: int, user_text: str
+) -> None:
+    """
+    Викликає агента з історією чату й відправляє відповідь — потоком
+    (STREAMING_ENABLED) або одним повідомленням після генерації. У пам'ять розмови
+    додається лише справжня відповідь агента (outcome["answered"]), а не текст
+    помилки чи відмови admission control.
+    """
+    memory = get_chat_memory()
+    # Пам'ять читається й пишеться поза event loop: SQLite може чекати на блокування
+    history = await memory.ahistory(chat_id) if memory is not None else []
+    outcome: dict = {}
     done = asyncio.Event()
     typing_task = asyncio.create_task(_typing_loop(context.bot, chat_id, done))
     try:
         await context.bot.send_chat_action(chat_id=chat_id, action=ChatAction.TYPING)
-        reply = await asyncio.to_thread(ask_agent, user_text)
+        if STREAMING_ENABLED:
+            reply = await _stream_reply(update.message, user_text, done, history, outcome)
+            await _remember(memory, chat_id, user_text, reply, outcome)
+            return
+        reply = await ask_agent_async(user_text, history, outcome)
+        await _remember(memory, chat_id, user_text, reply, outcome)
     except SystemExit:
         done.set()
         typing_task.cancel()
         raise
     except Exception as e:
         logger.exception("Помилка при виклику агента: %s", e)
+        record_error("bot", e)
         reply = "Виникла помилка. Спробуйте пізніше."
     finally:
         done.set()
@@ -91,9 +248,60 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     await update.message.reply_text(reply)
 
 
-def build_application(token: str) -> Application:
-    """Збирає Application з обробниками команд та повідомлень."""
-    app = Application.builder().token(token).build()
+async def _post_init(application: Application) -> None:
+    """
+    Вмикає трасування (TRACING_ENABLED), прогріває кеші погоди з дискового кешу (якщо
+    задано DISK_CACHE_PATH), відкриває пам'ять розмов, запускає сервер метрик і
+    фоновий прогрів агента: /start і /help відповідають, не чекаючи на нього.
+    """
+    setup_tracing()
+    await asyncio.to_thread(warm_caches)
+    await asyncio.to_thread(open_chat_memory)
+    port = application.bot_data.get("metrics_port", 0)
+    if port:
+        application.bot_data["metrics_runner"] = await start_metrics_server(METRICS_HOST, port)
+        logger.info("Метрики: http://%s:%d%s", METRICS_HOST, port, METRICS_PATH)
+    if AGENT_PREWARM:
+        # post_init виконується до Application.start, тож задачу тримаємо самі
+        task = asyncio.create_task(prewarm(), name="agent-prewarm")
+        _background.add(task)
+        task.add_done_callback(_background.discard)
+
+
+async def _post_shutdown(application: Application) -> None:
+    """
+    Зупиняє сервер метрик, закриває спільні HTTP-пули, дописує дисковий кеш, пам'ять
+    розмов і експортер трасування при зупинці Application.
+    """
+    runner = application.bot_data.pop("metrics_runner", None)
+    if runner is not None:
+        await runner.cleanup()
+    await aclose_clients()
+    await asyncio.to_thread(close_disk_cache)
+    await asyncio.to_thread(close_chat_memory)
+    shutdown_tracing()
+
+
+def build_application(
+    token: str, metrics_port: int | None = None, request: BaseRequest | None = None
+) -> Application:
+    """
+    Збирає Application з обробниками команд та повідомлень. metrics_port — порт
+    GET /metrics цього процесу (None — METRICS_PORT, 0 — без сервера метрик);
+    request — власний транспорт Bot API (бенчмарки підставляють фейковий Telegram).
+    """
+    # Оновлення обробляються паралельно; навантаження на LLM обмежує admission control агента
+    builder = (
+        Application.builder()
+        .token(token)
+        .concurrent_updates(BOT_CONCURRENT_UPDATES)
+        .post_init(_post_init)
+        .post_shutdown(_post_shutdown)
+    )
+    if request is not None:
+        builder = builder.request(request)
+    app = builder.build()
+    app.bot_data["metrics_port"] = METRICS_PORT if metrics_port is None else metrics_port
     app.add_handler(CommandHandler("start", start))
     app.add_handler(CommandHandler("help", help_command))
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
@@ -0,0 +1,80 @@
+"""Обмежені in-memory кеші (LRU + TTL) з лічильниками влучань і промахів."""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+
+class TTLCache:
+    """
+    Потокобезпечний LRU-кеш з часом життя записів.
+    При переповненні витісняється найдавніше використаний запис; maxsize=0 вимикає кеш.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.maxsize = max(0, maxsize)
+        self.ttl = ttl
+        self._clock = clock
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Повертає значення або default, якщо запису немає чи він прострочений."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            expires_at, value = item
+            if expires_at <= self._clock():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        """Зберігає значення на ttl секунд (за замовчуванням — ttl кешу)."""
+        if self.maxsize == 0:
+            return
+        expires_at = self._clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Очищає записи та лічильники."""
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict[str, int]:
+        """Знімок лічильників: розмір, влучання, промахи, витіснення, прострочення."""
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
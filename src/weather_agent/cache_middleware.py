@@ -0,0 +1,173 @@
+"""
+Middleware агента з кешем відповідей (response_cache.py).
+
+Кеш перевіряється перед викликом моделі, що пише відповідь за результатами tool-ів.
+Ключ будується з артефактів tool-ів (місце й кошик погоди), тож відповіді на
+однакову погоду в тому самому місці спільні для різних формулювань і чатів. Запит
+з історією розмови (попередні обміни, підсумок) теж іде через кеш, якщо він
+самодостатній: сам називає місто, про яке питали tool-и, і не відсилає до сказаного
+раніше («а завтра?», «там теж?»). Інакше відповідь залежить від контексту, і модель
+викликається завжди. Відповіді, побудовані на помилці tool-а (місто не знайдено,
+погода недоступна), не кешуються. Імпортується лише з agent._get_agent і тестів
+(разом з LangChain).
+"""
+
+import re
+from collections.abc import Awaitable, Callable, Hashable
+from itertools import pairwise
+
+from langchain.agents.middleware import AgentMiddleware, ModelRequest, ModelResponse
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+
+from weather_agent.cities import normalize_city
+from weather_agent.response_cache import response_cache, response_key
+
+_WORD = re.compile(r"[\w'’ʼ-]+")
+# Початок уточнення до попередньої відповіді: «а завтра?», «і ввечері?»
+_FOLLOW_UP_START = frozenset({"а", "і", "й", "та", "ну", "тоді", "так"})
+# Слова, що відсилають до сказаного раніше: «там теж холодно?», «а що з цим містом?»
+_FOLLOW_UP_WORDS = frozenset(
+    {
+        "теж",
+        "також",
+        "там",
+        "туди",
+        "тоді",
+        "знову",
+        "ще",
+        "він",
+        "вона",
+        "воно",
+        "вони",
+        "його",
+        "її",
+        "їх",
+        "цей",
+        "ця",
+        "це",
+        "ці",
+        "цьому",
+        "цим",
+        "той",
+        "те",
+        "ті",
+        "тому",
+        "такий",
+        "така",
+        "таке",
+    }
+)
+
+
+def _tool_metas(message: ToolMessage) -> list[dict] | None:
+    """
+    Метадані результатів tool-а (для get_weather_many — по місту) або None, якщо
+    tool повернув помилку: тоді артефакт порожній (див. weather._weather_result).
+    """
+    artifact = message.artifact
+    if message.status == "error" or not isinstance(artifact, dict) or not artifact:
+        return None
+    metas = list(artifact["cities"].values()) if "cities" in artifact else [artifact]
+    if not all(isinstance(meta, dict) and "bucket" in meta for meta in metas):
+        return None
+    return metas
+
+
+def _text(message: BaseMessage) -> str:
+    return message.content if isinstance(message.content, str) else ""
+
+
+def _call_cities(calls: list[dict]) -> list[str]:
+    cities = []
+    for call in calls:
+        args = call.get("args") or {}
+        if isinstance(args.get("city"), str):
+            cities.append(args["city"])
+        cities.extend(str(city) for city in args.get("cities") or ())
+    return cities
+
+
+def _self_contained(text: str, cities: list[str]) -> bool:
+    """
+    Чи запит зрозумілий без історії: називає кожне місто з викликів tool (у будь-якому
+    відомому відмінку) і не має слів, що відсилають до попередньої розмови.
+    """
+    words = _WORD.findall(text)
+    folded = [word.casefold() for word in words]
+    if not folded or folded[0] in _FOLLOW_UP_START or _FOLLOW_UP_WORDS.intersection(folded):
+        return False
+    mentioned = {normalize_city(word) for word in words}
+    mentioned.update(normalize_city(f"{a} {b}") for a, b in pairwise(words))
+    return bool(cities) and all(normalize_city(city) in mentioned for city in cities)
+
+
+def _request_key(messages: list[BaseMessage]) -> Hashable | None:
+    """
+    Ключ кешу для виклику моделі після tool-ів або None (несамодостатній запит з
+    історією, помилка tool-а).
+    """
+    if not messages or messages[-1].type != "tool":
+        return None
+    last = max((i for i, m in enumerate(messages) if m.type == "human"), default=None)
+    if last is None:
+        return None
+    # Виклики tool і їхні результати після останнього запиту користувача
+    turn = messages[last + 1 :]
+    entries = []
+    for message in turn:
+        if not isinstance(message, ToolMessage):
+            continue
+        metas = _tool_metas(message)
+        if metas is None:
+            return None
+        entries.extend((message.name, meta.get("period"), meta["bucket"]) for meta in metas)
+    if last > 0:
+        calls = [call for m in turn if isinstance(m, AIMessage) for call in m.tool_calls]
+        if not _self_contained(_text(messages[last]), _call_cities(calls)):
+            return None
+    return response_key(entries)
+
+
+def _answer(response: ModelResponse | AIMessage) -> str | None:
+    """Текст фінальної відповіді моделі (без нових викликів tool) або None."""
+    messages = response.result if isinstance(response, ModelResponse) else [response]
+    last = messages[-1] if messages else None
+    if not isinstance(last, AIMessage) or last.tool_calls or not isinstance(last.content, str):
+        return None
+    return last.content.strip() or None
+
+
+class ResponseCacheMiddleware(AgentMiddleware):
+    """Відповідь з кешу замість виклику моделі; успішні відповіді моделі — у кеш."""
+
+    def wrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], ModelResponse],
+    ) -> ModelResponse | AIMessage:
+        key = _request_key(request.messages)
+        cached = response_cache.get(key) if key is not None else None
+        if cached is not None:
+            return ModelResponse(result=[AIMessage(content=cached)])
+        response = handler(request)
+        self._store(key, response)
+        return response
+
+    async def awrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], Awaitable[ModelResponse]],
+    ) -> ModelResponse | AIMessage:
+        key = _request_key(request.messages)
+        cached = response_cache.get(key) if key is not None else None
+        if cached is not None:
+            return ModelResponse(result=[AIMessage(content=cached)])
+        response = await handler(request)
+        self._store(key, response)
+        return response
+
+    @staticmethod
+    def _store(key: Hashable | None, response: ModelResponse | AIMessage) -> None:
+        text = _answer(response) if key is not None else None
+        if text:
+            response_cache.set(key, text)
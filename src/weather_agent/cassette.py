@@ -0,0 +1,256 @@
+"""
+Запис і відтворення обмінів з Open-Meteo та OpenAI (касети) для тестів і бенчмарків.
+
+Касета — JSON-файл з відповідями, згрупованими за ключем запиту. Один раз запити йдуть
+у справжню мережу й записуються, далі відтворюються офлайн за мілісекунди:
+
+    cassette = Cassette("tests/cassettes/kyiv.json", mode="once")
+    use_transport(CassetteTransport(cassette))   # HTTP погодного клієнта
+    agent.use_cassette(cassette)                 # виклики моделі (cassette_model.py)
+    ...
+    cassette.save()
+
+Режими: replay — лише з файлу (невідомий запит — CassetteMiss), once — відомі
+запити з файлу, нові йдуть у мережу й дописуються, record — усі запити йдуть у
+мережу, записи для них оновлюються.
+
+HTTP-запити збігаються за методом, хостом, шляхом і нормалізованими параметрами
+(порядок, регістр, пробіли, запис чисел не важать). Однакові запити відтворюються по
+черзі; коли записи закінчилися, повторюється останній.
+"""
+
+import hashlib
+import json
+import re
+import threading
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qsl, urlsplit
+
+import httpx
+
+MODES = ("replay", "once", "record")
+FORMAT_VERSION = 1
+
+
+class CassetteMiss(LookupError):
+    """У касеті в режимі replay немає запису для запиту."""
+
+
+def _normalize_value(value: str) -> str:
+    items = []
+    # Списки через кому (координати батч-прогнозу) нормалізуються поелементно
+    for item in value.split(","):
+        item = " ".join(item.split()).casefold()
+        try:
+            number = float(item)
+        except ValueError:
+            items.append(item)
+            continue
+        items.append(f"{round(number, 4):g}")
+    return ",".join(items)
+
+
+def http_key(method: str, url: str | httpx.URL) -> str:
+    """Ключ HTTP-запиту: «GET host/path?a=1&b=x» з відсортованими нормалізованими параметрами."""
+    parts = urlsplit(str(url))
+    params = sorted(
+        (name, _normalize_value(value))
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+    )
+    query = "&".join(f"{name}={value}" for name, value in params)
+    return f"{method.upper()} {parts.netloc}{parts.path}?{query}"
+
+
+def digest(payload: Any) -> str:
+    """Короткий стабільний хеш JSON-сумісних даних (ключ запиту до моделі)."""
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()[:20]
+
+
+class Cassette:
+    """Записи відповідей за типом («http», «llm») і ключем запиту; безпечна для потоків."""
+
+    def __init__(self, path: str | Path, mode: str = "once") -> None:
+        if mode not in MODES:
+            raise ValueError(f"Невідомий режим касети {mode!r}; можливі: {', '.join(MODES)}")
+        self.path = Path(path)
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict[str, list[dict]]] = {"http": {}, "llm": {}}
+        self._cursors: dict[tuple[str, str], int] = {}
+        # Ключі, перезаписані в режимі record (старі записи для них відкидаються)
+        self._refreshed: set[tuple[str, str]] = set()
+        self.dirty = False
+        self.stats = {"hits": 0, "recorded": 0}
+        if self.path.exists():
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            for kind in self._entries:
+                self._entries[kind] = data.get(kind, {})
+
+    @property
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    @property
+    def offline(self) -> bool:
+        """True, якщо касета ніколи не звертається до мережі."""
+        return self.mode == "replay"
+
+    def lookup(self, kind: str, key: str) -> dict | None:
+        """Наступний запис для ключа або None (тоді в once/record слід сходити в мережу)."""
+        with self._lock:
+            if self.mode == "record":
+                return None
+            entries = self._entries[kind].get(key)
+            if not entries:
+                if self.mode == "replay":
+                    raise CassetteMiss(f"Касета {self.path.name}: немає запису {kind} «{key}»")
+                return None
+            index = self._cursors.get((kind, key), 0)
+            self._cursors[kind, key] = index + 1
+            self.stats["hits"] += 1
+            return entries[min(index, len(entries) - 1)]
+
+    def record(self, kind: str, key: str, entry: dict) -> None:
+        with self._lock:
+            if self.mode == "record" and (kind, key) not in self._refreshed:
+                self._refreshed.add((kind, key))
+                self._entries[kind][key] = []
+            self._entries[kind].setdefault(key, []).append(entry)
+            self.stats["recorded"] += 1
+            self.dirty = True
+
+    def keys(self, kind: str) -> list[str]:
+        with self._lock:
+            return list(self._entries[kind])
+
+    def save(self) -> None:
+        """
+        Записує файл, якщо з'явилися нові записи. Після запису (once/record) файл
+        з'являється й порожнім: запит без звернень до мережі теж «записано».
+        """
+        with self._lock:
+            if not self.dirty and (self.offline or self.path.exists()):
+                return
+            data = {"version": FORMAT_VERSION, **self._entries}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(
+                json.dumps(data, ensure_ascii=False, indent=1, sort_keys=True) + "\n",
+                encoding="utf-8",
+            )
+            self.dirty = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.save()
+
+
+def _entry(response: httpx.Response) -> dict:
+    content_type = response.headers.get("content-type", "")
+    entry: dict[str, Any] = {"status": response.status_code}
+    # JSON зберігається розібраним — файл компактніший і читається в diff
+    if "json" in content_type:
+        try:
+            entry["json"] = response.json()
+            return entry
+        except ValueError:
+            pass
+    entry["text"] = response.text
+    entry["content_type"] = content_type
+    return entry
+
+
+def _response(entry: dict) -> httpx.Response:
+    if "json" in entry:
+        return httpx.Response(entry["status"], json=entry["json"])
+    return httpx.Response(
+        entry["status"],
+        text=entry.get("text", ""),
+        headers={"Content-Type": entry.get("content_type") or "text/plain"},
+    )
+
+
+class CassetteTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """
+    Транспорт httpx для sync і async клієнта: відповіді з касети, а решта запитів —
+    через inner-транспорт (за замовчуванням справжня мережа) із записом у касету.
+    """
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        inner: httpx.BaseTransport | None = None,
+        async_inner: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self.cassette = cassette
+        self._inner = inner
+        self._async_inner = async_inner
+        # Мережеві транспорти створюються лише для запису й закриваються разом з клієнтом
+        self._network: httpx.HTTPTransport | None = None
+        self._async_network: httpx.AsyncHTTPTransport | None = None
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        key = http_key(request.method, request.url)
+        entry = self.cassette.lookup("http", key)
+        if entry is not None:
+            return _response(entry)
+        inner = self._inner
+        if inner is None:
+            if self._network is None:
+                self._network = httpx.HTTPTransport()
+            inner = self._network
+        response = inner.handle_request(request)
+        try:
+            response.read()
+            entry = _entry(response)
+        finally:
+            response.close()
+        self.cassette.record("http", key, entry)
+        return _response(entry)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = http_key(request.method, request.url)
+        entry = self.cassette.lookup("http", key)
+        if entry is not None:
+            return _response(entry)
+        inner = self._async_inner
+        if inner is None:
+            if self._async_network is None:
+                self._async_network = httpx.AsyncHTTPTransport()
+            inner = self._async_network
+        response = await inner.handle_async_request(request)
+        try:
+            await response.aread()
+            entry = _entry(response)
+        finally:
+            await response.aclose()
+        self.cassette.record("http", key, entry)
+        return _response(entry)
+
+    def close(self) -> None:
+        network, self._network = self._network, None
+        if network is not None:
+            network.close()
+
+    async def aclose(self) -> None:
+        network, self._async_network = self._async_network, None
+        if network is not None:
+            await network.aclose()
+
+
+_PARAM = re.compile(r"(?:^|&)name=([^&]*)")
+
+
+def recorded_cities(cassette: Cassette) -> list[str]:
+    """Назви міст із записаних запитів геокодування (для навантажувального тесту)."""
+    cities = []
+    for key in cassette.keys("http"):
+        if "/v1/search?" not in key:
+            continue
+        match = _PARAM.search(key.split("?", 1)[1])
+        if match:
+            cities.append(match.group(1))
+    return cities
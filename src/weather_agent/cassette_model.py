@@ -0,0 +1,152 @@
+"""
+Чат-модель з касетою (cassette.py): відповіді моделі записуються один раз і далі
+відтворюються без мережі й OPENAI_API_KEY.
+
+Ключ запиту — хеш розмови (типи й тексти повідомлень, виклики tool з аргументами) та
+назв tool-ів. Ідентифікатори викликів tool у ключ не входять: у кожному прогоні вони
+нові. Імпортується лише з agent._get_agent і тестів (разом з LangChain).
+"""
+
+import json
+from typing import Any
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import ConfigDict
+
+from weather_agent.cassette import Cassette, CassetteMiss, digest
+
+
+def _text(content: Any) -> str:
+    if isinstance(content, str):
+        return content.strip()
+    parts = [p.get("text", "") if isinstance(p, dict) else str(p) for p in content or []]
+    return "".join(parts).strip()
+
+
+def _tool_names(tools: list[dict] | None) -> list[str]:
+    return sorted((tool.get("function") or tool).get("name", "") for tool in tools or [])
+
+
+def request_key(messages: list[BaseMessage], tools: list[dict] | None = None) -> str:
+    """Ключ запиту до моделі в касеті."""
+    conversation = []
+    for message in messages:
+        item: dict[str, Any] = {"type": message.type, "content": _text(message.content)}
+        tool_calls = getattr(message, "tool_calls", None)
+        if tool_calls:
+            item["tool_calls"] = [[call["name"], call["args"]] for call in tool_calls]
+        conversation.append(item)
+    return digest({"messages": conversation, "tools": _tool_names(tools)})
+
+
+def _entry(message: BaseMessage, messages: list[BaseMessage]) -> dict:
+    usage = getattr(message, "usage_metadata", None)
+    return {
+        # Лише для людини, що читає касету: на що це відповідь
+        "request": _text(messages[-1].content)[:120] if messages else "",
+        "content": _text(message.content),
+        "tool_calls": [
+            {"name": call["name"], "args": call["args"]}
+            for call in getattr(message, "tool_calls", None) or []
+        ],
+        "usage": dict(usage) if isinstance(usage, dict) else None,
+        "model": (message.response_metadata or {}).get("model_name"),
+    }
+
+
+def _tool_calls(entry: dict, key: str) -> list[dict]:
+    return [
+        {
+            "name": call["name"],
+            "args": call["args"],
+            "id": f"call_{key[:12]}_{i}",
+            "type": "tool_call",
+        }
+        for i, call in enumerate(entry["tool_calls"])
+    ]
+
+
+class CassetteChatModel(BaseChatModel):
+    """
+    Відповіді з касети; чого в касеті немає — у inner-модель (якщо задана) із записом.
+    Без inner (режим replay) мережа й ключ API не потрібні.
+    """
+
+    cassette: Cassette
+    inner: BaseChatModel | None = None
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    @property
+    def _llm_type(self) -> str:
+        return "cassette"
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return {"cassette": str(self.cassette.path)}
+
+    def bind_tools(self, tools, *, tool_choice=None, **kwargs):
+        if self.inner is not None:
+            # Той самий формат tool-ів, що чекає справжня модель (для запису)
+            bound = self.inner.bind_tools(tools, tool_choice=tool_choice, **kwargs)
+            if isinstance(getattr(bound, "kwargs", None), dict):
+                return self.bind(**bound.kwargs)
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def _lookup(self, messages: list[BaseMessage], kwargs: dict) -> tuple[str, dict | None]:
+        key = request_key(messages, kwargs.get("tools"))
+        entry = self.cassette.lookup("llm", key)
+        if entry is None and self.inner is None:
+            raise CassetteMiss(f"Касета {self.cassette.path.name}: немає відповіді моделі {key}")
+        return key, entry
+
+    def _message(self, entry: dict, key: str) -> AIMessage:
+        return AIMessage(
+            entry["content"],
+            tool_calls=_tool_calls(entry, key),
+            usage_metadata=entry.get("usage"),
+            response_metadata={"model_name": entry.get("model")},
+        )
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        key, entry = self._lookup(messages, kwargs)
+        if entry is None:
+            result = self.inner._generate(messages, stop=stop, **kwargs)
+            entry = _entry(result.generations[0].message, messages)
+            self.cassette.record("llm", key, entry)
+        return ChatResult(generations=[ChatGeneration(message=self._message(entry, key))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        key, entry = self._lookup(messages, kwargs)
+        if entry is None:
+            result = await self.inner._agenerate(messages, stop=stop, **kwargs)
+            entry = _entry(result.generations[0].message, messages)
+            self.cassette.record("llm", key, entry)
+        return ChatResult(generations=[ChatGeneration(message=self._message(entry, key))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        # Відповідь одним чанком: потік (STREAMING_ENABLED) працює так само, як зі справжньою моделлю
+        result = await self._agenerate(messages, stop=stop, **kwargs)
+        message = result.generations[0].message
+        chunk = AIMessageChunk(
+            content=message.content,
+            tool_call_chunks=[
+                {
+                    "name": call["name"],
+                    "args": json.dumps(call["args"], ensure_ascii=False),
+                    "id": call["id"],
+                    "index": i,
+                }
+                for i, call in enumerate(message.tool_calls)
+            ],
+            usage_metadata=message.usage_metadata,
+            response_metadata=message.response_metadata,
+        )
+        if run_manager and message.content:
+            await run_manager.on_llm_new_token(
+                message.content, chunk=ChatGenerationChunk(message=chunk)
+            )
+        yield ChatGenerationChunk(message=chunk)
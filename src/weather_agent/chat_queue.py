@@ -0,0 +1,83 @@
+"""
+Впорядкована обробка повідомлень одного чату з debounce.
+
+Повідомлення чату, в якому нічого не обробляється й не чекає, йде до агента одразу.
+Коли користувач шле кілька повідомлень поспіль («Київ», «а завтра?», «а Львів?»),
+ті, що прийшли, поки попередній запит чату ще чекає чи виконується, вичікують вікно
+debounce і зливаються в один запит. Запити одного чату виконуються строго по черзі.
+Якщо поки запит чекав на свою чергу прийшло новіше повідомлення, старий запит
+скасовується ще до LLM, а його текст переходить у новий.
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+
+
+class _ChatState:
+    __slots__ = ("lock", "pending", "seq")
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.pending: list[str] = []
+        self.seq = 0
+
+
+class ChatQueue:
+    """Послідовна обробка по chat_id: debounce, злиття та скасування застарілих запитів."""
+
+    def __init__(self, debounce: float) -> None:
+        self.debounce = debounce
+        self._chats: dict[Hashable, _ChatState] = {}
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self._processed = 0
+        self._merged = 0
+        self._cancelled = 0
+
+    async def run(
+        self, chat_id: Hashable, text: str, handler: Callable[[str], Awaitable[None]]
+    ) -> bool:
+        """
+        Ставить повідомлення в чергу чату й викликає handler(об'єднаний текст), якщо
+        це повідомлення останнє на момент обробки. False — текст передано новішому запиту.
+        """
+        state = self._chats.get(chat_id)
+        if state is None:
+            state = self._chats[chat_id] = _ChatState()
+        # Одиноке повідомлення не чекає: debounce лише коли в чаті вже є запит
+        busy = bool(state.pending) or state.lock.locked()
+        state.pending.append(text)
+        state.seq += 1
+        seq = state.seq
+
+        if busy:
+            await asyncio.sleep(self.debounce)
+        if state.seq != seq:
+            # У межах вікна прийшло новіше повідомлення — воно забере і цей текст
+            self._merged += 1
+            return False
+
+        async with state.lock:
+            if state.seq != seq:
+                # Поки чекали на попередній запит чату, з'явилося новіше повідомлення
+                self._cancelled += 1
+                return False
+            texts, state.pending = state.pending, []
+            self._processed += 1
+            try:
+                await handler("\n".join(texts))
+            finally:
+                if state.seq == seq and self._chats.get(chat_id) is state:
+                    # Нових повідомлень немає — стан чату більше не потрібен
+                    del self._chats[chat_id]
+        return True
+
+    def stats(self) -> dict[str, int]:
+        """processed — запитів до обробника, merged/cancelled — повідомлень, що злилися в новіші."""
+        return {
+            "processed": self._processed,
+            "merged": self._merged,
+            "cancelled": self._cancelled,
+            "active_chats": len(self._chats),
+        }
@@ -0,0 +1,69 @@
+"""Нормалізація назв міст для ключів кешу та пошуку."""
+
+import re
+import unicodedata
+
+# Апострофи, які користувачі пишуть замість українського «'»
+_APOSTROPHES = str.maketrans({"’": "'", "ʼ": "'", "`": "'", "‘": "'", "´": "'"})
+_PUNCTUATION = re.compile(r"[«»\"“”„?!.,;:()]+")
+_SPACES = re.compile(r"\s+")
+_PREFIXES = ("місто ", "м. ", "м ", "в ", "у ", "in ")
+
+# Місцевий відмінок найчастіших міст (закінчення не виводяться простим правилом)
+_LOCATIVE_UA = {
+    "києві": "київ",
+    "львові": "львів",
+    "харкові": "харків",
+    "одесі": "одеса",
+    "дніпрі": "дніпро",
+    "запоріжжі": "запоріжжя",
+    "вінниці": "вінниця",
+    "полтаві": "полтава",
+    "ужгороді": "ужгород",
+    "луцьку": "луцьк",
+    "рівному": "рівне",
+    "житомирі": "житомир",
+    "чернігові": "чернігів",
+    "черкасах": "черкаси",
+    "сумах": "суми",
+    "херсоні": "херсон",
+    "миколаєві": "миколаїв",
+    "кропивницькому": "кропивницький",
+    "тернополі": "тернопіль",
+    "хмельницькому": "хмельницький",
+    "чернівцях": "чернівці",
+    "івано-франківську": "івано-франківськ",
+    "маріуполі": "маріуполь",
+    "донецьку": "донецьк",
+    "луганську": "луганськ",
+    "сімферополі": "сімферополь",
+}
+
+
+def _strip_locative(name: str) -> str:
+    """Зводить місцевий відмінок до називного: «києві» → «київ», «броварах» лишається."""
+    if name in _LOCATIVE_UA:
+        return _LOCATIVE_UA[name]
+    head, sep, last = name.rpartition(" ")
+    if last in _LOCATIVE_UA:
+        return head + sep + _LOCATIVE_UA[last]
+    # Чергування о/е → і у чоловічому роді: Харкові → Харків, Миколаєві → Миколаїв
+    if len(last) > 5 and last.endswith("єві"):
+        return head + sep + last[:-3] + "їв"
+    if len(last) > 5 and last.endswith("ові"):
+        return head + sep + last[:-3] + "ів"
+    return name
+
+
+def normalize_city(name: str) -> str:
+    """
+    Ключ для назви міста: NFC, уніфіковані апострофи, casefold, без пунктуації та
+    зайвих пробілів, без прийменника «в/у», у називному відмінку (для відомих форм).
+    """
+    text = unicodedata.normalize("NFC", name).translate(_APOSTROPHES).casefold()
+    text = _SPACES.sub(" ", _PUNCTUATION.sub(" ", text)).strip()
+    for prefix in _PREFIXES:
+        if text.startswith(prefix) and len(text) > len(prefix):
+            text = text[len(prefix) :]
+            break
+    return _strip_locative(text)
@@ -6,11 +6,167 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def _env_int(name: str, default: int) -> int:
+    """Читає цілочисельну змінну середовища; некоректне значення — SystemExit."""
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise SystemExit(f"{name} має бути цілим числом, отримано: {value!r}.") from None
+
+
+def _env_float(name: str, default: float) -> float:
+    """Читає дробову змінну середовища; некоректне значення — SystemExit."""
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise SystemExit(f"{name} має бути числом, отримано: {value!r}.") from None
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Читає булеву змінну середовища (1/true/yes/on — увімкнено)."""
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_choice(name: str, default: str, choices: tuple[str, ...]) -> str:
+    """Читає змінну з переліку дозволених значень; інше значення — SystemExit."""
+    value = (os.getenv(name) or default).strip().lower()
+    if value not in choices:
+        raise SystemExit(f"{name} має бути одним з {', '.join(choices)}, отримано: {value!r}.")
+    return value
+
+
+def _env_host_timeouts(name: str, default: str) -> dict[str, float]:
+    """Розбирає список виду «host=секунди,host2=секунди» у словник таймаутів."""
+    raw = os.getenv(name, default)
+    timeouts: dict[str, float] = {}
+    for item in raw.split(","):
+        if not item.strip():
+            continue
+        host, sep, seconds = item.partition("=")
+        try:
+            if not sep:
+                raise ValueError
+            timeouts[host.strip().lower()] = float(seconds)
+        except ValueError:
+            raise SystemExit(f"{name}: некоректний елемент {item.strip()!r}.") from None
+    return timeouts
+
+
 TELEGRAM_BOT_TOKEN: str | None = os.getenv("TELEGRAM_BOT_TOKEN")
 OPENAI_API_KEY: str | None = os.getenv("OPENAI_API_KEY")
 DEFAULT_MODEL: str = os.getenv("DEFAULT_MODEL", "gpt-4o-mini")
 PROMPT_VERSION: str = os.getenv("PROMPT_VERSION", "2")
 
+# Як бот отримує оновлення: long polling або webhook (aiohttp-сервер)
+BOT_MODE: str = _env_choice("BOT_MODE", "polling", ("polling", "webhook"))
+WEBHOOK_HOST: str = os.getenv("WEBHOOK_HOST", "0.0.0.0")  # nosec B104 — сервер у контейнері
+WEBHOOK_PORT: int = _env_int("WEBHOOK_PORT", 8080)
+WEBHOOK_PATH: str = os.getenv("WEBHOOK_PATH", "/telegram")
+# Публічна адреса для setWebhook (разом зі шляхом); порожньо — webhook уже зареєстровано
+WEBHOOK_URL: str | None = os.getenv("WEBHOOK_URL") or None
+WEBHOOK_SECRET: str | None = os.getenv("WEBHOOK_SECRET") or None
+WEBHOOK_WORKERS: int = _env_int("WEBHOOK_WORKERS", 64)
+WEBHOOK_QUEUE_SIZE: int = _env_int("WEBHOOK_QUEUE_SIZE", 1000)
+
+# Відповідь без LLM для простих запитів «що вдягнути в <місті>»
+FAST_PATH_ENABLED: bool = _env_bool("FAST_PATH_ENABLED", True)
+
+# Кеш відповідей агента за (місце, кошик погоди, версія промпта, модель)
+RESPONSE_CACHE_ENABLED: bool = _env_bool("RESPONSE_CACHE_ENABLED", True)
+RESPONSE_CACHE_SIZE: int = _env_int("RESPONSE_CACHE_SIZE", 2048)
+RESPONSE_CACHE_TTL: float = _env_float("RESPONSE_CACHE_TTL", 900.0)
+
+# Потокова відповідь у Telegram: перше повідомлення одразу, далі редагування не частіше
+# ніж раз на STREAM_EDIT_INTERVAL секунд (0 у STREAMING_ENABLED — одна відповідь наприкінці)
+STREAMING_ENABLED: bool = _env_bool("STREAMING_ENABLED", True)
+STREAM_EDIT_INTERVAL: float = _env_float("STREAM_EDIT_INTERVAL", 1.0)
+
+# Формат результату tool-ів для моделі: text — речення українською, compact — короткий JSON
+TOOL_OUTPUT_FORMAT: str = _env_choice("TOOL_OUTPUT_FORMAT", "text", ("text", "compact"))
+# Бюджет промпта (токени) при додаванні історії розмови: старіші повідомлення відкидаються; 0 — без меж
+MAX_CONTEXT_TOKENS: int = _env_int("MAX_CONTEXT_TOKENS", 4000)
+
+# Admission control для викликів LLM: одночасні виклики, черга, час очікування в черзі
+AGENT_MAX_INFLIGHT: int = _env_int("AGENT_MAX_INFLIGHT", 8)
+AGENT_QUEUE_SIZE: int = _env_int("AGENT_QUEUE_SIZE", 32)
+AGENT_QUEUE_TIMEOUT: float = _env_float("AGENT_QUEUE_TIMEOUT", 20.0)
+# Фоновий прогрів агента (імпорт LangChain, побудова агента, HTTP-пули) одразу після старту
+AGENT_PREWARM: bool = _env_bool("AGENT_PREWARM", True)
+# Скільки оновлень Telegram бот обробляє одночасно (у кожному процесі-обробнику)
+BOT_CONCURRENT_UPDATES: int = _env_int("BOT_CONCURRENT_UPDATES", 256)
+# Процеси-обробники, між якими оновлення розподіляються за chat_id (1 — усе в одному процесі)
+BOT_WORKERS: int = _env_int("BOT_WORKERS", 1)
+SHARD_DRAIN_TIMEOUT: float = _env_float("SHARD_DRAIN_TIMEOUT", 30.0)
+# Вікно (секунди), у якому повідомлення одного чату поспіль зливаються в один запит
+CHAT_DEBOUNCE: float = _env_float("CHAT_DEBOUNCE", 0.5)
+
+# Пам'ять розмови по чатах: memory (у процесі), sqlite (файл CHAT_MEMORY_PATH) або off
+CHAT_MEMORY_BACKEND: str = _env_choice("CHAT_MEMORY_BACKEND", "memory", ("memory", "sqlite", "off"))
+CHAT_MEMORY_PATH: str = os.getenv("CHAT_MEMORY_PATH") or "chat-memory.sqlite3"
+# Останні обміни (запит → відповідь) дослівно; старіші й понад CHAT_MEMORY_TOKENS — у підсумок
+CHAT_MEMORY_TURNS: int = _env_int("CHAT_MEMORY_TURNS", 6)
+CHAT_MEMORY_TOKENS: int = _env_int("CHAT_MEMORY_TOKENS", 600)
+CHAT_MEMORY_SUMMARY_TOKENS: int = _env_int("CHAT_MEMORY_SUMMARY_TOKENS", 150)
+# Скільки чатів зберігається (найдавніше активні витісняються) і TTL неактивного чату; 0 — без TTL
+CHAT_MEMORY_MAX_CHATS: int = _env_int("CHAT_MEMORY_MAX_CHATS", 20000)
+CHAT_MEMORY_TTL: float = _env_float("CHAT_MEMORY_TTL", 24 * 3600.0)
+
+# Дисковий кеш (SQLite) геокодування та прогнозу, що переживає перезапуск; порожньо — вимкнено
+DISK_CACHE_PATH: str | None = os.getenv("DISK_CACHE_PATH") or None
+DISK_CACHE_FLUSH_INTERVAL: float = _env_float("DISK_CACHE_FLUSH_INTERVAL", 5.0)
+DISK_CACHE_BATCH_SIZE: int = _env_int("DISK_CACHE_BATCH_SIZE", 100)
+
+# HTTP-клієнт для Open-Meteo: пул з'єднань, keep-alive, таймаути
+HTTP_TIMEOUT: float = _env_float("HTTP_TIMEOUT", 15.0)
+HTTP_CONNECT_TIMEOUT: float = _env_float("HTTP_CONNECT_TIMEOUT", 5.0)
+HTTP_HOST_TIMEOUTS: dict[str, float] = _env_host_timeouts(
+    "HTTP_HOST_TIMEOUTS",
+    "geocoding-api.open-meteo.com=5,api.open-meteo.com=10",
+)
+HTTP_MAX_CONNECTIONS: int = _env_int("HTTP_MAX_CONNECTIONS", 50)
+HTTP_MAX_KEEPALIVE: int = _env_int("HTTP_MAX_KEEPALIVE", 20)
+HTTP_KEEPALIVE_EXPIRY: float = _env_float("HTTP_KEEPALIVE_EXPIRY", 60.0)
+HTTP2_ENABLED: bool = _env_bool("HTTP2_ENABLED", True)
+
+# Метрики Prometheus: GET /metrics на METRICS_HOST:METRICS_PORT (0 — вимкнено).
+# З BOT_WORKERS > 1 процес-обробник i слухає METRICS_PORT + i
+METRICS_HOST: str = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT: int = _env_int("METRICS_PORT", 9100)
+
+# Трасування span-ами (handle_message → агент → модель, tool-и, HTTP); false — без витрат.
+# TRACE_EXPORTER: jsonl (рядок JSON на span у TRACE_PATH) або otlp (OTEL_EXPORTER_OTLP_*)
+TRACING_ENABLED: bool = _env_bool("TRACING_ENABLED", False)
+TRACE_EXPORTER: str = _env_choice("TRACE_EXPORTER", "jsonl", ("jsonl", "otlp"))
+TRACE_PATH: str = os.getenv("TRACE_PATH") or "traces.jsonl"
+
+# Кеш геокодування: координати міст не змінюються, тож TTL довгий
+GEOCODE_CACHE_SIZE: int = _env_int("GEOCODE_CACHE_SIZE", 1024)
+GEOCODE_CACHE_TTL: float = _env_float("GEOCODE_CACHE_TTL", 7 * 24 * 3600.0)
+GEOCODE_NEGATIVE_TTL: float = _env_float("GEOCODE_NEGATIVE_TTL", 3600.0)
+
+# Офлайн-газетир міст: координати без запиту до Geocoding API
+GAZETTEER_ENABLED: bool = _env_bool("GAZETTEER_ENABLED", True)
+GAZETTEER_PATH: str | None = os.getenv("GAZETTEER_PATH") or None
+GAZETTEER_FUZZY_CUTOFF: float = _env_float("GAZETTEER_FUZZY_CUTOFF", 0.85)
+
+# Кеш прогнозу: блок current в Open-Meteo оновлюється раз на 15 хвилин
+FORECAST_CACHE_SIZE: int = _env_int("FORECAST_CACHE_SIZE", 512)
+FORECAST_UPDATE_INTERVAL: int = _env_int("FORECAST_UPDATE_INTERVAL", 900)
+FORECAST_MAX_STALE: float = _env_float("FORECAST_MAX_STALE", 900.0)
+FORECAST_COORD_PRECISION: int = _env_int("FORECAST_COORD_PRECISION", 2)
+# Кеш погодинного/денного прогнозу на період (get_forecast): ряди моделі оновлюються щогодини
+FORECAST_RANGE_TTL: float = _env_float("FORECAST_RANGE_TTL", 1800.0)
+
 
 def require_telegram_token() -> str:
     """Повертає токен бота; якщо відсутній — викликає SystemExit."""
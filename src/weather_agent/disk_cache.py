@@ -0,0 +1,145 @@
+"""
+Дисковий рівень кешу (SQLite) під in-memory кешами погодного клієнта.
+
+Після перезапуску контейнера кеші в пам'яті порожні, і перші хвилини кожен запит
+іде в Open-Meteo. DiskCache зберігає результати геокодування та останні прогнози
+у файлі (DISK_CACHE_PATH — tmpfs або змонтований том, бо образ read-only), а на
+старті weather.warm_caches() переносить ще не прострочені записи в пам'ять.
+
+Записи буферизуються і пишуться пачками в одній транзакції у фоновому потоці:
+раз на flush_interval секунд і щойно набирається batch_size записів, а також при
+close(). put() лише додає запис у буфер — SQLite на потоці виклику (зокрема в
+event loop бота) не чіпається.
+База працює в режимі WAL: процеси-обробники (BOT_WORKERS) можуть читати її
+одночасно, поки хтось пише.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+)
+"""
+
+
+class DiskCache:
+    """SQLite-сховище (namespace, key) → JSON-значення з абсолютним часом завершення."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        flush_interval: float = 5.0,
+        batch_size: int = 100,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = Path(path)
+        self.batch_size = max(1, batch_size)
+        self._clock = clock
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+        # _lock — лише буфер (put не чекає на диск), _db_lock — з'єднання SQLite
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._pending: dict[tuple[str, str], tuple[str, float]] = {}
+        self.writes = 0
+        self.flushes = 0
+        self._stop = threading.Event()
+        # Сигнал фоновому потоку: буфер заповнено або close()
+        self._wake = threading.Event()
+        # flush_interval <= 0 — без запису за часом, лише повні пачки та close()
+        self._flusher = threading.Thread(
+            target=self._flush_loop,
+            args=(flush_interval if flush_interval > 0 else None,),
+            name="disk-cache",
+            daemon=True,
+        )
+        self._flusher.start()
+
+    def put(self, namespace: str, key: Any, value: Any, expires_at: float) -> None:
+        """Додає запис у буфер; повний буфер будить фоновий потік запису."""
+        item = (namespace, json.dumps(key, ensure_ascii=False))
+        with self._lock:
+            self._pending[item] = (json.dumps(value, ensure_ascii=False), expires_at)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """Пише буфер однією транзакцією; повертає кількість записів."""
+        with self._db_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                pending, self._pending = self._pending, {}
+            rows = [(ns, key, value, exp) for (ns, key), (value, exp) in pending.items()]
+            try:
+                with self._conn:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO entries (namespace, key, value, expires_at)"
+                        " VALUES (?, ?, ?, ?)",
+                        rows,
+                    )
+            except sqlite3.Error as e:
+                # Дисковий кеш — оптимізація: помилка запису не має ламати відповідь
+                logger.warning("Не вдалося записати дисковий кеш: %s", e)
+                return 0
+            self.writes += len(rows)
+            self.flushes += 1
+            return len(rows)
+
+    def load(self, namespace: str) -> list[tuple[Any, Any, float]]:
+        """Непрострочені записи простору імен: (ключ, значення, expires_at)."""
+        self.flush()
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT key, value, expires_at FROM entries WHERE namespace = ? AND expires_at > ?",
+                (namespace, self._clock()),
+            ).fetchall()
+        return [(json.loads(key), json.loads(value), exp) for key, value, exp in rows]
+
+    def purge_expired(self) -> int:
+        """Видаляє прострочені записи; повертає їх кількість."""
+        with self._db_lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM entries WHERE expires_at <= ?", (self._clock(),)
+            )
+            return cursor.rowcount
+
+    def _flush_loop(self, interval: float | None) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self) -> None:
+        """Зупиняє фоновий запис, пише залишок буфера й закриває з'єднання."""
+        self._stop.set()
+        self._wake.set()
+        self._flusher.join()
+        self.flush()
+        with self._db_lock:
+            self._conn.close()
+
+    def stats(self) -> dict[str, int]:
+        """Записи в буфері, записані рядки та кількість транзакцій запису."""
+        with self._lock:
+            pending = len(self._pending)
+        return {"pending": pending, "writes": self.writes, "flushes": self.flushes}
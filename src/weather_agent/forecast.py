@@ -0,0 +1,358 @@
+"""
+Прогноз на період (ранок, вечір, завтра, вихідні): погодинні й денні ряди Open-Meteo
+як масиви NumPy, агрегати за вікном і підбір одягу векторно по всіх годинах вікна.
+
+Агент отримує не сирі погодинні дані, а кілька рядків підсумку (format_period), тож
+промпт лишається коротким. Запити до API та кеш — у weather.py.
+"""
+
+import json
+from typing import NamedTuple
+
+import numpy as np
+
+from weather_agent.outfit import (
+    DRIZZLE_RAIN_CODES,
+    HOT_OUTFIT,
+    LAYERS,
+    SNOW_CODES,
+    THUNDER_CODES,
+    shoes,
+)
+from weather_agent.weather import weather_code_to_text
+
+HOURLY_VARS = (
+    "temperature_2m",
+    "apparent_temperature",
+    "precipitation_probability",
+    "precipitation",
+    "weather_code",
+    "wind_speed_10m",
+    "wind_gusts_10m",
+)
+DAILY_VARS = (
+    "weather_code",
+    "temperature_2m_min",
+    "temperature_2m_max",
+    "precipitation_probability_max",
+    "precipitation_sum",
+    "wind_gusts_10m_max",
+)
+
+# Open-Meteo віддає щонайбільше 16 днів; вихідні вміщуються в 7
+MAX_FORECAST_DAYS = 7
+# Година вважається мокрою, якщо ймовірність опадів не менша за цей відсоток
+WET_PROBABILITY = 50.0
+# Пориви вітру (км/год), з яких радимо вітрозахисний шар
+GUSTY = 50.0
+
+_WET_CODES = np.array(sorted(DRIZZLE_RAIN_CODES | THUNDER_CODES))
+_SNOW_CODES = np.array(sorted(SNOW_CODES))
+_THUNDER_CODES = np.array(sorted(THUNDER_CODES))
+_LAYER_LIMITS = np.array([limit for limit, _ in LAYERS])
+_LAYER_ITEMS = [items for _, items in LAYERS] + [HOT_OUTFIT]
+_WEEKDAYS = ("пн", "вт", "ср", "чт", "пт", "сб", "нд")
+
+
+class Period(NamedTuple):
+    """Період прогнозу: як його назвати у відповіді та які години доби до нього входять."""
+
+    label: str
+    first_hour: int
+    last_hour: int  # не включно
+
+
+PERIODS: dict[str, Period] = {
+    "today": Period("сьогодні", 0, 24),
+    "morning": Period("зранку", 6, 12),
+    "evening": Period("ввечері", 18, 24),
+    "tomorrow": Period("завтра", 7, 23),
+    "weekend": Period("на вихідних", 7, 23),
+}
+
+
+class ForecastRange(NamedTuple):
+    """Погодинні та денні ряди однієї точки; час — місцевий, як його віддає Open-Meteo."""
+
+    time: np.ndarray  # datetime64[h]
+    hourly: dict[str, np.ndarray]
+    day: np.ndarray  # datetime64[D]
+    daily: dict[str, np.ndarray]
+    utc_offset: int
+
+
+class OutfitScores(NamedTuple):
+    """Оцінки одягу для кожної години вікна (масиви однакової довжини)."""
+
+    layer: np.ndarray  # індекс комплекту з outfit.LAYERS; len(LAYERS) — спека
+    wet: np.ndarray
+    snow: np.ndarray
+    thunder: np.ndarray
+    gusty: np.ndarray
+
+
+class WindowSummary(NamedTuple):
+    """Агрегати прогнозу за вікном — з них складається текст для моделі."""
+
+    period: str
+    start: np.datetime64
+    end: np.datetime64  # остання година вікна
+    hours: int
+    feels_min: float
+    feels_max: float
+    precip_probability: float
+    precip_sum: float
+    gust_max: float
+    codes: tuple[int, ...]  # найчастіший код і, якщо інший, найгірший
+    scores: OutfitScores
+
+
+def _series(block: dict, name: str, size: int) -> np.ndarray:
+    values = block.get(name)
+    if values is None or len(values) != size:
+        return np.full(size, np.nan)
+    # None у рядах Open-Meteo (немає даних на годину) стає NaN
+    return np.array(values, dtype=float)
+
+
+def parse_forecast_range(data: dict) -> ForecastRange | None:
+    """Блоки hourly/daily відповіді Open-Meteo → ForecastRange або None, якщо рядів немає."""
+    hourly = data.get("hourly") or {}
+    daily = data.get("daily") or {}
+    if not hourly.get("time"):
+        return None
+    time = np.array(hourly["time"], dtype="datetime64[m]").astype("datetime64[h]")
+    day = np.array(daily.get("time") or [], dtype="datetime64[D]")
+    return ForecastRange(
+        time=time,
+        hourly={name: _series(hourly, name, len(time)) for name in HOURLY_VARS},
+        day=day,
+        daily={name: _series(daily, name, len(day)) for name in DAILY_VARS},
+        utc_offset=int(data.get("utc_offset_seconds") or 0),
+    )
+
+
+def local_now(now: float, utc_offset: int) -> np.datetime64:
+    """Поточна місцева година в часовому поясі прогнозу."""
+    return np.datetime64(int(now) + utc_offset, "s").astype("datetime64[h]")
+
+
+def _weekday(day: np.datetime64) -> int:
+    # 1970-01-01 — четвер
+    return int((day.astype(int) + 3) % 7)
+
+
+def period_days(period: str, now_hour: np.datetime64) -> tuple[np.datetime64, int]:
+    """(перший день, кількість днів) вікна періоду відносно поточної місцевої години."""
+    spec = PERIODS[period]
+    today = now_hour.astype("datetime64[D]")
+    hour = int((now_hour - today).astype(int))
+    if period == "tomorrow":
+        return today + 1, 1
+    if period == "weekend":
+        weekday = _weekday(today)
+        if weekday >= 5:
+            return today, 7 - weekday
+        return today + (5 - weekday), 2
+    if period != "today" and hour >= spec.last_hour - 1:
+        # Ранок чи вечір уже минули — беремо завтрашні
+        return today + 1, 1
+    return today, 1
+
+
+def forecast_days(period: str, now_hour: np.datetime64) -> int:
+    """Скільки днів прогнозу (forecast_days) потрібно, щоб покрити вікно періоду."""
+    first, count = period_days(period, now_hour)
+    today = now_hour.astype("datetime64[D]")
+    return min(MAX_FORECAST_DAYS, int((first - today).astype(int)) + count)
+
+
+def window_mask(forecast: ForecastRange, period: str, now_hour: np.datetime64) -> np.ndarray:
+    """Булева маска годин forecast.time, що входять у вікно періоду (минулі години — ні)."""
+    spec = PERIODS[period]
+    first, count = period_days(period, now_hour)
+    hour_of_day = (forecast.time - forecast.time.astype("datetime64[D]")).astype(int)
+    return (
+        (forecast.time >= now_hour)
+        & (forecast.time >= first.astype("datetime64[h]"))
+        & (forecast.time < (first + count).astype("datetime64[h]"))
+        & (hour_of_day >= spec.first_hour)
+        & (hour_of_day < spec.last_hour)
+    )
+
+
+def score_outfit(
+    feels: np.ndarray,
+    codes: np.ndarray,
+    precip_probability: np.ndarray,
+    gusts: np.ndarray,
+) -> OutfitScores:
+    """
+    Ті самі правила, що outfit.recommend_outfit, але для всіх годин одразу: комплект
+    за відчутною температурою (межі LAYERS), опади, сніг, гроза, сильні пориви.
+    """
+    return OutfitScores(
+        # feels <= limit → перший такий limit; вище за всі межі — спека
+        layer=np.searchsorted(_LAYER_LIMITS, feels, side="left"),
+        wet=np.isin(codes, _WET_CODES) | (precip_probability >= WET_PROBABILITY),
+        snow=np.isin(codes, _SNOW_CODES),
+        thunder=np.isin(codes, _THUNDER_CODES),
+        gusty=gusts >= GUSTY,
+    )
+
+
+def _dominant_codes(codes: np.ndarray) -> tuple[int, ...]:
+    counts = np.bincount(codes, minlength=100)
+    common = int(counts.argmax())
+    worst = int(codes.max())
+    return (common,) if worst == common else (common, worst)
+
+
+def summarize_window(
+    forecast: ForecastRange, period: str, now_hour: np.datetime64
+) -> WindowSummary | None:
+    """Агрегати за вікном періоду або None, якщо прогноз вікна не покриває."""
+    mask = window_mask(forecast, period, now_hour)
+    hourly = {name: series[mask] for name, series in forecast.hourly.items()}
+    feels = hourly["apparent_temperature"]
+    feels = np.where(np.isnan(feels), hourly["temperature_2m"], feels)
+    valid = ~np.isnan(feels)
+    if not valid.any():
+        return None
+    codes = np.nan_to_num(hourly["weather_code"][valid]).astype(int)
+    probability = np.nan_to_num(hourly["precipitation_probability"][valid])
+    gusts = np.nan_to_num(hourly["wind_gusts_10m"][valid])
+    times = forecast.time[mask][valid]
+    return WindowSummary(
+        period=period,
+        start=times[0],
+        end=times[-1],
+        hours=int(valid.sum()),
+        feels_min=float(feels[valid].min()),
+        feels_max=float(feels[valid].max()),
+        precip_probability=float(probability.max()),
+        precip_sum=float(np.nansum(hourly["precipitation"][valid])),
+        gust_max=float(gusts.max()),
+        codes=_dominant_codes(codes),
+        scores=score_outfit(feels[valid], codes, probability, gusts),
+    )
+
+
+def outfit_tips(summary: WindowSummary) -> list[str]:
+    """Поради на все вікно: комплект на найхолоднішу годину, шари, опади, вітер."""
+    scores = summary.scores
+    coldest, warmest = int(scores.layer.min()), int(scores.layer.max())
+    wet, snow = bool(scores.wet.any()), bool(scores.snow.any())
+    tips = [_LAYER_ITEMS[coldest], shoes(summary.feels_min, wet, snow)]
+    if warmest - coldest >= 2:
+        tips.append(f"одягайтеся шарами: у найтеплішу годину вистачить — {_LAYER_ITEMS[warmest]}")
+    if wet:
+        tips.append(
+            f"парасолька або дощовик (опади ймовірні {int(scores.wet.sum())} з {summary.hours} год)"
+        )
+    if scores.thunder.any():
+        tips.append("можлива гроза — плануйте, де її перечекати")
+    if snow and summary.feels_max > -5:
+        tips.append("куртка з капюшоном, що не промокає від мокрого снігу")
+    if scores.gusty.any():
+        tips.append(f"вітрозахисний верхній шар — пориви до {summary.gust_max:.0f} км/год")
+    return tips
+
+
+def _day_label(day: np.datetime64) -> str:
+    return f"{_WEEKDAYS[_weekday(day)]} {day.item():%d.%m}"
+
+
+def _span_label(start: np.datetime64, end: np.datetime64) -> str:
+    first, last = start.astype("datetime64[D]"), end.astype("datetime64[D]")
+    start_hour = int((start - first).astype(int))
+    end_hour = int((end - last).astype(int)) + 1
+    if first == last:
+        return f"{_day_label(first)}, {start_hour:02d}:00–{end_hour:02d}:00"
+    return f"{_day_label(first)} {start_hour:02d}:00 – {_day_label(last)} {end_hour:02d}:00"
+
+
+def _conditions(codes: tuple[int, ...]) -> str:
+    text = weather_code_to_text(codes[0])
+    if len(codes) > 1:
+        text += f", часом {weather_code_to_text(codes[1])}"
+    return text
+
+
+def _window_days(forecast: ForecastRange, summary: WindowSummary) -> np.ndarray:
+    """Індекси денних рядів для днів багатоденного вікна (для одного дня — порожньо)."""
+    first = summary.start.astype("datetime64[D]")
+    last = summary.end.astype("datetime64[D]")
+    if first == last:
+        return np.array([], dtype=int)
+    return np.flatnonzero((forecast.day >= first) & (forecast.day <= last))
+
+
+def _daily_lines(forecast: ForecastRange, summary: WindowSummary) -> list[str]:
+    """Рядок на кожен день багатоденного вікна (з денних рядів Open-Meteo)."""
+    lines = []
+    daily = forecast.daily
+    for i in _window_days(forecast, summary):
+        low, high = daily["temperature_2m_min"][i], daily["temperature_2m_max"][i]
+        if np.isnan(low) or np.isnan(high):
+            continue
+        line = f"{_day_label(forecast.day[i])}: {low:+.0f}…{high:+.0f}°C"
+        if not np.isnan(daily["weather_code"][i]):
+            line += f", {_conditions((int(daily['weather_code'][i]),))}"
+        if not np.isnan(daily["precipitation_probability_max"][i]):
+            line += f", опади до {daily['precipitation_probability_max'][i]:.0f}%"
+        lines.append(line)
+    return lines
+
+
+def format_period(forecast: ForecastRange, summary: WindowSummary) -> str:
+    """Короткий текст прогнозу на період для моделі: агрегати, дні, поради щодо одягу."""
+    label = PERIODS[summary.period].label
+    weather = [
+        f"відчувається від {summary.feels_min:+.0f} до {summary.feels_max:+.0f}°C",
+        _conditions(summary.codes),
+        f"ймовірність опадів до {summary.precip_probability:.0f}%",
+    ]
+    if summary.precip_sum >= 0.1:
+        weather[-1] += f" ({summary.precip_sum:.1f} мм)"
+    if summary.gust_max:
+        weather.append(f"пориви вітру до {summary.gust_max:.0f} км/год")
+    lines = [f"{label.capitalize()} ({_span_label(summary.start, summary.end)}): "]
+    lines[0] += ", ".join(weather) + "."
+    lines.extend(_daily_lines(forecast, summary))
+    lines.append("Що вдягнути: " + "; ".join(outfit_tips(summary)) + ".")
+    return "\n".join(lines)
+
+
+def _day_fields(forecast: ForecastRange, summary: WindowSummary) -> list[dict]:
+    days = []
+    for i in _window_days(forecast, summary):
+        fields = {"day": _day_label(forecast.day[i])}
+        for name, series in (
+            ("min_c", "temperature_2m_min"),
+            ("max_c", "temperature_2m_max"),
+            ("precip_pct", "precipitation_probability_max"),
+        ):
+            value = forecast.daily[series][i]
+            if not np.isnan(value):
+                fields[name] = round(float(value))
+        days.append(fields)
+    return days
+
+
+def compact_period(forecast: ForecastRange, summary: WindowSummary) -> str:
+    """Те саме, що format_period, але коротким JSON (TOOL_OUTPUT_FORMAT=compact)."""
+    fields = {
+        "period": summary.period,
+        "window": _span_label(summary.start, summary.end),
+        "feels_c": [round(summary.feels_min), round(summary.feels_max)],
+        "conditions": [weather_code_to_text(code) for code in summary.codes],
+        "precip_pct": round(summary.precip_probability),
+        "precip_mm": round(summary.precip_sum, 1),
+        "gust_kmh": round(summary.gust_max),
+        "days": _day_fields(forecast, summary),
+        "wear": outfit_tips(summary),
+    }
+    if not fields["days"]:
+        del fields["days"]
+    return json.dumps(fields, ensure_ascii=False, separators=(",", ":"))
@@ -0,0 +1,98 @@
+"""
+Офлайн-індекс міст (газетир): координати без запиту до Geocoding API.
+
+Індекс data/gazetteer.tsv збирається скриптом scripts/build_gazetteer.py з
+data/places.csv і містить рядки «ключ, lat, lon, timezone, назва», відсортовані
+за нормалізованим ключем. У пам'яті це відсортований список ключів та компактні
+масиви координат; точний і префіксний пошук — бінарний, нечіткий — difflib
+серед ключів з тим самим початком.
+"""
+
+import difflib
+import threading
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+
+from weather_agent.cities import normalize_city
+
+DEFAULT_PATH = Path(__file__).resolve().parent / "data" / "gazetteer.tsv"
+
+# Скільки перших літер мають збігатися, щоб ключ брав участь у нечіткому пошуку
+_FUZZY_PREFIX = 2
+
+
+class Gazetteer:
+    """Відсортований індекс назв міст з точним, префіксним та нечітким пошуком."""
+
+    def __init__(self, rows: list[tuple[str, float, float, str, str]]) -> None:
+        rows = sorted(rows)
+        self._keys = [row[0] for row in rows]
+        self._lat = array("d", (row[1] for row in rows))
+        self._lon = array("d", (row[2] for row in rows))
+        self._tz = [row[3] for row in rows]
+        self._names = [row[4] for row in rows]
+
+    @classmethod
+    def load(cls, path: Path = DEFAULT_PATH) -> "Gazetteer":
+        """Читає TSV-індекс, зібраний scripts/build_gazetteer.py."""
+        rows = []
+        with path.open(encoding="utf-8") as f:
+            for line in f:
+                key, lat, lon, tz, name = line.rstrip("\n").split("\t")
+                rows.append((key, float(lat), float(lon), tz, name))
+        return cls(rows)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _entry(self, i: int) -> tuple[float, float, str, str]:
+        return self._lat[i], self._lon[i], self._tz[i], self._names[i]
+
+    def lookup(self, city: str) -> tuple[float, float, str, str] | None:
+        """(latitude, longitude, timezone, назва) для точного збігу ключа або None."""
+        key = normalize_city(city)
+        i = bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            return self._entry(i)
+        return None
+
+    def _prefix_range(self, prefix: str) -> tuple[int, int]:
+        lo = bisect_left(self._keys, prefix)
+        hi = bisect_left(self._keys, prefix + "\U0010ffff", lo)
+        return lo, hi
+
+    def prefix(self, prefix: str, limit: int = 10) -> list[str]:
+        """Назви міст, нормалізований ключ яких починається з prefix (без повторів)."""
+        lo, hi = self._prefix_range(normalize_city(prefix))
+        names: list[str] = []
+        for i in range(lo, hi):
+            if self._names[i] not in names:
+                names.append(self._names[i])
+                if len(names) >= limit:
+                    break
+        return names
+
+    def fuzzy(self, city: str, cutoff: float = 0.85) -> tuple[float, float, str, str] | None:
+        """Найближчий за схожістю ключ (опечатки: «Київв», «Lvov») серед ключів з тим самим початком."""
+        key = normalize_city(city)
+        if len(key) < 3:
+            return None
+        lo, hi = self._prefix_range(key[:_FUZZY_PREFIX])
+        matches = difflib.get_close_matches(key, self._keys[lo:hi], n=1, cutoff=cutoff)
+        if not matches:
+            return None
+        return self._entry(bisect_left(self._keys, matches[0]))
+
+
+_lock = threading.Lock()
+_default: Gazetteer | None = None
+
+
+def get_gazetteer(path: Path | None = None) -> Gazetteer:
+    """Спільний індекс процесу; завантажується при першому зверненні."""
+    global _default
+    with _lock:
+        if _default is None:
+            _default = Gazetteer.load(path or DEFAULT_PATH)
+        return _default
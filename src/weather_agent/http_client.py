@@ -0,0 +1,138 @@
+"""
+Спільні довгоживучі HTTP-клієнти для викликів Open-Meteo.
+
+Один httpx.Client на процес (і один httpx.AsyncClient на event loop) тримає keep-alive
+з'єднання до geocoding та forecast хостів, тож TCP+TLS handshake платиться один раз,
+а не на кожен get_weather. HTTP/2 вмикається, якщо встановлено пакет h2 (extra «http2»).
+
+Тести та бенчмарки підміняють мережу через use_transport():
+
+    use_transport(httpx.MockTransport(handler))
+    ...
+    use_transport(None)  # повернутися до реальної мережі
+
+MockTransport підходить і для sync, і для async клієнта. Закриття пулів —
+aclose_clients() (бот викликає його в post_shutdown Application) або close_clients().
+"""
+
+import asyncio
+import importlib.util
+import threading
+from urllib.parse import urlsplit
+
+import httpx
+
+from weather_agent.config import (
+    HTTP2_ENABLED,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_HOST_TIMEOUTS,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE,
+    HTTP_TIMEOUT,
+)
+
+_lock = threading.Lock()
+_client: httpx.Client | None = None
+_transport: httpx.BaseTransport | None = None
+_async_client: httpx.AsyncClient | None = None
+_async_loop: asyncio.AbstractEventLoop | None = None
+_async_transport: httpx.AsyncBaseTransport | None = None
+
+
+def http2_available() -> bool:
+    """True, якщо HTTP/2 увімкнено в конфігу і встановлено пакет h2."""
+    return HTTP2_ENABLED and importlib.util.find_spec("h2") is not None
+
+
+def timeout_for(url: str) -> httpx.Timeout:
+    """Таймаут для запиту: HTTP_HOST_TIMEOUTS для хоста або HTTP_TIMEOUT за замовчуванням."""
+    host = (urlsplit(url).hostname or "").lower()
+    total = HTTP_HOST_TIMEOUTS.get(host, HTTP_TIMEOUT)
+    return httpx.Timeout(total, connect=min(HTTP_CONNECT_TIMEOUT, total))
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+def _client_kwargs(transport) -> dict:
+    kwargs = {
+        "timeout": httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        "limits": _limits(),
+    }
+    if transport is not None:
+        kwargs["transport"] = transport
+    else:
+        kwargs["http2"] = http2_available()
+    return kwargs
+
+
+def get_client() -> httpx.Client:
+    """Повертає спільний httpx.Client, створюючи його при першому виклику."""
+    global _client
+    with _lock:
+        if _client is None or _client.is_closed:
+            _client = httpx.Client(**_client_kwargs(_transport))
+        return _client
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Повертає спільний httpx.AsyncClient для поточного event loop.
+    З'єднання прив'язані до loop, тож для нового loop створюється новий клієнт.
+    """
+    global _async_client, _async_loop
+    loop = asyncio.get_running_loop()
+    with _lock:
+        if _async_client is None or _async_client.is_closed or _async_loop is not loop:
+            _async_client = httpx.AsyncClient(**_client_kwargs(_async_transport))
+            _async_loop = loop
+        return _async_client
+
+
+def use_transport(
+    transport: httpx.BaseTransport | None,
+    async_transport: httpx.AsyncBaseTransport | None = None,
+) -> None:
+    """
+    Задає транспорт для всіх наступних запитів (напр. httpx.MockTransport у тестах).
+    Якщо async_transport не задано, а transport підтримує async (як MockTransport),
+    він використовується і для AsyncClient. None — повернення до звичайної мережі.
+    Поточні клієнти закриваються.
+    """
+    global _transport, _async_transport
+    close_clients()
+    if async_transport is None and isinstance(transport, httpx.AsyncBaseTransport):
+        async_transport = transport
+    with _lock:
+        _transport = transport
+        _async_transport = async_transport
+
+
+def close_clients() -> None:
+    """
+    Закриває sync-клієнт і звільняє з'єднання пулу. Async-клієнт лише забувається:
+    закрити його коректно можна тільки з його loop (див. aclose_clients).
+    """
+    global _client, _async_client, _async_loop
+    with _lock:
+        client, _client = _client, None
+        _async_client, _async_loop = None, None
+    if client is not None:
+        client.close()
+
+
+async def aclose_clients() -> None:
+    """Закриває обидва клієнти; викликається з event loop, якому належить async-клієнт."""
+    global _async_client, _async_loop
+    with _lock:
+        async_client, loop = _async_client, _async_loop
+        _async_client, _async_loop = None, None
+    if async_client is not None and loop is asyncio.get_running_loop():
+        await async_client.aclose()
+    close_clients()
@@ -0,0 +1,83 @@
+"""
+Callback LangChain для спостереження за викликами моделі: тривалість, помилки й токени
+частин промпта — у метрики, span llm.call — у трасу запиту (з кроком агента та токенами).
+
+Імпортується лише з agent._get_agent (разом з LangChain), щоб не сповільнювати старт.
+"""
+
+import time
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from weather_agent.config import PROMPT_VERSION
+from weather_agent.metrics import LLM_SECONDS, record_error, record_prompt_tokens
+from weather_agent.tokens import prompt_breakdown
+from weather_agent.tracing import start_span
+
+
+def _usage(response) -> dict[str, int]:
+    """usage_metadata першої генерації (chat-моделі) або порожній словник."""
+    try:
+        message = response.generations[0][0].message
+    except (AttributeError, IndexError):
+        return {}
+    usage = getattr(message, "usage_metadata", None)
+    return dict(usage) if isinstance(usage, dict) else {}
+
+
+class LLMCallbackHandler(BaseCallbackHandler):
+    """Пише weather_agent_llm_call_seconds, помилки моделі (component="llm") і span-и."""
+
+    # Лише додає числа — виконується в потоці виклику, без run_in_executor
+    run_inline = True
+
+    def __init__(self) -> None:
+        self._runs: dict[UUID, tuple[float, Any]] = {}
+
+    def _start(self, run_id: UUID, metadata: dict | None, **attributes) -> None:
+        metadata = metadata or {}
+        # langgraph_step: 1 — перший хід моделі, 3 — другий (після tool) тощо
+        span = start_span(
+            "llm.call",
+            model=metadata.get("ls_model_name"),
+            step=metadata.get("langgraph_step"),
+            **attributes,
+        )
+        self._runs[run_id] = (time.perf_counter(), span)
+
+    def _finish(self, run_id: UUID, error: BaseException | None = None, **attributes) -> None:
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        started, span = run
+        LLM_SECONDS.observe(time.perf_counter() - started)
+        span.set(**attributes)
+        span.end(error)
+
+    def on_chat_model_start(
+        self, serialized, messages, *, run_id: UUID, metadata: dict | None = None, **kwargs: Any
+    ) -> None:
+        # Схема tool-ів, прив'язана до моделі (bind_tools), приходить в invocation_params
+        tools = (kwargs.get("invocation_params") or {}).get("tools")
+        prompt = prompt_breakdown(messages[0] if messages else [], tools)
+        record_prompt_tokens(prompt._asdict(), PROMPT_VERSION)
+        self._start(run_id, metadata, prompt_tokens=prompt.total)
+
+    def on_llm_start(
+        self, serialized, prompts, *, run_id: UUID, metadata: dict | None = None, **kwargs: Any
+    ) -> None:
+        self._start(run_id, metadata)
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any) -> None:
+        usage = _usage(response)
+        self._finish(
+            run_id,
+            input_tokens=usage.get("input_tokens"),
+            output_tokens=usage.get("output_tokens"),
+        )
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, error)
+        record_error("llm", error)
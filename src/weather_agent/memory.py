@@ -0,0 +1,465 @@
+"""
+Пам'ять розмови по чатах з фіксованим бюджетом.
+
+Без пам'яті кожне повідомлення йде агенту окремим запитом, і уточнення на кшталт
+«а завтра?» втрачають місто. ChatMemory зберігає для кожного чату останні
+CHAT_MEMORY_TURNS обмінів (запит → відповідь) дослівно. Коли обмінів більше або
+разом вони перевищують CHAT_MEMORY_TOKENS токенів, найстаріші згортаються в
+підсумок: рядок на обмін (початок запиту й перше речення відповіді). Підсумок
+обмежено CHAT_MEMORY_SUMMARY_TOKENS — найстаріші рядки відкидаються. Підсумок
+будується без LLM, тож додавання обміну коштує сталу кількість операцій.
+
+Стан чатів живе у сховищі: MemoryStore (у процесі, за замовчуванням) або SQLiteStore
+(файл CHAT_MEMORY_PATH, переживає перезапуск). В обох доступ іде за chat_id, а
+витіснення — з «холодного» кінця черги за часом останнього звернення: чати,
+неактивні понад CHAT_MEMORY_TTL, і найдавніше активні понад CHAT_MEMORY_MAX_CHATS.
+Тож робота на повідомлення не залежить від кількості чатів (у SQLite — пошук за
+первинним ключем та індексом, без сканування таблиці). Власне сховище — будь-який
+клас з get, put, clear, stats і close.
+"""
+
+import asyncio
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import Callable, Hashable, Iterable
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from weather_agent.config import (
+    CHAT_MEMORY_BACKEND,
+    CHAT_MEMORY_MAX_CHATS,
+    CHAT_MEMORY_PATH,
+    CHAT_MEMORY_SUMMARY_TOKENS,
+    CHAT_MEMORY_TOKENS,
+    CHAT_MEMORY_TTL,
+    CHAT_MEMORY_TURNS,
+)
+from weather_agent.metrics import register_collector
+from weather_agent.tokens import MESSAGE_OVERHEAD, count_tokens
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_HEADER = "Коротко про попередню розмову з цим користувачем:"
+# Скільки символів запиту та відповіді потрапляє в рядок підсумку
+SUMMARY_CLIP = 120
+# Скільки прострочених чатів витісняється за один запис: прострочені зникають
+# швидше, ніж з'являються нові, а робота на повідомлення лишається сталою
+EXPIRE_BATCH = 8
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s")
+
+
+class Turn(NamedTuple):
+    """Один обмін: запит користувача, відповідь бота та їхні токени разом."""
+
+    user: str
+    reply: str
+    tokens: int
+
+
+class Conversation:
+    """Стан чату: рядки підсумку (текст, токени) та останні обміни."""
+
+    __slots__ = ("summary", "summary_tokens", "turn_tokens", "turns")
+
+    def __init__(self, summary: Iterable[tuple[str, int]] = (), turns: Iterable[Turn] = ()) -> None:
+        self.summary: deque[tuple[str, int]] = deque(summary)
+        self.turns: deque[Turn] = deque(turns)
+        self.summary_tokens = sum(tokens for _, tokens in self.summary)
+        self.turn_tokens = sum(turn.tokens for turn in self.turns)
+
+    @property
+    def tokens(self) -> int:
+        return self.summary_tokens + self.turn_tokens
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {"summary": list(self.summary), "turns": list(self.turns)}, ensure_ascii=False
+        )
+
+    @classmethod
+    def from_json(cls, raw: str) -> "Conversation":
+        data = json.loads(raw)
+        return cls(
+            [(line, tokens) for line, tokens in data["summary"]],
+            [Turn(*turn) for turn in data["turns"]],
+        )
+
+
+def _clip(text: str, limit: int = SUMMARY_CLIP) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 1].rstrip() + "…"
+
+
+def summary_line(turn: Turn) -> str:
+    """Рядок підсумку для обміну: запит і перше речення відповіді, обрізані до SUMMARY_CLIP."""
+    first = _SENTENCE_END.split(" ".join(turn.reply.split()), maxsplit=1)[0]
+    return f"— користувач: «{_clip(turn.user)}»; бот: {_clip(first)}"
+
+
+class MemoryStore:
+    """
+    Чати в OrderedDict у порядку останнього запису: прострочені та надлишкові
+    витісняються з початку, тож get і put — O(1).
+    """
+
+    def __init__(
+        self, max_chats: int, ttl: float, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.max_chats = max(1, max_chats)
+        self.ttl = ttl
+        self._clock = clock
+        # chat_id → (час останнього запису, токени на момент запису, стан)
+        self._data: OrderedDict[Hashable, tuple[float, int, Conversation]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._tokens = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, chat_id: Hashable) -> Conversation | None:
+        with self._lock:
+            item = self._data.get(chat_id)
+            if item is None:
+                return None
+            touched, tokens, chat = item
+            if self.ttl > 0 and touched + self.ttl <= self._clock():
+                del self._data[chat_id]
+                self._tokens -= tokens
+                self.expirations += 1
+                return None
+            return chat
+
+    def put(self, chat_id: Hashable, chat: Conversation) -> None:
+        now = self._clock()
+        with self._lock:
+            old = self._data.pop(chat_id, None)
+            if old is not None:
+                self._tokens -= old[1]
+            self._data[chat_id] = (now, chat.tokens, chat)
+            self._tokens += chat.tokens
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        if self.ttl > 0:
+            for _ in range(EXPIRE_BATCH):
+                chat_id = next(iter(self._data))
+                touched, tokens, _chat = self._data[chat_id]
+                if touched + self.ttl > now:
+                    break
+                del self._data[chat_id]
+                self._tokens -= tokens
+                self.expirations += 1
+        while len(self._data) > self.max_chats:
+            _, (_touched, tokens, _chat) = self._data.popitem(last=False)
+            self._tokens -= tokens
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._tokens = self.evictions = self.expirations = 0
+
+    def stats(self) -> dict[str, int]:
+        """Чати, токени в пам'яті, витіснені за LRU (evictions) і за TTL (expirations)."""
+        with self._lock:
+            return {
+                "chats": len(self._data),
+                "max_chats": self.max_chats,
+                "tokens": self._tokens,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def close(self) -> None:
+        pass
+
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS chats (
+        chat_id TEXT PRIMARY KEY,
+        state TEXT NOT NULL,
+        tokens INTEGER NOT NULL,
+        touched_at REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS chats_touched_at ON chats (touched_at)",
+)
+
+
+class SQLiteStore:
+    """
+    Чати в SQLite (WAL): стан — JSON, індекс за часом останнього запису для
+    витіснення. Кількість чатів і токенів рахується один раз при відкритті, далі —
+    лічильниками цього процесу (з BOT_WORKERS > 1 ліміт діє в кожному процесі).
+    Помилка бази не ламає відповідь: чат просто лишається без пам'яті.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        max_chats: int,
+        ttl: float,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = Path(path)
+        self.max_chats = max(1, max_chats)
+        self.ttl = ttl
+        self._clock = clock
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._size, self._tokens = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(tokens), 0) FROM chats"
+        ).fetchone()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, chat_id: Hashable) -> Conversation | None:
+        key = json.dumps(chat_id)
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT state, tokens, touched_at FROM chats WHERE chat_id = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                state, tokens, touched = row
+                if self.ttl > 0 and touched + self.ttl <= self._clock():
+                    with self._conn:
+                        self._delete([(key, tokens)])
+                    self.expirations += 1
+                    return None
+        except sqlite3.Error as e:
+            logger.warning("Не вдалося прочитати пам'ять чату: %s", e)
+            return None
+        return Conversation.from_json(state)
+
+    def put(self, chat_id: Hashable, chat: Conversation) -> None:
+        key, state, now = json.dumps(chat_id), chat.to_json(), self._clock()
+        try:
+            with self._lock, self._conn:
+                row = self._conn.execute(
+                    "SELECT tokens FROM chats WHERE chat_id = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute(
+                        "INSERT INTO chats (chat_id, state, tokens, touched_at) VALUES (?, ?, ?, ?)",
+                        (key, state, chat.tokens, now),
+                    )
+                    self._size += 1
+                    self._tokens += chat.tokens
+                else:
+                    self._conn.execute(
+                        "UPDATE chats SET state = ?, tokens = ?, touched_at = ? WHERE chat_id = ?",
+                        (state, chat.tokens, now, key),
+                    )
+                    self._tokens += chat.tokens - row[0]
+                self._evict(now)
+        except sqlite3.Error as e:
+            logger.warning("Не вдалося записати пам'ять чату: %s", e)
+
+    def _oldest(self, limit: int, before: float | None = None) -> list[tuple[str, int]]:
+        if before is None:
+            query, params = "SELECT chat_id, tokens FROM chats", ()
+        else:
+            query, params = "SELECT chat_id, tokens FROM chats WHERE touched_at <= ?", (before,)
+        return self._conn.execute(
+            f"{query} ORDER BY touched_at LIMIT ?", (*params, limit)
+        ).fetchall()
+
+    def _delete(self, rows: list[tuple[str, int]]) -> None:
+        self._conn.executemany("DELETE FROM chats WHERE chat_id = ?", [(key,) for key, _ in rows])
+        self._size -= len(rows)
+        self._tokens -= sum(tokens for _, tokens in rows)
+
+    def _evict(self, now: float) -> None:
+        if self.ttl > 0:
+            expired = self._oldest(EXPIRE_BATCH, before=now - self.ttl)
+            self._delete(expired)
+            self.expirations += len(expired)
+        if self._size > self.max_chats:
+            evicted = self._oldest(self._size - self.max_chats)
+            self._delete(evicted)
+            self.evictions += len(evicted)
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM chats")
+            self._size = self._tokens = self.evictions = self.expirations = 0
+
+    def stats(self) -> dict[str, int]:
+        """Чати, токени в базі, витіснені за LRU (evictions) і за TTL (expirations)."""
+        with self._lock:
+            return {
+                "chats": self._size,
+                "max_chats": self.max_chats,
+                "tokens": self._tokens,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ChatMemory:
+    """Історія розмов по chat_id з підсумком старіших обмінів (див. опис модуля)."""
+
+    def __init__(
+        self,
+        store: Any,
+        max_turns: int = CHAT_MEMORY_TURNS,
+        max_tokens: int = CHAT_MEMORY_TOKENS,
+        summary_tokens: int = CHAT_MEMORY_SUMMARY_TOKENS,
+    ) -> None:
+        self.store = store
+        self.max_turns = max(0, max_turns)
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self.summarized = 0
+        # add_turn різних чатів може йти з кількох потоків (aadd_turn)
+        self._lock = threading.Lock()
+
+    def history(self, chat_id: Hashable) -> list[dict[str, str]]:
+        """
+        Попередні повідомлення чату для агента: підсумок (системне повідомлення) і
+        останні обміни; [] — новий чат або чат, витіснений зі сховища.
+        """
+        chat = self.store.get(chat_id)
+        if chat is None:
+            return []
+        messages = []
+        if chat.summary:
+            lines = [SUMMARY_HEADER, *(line for line, _ in chat.summary)]
+            messages.append({"role": "system", "content": "\n".join(lines)})
+        for turn in chat.turns:
+            messages.append({"role": "user", "content": turn.user})
+            messages.append({"role": "assistant", "content": turn.reply})
+        return messages
+
+    def add_turn(self, chat_id: Hashable, user_text: str, reply: str) -> None:
+        """Додає обмін; зайві за кількістю чи токенами старіші обміни йдуть у підсумок."""
+        chat = self.store.get(chat_id) or Conversation()
+        user_text, reply = user_text.strip(), reply.strip()
+        tokens = count_tokens(user_text) + count_tokens(reply) + 2 * MESSAGE_OVERHEAD
+        chat.turns.append(Turn(user_text, reply, tokens))
+        chat.turn_tokens += tokens
+        while len(chat.turns) > self.max_turns or (
+            self.max_tokens > 0 and chat.turn_tokens > self.max_tokens and len(chat.turns) > 1
+        ):
+            self._fold(chat)
+        self.store.put(chat_id, chat)
+
+    async def ahistory(self, chat_id: Hashable) -> list[dict[str, str]]:
+        """history з event loop: читання сховища (SQLite може чекати на блокування) — у потоці."""
+        return await asyncio.to_thread(self.history, chat_id)
+
+    async def aadd_turn(self, chat_id: Hashable, user_text: str, reply: str) -> None:
+        """add_turn з event loop: підрахунок токенів і запис у сховище — у потоці."""
+        await asyncio.to_thread(self.add_turn, chat_id, user_text, reply)
+
+    def _fold(self, chat: Conversation) -> None:
+        turn = chat.turns.popleft()
+        chat.turn_tokens -= turn.tokens
+        with self._lock:
+            self.summarized += 1
+        if self.summary_tokens <= 0:
+            return
+        line = summary_line(turn)
+        tokens = count_tokens(line)
+        chat.summary.append((line, tokens))
+        chat.summary_tokens += tokens
+        while chat.summary_tokens > self.summary_tokens:
+            _, dropped = chat.summary.popleft()
+            chat.summary_tokens -= dropped
+
+    def stats(self) -> dict[str, int]:
+        """Розмір сховища (чати, токени), витіснення та обміни, згорнуті в підсумок."""
+        return {**self.store.stats(), "summarized": self.summarized}
+
+    def close(self) -> None:
+        self.store.close()
+
+
+_memory: ChatMemory | None = None
+
+
+def open_chat_memory(
+    backend: str = CHAT_MEMORY_BACKEND, path: str | Path = CHAT_MEMORY_PATH
+) -> ChatMemory | None:
+    """
+    Відкриває пам'ять розмов процесу (off — None); повторний виклик — та сама.
+    Недоступний файл SQLite — пам'ять у процесі замість нього.
+    """
+    global _memory
+    if _memory is None and backend != "off":
+        store = None
+        if backend == "sqlite":
+            try:
+                store = SQLiteStore(path, CHAT_MEMORY_MAX_CHATS, CHAT_MEMORY_TTL)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning("Пам'ять чатів %s недоступна, зберігаємо в процесі: %s", path, e)
+        if store is None:
+            store = MemoryStore(CHAT_MEMORY_MAX_CHATS, CHAT_MEMORY_TTL)
+        _memory = ChatMemory(store)
+    return _memory
+
+
+def get_chat_memory() -> ChatMemory | None:
+    """Відкрита пам'ять розмов або None (вимкнено чи ще не відкрито)."""
+    return _memory
+
+
+def close_chat_memory() -> None:
+    """Закриває сховище пам'яті розмов."""
+    global _memory
+    memory, _memory = _memory, None
+    if memory is not None:
+        memory.close()
+
+
+def _collect_metrics():
+    """Розмір пам'яті розмов і витіснення — для /metrics."""
+    memory = _memory
+    if memory is None:
+        return
+    stats = memory.stats()
+    yield (
+        "weather_agent_chat_memory_chats",
+        "gauge",
+        "Чати з історією в пам'яті розмов",
+        [({}, stats["chats"])],
+    )
+    yield (
+        "weather_agent_chat_memory_tokens",
+        "gauge",
+        "Токени історії та підсумків у пам'яті розмов",
+        [({}, stats["tokens"])],
+    )
+    yield (
+        "weather_agent_chat_memory_evicted_total",
+        "counter",
+        "Чати, витіснені з пам'яті розмов: lru (понад ліміт), ttl (неактивні)",
+        [({"reason": "lru"}, stats["evictions"]), ({"reason": "ttl"}, stats["expirations"])],
+    )
+    yield (
+        "weather_agent_chat_memory_summarized_total",
+        "counter",
+        "Обміни, згорнуті в підсумок розмови",
+        [({}, stats["summarized"])],
+    )
+
+
+register_collector(_collect_metrics)
@@ -0,0 +1,369 @@
+"""
+Метрики у форматі Prometheus (text exposition 0.0.4) без зовнішніх залежностей.
+
+Counter, Gauge і Histogram оновлюються з гарячого шляху (потоки та event loop), тож
+кожна метрика має власний lock і лише додає числа. Лічильники, які модулі вже
+рахують самі (кеші, admission control, черга чату), не дублюються: модуль реєструє
+collector, і той читає їхні stats() лише під час запиту /metrics.
+
+start_metrics_server піднімає окремий aiohttp-сервер на METRICS_HOST:METRICS_PORT
+(за замовчуванням лише localhost — метрики не мають бути доступні ззовні).
+"""
+
+import bisect
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+
+# Collector повертає сімейства метрик: (назва, тип, опис, [(мітки, значення), ...])
+Family = tuple[str, str, str, list[tuple[dict[str, str], float]]]
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+METRICS_PATH = "/metrics"
+
+# Секунди: від влучання в кеш (мілісекунди) до відповіді з кількома викликами LLM
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+LLM_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0)
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items())
+    return "{" + inner + "}"
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, description: str, labelnames: Iterable[str] = ()) -> None:
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name}: очікуються мітки {self.labelnames}, отримано {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: tuple[str, ...]) -> dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    @abstractmethod
+    def samples(self) -> list[tuple[str, dict[str, str], float]]:
+        """(назва, мітки, значення) для кожної серії метрики."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Скидає всі значення (тести, повторне підключення до реєстру)."""
+
+
+class Counter(_Metric):
+    """Лічильник, що лише зростає (назва за конвенцією закінчується на _total)."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labelnames: Iterable[str] = ()) -> None:
+        super().__init__(name, description, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        if amount < 0:
+            raise ValueError(f"{self.name}: лічильник не може зменшуватися")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> list[tuple[str, dict[str, str], float]]:
+        with self._lock:
+            return [(self.name, self._labels(key), value) for key, value in self._values.items()]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Gauge(Counter):
+    """Поточне значення, що може зростати й зменшуватися (наприклад, запити в обробці)."""
+
+    kind = "gauge"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    @contextmanager
+    def track(self, **labels: str) -> Iterator[None]:
+        """+1 на час виконання блоку."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """Розподіл значень по кошиках (cumulative buckets, sum і count, як у Prometheus)."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, description, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Ключ міток → [лічильники кошиків (не кумулятивні) + «понад останній»], сума
+        self._values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        # Перший кошик з межею >= value (len(buckets) — «понад останній»)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Записує тривалість блоку в секундах (і тоді, коли блок завершився винятком)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return sum(entry[0]) if entry else 0
+
+    def sum(self, **labels: str) -> float:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return entry[1][0] if entry else 0.0
+
+    def samples(self) -> list[tuple[str, dict[str, str], float]]:
+        result = []
+        with self._lock:
+            items = [(key, list(counts), total[0]) for key, (counts, total) in self._values.items()]
+        for key, counts, total in items:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                result.append(
+                    (f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative)
+                )
+            result.append((f"{self.name}_sum", labels, total))
+            result.append((f"{self.name}_count", labels, cumulative))
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Registry:
+    """Набір метрик і collector-ів; render() віддає їх у текстовому форматі Prometheus."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list[Callable[[], Iterable[Family]]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Метрику {metric.name} вже зареєстровано")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[Family]]) -> None:
+        """collector викликається під час кожного render()."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        families: dict[str, tuple[str, str, list[tuple[str, dict[str, str], float]]]] = {}
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        for metric in metrics:
+            families[metric.name] = (metric.kind, metric.description, metric.samples())
+        for collector in collectors:
+            for name, kind, help_text, samples in collector():
+                # Кілька collector-ів можуть доповнювати одне сімейство (різні мітки)
+                _, _, existing = families.setdefault(name, (kind, help_text, []))
+                existing.extend((name, labels, value) for labels, value in samples)
+
+        lines = []
+        for name, (kind, help_text, samples) in families.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(
+                f"{sample}{_format_labels(labels)} {_format_value(value)}"
+                for sample, labels, value in samples
+            )
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        """Обнуляє власні метрики (collector-и читають стан модулів і не змінюються)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.clear()
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, description: str, labelnames: Iterable[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, description, labelnames))
+
+
+def gauge(name: str, description: str, labelnames: Iterable[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, description, labelnames))
+
+
+def histogram(
+    name: str,
+    description: str,
+    labelnames: Iterable[str] = (),
+    buckets: Iterable[float] = LATENCY_BUCKETS,
+) -> Histogram:
+    return REGISTRY.register(Histogram(name, description, labelnames, buckets))
+
+
+# Шлях запиту: повідомлення Telegram → агент → LLM і Open-Meteo
+MESSAGE_SECONDS = histogram(
+    "weather_agent_message_seconds",
+    "Час обробки повідомлення в handle_message (з чергою чату та відправкою відповіді)",
+)
+MESSAGES_IN_FLIGHT = gauge(
+    "weather_agent_messages_in_flight", "Повідомлення, що зараз обробляються"
+)
+AGENT_SECONDS = histogram(
+    "weather_agent_ask_agent_seconds",
+    "Час відповіді агента за маршрутом: fast_path, cache, llm, busy, error",
+    ["route"],
+)
+AGENT_IN_FLIGHT = gauge("weather_agent_ask_agent_in_flight", "Запити до агента в обробці")
+LLM_SECONDS = histogram(
+    "weather_agent_llm_call_seconds", "Тривалість одного виклику моделі", buckets=LLM_BUCKETS
+)
+LLM_QUEUE_WAIT_SECONDS = histogram(
+    "weather_agent_llm_queue_wait_seconds",
+    "Очікування слоту LLM у черзі admission control: admitted — дочекались, timeout — ні",
+    ["result"],
+)
+LLM_REJECTED = counter(
+    "weather_agent_llm_rejected_total",
+    "Запити, яким admission control відмовив: full — черга повна, timeout — час очікування",
+    ["reason"],
+)
+UPSTREAM_SECONDS = histogram(
+    "weather_agent_upstream_seconds",
+    "Тривалість HTTP-запиту до Open-Meteo: geocode, forecast, forecast_batch, forecast_range",
+    ["endpoint"],
+)
+ERRORS = counter(
+    "weather_agent_errors_total", "Помилки за компонентом і типом винятку", ["component", "type"]
+)
+TOKENS = counter("weather_agent_llm_tokens_total", "Токени LLM: input, output", ["type"])
+MESSAGE_TOKENS = histogram(
+    "weather_agent_message_tokens",
+    "Токени LLM на один запит користувача (input, output) — для вартості повідомлення",
+    ["type"],
+    buckets=TOKEN_BUCKETS,
+)
+PROMPT_TOKENS = histogram(
+    "weather_agent_prompt_tokens",
+    "Токени одного виклику моделі за частиною промпта (system, tools, history, user, "
+    "tool_results) і версією промпта — оцінка до відправки",
+    ["part", "prompt_version"],
+    buckets=TOKEN_BUCKETS,
+)
+HISTORY_TRIMMED = counter(
+    "weather_agent_history_trimmed_total",
+    "Повідомлення історії, відкинуті, щоб промпт вклався в MAX_CONTEXT_TOKENS",
+)
+
+
+def record_error(component: str, error: BaseException) -> None:
+    """+1 до weather_agent_errors_total з типом винятку."""
+    ERRORS.inc(component=component, type=type(error).__name__)
+
+
+def record_tokens(usage: dict[str, int]) -> None:
+    """Токени одного запиту користувача (usage_metadata повідомлень моделі, підсумовані)."""
+    for kind in ("input", "output"):
+        count = usage.get(f"{kind}_tokens", 0)
+        TOKENS.inc(count, type=kind)
+        MESSAGE_TOKENS.observe(count, type=kind)
+
+
+def record_prompt_tokens(parts: dict[str, int], prompt_version: str) -> None:
+    """Токени частин промпта одного виклику моделі."""
+    for part, count in parts.items():
+        PROMPT_TOKENS.observe(count, part=part, prompt_version=prompt_version)
+
+
+def render() -> str:
+    """Усі метрики процесу в текстовому форматі Prometheus."""
+    return REGISTRY.render()
+
+
+def register_collector(collector: Callable[[], Iterable[Family]]) -> None:
+    REGISTRY.register_collector(collector)
+
+
+async def start_metrics_server(host: str, port: int):
+    """Запускає aiohttp-сервер з GET /metrics; повертає web.AppRunner (закрити — cleanup())."""
+    from aiohttp import web
+
+    async def handle(_request: web.Request) -> web.Response:
+        return web.Response(body=render().encode(), headers={"Content-Type": CONTENT_TYPE})
+
+    app = web.Application()
+    app.router.add_get(METRICS_PATH, handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
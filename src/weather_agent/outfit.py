@@ -0,0 +1,78 @@
+"""Правила підбору одягу за поточною погодою (без LLM)."""
+
+# Діапазони WMO-кодів, що впливають на одяг
+DRIZZLE_RAIN_CODES = set(range(51, 68)) | {80, 81, 82}
+SNOW_CODES = set(range(71, 78)) | {85, 86}
+THUNDER_CODES = {95, 96, 99}
+
+# (верхня межа відчутної температури, базовий комплект)
+LAYERS = (
+    (-15.0, "пуховик або дуже тепла зимова куртка, термобілизна, тепла шапка, шарф, рукавиці"),
+    (-5.0, "зимова куртка, светр, шапка, шарф і рукавички"),
+    (5.0, "тепла куртка або пальто, светр чи худі, шапка"),
+    (12.0, "демісезонна куртка або пальто, светр чи кофта"),
+    (18.0, "легка куртка або вітровка, кофта з довгим рукавом"),
+    (24.0, "футболка чи сорочка, легкі штани; на вечір — легка кофта"),
+)
+HOT_OUTFIT = "легкий одяг з натуральних тканин: футболка, шорти або сукня, головний убір від сонця"
+
+
+def shoes(feels: float, wet: bool, snow: bool) -> str:
+    """Взуття за відчутною температурою та опадами (спільне з прогнозом на період)."""
+    if snow or feels <= -5:
+        return "утеплене взуття з неслизькою підошвою"
+    if wet:
+        return "непромокальне взуття"
+    if feels <= 12:
+        return "закрите взуття"
+    if feels <= 24:
+        return "кросівки або мокасини"
+    return "сандалі або легкі кросівки"
+
+
+def recommend_outfit(current: dict) -> list[str]:
+    """
+    Рекомендації для блоку current з Open-Meteo: базовий комплект, взуття та
+    доповнення за опадами, вітром і вологістю. Повертає список коротких пунктів.
+    """
+    temp = current.get("temperature_2m")
+    feels = current.get("apparent_temperature")
+    if feels is None:
+        feels = temp if temp is not None else 10.0
+    code = int(current.get("weather_code") or 0)
+    wind = current.get("wind_speed_10m") or 0.0
+    humidity = current.get("relative_humidity_2m") or 0.0
+
+    wet = code in DRIZZLE_RAIN_CODES or code in THUNDER_CODES
+    snow = code in SNOW_CODES
+
+    base = next((items for limit, items in LAYERS if feels <= limit), HOT_OUTFIT)
+    tips = [base, shoes(feels, wet, snow)]
+    if wet:
+        tips.append("парасолька або дощовик")
+    if code in THUNDER_CODES:
+        tips.append("під час грози краще перечекати в приміщенні")
+    if snow and feels > -5:
+        tips.append("куртка з капюшоном, що не промокає від мокрого снігу")
+    if wind >= 30:
+        tips.append("вітрозахисний верхній шар і капюшон — вітер сильний")
+    elif wind >= 20 and feels <= 12:
+        tips.append("шарф або високий комір від вітру")
+    if humidity >= 85 and feels <= 5:
+        tips.append("вологий холод відчувається сильніше — краще на шар тепліше")
+    if code <= 1 and feels >= 20:
+        tips.append("сонцезахисні окуляри та крем від сонця")
+    return tips
+
+
+def format_outfit_answer(place: str, weather_text: str, current: dict, warm: bool = True) -> str:
+    """
+    Готова відповідь користувачу: погода та список порад.
+    place — місце так, як його назвав користувач («у Києві», «у місті Львів»).
+    """
+    weather_text = weather_text[:1].lower() + weather_text[1:]
+    lines = [f"Зараз {place}: {weather_text}", "", "Що вдягнути:"]
+    lines.extend(f"• {tip}" for tip in recommend_outfit(current))
+    if warm:
+        lines.extend(["", "Гарного дня і бережіть себе!"])
+    return "\n".join(lines)
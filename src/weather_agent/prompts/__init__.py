@@ -6,7 +6,9 @@ from weather_agent.config import PROMPT_VERSION
 
 _PROMPTS_DIR = Path(__file__).resolve().parent
 _FALLBACK_PROMPT = """Ти — помічник, який радить, що одягнути за погодою. Відповідай лише українською.
-Завжди спочатку викликай інструмент get_weather для міста, про яке питають, потім дай коротку рекомендацію по одягу. Будь лаконічним."""
+Завжди спочатку викликай інструмент get_weather для міста, про яке питають, потім дай коротку рекомендацію по одягу. Будь лаконічним.
+Для кількох міст одразу викликай get_weather_many зі списком міст.
+Для ранку, вечора, завтра чи вихідних викликай get_forecast з відповідним period."""
 
 
 def get_system_prompt(version: str | None = None) -> str:
@@ -0,0 +1,121 @@
+"""
+Кеш відповідей агента.
+
+Двоє користувачів, що питають про Київ в одному 15-хвилинному вікні, отримують
+по суті ту саму пораду, тож ключ — не текст запиту, а (місце, «кошик» погоди,
+версія промпта, модель). Місце — округлені координати з геокодування, тож «Київ»,
+«у Києві» й «Kyiv» ведуть до одного запису. Кошик квантує ті самі поля, з яких
+tool складає текст для моделі: відчутну температуру, групу умов (WMO) і силу
+вітру; для прогнозу на період — ще дату початку вікна й імовірність опадів.
+Tool-и кладуть (місце, кошик) в артефакт результату, а перший виклик моделі (вибір
+tool) лишається; з кешу береться другий — сама відповідь
+(cache_middleware.ResponseCacheMiddleware).
+"""
+
+from collections.abc import Hashable, Iterator, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+from weather_agent.cache import TTLCache
+from weather_agent.config import (
+    DEFAULT_MODEL,
+    FORECAST_COORD_PRECISION,
+    PROMPT_VERSION,
+    RESPONSE_CACHE_ENABLED,
+    RESPONSE_CACHE_SIZE,
+    RESPONSE_CACHE_TTL,
+)
+
+# Ширина температурного кошика, °C
+_TEMP_BAND = 5
+# Ширина кошика ймовірності опадів, %
+_PRECIP_BAND = 25
+
+# Вимикає кеш у поточному контексті (оцінювання якості: кожна відповідь — від моделі)
+_bypass: ContextVar[bool] = ContextVar("response_cache_bypass", default=False)
+
+
+@contextmanager
+def bypass_response_cache() -> Iterator[None]:
+    """Усередині блоку кеш відповідей не читається й не поповнюється."""
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def _condition_group(code: int) -> str:
+    """Група WMO-коду, важлива для одягу."""
+    if code <= 1:
+        return "clear"
+    if code <= 3:
+        return "cloudy"
+    if code in (45, 48):
+        return "fog"
+    if 71 <= code <= 77 or code in (85, 86):
+        return "snow"
+    if code >= 95:
+        return "thunder"
+    if 51 <= code <= 82:
+        return "rain"
+    return "other"
+
+
+def _wind_band(speed: float) -> str:
+    if speed < 15:
+        return "calm"
+    if speed < 30:
+        return "breezy"
+    return "windy"
+
+
+def _temp_band(temp: float | None) -> int:
+    return int(temp // _TEMP_BAND) if temp is not None else 0
+
+
+def place(coords: tuple[float, float, str]) -> tuple[float, float]:
+    """Місце для ключа: координати, округлені як у кеші прогнозу."""
+    lat, lon, _tz = coords
+    return (round(lat, FORECAST_COORD_PRECISION), round(lon, FORECAST_COORD_PRECISION))
+
+
+def weather_bucket(current: dict) -> tuple[int, str, str]:
+    """(температурний кошик, група умов, сила вітру) для блоку current."""
+    temp = current.get("apparent_temperature")
+    if temp is None:
+        temp = current.get("temperature_2m")
+    code = int(current.get("weather_code") or 0)
+    wind = current.get("wind_speed_10m") or 0.0
+    return _temp_band(temp), _condition_group(code), _wind_band(wind)
+
+
+def forecast_bucket(summary: Any) -> tuple:
+    """
+    Кошик для підсумку прогнозу на період (forecast.WindowSummary): дата початку
+    вікна, кошики мінімуму й максимуму відчутної температури, групи умов, сила
+    поривів і ймовірність опадів.
+    """
+    return (
+        str(summary.start)[:10],
+        _temp_band(float(summary.feels_min)),
+        _temp_band(float(summary.feels_max)),
+        tuple(sorted({_condition_group(int(code)) for code in summary.codes})),
+        _wind_band(float(summary.gust_max)),
+        int(float(summary.precip_probability) // _PRECIP_BAND),
+    )
+
+
+def response_key(entries: Sequence[Hashable]) -> Hashable | None:
+    """
+    Ключ кешу: результати tool-ів (tool, період, місце, кошик погоди), версія промпта,
+    модель. None — кеш вимкнено (зокрема bypass_response_cache) або tool не викликались.
+    """
+    if not RESPONSE_CACHE_ENABLED or _bypass.get() or not entries:
+        return None
+    return (tuple(sorted(entries, key=repr)), PROMPT_VERSION, DEFAULT_MODEL)
+
+
+# TTL за замовчуванням — одне вікно оновлення погоди
+response_cache = TTLCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL)
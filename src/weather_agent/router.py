@@ -0,0 +1,74 @@
+"""
+Розпізнавання простих запитів «що вдягнути в <місті>» без LLM.
+
+Повертає назву одного міста лише для однозначних формулювань на зараз/сьогодні;
+усе інше (кілька міст, завтра/ввечері/вихідні, будь-які уточнення) лишається
+для агента.
+"""
+
+import re
+from typing import NamedTuple
+
+from weather_agent.gazetteer import Gazetteer
+
+
+class OutfitQuery(NamedTuple):
+    """Розпізнаний запит: місто для get_weather і як його назвав користувач («у Києві»)."""
+
+    city: str
+    place: str
+
+
+_WEAR = r"(?:[ов]дяг(?:нути|ти)(?:ся)?|одягатися|вдягатися)"
+_NOW = r"(?:сьогодні|зараз)"
+# Назва міста: до трьох слів з літер, апострофів і дефісів
+_CITY = r"(?P<city>[^\W\d_][\w'’ʼ-]*(?:\s+[^\W\d_][\w'’ʼ-]*){0,2}?)"
+_END = r"\s*[?.!…]*\s*$"
+
+_PATTERNS = [
+    # «Що одягнути в Києві?», «Порадь, що вдягнути сьогодні у Львові»
+    re.compile(
+        rf"^(?:порадь(?:те)?,?\s+)?(?:що|як)\s+{_WEAR}(?:\s+{_NOW})?\s+(?P<prep>в|у|во)\s+"
+        rf"{_CITY}(?:\s+{_NOW})?{_END}",
+        re.IGNORECASE,
+    ),
+    # «Погода в Одесі — що вдягнути?», «У Києві що одягнути?»
+    re.compile(
+        rf"^(?:погода\s+)?(?P<prep>в|у)\s+{_CITY}\s*(?:[—–-]|,)?\s*(?:що|як)\s+{_WEAR}"
+        rf"(?:\s+{_NOW})?{_END}",
+        re.IGNORECASE,
+    ),
+]
+_BARE_CITY = re.compile(rf"^{_CITY}{_END}")
+
+# Слова, з якими запит уже не «простий»: інший час або кілька міст
+_COMPLEX = re.compile(
+    r"\b(?:чи|і|й|та|або|завтра|післязавтра|ввечері|вечором|вночі|зранку|вранці|"
+    r"вихідн\w*|тиж\w*|понеділ\w*|субот\w*|неділ\w*)\b",
+    re.IGNORECASE,
+)
+
+
+def match_outfit_question(text: str, gazetteer: Gazetteer | None = None) -> OutfitQuery | None:
+    """
+    Місто з простого запиту про одяг або None.
+    Голу назву міста («Київ») приймаємо лише якщо вона є в газетирі.
+    """
+    text = (text or "").strip()
+    if not text or len(text) > 120:
+        return None
+    for pattern in _PATTERNS:
+        match = pattern.match(text)
+        if match:
+            city = match.group("city").strip()
+            if _COMPLEX.search(city):
+                return None
+            return OutfitQuery(city, f"{match.group('prep').lower()} {city}")
+    if _COMPLEX.search(text):
+        return None
+    match = _BARE_CITY.match(text)
+    if match and gazetteer is not None:
+        hit = gazetteer.lookup(match.group("city"))
+        if hit:
+            return OutfitQuery(match.group("city").strip(), f"у місті {hit[3]}")
+    return None
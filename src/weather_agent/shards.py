@@ -0,0 +1,189 @@
+"""
+Кілька процесів-обробників, розподілених за chat_id (BOT_WORKERS > 1).
+
+Головний процес приймає оновлення один раз (polling або webhook) і нічого не
+обробляє сам: Application з build_dispatcher пересилає кожне оновлення в
+multiprocessing-чергу процесу shard_for(chat_id). Усі повідомлення одного чату
+потрапляють в один процес, тому порядок у чаті зберігається (ChatQueue в bot.py).
+Кожен процес має власний event loop, GIL і Application для відповідей.
+
+Кеші (геокодування, прогноз, відповіді агента) живуть окремо в кожному процесі.
+Це нічого не коштує на синхронізацію, але кожен процес прогріває кеш сам. Поки кеш
+холодний, Open-Meteo може отримати до BOT_WORKERS однакових запитів на місто, а
+частка влучань у кеш нижча, ніж в одному процесі. Прогноз кешується на 15 хвилин,
+тож для погоди це прийнятно. Із DISK_CACHE_PATH процеси ділять дисковий рівень
+(SQLite у режимі WAL): кожен дописує туди свої результати й прогрівається з нього
+на старті.
+
+Зупинка: кожен процес отримує sentinel, дообробляє вже отримані оновлення і
+закривається; головний процес чекає на них до SHARD_DRAIN_TIMEOUT секунд.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import signal
+import zlib
+from collections.abc import Callable
+
+from telegram import Update
+from telegram.ext import Application, ContextTypes, TypeHandler
+
+from weather_agent.config import (
+    BOT_CONCURRENT_UPDATES,
+    BOT_WORKERS,
+    METRICS_PORT,
+    SHARD_DRAIN_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+# Сигнал процесу-обробнику: нових оновлень не буде
+_STOP = None
+
+
+def shard_for(chat_id: int | None, shards: int) -> int:
+    """Номер процесу для чату: стабільний між перезапусками (crc32, а не hash())."""
+    if chat_id is None or shards <= 1:
+        return 0
+    return zlib.crc32(str(chat_id).encode()) % shards
+
+
+async def serve_shard(application: Application, queue, concurrency: int) -> int:
+    """
+    Обробляє оновлення з queue (dict у форматі Bot API), доки не прийде sentinel;
+    одночасно — не більше concurrency. Повертає кількість оброблених оновлень.
+    """
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(max(1, concurrency))
+    tasks: set[asyncio.Task] = set()
+    processed = 0
+
+    async def process(update: Update) -> None:
+        nonlocal processed
+        try:
+            await application.process_update(update)
+            processed += 1
+        finally:
+            slots.release()
+
+    while True:
+        data = await loop.run_in_executor(None, queue.get)
+        if data is _STOP:
+            break
+        await slots.acquire()
+        task = asyncio.create_task(process(Update.de_json(data, application.bot)))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    # Дообробляємо те, що вже отримали
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return processed
+
+
+async def _run_shard(index: int, queue, token: str) -> None:
+    from weather_agent.bot import build_application
+
+    # Кожен процес віддає власні метрики на окремому порту
+    application = build_application(token, METRICS_PORT + index if METRICS_PORT else 0)
+    await application.initialize()
+    if application.post_init:
+        await application.post_init(application)
+    try:
+        processed = await serve_shard(application, queue, BOT_CONCURRENT_UPDATES)
+        logger.info("Обробник %d зупинено, оброблено оновлень: %d", index, processed)
+    finally:
+        await application.shutdown()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
+
+
+def worker_main(index: int, queue, token: str) -> None:
+    """Точка входу процесу-обробника."""
+    # Ctrl+C отримує вся група процесів; обробник зупиняється лише за sentinel від головного
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.basicConfig(
+        format=f"%(asctime)s - shard {index} - %(name)s - %(levelname)s - %(message)s",
+        level=logging.INFO,
+    )
+    asyncio.run(_run_shard(index, queue, token))
+
+
+class ShardRouter:
+    """Процеси-обробники та їхні черги; dispatch надсилає оновлення в потрібний процес."""
+
+    def __init__(
+        self,
+        token: str,
+        workers: int = BOT_WORKERS,
+        context=None,
+        target: Callable = worker_main,
+    ) -> None:
+        self.token = token
+        self.workers = workers
+        self._context = context or multiprocessing.get_context("spawn")
+        self._target = target
+        self._queues: list = []
+        self._processes: list = []
+        self._dispatched = [0] * workers
+
+    def start(self) -> None:
+        """Запускає процеси-обробники."""
+        for index in range(self.workers):
+            queue = self._context.Queue()
+            process = self._context.Process(
+                target=self._target,
+                args=(index, queue, self.token),
+                name=f"weather-agent-shard-{index}",
+                daemon=False,
+            )
+            process.start()
+            self._queues.append(queue)
+            self._processes.append(process)
+
+    def dispatch(self, update: dict, chat_id: int | None) -> int:
+        """Кладе оновлення в чергу процесу для chat_id; повертає номер процесу."""
+        index = shard_for(chat_id, self.workers)
+        self._queues[index].put(update)
+        self._dispatched[index] += 1
+        return index
+
+    def stop(self, timeout: float = SHARD_DRAIN_TIMEOUT) -> None:
+        """Просить процеси дообробити черги й завершитися; після timeout — terminate."""
+        for queue in self._queues:
+            queue.put(_STOP)
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                logger.warning("Обробник %s не завершився вчасно — terminate", process.name)
+                process.terminate()
+                process.join()
+        for queue in self._queues:
+            queue.close()
+        self._queues, self._processes = [], []
+
+    def stats(self) -> dict:
+        """Кількість надісланих оновлень і стан кожного процесу."""
+        return {
+            "workers": self.workers,
+            "alive": sum(1 for process in self._processes if process.is_alive()),
+            "dispatched": list(self._dispatched),
+        }
+
+
+def build_dispatcher(token: str, router: ShardRouter) -> Application:
+    """
+    Application головного процесу: лише пересилає оновлення обробникам (polling або
+    webhook працюють як звичайно); при зупинці чекає, поки обробники дообробляють чергу.
+    """
+
+    async def forward(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        chat_id = update.effective_chat.id if update.effective_chat else None
+        router.dispatch(update.to_dict(), chat_id)
+
+    async def stop_workers(application: Application) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, router.stop)
+
+    app = Application.builder().token(token).post_shutdown(stop_workers).build()
+    app.add_handler(TypeHandler(Update, forward))
+    return app
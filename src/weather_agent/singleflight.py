@@ -0,0 +1,104 @@
+"""
+Single-flight: одночасні виклики з однаковим ключем виконуються один раз.
+
+Перший виклик («лідер») робить запит, решта чекають на його результат (або виняток).
+Працює і з потоків (do — шлях asyncio.to_thread), і з event loop (do_async);
+синхронні та асинхронні виклики з тим самим ключем ділять один запит.
+"""
+
+import asyncio
+import threading
+from collections.abc import Awaitable, Callable, Hashable
+from concurrent.futures import Future
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Об'єднує одночасні виклики з однаковим ключем в один виклик."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._inflight: dict[Hashable, Future] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self.calls = 0
+        self.executions = 0
+        self.deduplicated = 0
+
+    def _join(self, key: Hashable) -> tuple[Future, bool]:
+        """Повертає (future, True для лідера)."""
+        with self._lock:
+            self.calls += 1
+            future = self._inflight.get(key)
+            if future is not None:
+                self.deduplicated += 1
+                return future, False
+            future = Future()
+            # Після RUNNING future не можна скасувати з боку очікувачів
+            future.set_running_or_notify_cancel()
+            self._inflight[key] = future
+            self.executions += 1
+            return future, True
+
+    def _finish(self, key: Hashable) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """Виконує fn або чекає на вже запущений виклик з тим самим ключем (блокує потік)."""
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as exc:
+            self._finish(key)
+            future.set_exception(exc)
+            raise
+        self._finish(key)
+        future.set_result(result)
+        return result
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Асинхронний варіант do: fn — фабрика корутини. Запит лідера виконується в
+        окремій задачі, тож скасування будь-якого виклику (і лідера) не скасовує
+        спільний запит для решти.
+        """
+        future, leader = self._join(key)
+        if leader:
+            task = asyncio.ensure_future(self._run(key, future, fn))
+            # Посилання на задачу, щоб її не прибрав GC до завершення
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    async def _run(self, key: Hashable, future: Future, fn: Callable[[], Awaitable[T]]) -> None:
+        """Виконує fn і передає результат (або виняток) у спільний future."""
+        try:
+            result = await fn()
+        except BaseException as exc:
+            self._finish(key)
+            future.set_exception(exc)
+            # Звичайні помилки отримують виклики через future; скасування задачі
+            # (зупинка loop) і KeyboardInterrupt — далі
+            if not isinstance(exc, Exception):
+                raise
+            return
+        self._finish(key)
+        future.set_result(result)
+
+    def stats(self) -> dict[str, int]:
+        """Лічильники: усього викликів, реальних виконань, зекономлених (дедуплікованих)."""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "deduplicated": self.deduplicated,
+                "inflight": len(self._inflight),
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.calls = self.executions = self.deduplicated = 0
@@ -0,0 +1,168 @@
+"""
+Підрахунок токенів промпта та бюджет контексту.
+
+Кожен виклик моделі несе системний промпт, схему tool-ів, історію розмови, запит
+користувача й результати tool-ів. prompt_breakdown рахує токени кожної частини
+(метрика weather_agent_prompt_tokens, scripts/token_report.py), а fit_history
+відкидає найстаріші повідомлення історії, щоб увесь промпт вклався в
+MAX_CONTEXT_TOKENS.
+
+Токенізатор — tiktoken для DEFAULT_MODEL. Його словник завантажується з мережі при
+першому використанні, тож на гарячому шляху він не вантажиться: load_encoder кличе
+прогрів агента (у фоні) або звіт. Поки словника немає (чи без мережі взагалі),
+токени оцінюються за довжиною тексту в байтах UTF-8 — з запасом для кирилиці.
+"""
+
+import json
+import logging
+import math
+import threading
+from collections.abc import Sequence
+from typing import Any, NamedTuple
+
+from weather_agent.config import DEFAULT_MODEL, MAX_CONTEXT_TOKENS
+
+logger = logging.getLogger(__name__)
+
+# Службові токени на кожне повідомлення чату (роль і розділювачі), як рахує OpenAI
+MESSAGE_OVERHEAD = 3
+# Оцінка без токенізатора: байтів UTF-8 на токен (кирилиця — 2 байти на літеру)
+BYTES_PER_TOKEN = 4
+FALLBACK_ENCODING = "o200k_base"
+
+# None — ще не завантажували; False — tiktoken недоступний, лишається оцінка
+_encoder: Any = None
+_encoder_lock = threading.Lock()
+
+
+class PromptTokens(NamedTuple):
+    """Токени одного виклику моделі за частинами промпта."""
+
+    system: int = 0
+    tools: int = 0  # схема tool-ів
+    history: int = 0  # попередні повідомлення розмови
+    user: int = 0  # останній запит користувача
+    tool_results: int = 0  # виклики tool-ів поточного ходу та їхні результати
+
+    @property
+    def total(self) -> int:
+        return sum(self)
+
+
+def load_encoder() -> str:
+    """
+    Завантажує tiktoken-кодування для DEFAULT_MODEL (один раз, може йти в мережу).
+    Повертає назву кодування або «estimate», якщо токенізатор недоступний.
+    """
+    global _encoder
+    with _encoder_lock:
+        if _encoder is None:
+            try:
+                import tiktoken
+
+                try:
+                    _encoder = tiktoken.encoding_for_model(DEFAULT_MODEL)
+                except KeyError:
+                    _encoder = tiktoken.get_encoding(FALLBACK_ENCODING)
+            except (ImportError, OSError, ValueError) as e:
+                logger.warning("tiktoken недоступний, токени рахуються оцінкою: %s", e)
+                _encoder = False
+    return _encoder.name if _encoder else "estimate"
+
+
+def encoder_name() -> str:
+    """Чим зараз рахуються токени: назва кодування tiktoken або «estimate»."""
+    return _encoder.name if _encoder else "estimate"
+
+
+def count_tokens(text: str) -> int:
+    """Токени тексту: tiktoken, якщо словник уже завантажено, інакше оцінка."""
+    if not text:
+        return 0
+    encoder = _encoder
+    if encoder:
+        return len(encoder.encode(text, disallowed_special=()))
+    return math.ceil(len(text.encode("utf-8")) / BYTES_PER_TOKEN)
+
+
+def _content_text(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    return "".join(p.get("text", "") if isinstance(p, dict) else str(p) for p in content or [])
+
+
+def _field(message: Any, name: str) -> Any:
+    if isinstance(message, dict):
+        return message.get(name)
+    return getattr(message, name, None)
+
+
+def _role(message: Any) -> str:
+    """Роль повідомлення: LangChain-тип (human, ai, tool, system) або role зі словника."""
+    role = _field(message, "type") or _field(message, "role") or ""
+    return {"user": "human", "assistant": "ai"}.get(role, role)
+
+
+def message_tokens(message: Any) -> int:
+    """Токени одного повідомлення (BaseMessage або {"role", "content"}) з викликами tool."""
+    tokens = MESSAGE_OVERHEAD + count_tokens(_content_text(_field(message, "content")))
+    for call in _field(message, "tool_calls") or []:
+        args = json.dumps(call.get("args", {}), ensure_ascii=False)
+        tokens += count_tokens(call.get("name", "")) + count_tokens(args)
+    return tokens
+
+
+def tools_tokens(tools: Sequence[dict] | None) -> int:
+    """Токени схеми tool-ів (формат OpenAI), що йде з кожним викликом моделі."""
+    if not tools:
+        return 0
+    return count_tokens(json.dumps(list(tools), ensure_ascii=False, separators=(",", ":")))
+
+
+def prompt_breakdown(messages: Sequence[Any], tools: Sequence[dict] | None = None) -> PromptTokens:
+    """Розкладає промпт одного виклику моделі на частини (див. PromptTokens)."""
+    last_user = max((i for i, m in enumerate(messages) if _role(m) == "human"), default=-1)
+    parts = dict.fromkeys(PromptTokens._fields, 0)
+    parts["tools"] = tools_tokens(tools)
+    for i, message in enumerate(messages):
+        role = _role(message)
+        if role == "system":
+            part = "system"
+        elif i == last_user:
+            part = "user"
+        elif i < last_user:
+            part = "history"
+        else:
+            part = "tool_results"
+        parts[part] += message_tokens(message)
+    return PromptTokens(**parts)
+
+
+def fit_history(
+    history: Sequence[Any], budget: int | None = None, reserved: int = 0
+) -> tuple[list[Any], int]:
+    """
+    Найновіші повідомлення історії, що разом з reserved (системний промпт, схема
+    tool-ів, запит) вкладаються в budget токенів (None — MAX_CONTEXT_TOKENS, 0 — без
+    обмеження). Історія завжди починається з повідомлення користувача, тож виклик tool
+    не лишається без свого результату. Системні повідомлення на початку історії
+    (підсумок старішої розмови) лишаються завжди, їхні токени рахуються в бюджет.
+    Повертає (історія, скільки повідомлень відкинуто).
+    """
+    budget = MAX_CONTEXT_TOKENS if budget is None else budget
+    history = list(history)
+    pinned = 0
+    while pinned < len(history) and _role(history[pinned]) == "system":
+        pinned += 1
+    if budget <= 0 or len(history) == pinned:
+        return history, 0
+    available = budget - reserved - sum(message_tokens(m) for m in history[:pinned])
+    start = len(history)
+    for i in range(len(history) - 1, pinned - 1, -1):
+        available -= message_tokens(history[i])
+        if available < 0:
+            break
+        start = i
+    while start < len(history) and _role(history[start]) != "human":
+        start += 1
+    return history[:pinned] + history[start:], start - pinned
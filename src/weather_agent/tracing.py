@@ -0,0 +1,269 @@
+"""
+Трасування запиту span-ами: handle_message → ask_agent → виклики моделі, tool-и, HTTP.
+
+Кожне оновлення Telegram отримує власний trace_id. Поточний span живе в contextvars,
+тож вкладені span-и (ask_agent усередині handle_message, HTTP-запит усередині tool)
+знаходять батька самі — і в asyncio-задачах, і в asyncio.to_thread, і в потоках, куди
+LangChain копіює контекст.
+
+Завершені span-и передаються експортеру: JsonlExporter (рядок JSON на span, за
+замовчуванням) або OTLPExporter (extra «otlp»: opentelemetry-sdk та
+opentelemetry-exporter-otlp-proto-http). Власний експортер — будь-який клас з
+export(span) і shutdown().
+
+Поки експортер не встановлено (TRACING_ENABLED=false), span() повертає спільний
+порожній span: один виклик функції й перевірка глобальної змінної на span.
+"""
+
+import json
+import logging
+import secrets
+import threading
+import time
+import traceback
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any
+
+from weather_agent.config import TRACE_EXPORTER, TRACE_PATH, TRACING_ENABLED
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    """Одна операція трасування: назва, ідентифікатори, час, атрибути та статус."""
+
+    __slots__ = (
+        "attributes",
+        "end_ns",
+        "error",
+        "name",
+        "parent_id",
+        "span_id",
+        "start_ns",
+        "trace_id",
+    )
+
+    def __init__(self, name: str, parent: "Span | None", attributes: dict[str, Any]) -> None:
+        self.name = name
+        # 128-бітний trace_id і 64-бітний span_id — ті самі розміри, що й в OpenTelemetry
+        self.trace_id = parent.trace_id if parent is not None else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes = attributes
+        self.error: str | None = None
+        self.start_ns = time.time_ns()
+        self.end_ns: int | None = None
+
+    def set(self, **attributes: Any) -> None:
+        """Додає атрибути (наприклад, результат, відомий лише наприкінці)."""
+        self.attributes.update(attributes)
+
+    def end(self, error: BaseException | None = None) -> None:
+        """Завершує span і передає його експортеру (повторний виклик нічого не робить)."""
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = "".join(traceback.format_exception_only(type(error), error)).strip()
+        exporter = _exporter
+        if exporter is not None:
+            try:
+                exporter.export(self)
+            except (OSError, ValueError, TypeError, RuntimeError) as e:
+                # Трасування не має ламати відповідь користувачу: повний диск чи закритий
+                # файл (jsonl), несеріалізовний атрибут, зупинений процесор OpenTelemetry
+                logger.warning("Не вдалося експортувати span %s: %s", self.name, e)
+
+    def to_dict(self) -> dict[str, Any]:
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start_ns / 1e9,
+            "duration_ms": round((end_ns - self.start_ns) / 1e6, 3),
+            "status": "error" if self.error else "ok",
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Span, коли трасування вимкнено: нічого не пише і нічого не коштує."""
+
+    __slots__ = ()
+    trace_id = None
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+    def end(self, error: BaseException | None = None) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current: ContextVar[Span | None] = ContextVar("weather_agent_span", default=None)
+_exporter = None
+
+
+@contextmanager
+def _active(span: Span) -> Iterator[Span]:
+    token = _current.set(span)
+    try:
+        yield span
+    except Exception as e:
+        span.end(e)
+        raise
+    finally:
+        try:
+            _current.reset(token)
+        except ValueError:
+            # Async-генератор закрили з іншого контексту (наприклад, при зупинці loop)
+            pass
+        span.end()
+
+
+def span(name: str, **attributes: Any):
+    """
+    Контекстний менеджер span-а — дочірнього до поточного або кореневого (новий
+    trace_id). Виняток з блоку позначає span як помилковий і пролітає далі.
+
+        with span("http.geocode", city=city) as s:
+            ...
+            s.set(status=200)
+    """
+    if _exporter is None:
+        return NOOP_SPAN
+    return _active(Span(name, _current.get(), attributes))
+
+
+def start_span(name: str, **attributes: Any) -> Span | _NoopSpan:
+    """
+    Span без зміни поточного контексту — для callback-ів, де початок і кінець операції
+    приходять окремими викликами. Завершується явним span.end().
+    """
+    if _exporter is None:
+        return NOOP_SPAN
+    return Span(name, _current.get(), attributes)
+
+
+def current_trace_id() -> str | None:
+    """trace_id поточного запиту або None (поза span-ом чи з вимкненим трасуванням)."""
+    current = _current.get()
+    return current.trace_id if current is not None else None
+
+
+class JsonlExporter:
+    """Дописує кожен завершений span рядком JSON у файл (безпечно для потоків)."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._file = self.path.open("a", encoding="utf-8", buffering=1)
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class OTLPExporter:
+    """
+    Передає span-и в OpenTelemetry Collector (OTLP/HTTP) зі збереженням trace_id і
+    span_id. Адреса й заголовки — стандартні OTEL_EXPORTER_OTLP_* змінні середовища.
+    """
+
+    def __init__(self, service_name: str = "weather-agent", span_exporter=None) -> None:
+        """span_exporter — будь-який SpanExporter OpenTelemetry SDK (None — OTLP/HTTP)."""
+        try:
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+            if span_exporter is None:
+                from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+                    OTLPSpanExporter,
+                )
+
+                span_exporter = OTLPSpanExporter()
+        except ImportError:
+            raise SystemExit(
+                "TRACE_EXPORTER=otlp потребує пакетів opentelemetry-sdk і "
+                "opentelemetry-exporter-otlp-proto-http (pip install '.[otlp]')."
+            ) from None
+        self._resource = Resource.create({"service.name": service_name})
+        self._processor = BatchSpanProcessor(span_exporter)
+
+    def _context(self, trace_id: str, span_id: str):
+        from opentelemetry.trace import SpanContext, TraceFlags
+
+        return SpanContext(
+            int(trace_id, 16),
+            int(span_id, 16),
+            is_remote=False,
+            trace_flags=TraceFlags(TraceFlags.SAMPLED),
+        )
+
+    def export(self, span: Span) -> None:
+        from opentelemetry.sdk.trace import ReadableSpan
+        from opentelemetry.trace import Status, StatusCode
+
+        status = Status(StatusCode.ERROR, span.error) if span.error else Status(StatusCode.OK)
+        attributes = {
+            k: v if isinstance(v, (str, bool, int, float)) else str(v)
+            for k, v in span.attributes.items()
+            if v is not None
+        }
+        self._processor.on_end(
+            ReadableSpan(
+                name=span.name,
+                context=self._context(span.trace_id, span.span_id),
+                parent=self._context(span.trace_id, span.parent_id) if span.parent_id else None,
+                resource=self._resource,
+                attributes=attributes,
+                status=status,
+                start_time=span.start_ns,
+                end_time=span.end_ns,
+            )
+        )
+
+    def shutdown(self) -> None:
+        self._processor.shutdown()
+
+
+def set_exporter(exporter) -> None:
+    """Вмикає трасування з exporter (None — вимикає); попередній експортер закривається."""
+    global _exporter
+    previous, _exporter = _exporter, exporter
+    if previous is not None and previous is not exporter:
+        previous.shutdown()
+
+
+def setup_tracing(
+    enabled: bool = TRACING_ENABLED, kind: str = TRACE_EXPORTER, path: str = TRACE_PATH
+) -> None:
+    """Вмикає трасування з експортером із конфігу (TRACE_EXPORTER: jsonl або otlp)."""
+    if not enabled:
+        return
+    set_exporter(OTLPExporter() if kind == "otlp" else JsonlExporter(path))
+    logger.info("Трасування: %s", path if kind == "jsonl" else "OTLP")
+
+
+def shutdown_tracing() -> None:
+    """Дописує й закриває експортер."""
+    set_exporter(None)
@@ -1,11 +1,89 @@
 """Open-Meteo клієнт та tool get_weather для агента."""
 
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import copy_context
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Literal
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
 import httpx
-from langchain_core.tools import tool
+
+from weather_agent.cache import TTLCache
+from weather_agent.cities import normalize_city
+from weather_agent.config import (
+    DISK_CACHE_BATCH_SIZE,
+    DISK_CACHE_FLUSH_INTERVAL,
+    DISK_CACHE_PATH,
+    FORECAST_CACHE_SIZE,
+    FORECAST_COORD_PRECISION,
+    FORECAST_MAX_STALE,
+    FORECAST_RANGE_TTL,
+    FORECAST_UPDATE_INTERVAL,
+    GAZETTEER_ENABLED,
+    GAZETTEER_FUZZY_CUTOFF,
+    GAZETTEER_PATH,
+    GEOCODE_CACHE_SIZE,
+    GEOCODE_CACHE_TTL,
+    GEOCODE_NEGATIVE_TTL,
+    TOOL_OUTPUT_FORMAT,
+)
+from weather_agent.disk_cache import DiskCache
+from weather_agent.gazetteer import get_gazetteer
+from weather_agent.http_client import get_async_client, get_client, timeout_for
+from weather_agent.metrics import UPSTREAM_SECONDS, record_error, register_collector
+from weather_agent.response_cache import forecast_bucket, place, weather_bucket
+from weather_agent.singleflight import SingleFlight
+from weather_agent.tracing import span
+
+if TYPE_CHECKING:
+    # numpy підтягується лише з першим get_forecast (forecast.py імпортується ліниво)
+    from weather_agent.forecast import ForecastRange
+
+logger = logging.getLogger(__name__)
 
 GEOCODING_URL = "https://geocoding-api.open-meteo.com/v1/search"
 FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
-HTTP_TIMEOUT = 15.0
+# Верхня межа міст для get_weather_many (один запит до Forecast API)
+MAX_BATCH_CITIES = 10
+# Періоди get_forecast (див. forecast.PERIODS)
+ForecastPeriod = Literal["today", "morning", "evening", "tomorrow", "weekend"]
+
+# Позначка «місто не знайдено» у кеші (негативне кешування)
+_NOT_FOUND = object()
+_geocode_cache = TTLCache(GEOCODE_CACHE_SIZE, GEOCODE_CACHE_TTL)
+
+# Кеш прогнозу за годинником (межі оновлення Open-Meteo прив'язані до реального часу);
+# значення — (дані, момент, до якого вони свіжі)
+_forecast_cache = TTLCache(
+    FORECAST_CACHE_SIZE,
+    FORECAST_UPDATE_INTERVAL + FORECAST_MAX_STALE,
+    clock=lambda: _wall_clock(),
+)
+# Прогноз на період: значення — (forecast.ForecastRange, скільки днів запитано)
+_range_cache = TTLCache(FORECAST_CACHE_SIZE, FORECAST_RANGE_TTL, clock=lambda: _wall_clock())
+_refresh_lock = threading.Lock()
+_refreshing: set[tuple[float, float, str]] = set()
+# Посилання на фонові asyncio-задачі, щоб їх не зібрав GC до завершення
+_refresh_tasks: set[asyncio.Task] = set()
+
+# Влучання/промахи офлайн-газетира (лічильники для статистики): промах — точного
+# збігу немає; влучання — і точні, і нечіткі збіги, якщо API місто не знайшов
+_gazetteer_counts = {"hits": 0, "misses": 0}
+
+# Спільні запити для однакових міст/координат (шторм однакових питань після алерту)
+_flight = SingleFlight()
+
+# Дисковий рівень під кешами геокодування та прогнозу (див. warm_caches)
+_disk: DiskCache | None = None
 
 # WMO Weather interpretation codes (WW) -> короткий опис українською
 WMO_WEATHER_UA = {
@@ -40,7 +118,7 @@ WMO_WEATHER_UA = {
 }
 
 
-def _weather_code_to_text(code: int) -> str:
+def weather_code_to_text(code: int) -> str:
     """Перетворює WMO код погоди на опис українською."""
     if code in WMO_WEATHER_UA:
         return WMO_WEATHER_UA[code]
@@ -50,35 +128,138 @@ def _weather_code_to_text(code: int) -> str:
     return "невідомо"
 
 
-def _geocode(city: str) -> tuple[float, float, str] | None:
-    """Повертає (latitude, longitude, timezone) для першого результату пошуку міста."""
-    try:
-        with httpx.Client(timeout=HTTP_TIMEOUT) as client:
-            r = client.get(
-                GEOCODING_URL,
-                params={"name": city.strip(), "count": 1, "language": "uk"},
-            )
-            r.raise_for_status()
-            data = r.json()
-    except (httpx.HTTPError, httpx.TimeoutException):
-        return None
-
+def _parse_geocode(data: dict) -> tuple[tuple[float, float, str] | None, str | None]:
+    """Витягує ((latitude, longitude, timezone), назва) з першого результату пошуку."""
     results = data.get("results")
     if not results:
-        return None
+        return None, None
 
     first = results[0]
     lat = first.get("latitude")
     lon = first.get("longitude")
     tz = first.get("timezone", "UTC")
     if lat is None or lon is None:
+        return None, None
+    return (float(lat), float(lon), str(tz)), first.get("name")
+
+
+def _gazetteer_lookup(city: str, fuzzy: bool = False) -> tuple[float, float, str] | None:
+    """
+    Координати з офлайн-газетира або None. Спершу лише точний збіг (назва, відмінок,
+    псевдонім); нечіткий (fuzzy=True) — тільки коли Geocoding API місто не знайшов
+    або недоступний: у газетирі ~100 міст, і «Миколаївка» інакше стала б Миколаєвом.
+    """
+    global GAZETTEER_ENABLED
+    if not GAZETTEER_ENABLED:
+        return None
+    try:
+        gazetteer = get_gazetteer(Path(GAZETTEER_PATH) if GAZETTEER_PATH else None)
+    except OSError as e:
+        # Без індексу працюємо як раніше — лише через Geocoding API
+        logger.warning("Газетир недоступний, вимикаю: %s", e)
+        GAZETTEER_ENABLED = False
         return None
-    return (float(lat), float(lon), str(tz))
+    if fuzzy:
+        hit = gazetteer.fuzzy(city, GAZETTEER_FUZZY_CUTOFF)
+    else:
+        hit = gazetteer.lookup(city)
+        if hit is None:
+            _gazetteer_counts["misses"] += 1
+    if hit is None:
+        return None
+    _gazetteer_counts["hits"] += 1
+    lat, lon, tz, _name = hit
+    return lat, lon, tz
 
 
-def _fetch_forecast(lat: float, lon: float, timezone: str) -> dict | None:
-    """Отримує поточну погоду з Open-Meteo Forecast API."""
-    params = {
+def _geocode(city: str) -> tuple[float, float, str] | None:
+    """
+    Повертає (latitude, longitude, timezone) для першого результату пошуку міста.
+    Спершу — точний збіг в офлайн-газетирі; далі Geocoding API; нечіткий збіг у
+    газетирі — лише якщо API нічого не дав. Координати кешуються за нормалізованою
+    назвою, «місто не знайдено» — за текстом запиту до API (див. _geocode_from_cache).
+    """
+    coords = _gazetteer_lookup(city)
+    if coords is not None:
+        return coords
+    key, query = normalize_city(city), _query_key(city)
+    found, coords = _geocode_from_cache(key, query)
+    if not found:
+        coords = _flight.do(("geocode", query), lambda: _geocode_uncached(city, key))
+    return coords if coords is not None else _gazetteer_lookup(city, fuzzy=True)
+
+
+def _query_key(city: str) -> str:
+    """Ключ «місто не знайдено»: текст запиту до API з уніфікованим регістром і пробілами."""
+    return " ".join(city.casefold().split())
+
+
+def _geocode_from_cache(key: str, query: str) -> tuple[bool, tuple[float, float, str] | None]:
+    """
+    (чи є відповідь у кеші, координати або None). API шукає за текстом запиту, а не
+    за нормалізованою назвою, тож промах «у Фастові» не означає, що «Фастів» не
+    знайдеться: промахи зберігаються окремо за текстом запиту.
+    """
+    cached = _geocode_cache.get(key)
+    if cached is not None and cached is not _NOT_FOUND:
+        return True, cached
+    if query != key:
+        cached = _geocode_cache.get(query)
+    return cached is _NOT_FOUND, None
+
+
+def _geocode_uncached(city: str, key: str) -> tuple[float, float, str] | None:
+    """Запит до Geocoding API з записом результату в кеш."""
+    try:
+        with _upstream("geocode"):
+            r = get_client().get(
+                GEOCODING_URL,
+                params=_geocode_params(city),
+                timeout=timeout_for(GEOCODING_URL),
+            )
+        r.raise_for_status()
+        data = r.json()
+    except (httpx.HTTPError, httpx.TimeoutException) as e:
+        record_error("geocode", e)
+        return None
+    return _store_geocode(key, _query_key(city), data)
+
+
+@contextmanager
+def _upstream(endpoint: str) -> Iterator[None]:
+    """HTTP-запит до Open-Meteo: span http.<endpoint> і weather_agent_upstream_seconds."""
+    with span(f"http.{endpoint}"), UPSTREAM_SECONDS.time(endpoint=endpoint):
+        yield
+
+
+def _geocode_params(city: str) -> dict:
+    return {"name": city.strip(), "count": 1, "language": "uk"}
+
+
+def _store_geocode(key: str, query: str, data: dict) -> tuple[float, float, str] | None:
+    coords, name = _parse_geocode(data)
+    if coords is None:
+        _geocode_cache.set(query, _NOT_FOUND, ttl=GEOCODE_NEGATIVE_TTL)
+        _persist("geocode", query, None, GEOCODE_NEGATIVE_TTL)
+        return None
+    _geocode_cache.set(key, coords)
+    _persist("geocode", key, coords, GEOCODE_CACHE_TTL)
+    if name:
+        # «Kyiv» і «Київ» ведуть до того самого запису
+        _geocode_cache.set(normalize_city(str(name)), coords)
+        _persist("geocode", normalize_city(str(name)), coords, GEOCODE_CACHE_TTL)
+    return coords
+
+
+def _persist(namespace: str, key, value, ttl: float) -> None:
+    """Дублює запис кешу на диск (якщо дисковий рівень відкрито)."""
+    disk = _disk
+    if disk is not None:
+        disk.put(namespace, key, value, _wall_clock() + ttl)
+
+
+def _forecast_params(lat: float, lon: float, timezone: str) -> dict:
+    return {
         "latitude": lat,
         "longitude": lon,
         "timezone": timezone,
@@ -90,34 +271,505 @@ def _fetch_forecast(lat: float, lon: float, timezone: str) -> dict | None:
             "apparent_temperature",
         ],
     }
+
+
+def _fetch_forecast(lat: float, lon: float, timezone: str) -> dict | None:
+    """Отримує поточну погоду з Open-Meteo Forecast API."""
+    params = _forecast_params(lat, lon, timezone)
     try:
-        with httpx.Client(timeout=HTTP_TIMEOUT) as client:
-            r = client.get(FORECAST_URL, params=params)
-            r.raise_for_status()
-            return r.json()
-    except (httpx.HTTPError, httpx.TimeoutException):
+        with _upstream("forecast"):
+            r = get_client().get(FORECAST_URL, params=params, timeout=timeout_for(FORECAST_URL))
+        r.raise_for_status()
+        return r.json()
+    except (httpx.HTTPError, httpx.TimeoutException) as e:
+        record_error("forecast", e)
         return None
 
 
-@tool
-def get_weather(city: str) -> str:
-    """Отримати поточну погоду для міста (назва українською або англійською). Використовуй для рекомендацій що одягнути."""
-    if not city or not city.strip():
-        return "Помилка: не вказано назву міста."
+def _forecast_key(lat: float, lon: float, timezone: str) -> tuple[float, float, str]:
+    """Ключ кешу прогнозу: координати, округлені до FORECAST_COORD_PRECISION знаків."""
+    return (
+        round(lat, FORECAST_COORD_PRECISION),
+        round(lon, FORECAST_COORD_PRECISION),
+        timezone,
+    )
 
-    coords = _geocode(city.strip())
-    if not coords:
-        return f"Не вдалося знайти місто «{city.strip()}». Перевірте назву або спробуйте інший варіант."
 
-    lat, lon, tz = coords
+def _wall_clock() -> float:
+    return time.time()
+
+
+def _next_update(data: dict, now: float) -> float:
+    """Момент наступного оновлення блоку current (межа інтервалу моделі Open-Meteo)."""
+    interval = (data.get("current") or {}).get("interval") or FORECAST_UPDATE_INTERVAL
+    interval = max(60, int(interval))
+    return (now // interval + 1) * interval
+
+
+def _store_forecast(key: tuple[float, float, str], data: dict) -> None:
+    now = _wall_clock()
+    fresh_until = _next_update(data, now)
+    ttl = fresh_until - now + FORECAST_MAX_STALE
+    _forecast_cache.set(key, (data, fresh_until), ttl=ttl)
+    _persist("forecast", key, [data, fresh_until], ttl)
+
+
+def _fetch_and_store_forecast(
+    key: tuple[float, float, str], lat: float, lon: float, tz: str
+) -> dict | None:
     data = _fetch_forecast(lat, lon, tz)
-    if not data:
-        return f"Не вдалося отримати погоду для «{city.strip()}». Спробуйте пізніше."
+    if data:
+        _store_forecast(key, data)
+    return data
 
-    current = data.get("current")
-    if not current:
-        return f"Немає даних про поточну погоду для «{city.strip()}»."
 
+def _refresh_forecast(key: tuple[float, float, str], lat: float, lon: float, tz: str) -> None:
+    """Фонове оновлення простроченого запису; при помилці лишається старе значення."""
+    try:
+        _flight.do(("forecast", key), lambda: _fetch_and_store_forecast(key, lat, lon, tz))
+    finally:
+        with _refresh_lock:
+            _refreshing.discard(key)
+
+
+def _schedule_refresh(key: tuple[float, float, str], lat: float, lon: float, tz: str) -> None:
+    """Запускає не більше одного фонового оновлення на ключ."""
+    with _refresh_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+    threading.Thread(
+        target=_refresh_forecast,
+        args=(key, lat, lon, tz),
+        name="forecast-refresh",
+        daemon=True,
+    ).start()
+
+
+def _cached_forecast(lat: float, lon: float, timezone: str) -> tuple[dict | None, bool]:
+    """
+    Повертає (прогноз, served_stale). Свіжий запис живе до наступної межі оновлення
+    Open-Meteo; після неї ще FORECAST_MAX_STALE секунд віддається старе значення,
+    поки один фоновий потік його оновлює.
+    """
+    cached = _forecast_from_cache(lat, lon, timezone, _schedule_refresh)
+    if cached is not None:
+        return cached
+
+    key = _forecast_key(lat, lon, timezone)
+    data = _flight.do(("forecast", key), lambda: _fetch_and_store_forecast(key, lat, lon, timezone))
+    return data, False
+
+
+async def _ageocode(city: str) -> tuple[float, float, str] | None:
+    """Асинхронний _geocode: той самий газетир, кеш і single-flight, запит через AsyncClient."""
+    coords = _gazetteer_lookup(city)
+    if coords is not None:
+        return coords
+    key, query = normalize_city(city), _query_key(city)
+    found, coords = _geocode_from_cache(key, query)
+    if not found:
+        coords = await _flight.do_async(("geocode", query), lambda: _ageocode_uncached(city, key))
+    return coords if coords is not None else _gazetteer_lookup(city, fuzzy=True)
+
+
+async def _ageocode_uncached(city: str, key: str) -> tuple[float, float, str] | None:
+    try:
+        with _upstream("geocode"):
+            r = await get_async_client().get(
+                GEOCODING_URL,
+                params=_geocode_params(city),
+                timeout=timeout_for(GEOCODING_URL),
+            )
+        r.raise_for_status()
+        data = r.json()
+    except (httpx.HTTPError, httpx.TimeoutException) as e:
+        record_error("geocode", e)
+        return None
+    return _store_geocode(key, _query_key(city), data)
+
+
+async def _afetch_forecast(lat: float, lon: float, timezone: str) -> dict | None:
+    """Асинхронний _fetch_forecast."""
+    params = _forecast_params(lat, lon, timezone)
+    try:
+        with _upstream("forecast"):
+            r = await get_async_client().get(
+                FORECAST_URL, params=params, timeout=timeout_for(FORECAST_URL)
+            )
+        r.raise_for_status()
+        return r.json()
+    except (httpx.HTTPError, httpx.TimeoutException) as e:
+        record_error("forecast", e)
+        return None
+
+
+async def _afetch_and_store_forecast(
+    key: tuple[float, float, str], lat: float, lon: float, tz: str
+) -> dict | None:
+    data = await _afetch_forecast(lat, lon, tz)
+    if data:
+        _store_forecast(key, data)
+    return data
+
+
+async def _arefresh_forecast(
+    key: tuple[float, float, str], lat: float, lon: float, tz: str
+) -> None:
+    try:
+        await _flight.do_async(
+            ("forecast", key), lambda: _afetch_and_store_forecast(key, lat, lon, tz)
+        )
+    finally:
+        with _refresh_lock:
+            _refreshing.discard(key)
+
+
+def _aschedule_refresh(key: tuple[float, float, str], lat: float, lon: float, tz: str) -> None:
+    """Як _schedule_refresh, але оновлення — asyncio-задача поточного loop."""
+    with _refresh_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+    task = asyncio.get_running_loop().create_task(_arefresh_forecast(key, lat, lon, tz))
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+
+async def _acached_forecast(lat: float, lon: float, timezone: str) -> tuple[dict | None, bool]:
+    """Асинхронний _cached_forecast (stale-while-revalidate через asyncio-задачу)."""
+    cached = _forecast_from_cache(lat, lon, timezone, _aschedule_refresh)
+    if cached is not None:
+        return cached
+
+    key = _forecast_key(lat, lon, timezone)
+    data = await _flight.do_async(
+        ("forecast", key), lambda: _afetch_and_store_forecast(key, lat, lon, timezone)
+    )
+    return data, False
+
+
+def _batch_params(locations: list[tuple[float, float, str]]) -> dict:
+    """Параметри одного запиту Forecast API для кількох точок (списки через кому)."""
+    params = _forecast_params(0.0, 0.0, "")
+    params["latitude"] = ",".join(str(lat) for lat, _, _ in locations)
+    params["longitude"] = ",".join(str(lon) for _, lon, _ in locations)
+    params["timezone"] = ",".join(tz for _, _, tz in locations)
+    return params
+
+
+def _split_batch(data, count: int) -> list[dict | None]:
+    """Open-Meteo повертає об'єкт для однієї точки і список — для кількох."""
+    items = data if isinstance(data, list) else [data]
+    if len(items) != count:
+        return [None] * count
+    return [item if isinstance(item, dict) else None for item in items]
+
+
+def _store_batch(keys: list[tuple[float, float, str]], items: list[dict | None]) -> list:
+    for key, item in zip(keys, items):
+        if item:
+            _store_forecast(key, item)
+    return items
+
+
+def _fetch_forecasts(locations: list[tuple[float, float, str]]) -> list[dict | None]:
+    """Прогнози для кількох точок одним HTTP-запитом; записує їх у кеш."""
+    keys = [_forecast_key(*loc) for loc in locations]
+
+    def fetch() -> list[dict | None]:
+        try:
+            with _upstream("forecast_batch"):
+                r = get_client().get(
+                    FORECAST_URL, params=_batch_params(locations), timeout=timeout_for(FORECAST_URL)
+                )
+            r.raise_for_status()
+            items = _split_batch(r.json(), len(locations))
+        except (httpx.HTTPError, httpx.TimeoutException) as e:
+            record_error("forecast_batch", e)
+            return [None] * len(locations)
+        return _store_batch(keys, items)
+
+    return _flight.do(("forecast-batch", tuple(keys)), fetch)
+
+
+async def _afetch_forecasts(locations: list[tuple[float, float, str]]) -> list[dict | None]:
+    """Асинхронний _fetch_forecasts."""
+    keys = [_forecast_key(*loc) for loc in locations]
+
+    async def fetch() -> list[dict | None]:
+        try:
+            with _upstream("forecast_batch"):
+                r = await get_async_client().get(
+                    FORECAST_URL, params=_batch_params(locations), timeout=timeout_for(FORECAST_URL)
+                )
+            r.raise_for_status()
+            items = _split_batch(r.json(), len(locations))
+        except (httpx.HTTPError, httpx.TimeoutException) as e:
+            record_error("forecast_batch", e)
+            return [None] * len(locations)
+        return _store_batch(keys, items)
+
+    return await _flight.do_async(("forecast-batch", tuple(keys)), fetch)
+
+
+def _forecast_from_cache(
+    lat: float, lon: float, tz: str, schedule: Callable[..., None]
+) -> tuple[dict, bool] | None:
+    """(прогноз, served_stale) з кешу або None; для простроченого запису кличе schedule."""
+    key = _forecast_key(lat, lon, tz)
+    cached = _forecast_cache.get(key)
+    if cached is None:
+        return None
+    data, fresh_until = cached
+    if _wall_clock() < fresh_until:
+        return data, False
+    schedule(key, lat, lon, tz)
+    return data, True
+
+
+def _unique_cities(cities: list[str]) -> list[str]:
+    """Прибирає порожні та повторені (після нормалізації) назви, зберігаючи порядок."""
+    seen: set[str] = set()
+    unique = []
+    for city in cities:
+        city = (city or "").strip()
+        key = normalize_city(city)
+        if city and key not in seen:
+            seen.add(key)
+            unique.append(city)
+    return unique
+
+
+def _cached_batch(
+    coords: list[tuple[float, float, str] | None], schedule: Callable[..., None]
+) -> tuple[list[tuple[dict | None, bool] | None], list[int]]:
+    """Прогнози з кешу для кожного міста та індекси промахів (їх треба дозапитати)."""
+    results: list = [None] * len(coords)
+    missing: list[int] = []
+    for i, loc in enumerate(coords):
+        if loc is None:
+            continue
+        cached = _forecast_from_cache(*loc, schedule)
+        if cached is not None:
+            results[i] = cached
+        else:
+            missing.append(i)
+    return results, missing
+
+
+def _range_params(lat: float, lon: float, timezone: str, days: int) -> dict:
+    from weather_agent.forecast import DAILY_VARS, HOURLY_VARS
+
+    return {
+        "latitude": lat,
+        "longitude": lon,
+        "timezone": timezone,
+        "hourly": list(HOURLY_VARS),
+        "daily": list(DAILY_VARS),
+        "forecast_days": days,
+    }
+
+
+def _utc_offset(timezone: str) -> int:
+    """Зсув від UTC (секунди) для часового поясу з геокодування; невідомий пояс — 0."""
+    try:
+        offset = datetime.fromtimestamp(_wall_clock(), ZoneInfo(timezone)).utcoffset()
+    except (ZoneInfoNotFoundError, ValueError):
+        return 0
+    return int(offset.total_seconds()) if offset else 0
+
+
+def _range_key(lat: float, lon: float, timezone: str) -> tuple[float, float, str, str]:
+    """
+    Ключ кешу прогнозу на період: координати та місцева дата. Після місцевої опівночі
+    «сьогодні» й «завтра» — інші дні, тож вчорашній запис уже не підходить.
+    """
+    local = time.gmtime(_wall_clock() + _utc_offset(timezone))
+    return (*_forecast_key(lat, lon, timezone), time.strftime("%Y-%m-%d", local))
+
+
+def _range_days(timezone: str, period: str) -> int:
+    from weather_agent.forecast import forecast_days, local_now
+
+    return forecast_days(period, local_now(_wall_clock(), _utc_offset(timezone)))
+
+
+def _range_from_cache(key: tuple[float, float, str, str], days: int) -> "ForecastRange | None":
+    """ForecastRange з кешу, якщо запис покриває щонайменше days днів, інакше None."""
+    cached = _range_cache.get(key)
+    if cached is not None and cached[1] >= days:
+        return cached[0]
+    return None
+
+
+def _store_range(
+    key: tuple[float, float, str, str], days: int, data: dict
+) -> "ForecastRange | None":
+    """Розбирає відповідь у масиви NumPy і кешує; сирий JSON далі не зберігається."""
+    from weather_agent.forecast import parse_forecast_range
+
+    forecast = parse_forecast_range(data)
+    if forecast is not None:
+        _range_cache.set(key, (forecast, days))
+    return forecast
+
+
+def _cached_range(lat: float, lon: float, timezone: str, period: str) -> "ForecastRange | None":
+    """
+    Погодинний і денний прогноз (forecast.ForecastRange) на стільки днів, скільки
+    потрібно для періоду, або None. Запит до Forecast API — лише при промаху кешу.
+    """
+    key = _range_key(lat, lon, timezone)
+    days = _range_days(timezone, period)
+    cached = _range_from_cache(key, days)
+    if cached is not None:
+        return cached
+
+    def fetch() -> "ForecastRange | None":
+        try:
+            with _upstream("forecast_range"):
+                r = get_client().get(
+                    FORECAST_URL,
+                    params=_range_params(lat, lon, timezone, days),
+                    timeout=timeout_for(FORECAST_URL),
+                )
+            r.raise_for_status()
+            data = r.json()
+        except (httpx.HTTPError, httpx.TimeoutException) as e:
+            record_error("forecast_range", e)
+            return None
+        return _store_range(key, days, data)
+
+    return _flight.do(("forecast-range", key, days), fetch)
+
+
+async def _acached_range(
+    lat: float, lon: float, timezone: str, period: str
+) -> "ForecastRange | None":
+    """Асинхронний _cached_range."""
+    key = _range_key(lat, lon, timezone)
+    days = _range_days(timezone, period)
+    cached = _range_from_cache(key, days)
+    if cached is not None:
+        return cached
+
+    async def fetch() -> "ForecastRange | None":
+        try:
+            with _upstream("forecast_range"):
+                r = await get_async_client().get(
+                    FORECAST_URL,
+                    params=_range_params(lat, lon, timezone, days),
+                    timeout=timeout_for(FORECAST_URL),
+                )
+            r.raise_for_status()
+            data = r.json()
+        except (httpx.HTTPError, httpx.TimeoutException) as e:
+            record_error("forecast_range", e)
+            return None
+        return _store_range(key, days, data)
+
+    return await _flight.do_async(("forecast-range", key, days), fetch)
+
+
+def cache_stats() -> dict[str, dict[str, int]]:
+    """Лічильники кешів погодного клієнта (для логів і метрик)."""
+    stats = {
+        "gazetteer": dict(_gazetteer_counts),
+        "geocode": _geocode_cache.stats(),
+        "forecast": _forecast_cache.stats(),
+        "forecast_range": _range_cache.stats(),
+    }
+    if _disk is not None:
+        stats["disk"] = _disk.stats()
+    return stats
+
+
+def singleflight_stats() -> dict[str, int]:
+    """Скільки запитів до Open-Meteo було об'єднано з уже запущеними."""
+    return _flight.stats()
+
+
+def _collect_metrics():
+    """Влучання/промахи кешів погоди та об'єднані запити до Open-Meteo — для /metrics."""
+    stats = cache_stats()
+    caches = ("gazetteer", "geocode", "forecast", "forecast_range")
+    yield (
+        "weather_agent_cache_hits_total",
+        "counter",
+        "Влучання в кеш",
+        [({"cache": cache}, stats[cache]["hits"]) for cache in caches],
+    )
+    yield (
+        "weather_agent_cache_misses_total",
+        "counter",
+        "Промахи кешу",
+        [({"cache": cache}, stats[cache]["misses"]) for cache in caches],
+    )
+    yield (
+        "weather_agent_singleflight_deduplicated_total",
+        "counter",
+        "Запити до Open-Meteo, об'єднані з уже запущеними",
+        [({}, singleflight_stats()["deduplicated"])],
+    )
+
+
+register_collector(_collect_metrics)
+
+
+def open_disk_cache(path: str | Path | None = DISK_CACHE_PATH) -> DiskCache | None:
+    """Відкриває дисковий рівень кешу (None у path — вимкнено); повторний виклик — той самий."""
+    global _disk
+    if _disk is None and path:
+        try:
+            _disk = DiskCache(path, DISK_CACHE_FLUSH_INTERVAL, DISK_CACHE_BATCH_SIZE)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("Дисковий кеш %s недоступний, працюємо без нього: %s", path, e)
+    return _disk
+
+
+def close_disk_cache() -> None:
+    """Записує буфер і закриває дисковий рівень кешу."""
+    global _disk
+    disk, _disk = _disk, None
+    if disk is not None:
+        disk.close()
+
+
+def warm_caches(path: str | Path | None = DISK_CACHE_PATH) -> dict[str, int]:
+    """
+    Відкриває дисковий кеш і переносить у пам'ять непрострочені записи геокодування
+    та прогнозу (старт процесу). Повертає, скільки записів завантажено.
+    """
+    disk = open_disk_cache(path)
+    if disk is None:
+        return {"geocode": 0, "forecast": 0}
+    disk.purge_expired()
+    now = _wall_clock()
+    geocode = disk.load("geocode")
+    for key, value, expires_at in geocode:
+        ttl = expires_at - now
+        _geocode_cache.set(key, _NOT_FOUND if value is None else tuple(value), ttl=ttl)
+    forecast = disk.load("forecast")
+    for key, (data, fresh_until), expires_at in forecast:
+        _forecast_cache.set(tuple(key), (data, fresh_until), ttl=expires_at - now)
+    logger.info(
+        "Кеш прогріто з %s: геокодування %d, прогнозів %d", disk.path, len(geocode), len(forecast)
+    )
+    return {"geocode": len(geocode), "forecast": len(forecast)}
+
+
+def clear_caches() -> None:
+    """Очищає кеші та лічильники погодного клієнта (тести, ручне скидання)."""
+    _geocode_cache.clear()
+    _forecast_cache.clear()
+    _range_cache.clear()
+    _flight.reset_stats()
+    _gazetteer_counts.update(hits=0, misses=0)
+
+
+def format_current(current: dict) -> str:
+    """Форматує блок current у коротке речення українською."""
     temp = current.get("temperature_2m")
     feels = current.get("apparent_temperature")
     code = current.get("weather_code", 0)
@@ -126,7 +778,7 @@ def get_weather(city: str) -> str:
 
     temp_str = f"{temp:+.1f}°C" if temp is not None else "—"
     feels_str = f"{feels:+.1f}°C" if feels is not None else ""
-    cond = _weather_code_to_text(int(code))
+    cond = weather_code_to_text(int(code))
     wind_str = f"{wind:.0f} км/год" if wind is not None else "—"
     hum_str = f"{humidity:.0f}%" if humidity is not None else "—"
 
@@ -139,3 +791,247 @@ def get_weather(city: str) -> str:
     if feels_str and feels != temp:
         parts.insert(1, f"відчувається {feels_str}")
     return ". ".join(parts) + "."
+
+
+def compact_current(current: dict) -> str:
+    """
+    Блок current для моделі у вигляді короткого JSON (TOOL_OUTPUT_FORMAT=compact):
+    ті самі поля, що в format_current, але без речень — помітно менше токенів.
+    """
+    fields = {
+        "temp_c": current.get("temperature_2m"),
+        "feels_c": current.get("apparent_temperature"),
+        "conditions": weather_code_to_text(int(current.get("weather_code", 0))),
+        "wind_kmh": current.get("wind_speed_10m"),
+        "humidity_pct": current.get("relative_humidity_2m"),
+    }
+    if fields["feels_c"] == fields["temp_c"]:
+        del fields["feels_c"]
+    return json.dumps(
+        {name: value for name, value in fields.items() if value is not None},
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+
+
+def _current_text(current: dict) -> str:
+    return compact_current(current) if TOOL_OUTPUT_FORMAT == "compact" else format_current(current)
+
+
+def _weather_result(
+    city: str, coords: tuple[float, float, str] | None, forecast: tuple[dict | None, bool] | None
+) -> tuple[str, dict]:
+    """Спільне для sync/async tool: текст для моделі та артефакт з метаданими."""
+    if not coords:
+        return (
+            f"Не вдалося знайти місто «{city}». Перевірте назву або спробуйте інший варіант.",
+            {},
+        )
+    data, stale = forecast or (None, False)
+    if not data:
+        return f"Не вдалося отримати погоду для «{city}». Спробуйте пізніше.", {}
+
+    current = data.get("current")
+    if not current:
+        return f"Немає даних про поточну погоду для «{city}».", {}
+
+    # Артефакт потрапляє в ToolMessage.artifact і не надсилається моделі; bucket — для
+    # ключа кешу відповідей (response_cache)
+    return _current_text(current), {
+        "served_stale": stale,
+        "bucket": (place(coords), weather_bucket(current)),
+    }
+
+
+def lookup_current(city: str) -> tuple[tuple[float, float, str], dict] | None:
+    """
+    (координати, блок current) для міста — через газетир/кеш/API, як у get_weather,
+    або None, якщо місто не знайдено чи погода недоступна. Для коду без LLM.
+    """
+    coords = _geocode(city.strip()) if city and city.strip() else None
+    data, _stale = _cached_forecast(*coords) if coords else (None, False)
+    current = (data or {}).get("current")
+    return (coords, current) if current else None
+
+
+async def alookup_current(city: str) -> tuple[tuple[float, float, str], dict] | None:
+    """Асинхронний lookup_current."""
+    coords = await _ageocode(city.strip()) if city and city.strip() else None
+    data, _stale = await _acached_forecast(*coords) if coords else (None, False)
+    current = (data or {}).get("current")
+    return (coords, current) if current else None
+
+
+def _get_weather(city: str) -> tuple[str, dict]:
+    """Отримати поточну погоду для міста (назва українською або англійською). Використовуй для рекомендацій що одягнути."""
+    if not city or not city.strip():
+        return "Помилка: не вказано назву міста.", {}
+
+    city = city.strip()
+    with span("tool.get_weather", city=city):
+        coords = _geocode(city)
+        forecast = _cached_forecast(*coords) if coords else None
+        return _weather_result(city, coords, forecast)
+
+
+async def _aget_weather(city: str) -> tuple[str, dict]:
+    """Асинхронна реалізація get_weather (httpx.AsyncClient, без потоків)."""
+    if not city or not city.strip():
+        return "Помилка: не вказано назву міста.", {}
+
+    city = city.strip()
+    with span("tool.get_weather", city=city):
+        coords = await _ageocode(city)
+        forecast = await _acached_forecast(*coords) if coords else None
+        return _weather_result(city, coords, forecast)
+
+
+def _batch_error(cities: list[str]) -> str | None:
+    if not cities:
+        return "Помилка: не вказано жодного міста."
+    if len(cities) > MAX_BATCH_CITIES:
+        return f"Помилка: за один раз можна запитати не більше {MAX_BATCH_CITIES} міст."
+    return None
+
+
+def _many_result(
+    cities: list[str],
+    coords: list[tuple[float, float, str] | None],
+    forecasts: list[tuple[dict | None, bool] | None],
+) -> tuple[str, dict]:
+    blocks = []
+    artifact: dict[str, dict] = {}
+    for city, loc, forecast in zip(cities, coords, forecasts):
+        text, meta = _weather_result(city, loc, forecast)
+        blocks.append(f"{city}: {text}")
+        artifact[city] = meta
+    return "\n".join(blocks), {"cities": artifact}
+
+
+def _get_weather_many(cities: list[str]) -> tuple[str, dict]:
+    """Отримати поточну погоду одразу для кількох міст (список назв). Використовуй замість кількох викликів get_weather, коли питають про два й більше міст."""
+    cities = _unique_cities(cities)
+    error = _batch_error(cities)
+    if error:
+        return error, {}
+
+    with span("tool.get_weather_many", cities=len(cities)):
+        with ThreadPoolExecutor(max_workers=min(len(cities), MAX_BATCH_CITIES)) as pool:
+            # Копія контексту на кожне місто — span-и геокодування лишаються в трасі запиту
+            futures = [pool.submit(copy_context().run, _geocode, city) for city in cities]
+            coords = [future.result() for future in futures]
+        forecasts, missing = _cached_batch(coords, _schedule_refresh)
+        if missing:
+            fetched = _fetch_forecasts([coords[i] for i in missing])
+            for i, data in zip(missing, fetched):
+                forecasts[i] = (data, False)
+        return _many_result(cities, coords, forecasts)
+
+
+async def _aget_weather_many(cities: list[str]) -> tuple[str, dict]:
+    """Асинхронна реалізація get_weather_many."""
+    cities = _unique_cities(cities)
+    error = _batch_error(cities)
+    if error:
+        return error, {}
+
+    with span("tool.get_weather_many", cities=len(cities)):
+        coords = list(await asyncio.gather(*(_ageocode(city) for city in cities)))
+        forecasts, missing = _cached_batch(coords, _aschedule_refresh)
+        if missing:
+            fetched = await _afetch_forecasts([coords[i] for i in missing])
+            for i, data in zip(missing, fetched):
+                forecasts[i] = (data, False)
+        return _many_result(cities, coords, forecasts)
+
+
+def _forecast_error(city: str, period: str) -> str | None:
+    from weather_agent.forecast import PERIODS
+
+    if not city or not city.strip():
+        return "Помилка: не вказано назву міста."
+    if period not in PERIODS:
+        return f"Помилка: невідомий період «{period}». Доступні: {', '.join(PERIODS)}."
+    return None
+
+
+def _forecast_result(
+    city: str,
+    coords: tuple[float, float, str] | None,
+    period: str,
+    forecast: "ForecastRange | None",
+) -> tuple[str, dict]:
+    """Текст прогнозу на період для моделі (агрегати й поради, без погодинних рядів)."""
+    from weather_agent.forecast import compact_period, format_period, local_now, summarize_window
+
+    if not coords:
+        return (
+            f"Не вдалося знайти місто «{city}». Перевірте назву або спробуйте інший варіант.",
+            {},
+        )
+    if forecast is None:
+        return f"Не вдалося отримати прогноз для «{city}». Спробуйте пізніше.", {}
+    summary = summarize_window(forecast, period, local_now(_wall_clock(), forecast.utc_offset))
+    if summary is None:
+        return f"Немає прогнозу для «{city}» на цей період.", {}
+    render = compact_period if TOOL_OUTPUT_FORMAT == "compact" else format_period
+    return render(forecast, summary), {
+        "period": period,
+        "hours": summary.hours,
+        "bucket": (place(coords), forecast_bucket(summary)),
+    }
+
+
+def _get_forecast(city: str, period: ForecastPeriod = "tomorrow") -> tuple[str, dict]:
+    """Прогноз погоди для міста на період: today (решта дня), morning (ранок), evening (вечір), tomorrow (завтра вдень) або weekend (вихідні). Використовуй, коли питають не про «зараз», а про вечір, завтра, вихідні тощо."""
+    error = _forecast_error(city, period)
+    if error:
+        return error, {}
+
+    city = city.strip()
+    with span("tool.get_forecast", city=city, period=period):
+        coords = _geocode(city)
+        forecast = _cached_range(*coords, period) if coords else None
+        return _forecast_result(city, coords, period, forecast)
+
+
+async def _aget_forecast(city: str, period: ForecastPeriod = "tomorrow") -> tuple[str, dict]:
+    """Асинхронна реалізація get_forecast."""
+    error = _forecast_error(city, period)
+    if error:
+        return error, {}
+
+    city = city.strip()
+    with span("tool.get_forecast", city=city, period=period):
+        coords = await _ageocode(city)
+        forecast = await _acached_range(*coords, period) if coords else None
+        return _forecast_result(city, coords, period, forecast)
+
+
+# Tool-и агента: по одному StructuredTool з двома реалізаціями (invoke → sync, ainvoke → async).
+# Будуються при першому зверненні (weather.get_weather), бо langchain_core.tools помітно
+# сповільнює старт, а для /start, fast path і кешу він не потрібен.
+_TOOLS = {
+    "get_weather": (_get_weather, _aget_weather),
+    "get_weather_many": (_get_weather_many, _aget_weather_many),
+    "get_forecast": (_get_forecast, _aget_forecast),
+}
+_tools_lock = threading.Lock()
+
+
+def __getattr__(name: str):
+    if name not in _TOOLS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from langchain_core.tools import StructuredTool
+
+    with _tools_lock:
+        if name not in globals():
+            func, coroutine = _TOOLS[name]
+            globals()[name] = StructuredTool.from_function(
+                func=func,
+                coroutine=coroutine,
+                name=name,
+                description=func.__doc__,
+                response_format="content_and_artifact",
+            )
+    return globals()[name]
@@ -0,0 +1,157 @@
+"""
+Webhook-режим: aiohttp-сервер приймає оновлення Telegram замість long polling.
+
+POST WEBHOOK_PATH — оновлення від Telegram. Якщо задано WEBHOOK_SECRET, перевіряється
+заголовок X-Telegram-Bot-Api-Secret-Token. Оновлення ставиться в чергу, і Telegram
+одразу отримує 200. WEBHOOK_WORKERS задач обробляють чергу через
+Application.process_update. Якщо черга заповнена, сервер відповідає 503, і Telegram
+повторить доставку пізніше.
+
+GET /healthz — стан для балансувальника: 200 під час роботи, 503 під час зупинки.
+
+На відміну від polling, оновлення може приймати будь-яка кількість реплік за
+балансувальником: кожне оновлення Telegram доставляє один раз на WEBHOOK_URL.
+"""
+
+import asyncio
+import hmac
+import json
+import logging
+
+from aiohttp import web
+from telegram import Update
+from telegram.ext import Application
+
+from weather_agent.config import (
+    WEBHOOK_HOST,
+    WEBHOOK_PATH,
+    WEBHOOK_PORT,
+    WEBHOOK_QUEUE_SIZE,
+    WEBHOOK_SECRET,
+    WEBHOOK_URL,
+    WEBHOOK_WORKERS,
+)
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+HEALTH_PATH = "/healthz"
+
+
+class WebhookServer:
+    """HTTP-приймач оновлень Telegram з чергою та пулом задач-обробників."""
+
+    def __init__(
+        self,
+        application: Application,
+        path: str = WEBHOOK_PATH,
+        secret: str | None = WEBHOOK_SECRET,
+        workers: int = WEBHOOK_WORKERS,
+        queue_size: int = WEBHOOK_QUEUE_SIZE,
+        webhook_url: str | None = WEBHOOK_URL,
+        drain_timeout: float = 30.0,
+    ) -> None:
+        self.application = application
+        self.path = path
+        self.secret = secret
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.webhook_url = webhook_url
+        self.drain_timeout = drain_timeout
+        self._queue: asyncio.Queue[Update] | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._draining = False
+        self._counts = {"received": 0, "processed": 0, "failed": 0, "rejected": 0}
+
+    def build(self) -> web.Application:
+        """aiohttp-застосунок з маршрутами та хуками запуску/зупинки Application."""
+        app = web.Application()
+        app.router.add_post(self.path, self._handle_update)
+        app.router.add_get(HEALTH_PATH, self._handle_health)
+        app.on_startup.append(self._on_startup)
+        app.on_cleanup.append(self._on_cleanup)
+        return app
+
+    async def _on_startup(self, _app: web.Application) -> None:
+        await self.application.initialize()
+        if self.application.post_init:
+            await self.application.post_init(self.application)
+        if self.webhook_url:
+            await self.application.bot.set_webhook(
+                url=self.webhook_url,
+                secret_token=self.secret,
+                allowed_updates=["message"],
+            )
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._draining = False
+        self._tasks = [asyncio.create_task(self._worker(self._queue)) for _ in range(self.workers)]
+        logger.info("Webhook: %s, обробників: %d", self.path, self.workers)
+
+    async def _on_cleanup(self, _app: web.Application) -> None:
+        # Нові оновлення не приймаємо; ті, що в черзі, дообробляємо
+        self._draining = True
+        if self._queue is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), self.drain_timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Webhook: не оброблено %d оновлень", self._queue.qsize())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.application.shutdown()
+        if self.application.post_shutdown:
+            await self.application.post_shutdown(self.application)
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            update = await queue.get()
+            try:
+                await self.application.process_update(update)
+                self._counts["processed"] += 1
+            except Exception:
+                self._counts["failed"] += 1
+                logger.exception("Помилка при обробці оновлення %s", update.update_id)
+            finally:
+                queue.task_done()
+
+    async def _handle_update(self, request: web.Request) -> web.Response:
+        if self.secret and not hmac.compare_digest(
+            request.headers.get(SECRET_HEADER, ""), self.secret
+        ):
+            return web.Response(status=403)
+        if self._draining or self._queue is None:
+            return web.Response(status=503)
+        try:
+            data = await request.json()
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return web.Response(status=400)
+        if not isinstance(data, dict):
+            return web.Response(status=400)
+
+        update = Update.de_json(data, self.application.bot)
+        try:
+            self._queue.put_nowait(update)
+        except asyncio.QueueFull:
+            self._counts["rejected"] += 1
+            return web.Response(status=503)
+        self._counts["received"] += 1
+        return web.Response(status=200)
+
+    async def _handle_health(self, _request: web.Request) -> web.Response:
+        return web.json_response(self.stats(), status=503 if self._draining else 200)
+
+    def stats(self) -> dict:
+        """Стан сервера: status, розмір черги, живі обробники та лічильники оновлень."""
+        return {
+            "status": "draining" if self._draining else "ok",
+            "queue": self._queue.qsize() if self._queue is not None else 0,
+            "workers": sum(1 for task in self._tasks if not task.done()),
+            **self._counts,
+        }
+
+
+def run_webhook(application: Application) -> None:
+    """Запускає aiohttp-сервер на WEBHOOK_HOST:WEBHOOK_PORT (блокує до зупинки)."""
+    server = WebhookServer(application)
+    web.run_app(server.build(), host=WEBHOOK_HOST, port=WEBHOOK_PORT, print=None)
@@ -0,0 +1,70 @@
+"""Integration tests: deterministic fast path in ask_agent — mocked HTTP, no LLM."""
+
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from weather_agent.agent import ask_agent, ask_agent_async, fast_path_stats
+from weather_agent.http_client import use_transport
+
+
+@pytest.fixture
+def forecast_only(mock_httpx_forecast):
+    """Gazetteer resolves the city; only the forecast host is served."""
+    hosts = []
+
+    def handler(request):
+        hosts.append(request.url.host)
+        return httpx.Response(200, json=mock_httpx_forecast)
+
+    use_transport(httpx.MockTransport(handler))
+    return hosts
+
+
+@pytest.mark.integration_mock
+class TestFastPath:
+    def test_simple_question_answered_without_llm(self, fast_path, forecast_only):
+        with patch("weather_agent.agent._get_agent") as mock_get_agent:
+            reply = ask_agent("Що одягнути в Києві?")
+
+        mock_get_agent.assert_not_called()
+        assert reply.startswith("Зараз в Києві: температура -2.5°C")
+        assert "Що вдягнути:" in reply
+        assert forecast_only == ["api.open-meteo.com"]
+        assert fast_path_stats()["hits"] == 1
+
+    def test_complex_question_falls_through_to_agent(self, fast_path, forecast_only):
+        with patch("weather_agent.agent._get_agent") as mock_get_agent:
+            mock_get_agent.return_value.invoke.return_value = {
+                "messages": [{"role": "assistant", "content": "Завтра візьміть парасольку."}]
+            }
+            reply = ask_agent("Що одягнути в Києві завтра?")
+
+        assert reply == "Завтра візьміть парасольку."
+        assert forecast_only == []
+        stats = fast_path_stats()
+        assert stats["fallthrough"] == 1
+        assert stats["hit_rate"] == 0.0
+
+    def test_weather_failure_falls_through_to_agent(self, fast_path):
+        use_transport(httpx.MockTransport(lambda request: httpx.Response(503)))
+        with patch("weather_agent.agent._get_agent") as mock_get_agent:
+            mock_get_agent.return_value.invoke.return_value = {
+                "messages": [{"role": "assistant", "content": "Спробуйте пізніше."}]
+            }
+            assert ask_agent("Що одягнути в Києві?") == "Спробуйте пізніше."
+
+    def test_disabled_by_config(self, forecast_only):
+        with patch("weather_agent.agent._get_agent") as mock_get_agent:
+            mock_get_agent.return_value.invoke.return_value = {
+                "messages": [{"role": "assistant", "content": "LLM"}]
+            }
+            assert ask_agent("Що одягнути в Києві?") == "LLM"
+
+    async def test_async_fast_path(self, fast_path, forecast_only):
+        with patch("weather_agent.agent._get_agent") as mock_get_agent:
+            reply = await ask_agent_async("Київ")
+
+        mock_get_agent.assert_not_called()
+        assert reply.startswith("Зараз у місті Київ:")
@@ -1,6 +1,5 @@
-"""System tests: safety (injection, leakage, misuse) with real agent — require OPENAI_API_KEY."""
+"""System tests: safety (injection, leakage, misuse) with real agent — recorded once with OPENAI_API_KEY, replayed offline."""
 
-import os
 import sys
 from pathlib import Path
 
@@ -13,15 +12,10 @@ if str(_SRC) not in sys.path:
 
 from weather_agent.agent import ask_agent
 
-REQUIRES_OPENAI = pytest.mark.skipif(
-    not os.getenv("OPENAI_API_KEY"),
-    reason="OPENAI_API_KEY not set",
-)
-
 
 @pytest.mark.system_llm
 @pytest.mark.safety
-@REQUIRES_OPENAI
+@pytest.mark.usefixtures("llm_cassette")
 class TestSafety:
     """Safety behaviour: no prompt injection, no leakage, graceful misuse."""
 
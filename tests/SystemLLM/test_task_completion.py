@@ -1,6 +1,5 @@
-"""System tests: E2E task completion with real agent — require OPENAI_API_KEY."""
+"""System tests: E2E task completion with real agent — recorded once with OPENAI_API_KEY, replayed offline."""
 
-import os
 import sys
 from pathlib import Path
 
@@ -11,14 +10,9 @@ _SRC = _ROOT / "src"
 if str(_SRC) not in sys.path:
     sys.path.insert(0, str(_SRC))
 
-REQUIRES_OPENAI = pytest.mark.skipif(
-    not os.getenv("OPENAI_API_KEY"),
-    reason="OPENAI_API_KEY not set",
-)
-
 
 @pytest.mark.system_llm
-@REQUIRES_OPENAI
+@pytest.mark.usefixtures("llm_cassette")
 class TestTaskCompletion:
     """Agent accomplishes the intended task end-to-end."""
 
@@ -55,10 +55,23 @@ class TestBotHandlers:
     async def test_handle_message_calls_agent_and_replies(self):
         update = _make_update("Що одягнути в Києві?")
         context = _make_context()
-        with patch("weather_agent.bot.ask_agent", return_value="Одягни куртку та шапку."):
+        with patch(
+            "weather_agent.bot.ask_agent_async",
+            AsyncMock(return_value="Одягни куртку та шапку."),
+        ) as mock_ask:
             await handle_message(update, context)
+        mock_ask.assert_awaited_once_with("Що одягнути в Києві?", [], {})
         update.message.reply_text.assert_called_once_with("Одягни куртку та шапку.")
 
+    async def test_handle_message_agent_failure_sends_error_text(self):
+        update = _make_update("Що одягнути в Києві?")
+        context = _make_context()
+        with patch(
+            "weather_agent.bot.ask_agent_async", AsyncMock(side_effect=RuntimeError("boom"))
+        ):
+            await handle_message(update, context)
+        update.message.reply_text.assert_called_once_with("Виникла помилка. Спробуйте пізніше.")
+
     async def test_handle_message_no_text_does_not_reply(self):
         update = MagicMock()
         update.message = MagicMock()
@@ -77,3 +90,304 @@ class TestBotHandlers:
         for group in handlers.values():
             all_handlers.extend(group)
         assert len(all_handlers) >= 2
+
+    async def test_build_application_processes_updates_concurrently(self):
+        app = build_application("fake-token")
+        assert app.update_processor.max_concurrent_updates > 1
+
+    async def test_build_application_closes_http_pool_on_shutdown(self):
+        app = build_application("fake-token")
+        with patch("weather_agent.bot.aclose_clients", AsyncMock()) as mock_close:
+            await app.post_shutdown(app)
+        mock_close.assert_awaited_once()
+
+
+def _stream(*parts):
+    async def fake_stream(user_text, history=(), outcome=None):
+        for part in parts:
+            yield part
+        if outcome is not None:
+            outcome["answered"] = True
+
+    return fake_stream
+
+
+def _answers(*replies):
+    """Fake ask_agent_async that returns `replies` in turn and reports them as real answers."""
+    replies = iter(replies)
+
+    async def fake_ask(user_text, history=(), outcome=None):
+        if outcome is not None:
+            outcome["answered"] = True
+        return next(replies)
+
+    return AsyncMock(side_effect=fake_ask)
+
+
+@pytest.fixture
+def streaming(monkeypatch):
+    """Streamed replies on; the first reply_text returns a message that can be edited."""
+    monkeypatch.setattr("weather_agent.bot.STREAMING_ENABLED", True)
+    update = _make_update("Що одягнути в Києві?")
+    sent = MagicMock()
+    sent.edit_text = AsyncMock()
+    update.message.reply_text = AsyncMock(return_value=sent)
+    return update, sent
+
+
+@pytest.mark.system_mock
+@pytest.mark.asyncio
+class TestStreamingReplies:
+    """Streaming mode: first message as soon as there is text, then throttled edits."""
+
+    async def test_first_message_then_final_edit(self, streaming, monkeypatch):
+        update, sent = streaming
+        monkeypatch.setattr("weather_agent.bot.STREAM_EDIT_INTERVAL", 60.0)
+        stream = _stream("Одягни", "Одягни теплу", "Одягни теплу куртку.")
+        with patch("weather_agent.bot.stream_agent", stream):
+            await handle_message(update, _make_context())
+
+        update.message.reply_text.assert_called_once_with("Одягни")
+        # Проміжні частини пропущені через інтервал, фінальний текст відредаговано
+        sent.edit_text.assert_awaited_once_with("Одягни теплу куртку.")
+
+    async def test_edits_each_part_when_not_throttled(self, streaming, monkeypatch):
+        update, sent = streaming
+        monkeypatch.setattr("weather_agent.bot.STREAM_EDIT_INTERVAL", 0.0)
+        stream = _stream("Одягни", "Одягни теплу", "Одягни теплу куртку.")
+        with patch("weather_agent.bot.stream_agent", stream):
+            await handle_message(update, _make_context())
+
+        assert [c.args[0] for c in sent.edit_text.await_args_list] == [
+            "Одягни теплу",
+            "Одягни теплу куртку.",
+        ]
+
+    async def test_retry_after_skips_edit_and_final_is_retried(self, streaming, monkeypatch):
+        from datetime import timedelta
+
+        from telegram.error import RetryAfter
+
+        update, sent = streaming
+        monkeypatch.setattr("weather_agent.bot.STREAM_EDIT_INTERVAL", 0.0)
+        sent.edit_text.side_effect = [RetryAfter(timedelta(0)), RetryAfter(timedelta(0)), None]
+        stream = _stream("Одягни", "Одягни теплу", "Одягни теплу куртку.")
+        with patch("weather_agent.bot.stream_agent", stream):
+            await handle_message(update, _make_context())
+
+        assert sent.edit_text.await_args_list[-1].args == ("Одягни теплу куртку.",)
+        assert sent.edit_text.await_count == 3
+
+    async def test_single_part_sends_one_message(self, streaming):
+        update, sent = streaming
+        with patch("weather_agent.bot.stream_agent", _stream("Зараз у Києві: -2°C")):
+            await handle_message(update, _make_context())
+
+        update.message.reply_text.assert_called_once_with("Зараз у Києві: -2°C")
+        sent.edit_text.assert_not_called()
+
+    async def test_one_shot_when_streaming_disabled(self):
+        update = _make_update("Що одягнути в Києві?")
+        with (
+            patch("weather_agent.bot.stream_agent") as mock_stream,
+            patch("weather_agent.bot.ask_agent_async", AsyncMock(return_value="Куртка.")),
+        ):
+            await handle_message(update, _make_context())
+
+        mock_stream.assert_not_called()
+        update.message.reply_text.assert_called_once_with("Куртка.")
+
+
+@pytest.mark.system_mock
+@pytest.mark.asyncio
+class TestChatDebounce:
+    """Rapid messages from one chat become a single agent request."""
+
+    async def test_rapid_messages_merged_into_one_agent_call(self, monkeypatch):
+        import asyncio
+
+        from weather_agent.bot import chat_queue_stats
+        from weather_agent.chat_queue import ChatQueue
+
+        async def slow_ask(user_text, history=(), outcome=None):
+            await asyncio.sleep(0.01)
+            return f"Відповідь на: {user_text}"
+
+        monkeypatch.setattr("weather_agent.bot._chats", ChatQueue(debounce=0.05))
+        updates = [_make_update(text) for text in ("Київ", "а завтра?", "а Львів?")]
+        context = _make_context()
+        with patch(
+            "weather_agent.bot.ask_agent_async", AsyncMock(side_effect=slow_ask)
+        ) as mock_ask:
+            await asyncio.gather(*(handle_message(u, context) for u in updates))
+
+        # Перше повідомлення — одразу, два наступні (поки воно в роботі) — одним запитом
+        assert [call.args[0] for call in mock_ask.await_args_list] == [
+            "Київ",
+            "а завтра?\nа Львів?",
+        ]
+        updates[0].message.reply_text.assert_called_once_with("Відповідь на: Київ")
+        updates[1].message.reply_text.assert_not_called()
+        updates[2].message.reply_text.assert_called_once_with("Відповідь на: а завтра?\nа Львів?")
+        assert chat_queue_stats()["merged"] == 1
+
+
+@pytest.mark.system_mock
+@pytest.mark.asyncio
+class TestChatMemory:
+    """Follow-ups in one chat reach the agent with the earlier turns."""
+
+    async def test_follow_up_gets_previous_turn(self, chat_memory):
+        context = _make_context()
+        with patch(
+            "weather_agent.bot.ask_agent_async",
+            _answers("У Києві +3°C, куртка.", "Завтра теж куртка."),
+        ) as mock_ask:
+            await handle_message(_make_update("Що одягнути в Києві?"), context)
+            await handle_message(_make_update("а завтра?"), context)
+
+        assert mock_ask.await_args_list[0].args[:2] == ("Що одягнути в Києві?", [])
+        assert mock_ask.await_args_list[1].args[:2] == (
+            "а завтра?",
+            [
+                {"role": "user", "content": "Що одягнути в Києві?"},
+                {"role": "assistant", "content": "У Києві +3°C, куртка."},
+            ],
+        )
+        assert chat_memory.stats()["chats"] == 1
+
+    async def test_streamed_reply_is_remembered(self, chat_memory, streaming):
+        update, _sent = streaming
+        with patch("weather_agent.bot.stream_agent", _stream("Одягни", "Одягни куртку.")):
+            await handle_message(update, _make_context())
+
+        assert chat_memory.history(12345)[-1] == {
+            "role": "assistant",
+            "content": "Одягни куртку.",
+        }
+
+    async def test_failed_reply_is_not_remembered(self, chat_memory):
+        with patch(
+            "weather_agent.bot.ask_agent_async", AsyncMock(side_effect=RuntimeError("boom"))
+        ):
+            await handle_message(_make_update("Київ"), _make_context())
+
+        assert chat_memory.history(12345) == []
+
+    @pytest.mark.parametrize("streamed", [False, True])
+    async def test_agent_error_text_is_not_remembered(self, chat_memory, monkeypatch, streamed):
+        """The agent's own error reply is sent to the user but not replayed as history."""
+        agent = MagicMock()
+        agent.ainvoke = AsyncMock(side_effect=RuntimeError("boom"))
+        agent.astream = MagicMock(side_effect=RuntimeError("boom"))
+        monkeypatch.setattr("weather_agent.agent._get_agent", lambda: agent)
+        monkeypatch.setattr("weather_agent.bot.STREAMING_ENABLED", streamed)
+        update = _make_update("Київ")
+        await handle_message(update, _make_context())
+
+        update.message.reply_text.assert_called_once()
+        assert update.message.reply_text.call_args.args[0].startswith("Виникла помилка")
+        assert chat_memory.history(12345) == []
+
+    async def test_busy_reply_is_not_remembered(self, chat_memory, monkeypatch):
+        from weather_agent.admission import AdmissionRejected
+        from weather_agent.agent import BUSY_REPLY
+
+        slots = MagicMock()
+        slots.slot = MagicMock(side_effect=AdmissionRejected("queue_full"))
+        monkeypatch.setattr("weather_agent.agent._get_agent", MagicMock)
+        monkeypatch.setattr("weather_agent.agent._llm_slots", slots)
+        update = _make_update("Київ")
+        await handle_message(update, _make_context())
+
+        update.message.reply_text.assert_called_once_with(BUSY_REPLY)
+        assert chat_memory.history(12345) == []
+
+
+@pytest.mark.system_mock
+@pytest.mark.asyncio
+class TestAgentPrewarm:
+    """post_init starts the agent prewarm in the background instead of waiting for it."""
+
+    async def test_post_init_does_not_wait_for_prewarm(self, monkeypatch):
+        import asyncio
+
+        from weather_agent.bot import _background, _post_init
+
+        release = asyncio.Event()
+
+        async def slow_prewarm():
+            await release.wait()
+            return {}
+
+        monkeypatch.setattr("weather_agent.bot.AGENT_PREWARM", True)
+        monkeypatch.setattr("weather_agent.bot.prewarm", slow_prewarm)
+        await asyncio.wait_for(_post_init(MagicMock(bot_data={})), timeout=1.0)
+
+        assert len(_background) == 1
+        release.set()
+        await asyncio.gather(*_background)
+        await asyncio.sleep(0)
+        assert not _background
+
+    async def test_prewarm_disabled(self):
+        from weather_agent.bot import _background, _post_init
+
+        with patch("weather_agent.bot.prewarm") as mock_prewarm:
+            await _post_init(MagicMock(bot_data={}))
+        mock_prewarm.assert_not_called()
+        assert not _background
+
+
+@pytest.mark.system_mock
+@pytest.mark.asyncio
+class TestMetricsEndpoint:
+    """post_init serves GET /metrics with the whole request path recorded."""
+
+    @staticmethod
+    def _free_port() -> int:
+        import socket
+
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            return sock.getsockname()[1]
+
+    async def test_message_latency_served_on_metrics_port(self):
+        import httpx
+
+        from weather_agent.bot import _post_init, _post_shutdown
+
+        application = MagicMock(bot_data={"metrics_port": self._free_port()})
+        await _post_init(application)
+        try:
+            update = _make_update("Київ")
+            with patch("weather_agent.bot.ask_agent_async", _answers("Куртка.")):
+                await handle_message(update, _make_context())
+            port = application.bot_data["metrics_port"]
+            async with httpx.AsyncClient() as client:
+                response = await client.get(f"http://127.0.0.1:{port}/metrics")
+        finally:
+            await _post_shutdown(application)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert "weather_agent_message_seconds_count 1" in response.text
+        assert "weather_agent_messages_in_flight 0" in response.text
+        assert 'weather_agent_chat_messages_total{result="processed"} 1' in response.text
+        assert "weather_agent_chat_memory_chats 1" in response.text
+        assert "metrics_runner" not in application.bot_data
+
+
+@pytest.mark.system_mock
+@pytest.mark.asyncio
+class TestTracing:
+    async def test_each_update_is_a_root_span(self, traced):
+        update = _make_update("Київ")
+        update.update_id = 42
+        with patch("weather_agent.bot.ask_agent_async", AsyncMock(return_value="Куртка.")):
+            await handle_message(update, _make_context())
+
+        (root,) = traced
+        assert root["name"] == "handle_message"
+        assert root["parent_id"] is None
+        assert root["attributes"] == {"update_id": 42, "chat_id": 12345, "answered": True}
@@ -0,0 +1,99 @@
+"""System tests: load-test harness — fake Telegram, Open-Meteo and LLM, short run."""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+_ROOT = Path(__file__).resolve().parent.parent.parent
+if str(_ROOT) not in sys.path:
+    sys.path.insert(0, str(_ROOT))
+
+from benchmarks.load_test import LoadConfig, format_report, percentile, run_load
+
+_FAST = LoadConfig(
+    rate=200.0,
+    requests=20,
+    cities=5,
+    llm_delay=0.005,
+    geocode_latency=0.001,
+    forecast_latency=0.001,
+    telegram_latency=0.0,
+)
+
+
+@pytest.mark.system_mock
+class TestLoadHarness:
+    """run_load drives build_application handlers end to end and reports latency stats."""
+
+    def test_every_update_gets_an_answer(self):
+        report = asyncio.run(run_load(_FAST))
+        assert report["requests"] == 20
+        assert report["replies"] == 20
+        assert report["errors"] == 0
+        assert report["error_rate"] == 0.0
+        assert set(report["latency_ms"]) == {"p50", "p95", "p99", "mean", "max"}
+        assert 0 < report["latency_ms"]["p50"] <= report["latency_ms"]["p99"]
+        assert report["throughput_rps"] > 0
+        # Two model turns per question (tool call, then answer)
+        assert report["llm_calls"] == 40
+
+    def test_repeated_cities_hit_geocode_cache(self):
+        report = asyncio.run(run_load(_FAST._replace(rate=20.0)))
+        assert report["open_meteo_requests"]["geocode"] == 5
+
+    def test_upstream_failures_show_up_in_replies_not_as_crashes(self):
+        report = asyncio.run(run_load(_FAST._replace(upstream_error_rate=1.0)))
+        assert report["replies"] == 20
+        assert report["open_meteo_requests"]["errors"] > 0
+
+    def test_compare_marks_regressions(self):
+        report = asyncio.run(run_load(_FAST._replace(requests=5)))
+        baseline = {**report, "latency_ms": {k: v / 10 for k, v in report["latency_ms"].items()}}
+        text = format_report(report, baseline)
+        assert "latency_ms.p95" in text
+        assert "гірше" in text
+
+
+@pytest.mark.unit_mock
+class TestPercentile:
+    def test_nearest_rank(self):
+        values = [float(v) for v in range(1, 101)]
+        assert percentile(values, 50) == 50.0
+        assert percentile(values, 95) == 95.0
+        assert percentile(values, 99) == 99.0
+        assert percentile([3.0], 99) == 3.0
+
+    def test_empty(self):
+        assert percentile([], 50) == 0.0
+
+
+@pytest.mark.system_mock
+class TestLoadHarnessCassette:
+    """With --cassette the fake Open-Meteo serves recorded payloads for recorded cities."""
+
+    def test_recorded_payloads_are_replayed(self, tmp_path):
+        import httpx
+
+        from weather_agent.cassette import Cassette, CassetteTransport
+        from weather_agent.http_client import use_transport
+        from weather_agent.weather import _get_weather, clear_caches
+
+        geo = {"results": [{"name": "Київ", "latitude": 50.45, "longitude": 30.52}]}
+        forecast = {"current": {"temperature_2m": 7.5, "weather_code": 3, "interval": 900}}
+        upstream = httpx.MockTransport(
+            lambda request: httpx.Response(
+                200, json=geo if "search" in request.url.path else forecast
+            )
+        )
+        path = tmp_path / "kyiv.json"
+        with Cassette(path, mode="once") as cassette:
+            use_transport(CassetteTransport(cassette, inner=upstream))
+            _get_weather("Київ")
+        use_transport(None)
+        clear_caches()
+
+        report = asyncio.run(run_load(_FAST._replace(requests=10, cassette=str(path))))
+        assert report["errors"] == 0
+        assert report["open_meteo_requests"]["recorded"] == 2
@@ -0,0 +1,110 @@
+"""System tests: multi-process sharding by chat_id — fake workers, no Telegram/LLM."""
+
+import asyncio
+import functools
+import multiprocessing
+import queue
+from types import SimpleNamespace
+
+import pytest
+from telegram import Update
+
+from weather_agent.shards import ShardRouter, build_dispatcher, serve_shard, shard_for
+
+
+def _update(update_id: int, chat_id: int, text: str = "Київ") -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 1760000000,
+            "chat": {"id": chat_id, "type": "private"},
+            "text": text,
+        },
+    }
+
+
+def _echo_worker(results, index, updates, token):
+    """Worker stand-in: reports (shard, update_id) for every update until the sentinel."""
+    while (data := updates.get()) is not None:
+        results.put((index, data["update_id"]))
+    results.put((index, "stopped"))
+
+
+@pytest.mark.system_mock
+class TestShardFor:
+    def test_stable_and_in_range(self):
+        assert all(0 <= shard_for(chat_id, 4) < 4 for chat_id in range(-50, 50))
+        assert shard_for(123456789, 4) == shard_for(123456789, 4)
+
+    def test_spreads_chats_across_workers(self):
+        shards = {shard_for(chat_id, 4) for chat_id in range(1000, 1100)}
+        assert shards == {0, 1, 2, 3}
+
+    def test_single_worker_or_no_chat(self):
+        assert shard_for(42, 1) == 0
+        assert shard_for(None, 4) == 0
+
+
+@pytest.mark.system_mock
+@pytest.mark.asyncio
+class TestServeShard:
+    async def test_processes_in_arrival_order_and_drains(self):
+        started = []
+
+        async def process_update(update):
+            started.append(update.update_id)
+            await asyncio.sleep(0.01)
+
+        application = SimpleNamespace(bot=None, process_update=process_update)
+        updates = queue.Queue()
+        for update_id in range(1, 6):
+            updates.put(_update(update_id, chat_id=7))
+        updates.put(None)
+
+        processed = await serve_shard(application, updates, concurrency=2)
+
+        assert processed == 5
+        assert started == [1, 2, 3, 4, 5]
+
+
+@pytest.mark.system_mock
+class TestShardRouter:
+    @pytest.mark.skipif(
+        "fork" not in multiprocessing.get_all_start_methods(), reason="needs fork start method"
+    )
+    def test_same_chat_goes_to_same_worker_and_workers_drain(self):
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        router = ShardRouter(
+            "123:abc", workers=3, context=context, target=functools.partial(_echo_worker, results)
+        )
+        router.start()
+        chats = [1001, 1002, 1003, 1001, 1002, 1001]
+        for update_id, chat_id in enumerate(chats, start=1):
+            router.dispatch(_update(update_id, chat_id), chat_id)
+        router.stop(timeout=10)
+
+        seen = [results.get(timeout=5) for _ in range(len(chats) + 3)]
+        by_update = {update_id: shard for shard, update_id in seen if update_id != "stopped"}
+        assert sorted(by_update) == [1, 2, 3, 4, 5, 6]
+        assert by_update[1] == by_update[4] == by_update[6] == shard_for(1001, 3)
+        # Кожен процес отримав sentinel і завершився після своїх оновлень
+        assert sorted(shard for shard, update_id in seen if update_id == "stopped") == [0, 1, 2]
+        assert router.stats()["alive"] == 0
+
+
+@pytest.mark.system_mock
+@pytest.mark.asyncio
+class TestDispatcher:
+    async def test_forwards_update_to_chat_shard(self):
+        dispatched = []
+        router = SimpleNamespace(dispatch=lambda data, chat_id: dispatched.append((data, chat_id)))
+        app = build_dispatcher("123:abc", router)
+        handler = app.handlers[0][0]
+
+        update = Update.de_json(_update(5, chat_id=77, text="Львів"), None)
+        await handler.callback(update, None)
+
+        assert dispatched[0][1] == 77
+        assert dispatched[0][0]["message"]["text"] == "Львів"
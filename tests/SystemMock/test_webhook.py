@@ -0,0 +1,145 @@
+"""System tests: webhook mode — recorded updates POSTed to a local aiohttp server, fake agent."""
+
+import asyncio
+import importlib.util
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+from aiohttp.test_utils import TestServer
+from telegram import Message, User
+from telegram.ext import Application, ExtBot, MessageHandler, filters
+
+from weather_agent.bot import WELCOME_TEXT, build_application
+from weather_agent.webhook import HEALTH_PATH, SECRET_HEADER, WebhookServer
+
+_ROOT = Path(__file__).resolve().parent.parent.parent
+
+
+def _load_replay_script():
+    spec = importlib.util.spec_from_file_location(
+        "replay_updates", _ROOT / "scripts" / "replay_updates.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+replay_updates = _load_replay_script()
+
+
+@pytest.fixture
+def offline_bot():
+    """Application.initialize without calling Telegram (getMe is faked)."""
+    me = User(1, "Weather", True, username="weather_test_bot")
+
+    async def get_me(bot, *args, **kwargs):
+        bot._bot_user = me
+        return me
+
+    with (
+        patch.object(ExtBot, "get_me", autospec=True, side_effect=get_me),
+        patch.object(ExtBot, "send_chat_action", AsyncMock()),
+        patch.object(Message, "reply_text", AsyncMock()) as reply_text,
+    ):
+        yield reply_text
+
+
+async def _serve(server: WebhookServer) -> TestServer:
+    test_server = TestServer(server.build())
+    await test_server.start_server()
+    return test_server
+
+
+def _message_update(update_id: int, text: str, chat_id: int = 501) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 1760000000,
+            "chat": {"id": chat_id, "type": "private"},
+            "text": text,
+        },
+    }
+
+
+@pytest.mark.system_mock
+@pytest.mark.asyncio
+class TestWebhookServer:
+    async def test_recorded_updates_are_answered(self, offline_bot):
+        server = WebhookServer(build_application("123:abc"), secret="s3cret", workers=4)
+        test_server = await _serve(server)
+        updates = replay_updates.load_updates(replay_updates.DEFAULT_UPDATES)
+        with patch(
+            "weather_agent.bot.ask_agent_async", AsyncMock(return_value="Одягніть куртку.")
+        ) as mock_ask:
+            statuses = await replay_updates.replay(
+                str(test_server.make_url("/telegram")), updates, secret="s3cret"
+            )
+            async with httpx.AsyncClient() as client:
+                health = (await client.get(str(test_server.make_url(HEALTH_PATH)))).json()
+            # Зупинка дочікується обробки всієї черги
+            await test_server.close()
+
+        assert statuses == [200] * len(updates)
+        assert health["status"] == "ok"
+        assert health["workers"] == 4
+        assert sorted(c.args[0] for c in mock_ask.await_args_list) == [
+            "Львів",
+            "Що одягнути в Києві?",
+            "Як одягнутися сьогодні в Одесі?",
+        ]
+        replies = [c.args[0] for c in offline_bot.await_args_list]
+        assert WELCOME_TEXT in replies
+        assert replies.count("Одягніть куртку.") == 3
+        assert server.stats()["processed"] == len(updates)
+
+    async def test_wrong_or_missing_secret_rejected(self, offline_bot):
+        test_server = await _serve(WebhookServer(build_application("123:abc"), secret="s3cret"))
+        url = str(test_server.make_url("/telegram"))
+        try:
+            async with httpx.AsyncClient() as client:
+                missing = await client.post(url, json=_message_update(1, "Київ"))
+                wrong = await client.post(
+                    url, json=_message_update(2, "Київ"), headers={SECRET_HEADER: "nope"}
+                )
+        finally:
+            await test_server.close()
+
+        assert (missing.status_code, wrong.status_code) == (403, 403)
+
+    async def test_invalid_body_is_bad_request(self, offline_bot):
+        test_server = await _serve(WebhookServer(build_application("123:abc"), secret=None))
+        try:
+            async with httpx.AsyncClient() as client:
+                response = await client.post(
+                    str(test_server.make_url("/telegram")), content=b"not json"
+                )
+        finally:
+            await test_server.close()
+
+        assert response.status_code == 400
+
+    async def test_full_queue_returns_503(self, offline_bot):
+        release = asyncio.Event()
+
+        async def blocking(update, context):
+            await release.wait()
+
+        application = Application.builder().token("123:abc").build()
+        application.add_handler(MessageHandler(filters.TEXT, blocking))
+        server = WebhookServer(application, secret=None, workers=1, queue_size=1)
+        test_server = await _serve(server)
+        url = str(test_server.make_url("/telegram"))
+        async with httpx.AsyncClient() as client:
+            first = await client.post(url, json=_message_update(1, "Київ"))
+            await asyncio.sleep(0.05)  # обробник узяв перше оновлення й чекає
+            second = await client.post(url, json=_message_update(2, "Львів"))
+            third = await client.post(url, json=_message_update(3, "Одеса"))
+        release.set()
+        await test_server.close()
+
+        assert [first.status_code, second.status_code, third.status_code] == [200, 200, 503]
+        assert server.stats()["rejected"] == 1
+        assert server.stats()["processed"] == 2
@@ -1,10 +1,15 @@
 """Fixtures for UnitLLM: fake model, mocked HTTP for get_weather."""
 
+import json
+import re
 import sys
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGenerationChunk
 
 _ROOT = Path(__file__).resolve().parent.parent.parent
 _SRC = _ROOT / "src"
@@ -39,3 +44,58 @@ def mock_httpx_for_weather():
         client.get = fake_get
         mock_cls.return_value = client
         yield
+
+
+class ToolCallingFakeModel(GenericFakeChatModel):
+    """
+    GenericFakeChatModel that accepts bind_tools, so create_agent can use it.
+    Streaming emits tool calls as one chunk and text word by word.
+    """
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        message = self._generate(messages, stop, run_manager, **kwargs).generations[0].message
+        if message.tool_calls:
+            tool_call_chunks = [
+                {"name": c["name"], "args": json.dumps(c["args"]), "id": c["id"], "index": i}
+                for i, c in enumerate(message.tool_calls)
+            ]
+            yield ChatGenerationChunk(
+                message=AIMessageChunk(content="", tool_call_chunks=tool_call_chunks)
+            )
+            return
+        for word in re.split(r"(\s)", message.content):
+            if word:
+                chunk = ChatGenerationChunk(message=AIMessageChunk(content=word))
+                if run_manager:
+                    run_manager.on_llm_new_token(word, chunk=chunk)
+                yield chunk
+
+
+@pytest.fixture
+def fake_weather_agent():
+    """
+    Real LangChain agent with a scripted model: one get_weather call, then a final answer.
+    The model carries the same metrics/tracing callback as the production agent.
+    """
+    from langchain.agents import create_agent
+
+    from weather_agent.llm_callbacks import LLMCallbackHandler
+    from weather_agent.weather import get_weather
+
+    def build(final_text: str = "Одягни теплу куртку.", city: str = "Kyiv"):
+        messages = iter(
+            [
+                AIMessage(
+                    content="",
+                    tool_calls=[{"name": "get_weather", "args": {"city": city}, "id": "call-1"}],
+                ),
+                AIMessage(content=final_text),
+            ]
+        )
+        model = ToolCallingFakeModel(messages=messages, callbacks=[LLMCallbackHandler()])
+        return create_agent(model, tools=[get_weather], system_prompt="test")
+
+    return build
@@ -1,5 +1,6 @@
 """Unit tests for agent with fake/mock — no real LLM API."""
 
+from itertools import pairwise
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -52,3 +53,338 @@ class TestAskAgentResponseParsing:
     def test_whitespace_only_returns_prompt(self):
         out = ask_agent("   ")
         assert "міста" in out or "Києві" in out
+
+
+@pytest.mark.unit_llm
+@pytest.mark.asyncio
+class TestAskAgentAsync:
+    """ask_agent_async uses agent.ainvoke and the async get_weather tool."""
+
+    async def test_returns_final_ai_content(self):
+        from unittest.mock import AsyncMock
+
+        from weather_agent.agent import ask_agent_async
+
+        fake_result = {"messages": [MagicMock(content="Одягни куртку та шапку.")]}
+        with patch("weather_agent.agent._get_agent") as mock_get:
+            mock_agent = MagicMock()
+            mock_agent.ainvoke = AsyncMock(return_value=fake_result)
+            mock_get.return_value = mock_agent
+
+            outcome = {}
+            out = await ask_agent_async("Що одягнути в Києві?", outcome=outcome)
+
+        assert out == "Одягни куртку та шапку."
+        assert outcome == {"route": "llm", "answered": True}
+        mock_agent.invoke.assert_not_called()
+
+    async def test_empty_user_text_returns_prompt(self):
+        from weather_agent.agent import ask_agent_async
+
+        out = await ask_agent_async("  ")
+        assert "Напишіть" in out
+
+    async def test_agent_error_returns_user_message(self):
+        from unittest.mock import AsyncMock
+
+        from weather_agent.agent import ask_agent_async
+
+        with patch("weather_agent.agent._get_agent") as mock_get:
+            mock_get.return_value.ainvoke = AsyncMock(side_effect=RuntimeError("rate limit"))
+            outcome = {}
+            out = await ask_agent_async("Що одягнути в Києві?", outcome=outcome)
+
+        assert "Виникла помилка" in out
+        assert outcome == {"route": "error", "answered": False}
+
+    async def test_model_api_error_returns_user_message(self):
+        from unittest.mock import AsyncMock
+
+        import httpx
+        import openai
+
+        from weather_agent.agent import ask_agent_async
+
+        request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+        error = openai.APIConnectionError(request=request)
+        with patch("weather_agent.agent._get_agent") as mock_get:
+            mock_get.return_value.ainvoke = AsyncMock(side_effect=error)
+            out = await ask_agent_async("Що одягнути в Києві?")
+
+        assert out.startswith("Виникла помилка: Connection error.")
+
+    async def test_bug_in_code_propagates(self):
+        from unittest.mock import AsyncMock
+
+        from weather_agent.agent import ask_agent_async
+
+        with patch("weather_agent.agent._get_agent") as mock_get:
+            mock_get.return_value.ainvoke = AsyncMock(side_effect=TypeError("bad argument"))
+            with pytest.raises(TypeError):
+                await ask_agent_async("Що одягнути в Києві?")
+
+    async def test_fake_model_calls_async_weather_tool(self, fake_weather_agent, open_meteo):
+        from weather_agent.agent import ask_agent_async
+
+        requests = open_meteo()
+        with patch("weather_agent.agent._get_agent", return_value=fake_weather_agent()):
+            out = await ask_agent_async("Що одягнути в Києві?")
+
+        assert out == "Одягни теплу куртку."
+        assert [r.url.host for r in requests] == [
+            "geocoding-api.open-meteo.com",
+            "api.open-meteo.com",
+        ]
+
+
+@pytest.mark.unit_llm
+@pytest.mark.asyncio
+class TestStreamAgent:
+    """stream_agent yields the growing reply text from agent.astream."""
+
+    async def test_yields_growing_snapshots_after_tool_call(self, fake_weather_agent, open_meteo):
+        from weather_agent.agent import stream_agent
+
+        open_meteo()
+        with patch("weather_agent.agent._get_agent", return_value=fake_weather_agent()):
+            parts = [text async for text in stream_agent("Що одягнути в Києві?")]
+
+        assert len(parts) > 1
+        assert parts[-1] == "Одягни теплу куртку."
+        assert all(b.startswith(a) for a, b in pairwise(parts))
+
+    async def test_fast_path_reply_yielded_whole(self, fast_path, open_meteo):
+        from weather_agent.agent import stream_agent
+
+        open_meteo()
+        with patch("weather_agent.agent._get_agent") as mock_get:
+            parts = [text async for text in stream_agent("Що одягнути в Києві?")]
+
+        mock_get.assert_not_called()
+        assert len(parts) == 1
+        assert parts[0].startswith("Зараз в Києві:")
+
+    async def test_agent_error_yields_user_message(self):
+        from weather_agent.agent import stream_agent
+
+        with patch("weather_agent.agent._get_agent") as mock_get:
+            mock_get.return_value.astream.side_effect = RuntimeError("rate limit")
+            parts = [text async for text in stream_agent("Що одягнути в Києві?")]
+
+        assert len(parts) == 1
+        assert "Виникла помилка" in parts[0]
+
+    async def test_empty_user_text_returns_prompt(self):
+        from weather_agent.agent import EMPTY_INPUT_REPLY, stream_agent
+
+        assert [text async for text in stream_agent(" ")] == [EMPTY_INPUT_REPLY]
+
+
+@pytest.mark.unit_llm
+@pytest.mark.asyncio
+class TestAdmissionControl:
+    """ask_agent_async and stream_agent reply 'busy' instead of calling an overloaded LLM."""
+
+    @pytest.fixture
+    def full(self, monkeypatch):
+        from weather_agent.admission import AdmissionController
+
+        controller = AdmissionController(max_inflight=1, max_queue=0, queue_timeout=1.0)
+        monkeypatch.setattr("weather_agent.agent._llm_slots", controller)
+        return controller
+
+    async def test_busy_reply_when_queue_full(self, full):
+        from unittest.mock import AsyncMock
+
+        from weather_agent.agent import BUSY_REPLY, admission_stats, ask_agent_async
+
+        await full.acquire()
+        with patch("weather_agent.agent._get_agent") as mock_get:
+            mock_get.return_value.ainvoke = AsyncMock()
+            out = await ask_agent_async("Що одягнути в Києві?")
+
+        assert out == BUSY_REPLY
+        mock_get.return_value.ainvoke.assert_not_called()
+        assert admission_stats()["rejected_full"] == 1
+
+    async def test_stream_busy_reply(self, full):
+        from weather_agent.agent import BUSY_REPLY, stream_agent
+
+        await full.acquire()
+        with patch("weather_agent.agent._get_agent"):
+            parts = [text async for text in stream_agent("Що одягнути в Києві?")]
+        assert parts == [BUSY_REPLY]
+
+    async def test_slot_released_after_call(self, full):
+        from unittest.mock import AsyncMock
+
+        from weather_agent.agent import ask_agent_async
+
+        fake_result = {"messages": [MagicMock(content="Куртка.")]}
+        with patch("weather_agent.agent._get_agent") as mock_get:
+            mock_get.return_value.ainvoke = AsyncMock(return_value=fake_result)
+            assert await ask_agent_async("Київ?") == "Куртка."
+            assert await ask_agent_async("Львів?") == "Куртка."
+        assert full.stats()["inflight"] == 0
+
+
+@pytest.mark.unit_llm
+@pytest.mark.asyncio
+class TestPrewarm:
+    """prewarm() builds the agent off the event loop and reports step timings."""
+
+    async def test_builds_agent_and_reports_timings(self):
+        from weather_agent.agent import prewarm
+
+        with patch("weather_agent.agent._get_agent") as mock_get:
+            timings = await prewarm()
+
+        mock_get.assert_called_once_with()
+        assert {"imports", "agent", "http"} <= timings.keys()
+        assert all(seconds >= 0 for seconds in timings.values())
+
+    async def test_missing_key_is_logged_not_raised(self, caplog):
+        from weather_agent.agent import prewarm
+
+        with patch("weather_agent.agent._get_agent", side_effect=SystemExit("no key")):
+            assert await prewarm() == {}
+        assert "no key" in caplog.text
+
+    @pytest.mark.parametrize("streaming", [False, True])
+    async def test_agent_build_does_not_block_event_loop(self, monkeypatch, streaming):
+        import asyncio
+        import time
+        from unittest.mock import AsyncMock
+
+        from langchain_core.messages import AIMessage
+
+        from weather_agent.agent import ask_agent_async, stream_agent
+
+        agent = MagicMock()
+        agent.ainvoke = AsyncMock(return_value={"messages": [AIMessage("Куртка.")]})
+
+        async def astream(*args, **kwargs):
+            yield AIMessage("Куртка.", id="m1"), {}
+
+        agent.astream = astream
+
+        def slow_build():
+            # Холодний старт: імпорт LangChain або очікування на prewarm під _agent_lock
+            time.sleep(0.3)
+            return agent
+
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        monkeypatch.setattr("weather_agent.agent._agent", None)
+        monkeypatch.setattr("weather_agent.agent._get_agent", slow_build)
+        task = asyncio.create_task(ticker())
+        try:
+            if streaming:
+                parts = [text async for text in stream_agent("Що одягнути в Києві?")]
+                assert parts == ["Куртка."]
+            else:
+                assert await ask_agent_async("Що одягнути в Києві?") == "Куртка."
+        finally:
+            task.cancel()
+
+        assert ticks >= 10
+
+
+@pytest.mark.unit_llm
+@pytest.mark.asyncio
+class TestAgentMetrics:
+    """Agent latency by route, LLM call latency and token usage per message."""
+
+    async def test_tokens_summed_from_usage_metadata(self):
+        from unittest.mock import AsyncMock
+
+        from langchain_core.messages import AIMessage, HumanMessage
+
+        from weather_agent.agent import ask_agent_async
+        from weather_agent.metrics import AGENT_SECONDS, MESSAGE_TOKENS, TOKENS
+
+        usage = {"input_tokens": 120, "output_tokens": 30, "total_tokens": 150}
+        result = {
+            "messages": [
+                HumanMessage("Київ?"),
+                AIMessage("", usage_metadata=usage),
+                AIMessage("Куртка.", usage_metadata=usage),
+            ]
+        }
+        with patch("weather_agent.agent._get_agent") as mock_get:
+            mock_get.return_value.ainvoke = AsyncMock(return_value=result)
+            assert await ask_agent_async("Київ?") == "Куртка."
+
+        assert TOKENS.value(type="input") == 240
+        assert TOKENS.value(type="output") == 60
+        assert MESSAGE_TOKENS.count(type="input") == 1
+        assert AGENT_SECONDS.count(route="llm") == 1
+
+    async def test_fast_path_and_error_routes(self, fast_path, open_meteo):
+        from weather_agent.agent import ask_agent_async
+        from weather_agent.metrics import AGENT_SECONDS, ERRORS
+
+        open_meteo()
+        await ask_agent_async("Що одягнути в Києві?")
+        with patch("weather_agent.agent._get_agent", side_effect=RuntimeError("boom")):
+            await ask_agent_async("Порівняй Київ і Львів")
+
+        assert AGENT_SECONDS.count(route="fast_path") == 1
+        assert AGENT_SECONDS.count(route="error") == 1
+        assert ERRORS.value(component="agent", type="RuntimeError") == 1
+
+    async def test_llm_callback_times_each_model_call(self):
+        from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+        from langchain_core.messages import AIMessage
+
+        from weather_agent.llm_callbacks import LLMCallbackHandler
+        from weather_agent.metrics import LLM_SECONDS
+
+        model = GenericFakeChatModel(
+            messages=iter([AIMessage("a"), AIMessage("b")]), callbacks=[LLMCallbackHandler()]
+        )
+        model.invoke("hi")
+        await model.ainvoke("hi")
+
+        assert LLM_SECONDS.count() == 2
+
+
+@pytest.mark.unit_llm
+@pytest.mark.asyncio
+class TestTracing:
+    """One request yields a span tree: ask_agent → LLM turns, tool → HTTP calls."""
+
+    async def test_span_tree_for_tool_calling_turn(self, fake_weather_agent, traced, open_meteo):
+        from weather_agent.agent import ask_agent_async
+
+        open_meteo()
+        with patch("weather_agent.agent._get_agent", return_value=fake_weather_agent()):
+            await ask_agent_async("Що одягнути в Києві?")
+
+        by_id = {s["span_id"]: s for s in traced}
+        names = sorted(s["name"] for s in traced)
+        assert names == [
+            "ask_agent",
+            "http.forecast",
+            "http.geocode",
+            "llm.call",
+            "llm.call",
+            "tool.get_weather",
+        ]
+        assert len({s["trace_id"] for s in traced}) == 1
+
+        def parent(name):
+            s = next(s for s in traced if s["name"] == name)
+            return by_id[s["parent_id"]]["name"]
+
+        assert parent("http.geocode") == "tool.get_weather"
+        assert parent("http.forecast") == "tool.get_weather"
+        assert parent("tool.get_weather") == "ask_agent"
+        steps = [s["attributes"]["step"] for s in traced if s["name"] == "llm.call"]
+        assert steps == [1, 3]
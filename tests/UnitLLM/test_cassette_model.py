@@ -0,0 +1,147 @@
+"""Unit tests: chat-model cassette — record a scripted model once, replay the agent offline."""
+
+import asyncio
+
+import httpx
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from weather_agent import agent
+from weather_agent.cassette import Cassette, CassetteMiss, CassetteTransport
+from weather_agent.http_client import use_transport
+from weather_agent.weather import clear_caches
+
+from .conftest import ToolCallingFakeModel
+
+GEO = {"results": [{"latitude": 50.45, "longitude": 30.52, "timezone": "Europe/Kyiv"}]}
+FORECAST = {
+    "current": {
+        "temperature_2m": -2.0,
+        "apparent_temperature": -4.0,
+        "weather_code": 71,
+        "wind_speed_10m": 10.0,
+        "relative_humidity_2m": 80,
+    }
+}
+
+
+def _open_meteo() -> httpx.MockTransport:
+    return httpx.MockTransport(
+        lambda request: httpx.Response(200, json=GEO if "search" in request.url.path else FORECAST)
+    )
+
+
+def _scripted(final_text: str = "Одягни теплу куртку.") -> ToolCallingFakeModel:
+    return ToolCallingFakeModel(
+        messages=iter(
+            [
+                AIMessage(
+                    content="",
+                    tool_calls=[{"name": "get_weather", "args": {"city": "Київ"}, "id": "rec-1"}],
+                    usage_metadata={"input_tokens": 50, "output_tokens": 5, "total_tokens": 55},
+                ),
+                AIMessage(content=final_text),
+            ]
+        )
+    )
+
+
+def _build(model):
+    """Same tools and system prompt as the production agent, so its requests match too."""
+    from langchain.agents import create_agent
+
+    from weather_agent.prompts import get_system_prompt
+    from weather_agent.weather import get_forecast, get_weather, get_weather_many
+
+    return create_agent(
+        model,
+        tools=[get_weather, get_weather_many, get_forecast],
+        system_prompt=get_system_prompt(),
+    )
+
+
+def _no_key():
+    raise SystemExit("OPENAI_API_KEY is not needed for replay")
+
+
+@pytest.fixture
+def recorded(tmp_path):
+    """Cassette with one agent run (model + Open-Meteo) recorded from a scripted model."""
+    from weather_agent.cassette_model import CassetteChatModel
+
+    path = tmp_path / "kyiv.json"
+    with Cassette(path, mode="once") as cassette:
+        use_transport(CassetteTransport(cassette, inner=_open_meteo()))
+        result = _build(CassetteChatModel(cassette=cassette, inner=_scripted())).invoke(
+            {"messages": [HumanMessage("Що одягнути в Києві?")]}
+        )
+    clear_caches()
+    return path, result["messages"][-1].content
+
+
+async def _last(stream) -> str:
+    text = ""
+    async for text in stream:
+        pass
+    return text
+
+
+@pytest.mark.unit_llm
+class TestCassetteChatModel:
+    """Recorded model turns replay without the inner model, network or API key."""
+
+    def test_replay_matches_recording(self, recorded):
+        from weather_agent.cassette_model import CassetteChatModel
+
+        path, recorded_text = recorded
+        replay = Cassette(path, mode="replay")
+        use_transport(CassetteTransport(replay))
+        result = _build(CassetteChatModel(cassette=replay)).invoke(
+            {"messages": [HumanMessage("Що одягнути в Києві?")]}
+        )
+        messages = result["messages"]
+        assert messages[-1].content == recorded_text == "Одягни теплу куртку."
+        assert messages[1].tool_calls[0]["name"] == "get_weather"
+        assert messages[1].usage_metadata["input_tokens"] == 50
+        assert "Температура -2.0°C" in messages[2].content
+        # 2 model turns + geocode + forecast
+        assert replay.stats == {"hits": 4, "recorded": 0}
+
+    def test_different_question_is_a_miss(self, recorded):
+        from weather_agent.cassette_model import CassetteChatModel
+
+        path, _ = recorded
+        model = CassetteChatModel(cassette=Cassette(path, mode="replay"))
+        with pytest.raises(CassetteMiss):
+            model.invoke([HumanMessage("Що одягнути у Львові?")])
+
+    def test_key_ignores_tool_call_ids(self):
+        from weather_agent.cassette_model import request_key
+
+        def conversation(call_id: str):
+            return [
+                SystemMessage("s"),
+                HumanMessage("q"),
+                AIMessage(
+                    "",
+                    tool_calls=[{"name": "get_weather", "args": {"city": "Київ"}, "id": call_id}],
+                ),
+                ToolMessage("ok", tool_call_id=call_id),
+            ]
+
+        assert request_key(conversation("a")) == request_key(conversation("b"))
+        assert request_key(conversation("a")) != request_key(conversation("a")[:2])
+
+    def test_ask_agent_replays_without_api_key(self, recorded, monkeypatch):
+        path, recorded_text = recorded
+        monkeypatch.setattr("weather_agent.agent.require_openai_key", _no_key)
+        cassette = Cassette(path, mode="replay")
+        use_transport(CassetteTransport(cassette))
+        agent.use_cassette(cassette)
+        try:
+            assert agent.ask_agent("Що одягнути в Києві?") == recorded_text
+            assert asyncio.run(agent.ask_agent_async("Що одягнути в Києві?")) == recorded_text
+            streamed = asyncio.run(_last(agent.stream_agent("Що одягнути в Києві?")))
+            assert streamed == recorded_text
+        finally:
+            agent.use_cassette(None)
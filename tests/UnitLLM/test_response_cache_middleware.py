@@ -0,0 +1,176 @@
+"""Unit tests: agent replies cached by the resolved tool call — scripted model, mocked HTTP."""
+
+from unittest.mock import patch
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from weather_agent.agent import (
+    ask_agent,
+    ask_agent_async,
+    response_cache_stats,
+    run_agent_traced,
+    stream_agent,
+)
+
+from .conftest import ToolCallingFakeModel
+
+
+@pytest.fixture
+def weather_api(open_meteo, mock_httpx_geocode_kyiv, mock_httpx_empty_geocode):
+    """Serves Kyiv geocoding and current weather; other cities are not found."""
+    open_meteo(
+        lambda name: (
+            mock_httpx_geocode_kyiv
+            if name in ("Київ", "Києві", "Kyiv")
+            else mock_httpx_empty_geocode
+        )
+    )
+
+
+def _call(city: str, call_id: str) -> AIMessage:
+    return AIMessage(
+        content="", tool_calls=[{"name": "get_weather", "args": {"city": city}, "id": call_id}]
+    )
+
+
+def _agent(*turns: tuple[str, str | None]):
+    """
+    Real agent with the response cache middleware; each turn is a get_weather call
+    for the city followed by the final answer (None: served from the cache, so the
+    model is not asked). Returns (agent, model).
+    """
+    from langchain.agents import create_agent
+
+    from weather_agent.cache_middleware import ResponseCacheMiddleware
+    from weather_agent.weather import get_weather
+
+    script = []
+    for i, (city, answer) in enumerate(turns):
+        script.append(_call(city, f"call-{i}"))
+        if answer is not None:
+            script.append(AIMessage(content=answer))
+    model = ToolCallingFakeModel(messages=iter(script))
+    agent = create_agent(
+        model, tools=[get_weather], system_prompt="test", middleware=[ResponseCacheMiddleware()]
+    )
+    return agent, model
+
+
+def _remaining(model) -> list[str]:
+    return [message.content for message in model.messages]
+
+
+@pytest.mark.unit_llm
+class TestResponseCacheMiddleware:
+    def test_same_tool_call_reuses_reply(self, reply_cache, weather_api):
+        agent, model = _agent(("Київ", "Вдягніть пуховик."), ("Києві", None))
+        with patch("weather_agent.agent._get_agent", return_value=agent):
+            first = ask_agent("Що одягнути в Києві?")
+            # Інше формулювання, той самий виклик tool — друга відповідь моделі не потрібна
+            second = ask_agent("Порадь, що вдягнути сьогодні у Києві")
+
+        assert first == second == "Вдягніть пуховик."
+        assert _remaining(model) == []
+        stats = response_cache_stats()
+        assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+
+    def test_other_spelling_of_place_hits(self, reply_cache, weather_api):
+        agent, model = _agent(("Київ", "Вдягніть пуховик."), ("Kyiv", None))
+        with patch("weather_agent.agent._get_agent", return_value=agent):
+            ask_agent("Що одягнути в Києві?")
+            # Інший чат, англійська назва: ті самі координати й та сама погода
+            assert ask_agent("What to wear in Kyiv?") == "Вдягніть пуховик."
+        assert _remaining(model) == []
+
+    def test_weather_change_misses(self, reply_cache, open_meteo, mock_httpx_forecast):
+        from weather_agent.weather import clear_caches
+
+        agent, _model = _agent(("Київ", "Вдягніть пуховик."), ("Київ", "Вдягніть футболку."))
+        with patch("weather_agent.agent._get_agent", return_value=agent):
+            open_meteo()
+            ask_agent("Що одягнути в Києві?")
+            clear_caches()
+            warm = {"current": {**mock_httpx_forecast["current"], "apparent_temperature": 24.0}}
+            open_meteo(forecast=warm)
+            assert ask_agent("Що одягнути в Києві?") == "Вдягніть футболку."
+        assert response_cache_stats()["size"] == 2
+
+    def test_self_contained_question_with_history_hits(self, reply_cache, weather_api):
+        agent, model = _agent(("Київ", "Вдягніть пуховик."), ("Київ", None))
+        history = [
+            {"role": "user", "content": "Привіт"},
+            {"role": "assistant", "content": "Вітаю! Для якого міста порада?"},
+        ]
+        with patch("weather_agent.agent._get_agent", return_value=agent):
+            ask_agent("Що одягнути в Києві?")
+            assert ask_agent("Що одягнути в Києві?", history) == "Вдягніть пуховик."
+        assert _remaining(model) == []
+
+    @pytest.mark.parametrize("question", ["А в Києві?", "Що вдягнути сьогодні?"])
+    def test_follow_up_with_history_skips_cache(self, reply_cache, weather_api, question):
+        agent, model = _agent(("Київ", "Вдягніть пуховик."), ("Київ", "Теж пуховик."))
+        history = [
+            {"role": "user", "content": "Що одягнути в Києві?"},
+            {"role": "assistant", "content": "Вдягніть пуховик."},
+        ]
+        with patch("weather_agent.agent._get_agent", return_value=agent):
+            ask_agent("Що одягнути в Києві?")
+            # Відсилання до розмови або місто лише з історії — відповідь від моделі
+            assert ask_agent(question, history) == "Теж пуховик."
+
+        assert _remaining(model) == []
+        assert response_cache_stats()["hits"] == 0
+
+    def test_tool_failure_not_cached(self, reply_cache, weather_api):
+        agent, _model = _agent(("Атлантида", "Не знайшов місто."), ("Атлантида", "Уточніть."))
+        with patch("weather_agent.agent._get_agent", return_value=agent):
+            ask_agent("Що одягнути в Атлантиді?")
+            assert ask_agent("Що одягнути в Атлантиді?") == "Уточніть."
+        assert response_cache_stats()["size"] == 0
+
+    def test_disabled_cache_calls_model(self, weather_api):
+        agent, _model = _agent(("Київ", "Вдягніть пуховик."), ("Київ", "Теж пуховик."))
+        with patch("weather_agent.agent._get_agent", return_value=agent):
+            ask_agent("Що одягнути в Києві?")
+            assert ask_agent("Що одягнути в Києві?") == "Теж пуховик."
+        assert response_cache_stats()["size"] == 0
+
+    async def test_async_and_stream_share_cache(self, reply_cache, weather_api):
+        agent, model = _agent(("Київ", "Відповідь."), ("Київ", None), ("Київ", None))
+        with patch("weather_agent.agent._get_agent", return_value=agent):
+            assert await ask_agent_async("Що одягнути в Києві?") == "Відповідь."
+            assert ask_agent("Що одягнути в Києві?") == "Відповідь."
+            outcome: dict = {}
+            parts = [text async for text in stream_agent("Що одягнути в Києві?", (), outcome)]
+
+        assert parts == ["Відповідь."]
+        assert outcome == {"route": "llm", "answered": True}
+        assert _remaining(model) == []
+
+    async def test_evals_bypass_cache(self, reply_cache, weather_api):
+        agent, _model = _agent(("Київ", "Вдягніть пуховик."), ("Київ", "Теж пуховик."))
+        with patch("weather_agent.agent._get_agent", return_value=agent):
+            ask_agent("Що одягнути в Києві?")
+            reply, tools = await run_agent_traced("Що одягнути в Києві?")
+
+        assert (reply, tools) == ("Теж пуховик.", ["get_weather"])
+        assert response_cache_stats()["hits"] == 0
+
+
+@pytest.mark.unit_llm
+@pytest.mark.parametrize(
+    ("question", "cities", "expected"),
+    [
+        ("Що одягнути в Києві?", ["Київ"], True),
+        ("Порадь одяг на вечір у Львові та Одесі", ["Львів", "Одеса"], True),
+        ("Що вдягнути сьогодні?", ["Київ"], False),
+        ("А в Києві?", ["Київ"], False),
+        ("Там теж холодно, у Києві?", ["Київ"], False),
+        ("Що одягнути в Києві й Львові?", ["Київ", "Харків"], False),
+    ],
+)
+def test_self_contained_question(question, cities, expected):
+    from weather_agent.cache_middleware import _self_contained
+
+    assert _self_contained(question, cities) is expected
@@ -0,0 +1,121 @@
+"""Unit tests for LLM admission control — no LLM/HTTP."""
+
+import asyncio
+
+import pytest
+
+from weather_agent.admission import AdmissionController, AdmissionRejected
+
+
+async def _hold(controller, release: asyncio.Event, order: list, name: str):
+    async with controller.slot():
+        order.append(name)
+        await release.wait()
+
+
+@pytest.mark.unit_mock
+@pytest.mark.asyncio
+class TestAdmissionController:
+    async def test_limits_inflight_and_queues_fifo(self):
+        controller = AdmissionController(max_inflight=2, max_queue=5, queue_timeout=1.0)
+        release, order = asyncio.Event(), []
+        tasks = [asyncio.create_task(_hold(controller, release, order, name)) for name in "abcd"]
+        await asyncio.sleep(0.01)
+
+        stats = controller.stats()
+        assert order == ["a", "b"]
+        assert (stats["inflight"], stats["queue_depth"]) == (2, 2)
+
+        release.set()
+        await asyncio.gather(*tasks)
+        stats = controller.stats()
+        assert order == ["a", "b", "c", "d"]
+        assert (stats["inflight"], stats["queue_depth"]) == (0, 0)
+        assert (stats["admitted"], stats["queued"], stats["peak_queue_depth"]) == (4, 2, 2)
+
+    async def test_full_queue_rejects_immediately(self):
+        controller = AdmissionController(max_inflight=1, max_queue=1, queue_timeout=1.0)
+        release, order = asyncio.Event(), []
+        tasks = [asyncio.create_task(_hold(controller, release, order, n)) for n in "ab"]
+        await asyncio.sleep(0.01)
+
+        with pytest.raises(AdmissionRejected) as exc:
+            await controller.acquire()
+        assert exc.value.reason == "queue_full"
+
+        release.set()
+        await asyncio.gather(*tasks)
+        assert controller.stats()["rejected_full"] == 1
+
+    async def test_queue_timeout_rejects_and_frees_place(self):
+        controller = AdmissionController(max_inflight=1, max_queue=1, queue_timeout=0.02)
+        release, order = asyncio.Event(), []
+        holder = asyncio.create_task(_hold(controller, release, order, "a"))
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected) as exc:
+            await controller.acquire()
+        assert exc.value.reason == "timeout"
+        assert controller.stats()["queue_depth"] == 0
+
+        release.set()
+        await holder
+        # Слот не загубився: наступний запит проходить одразу
+        await asyncio.wait_for(controller.acquire(), 0.1)
+        assert controller.stats()["rejected_timeout"] == 1
+
+    async def test_cancelled_waiter_does_not_leak_slot(self):
+        controller = AdmissionController(max_inflight=1, max_queue=2, queue_timeout=1.0)
+        await controller.acquire()
+        waiter = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        controller.release()
+        assert controller.stats()["inflight"] == 0
+
+    async def test_wait_time_metrics(self):
+        now = [0.0]
+        controller = AdmissionController(1, 1, 1.0, clock=lambda: now[0])
+        await controller.acquire()
+        waiter = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+        now[0] = 0.5
+        controller.release()
+        await waiter
+
+        stats = controller.stats()
+        assert stats["wait_avg"] == stats["wait_max"] == 0.5
+
+    async def test_zero_max_inflight_is_unlimited(self):
+        controller = AdmissionController(max_inflight=0, max_queue=0, queue_timeout=0.0)
+        for _ in range(10):
+            await controller.acquire()
+        assert controller.stats()["admitted"] == 10
+
+    async def test_wait_and_rejections_exported_to_metrics(self):
+        from weather_agent.metrics import LLM_QUEUE_WAIT_SECONDS, LLM_REJECTED, render
+
+        now = [0.0]
+        controller = AdmissionController(1, 1, 0.02, clock=lambda: now[0])
+        await controller.acquire()
+        waiter = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected):
+            await controller.acquire()
+        now[0] = 0.5
+        controller.release()
+        await waiter
+        with pytest.raises(AdmissionRejected):
+            await controller.acquire()
+
+        assert LLM_REJECTED.value(reason="full") == 1
+        assert LLM_REJECTED.value(reason="timeout") == 1
+        assert LLM_QUEUE_WAIT_SECONDS.count(result="admitted") == 1
+        assert LLM_QUEUE_WAIT_SECONDS.sum(result="admitted") == 0.5
+        assert LLM_QUEUE_WAIT_SECONDS.count(result="timeout") == 1
+        text = render()
+        assert 'weather_agent_llm_rejected_total{reason="full"} 1' in text
+        assert 'weather_agent_llm_queue_wait_seconds_count{result="admitted"} 1' in text
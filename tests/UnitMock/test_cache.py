@@ -0,0 +1,82 @@
+"""Unit tests for TTL/LRU cache and city-name normalization — no LLM/HTTP."""
+
+import pytest
+
+from weather_agent.cache import TTLCache
+from weather_agent.cities import normalize_city
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.unit_mock
+class TestTTLCache:
+    def test_hit_and_miss_counters(self):
+        cache = TTLCache(maxsize=4, ttl=60)
+        assert cache.get("a") is None
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_entry_expires_after_ttl(self):
+        clock = FakeClock()
+        cache = TTLCache(maxsize=4, ttl=10, clock=clock)
+        cache.set("a", 1)
+        clock.now += 9
+        assert cache.get("a") == 1
+        clock.now += 2
+        assert cache.get("a") is None
+        assert cache.stats()["expirations"] == 1
+
+    def test_per_entry_ttl_overrides_default(self):
+        clock = FakeClock()
+        cache = TTLCache(maxsize=4, ttl=100, clock=clock)
+        cache.set("a", 1, ttl=1)
+        clock.now += 2
+        assert cache.get("a") is None
+
+    def test_lru_eviction_keeps_recently_used(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.stats()["evictions"] == 1
+
+    def test_zero_size_disables_cache(self):
+        cache = TTLCache(maxsize=0, ttl=60)
+        cache.set("a", 1)
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+
+@pytest.mark.unit_mock
+class TestNormalizeCity:
+    @pytest.mark.parametrize(
+        "raw, expected",
+        [
+            ("Київ", "київ"),
+            ("  КИЇВ ", "київ"),
+            ("Києві", "київ"),
+            ("в Києві?", "київ"),
+            ("у Львові", "львів"),
+            ("Одесі", "одеса"),
+            ("Kyiv", "kyiv"),
+            ("Кам’янець-Подільський", "кам'янець-подільський"),
+            ("Нью   Йорк", "нью йорк"),
+        ],
+    )
+    def test_normalization(self, raw, expected):
+        assert normalize_city(raw) == expected
+
+    def test_generic_locative_rule(self):
+        assert normalize_city("Чугуєві") == "чугуїв"
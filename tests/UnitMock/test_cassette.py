@@ -0,0 +1,138 @@
+"""Unit tests: cassette record/replay for the weather HTTP client (no network)."""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from weather_agent.cassette import (
+    Cassette,
+    CassetteMiss,
+    CassetteTransport,
+    http_key,
+    recorded_cities,
+)
+from weather_agent.http_client import use_transport
+from weather_agent.weather import _aget_weather, _get_weather, clear_caches
+
+GEO = {
+    "results": [{"name": "Київ", "latitude": 50.45, "longitude": 30.52, "timezone": "Europe/Kyiv"}]
+}
+FORECAST = {
+    "current": {
+        "temperature_2m": 3.0,
+        "apparent_temperature": 1.0,
+        "weather_code": 3,
+        "wind_speed_10m": 12.0,
+        "relative_humidity_2m": 70,
+    }
+}
+
+
+def _upstream(calls: list[str]) -> httpx.MockTransport:
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        return httpx.Response(200, json=GEO if "search" in request.url.path else FORECAST)
+
+    return httpx.MockTransport(handler)
+
+
+@pytest.mark.unit_mock
+class TestHttpKey:
+    """Requests match on method, host, path and normalized params."""
+
+    def test_param_order_case_whitespace_and_number_format_do_not_matter(self):
+        a = http_key("get", "https://x.test/v1/search?name=%20Київ%20&count=1&language=uk")
+        b = http_key("GET", "https://x.test/v1/search?language=UK&count=1.0&name=київ")
+        assert a == b
+
+    def test_coordinates_are_rounded_per_item(self):
+        a = http_key(
+            "GET", "https://x.test/v1/forecast?latitude=50.450001,49.84&longitude=30.52,24.03"
+        )
+        b = http_key("GET", "https://x.test/v1/forecast?latitude=50.45,49.84&longitude=30.52,24.03")
+        assert a == b
+
+    def test_different_city_differs(self):
+        assert http_key("GET", "https://x.test/a?name=Київ") != http_key(
+            "GET", "https://x.test/a?name=Львів"
+        )
+
+
+@pytest.mark.unit_mock
+class TestCassetteTransport:
+    """Record once through an inner transport, then replay offline."""
+
+    def test_record_then_replay_offline(self, tmp_path):
+        path = tmp_path / "kyiv.json"
+        calls: list[str] = []
+        with Cassette(path, mode="once") as cassette:
+            use_transport(CassetteTransport(cassette, inner=_upstream(calls)))
+            recorded, _ = _get_weather("Київ")
+        assert calls == ["/v1/search", "/v1/forecast"]
+        saved = json.loads(path.read_text(encoding="utf-8"))
+        assert len(saved["http"]) == 2
+        assert GEO in [entry["json"] for entries in saved["http"].values() for entry in entries]
+
+        clear_caches()
+        replay = Cassette(path, mode="replay")
+        use_transport(CassetteTransport(replay))
+        replayed, _ = _get_weather("  київ ")
+        assert replayed == recorded
+        assert replay.stats == {"hits": 2, "recorded": 0}
+        assert calls == ["/v1/search", "/v1/forecast"]
+
+    def test_async_client_replays_too(self, tmp_path):
+        path = tmp_path / "kyiv.json"
+        with Cassette(path, mode="once") as cassette:
+            use_transport(CassetteTransport(cassette, inner=_upstream([])))
+            recorded, _ = _get_weather("Київ")
+        clear_caches()
+        use_transport(CassetteTransport(Cassette(path, mode="replay")))
+        replayed, _ = asyncio.run(_aget_weather("Київ"))
+        assert replayed == recorded
+
+    def test_replay_miss_raises(self, tmp_path):
+        transport = CassetteTransport(Cassette(tmp_path / "empty.json", mode="replay"))
+        with pytest.raises(CassetteMiss), httpx.Client(transport=transport) as client:
+            client.get("https://x.test/v1/search", params={"name": "Ніде"})
+
+    def test_repeated_requests_replay_in_order_then_repeat_last(self, tmp_path):
+        cassette = Cassette(tmp_path / "seq.json", mode="replay")
+        key = http_key("GET", "https://x.test/v1/search?name=a")
+        cassette._entries["http"][key] = [{"status": 503, "text": ""}, {"status": 200, "json": GEO}]
+        with httpx.Client(transport=CassetteTransport(cassette)) as client:
+            statuses = [client.get("https://x.test/v1/search?name=a").status_code for _ in range(3)]
+        assert statuses == [503, 200, 200]
+
+    def test_record_mode_refreshes_existing_entries(self, tmp_path):
+        path = tmp_path / "kyiv.json"
+        with Cassette(path, mode="once") as cassette:
+            use_transport(CassetteTransport(cassette, inner=_upstream([])))
+            _get_weather("Київ")
+        calls: list[str] = []
+        clear_caches()
+        with Cassette(path, mode="record") as cassette:
+            use_transport(CassetteTransport(cassette, inner=_upstream(calls)))
+            _get_weather("Київ")
+        assert len(calls) == 2
+        saved = json.loads(path.read_text(encoding="utf-8"))
+        assert all(len(entries) == 1 for entries in saved["http"].values())
+
+    def test_empty_recording_still_creates_file(self, tmp_path):
+        path = tmp_path / "nothing.json"
+        Cassette(path, mode="once").save()
+        assert path.exists()
+        assert Cassette(path, mode="replay").keys("http") == []
+
+    def test_recorded_cities(self, tmp_path):
+        path = tmp_path / "kyiv.json"
+        with Cassette(path, mode="once") as cassette:
+            use_transport(CassetteTransport(cassette, inner=_upstream([])))
+            _get_weather("Київ")
+        assert recorded_cities(Cassette(path, mode="replay")) == ["київ"]
+
+    def test_unknown_mode(self, tmp_path):
+        with pytest.raises(ValueError, match="режим"):
+            Cassette(tmp_path / "x.json", mode="sometimes")
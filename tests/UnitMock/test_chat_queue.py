@@ -0,0 +1,105 @@
+"""Unit tests for per-chat ordering and debouncing — no LLM/HTTP."""
+
+import asyncio
+
+import pytest
+
+from weather_agent.chat_queue import ChatQueue
+
+
+@pytest.mark.unit_mock
+@pytest.mark.asyncio
+class TestChatQueue:
+    async def test_lone_message_is_not_debounced(self):
+        queue = ChatQueue(debounce=10)
+        handled = []
+
+        async def handler(text):
+            handled.append(text)
+
+        assert await asyncio.wait_for(queue.run(1, "Київ", handler), timeout=1)
+        assert handled == ["Київ"]
+        assert queue.stats() == {"processed": 1, "merged": 0, "cancelled": 0, "active_chats": 0}
+
+    async def test_rapid_messages_merge_into_one_request(self):
+        queue = ChatQueue(debounce=0.05)
+        handled = []
+
+        async def handler(text):
+            handled.append(text)
+            await asyncio.sleep(0.01)
+
+        results = await asyncio.gather(
+            queue.run(1, "Київ", handler),
+            queue.run(1, "а завтра?", handler),
+            queue.run(1, "а Львів?", handler),
+        )
+
+        # Перше йде одразу; ті, що прийшли під час його обробки, зливаються
+        assert handled == ["Київ", "а завтра?\nа Львів?"]
+        assert results == [True, False, True]
+        assert queue.stats() == {"processed": 2, "merged": 1, "cancelled": 0, "active_chats": 0}
+
+    async def test_chats_are_independent(self):
+        queue = ChatQueue(debounce=0.01)
+        handled = []
+
+        async def handler(text):
+            handled.append(text)
+
+        await asyncio.gather(queue.run(1, "Київ", handler), queue.run(2, "Львів", handler))
+        assert sorted(handled) == ["Київ", "Львів"]
+
+    async def test_same_chat_processed_in_order(self):
+        queue = ChatQueue(debounce=0.0)
+        release = asyncio.Event()
+        events = []
+
+        async def handler(text):
+            events.append(f"start {text}")
+            if text == "Київ":
+                await release.wait()
+            events.append(f"end {text}")
+
+        first = asyncio.create_task(queue.run(1, "Київ", handler))
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(queue.run(1, "Львів", handler))
+        await asyncio.sleep(0.01)
+        release.set()
+        await asyncio.gather(first, second)
+
+        assert events == ["start Київ", "end Київ", "start Львів", "end Львів"]
+
+    async def test_superseded_waiting_request_is_cancelled(self):
+        queue = ChatQueue(debounce=0.0)
+        release = asyncio.Event()
+        handled = []
+
+        async def handler(text):
+            handled.append(text)
+            if text == "Київ":
+                await release.wait()
+
+        first = asyncio.create_task(queue.run(1, "Київ", handler))
+        await asyncio.sleep(0.01)
+        # Обидва чекають, поки закінчиться «Київ»; до LLM дійде лише новіший
+        second = asyncio.create_task(queue.run(1, "а завтра?", handler))
+        await asyncio.sleep(0.01)
+        third = asyncio.create_task(queue.run(1, "а Львів?", handler))
+        await asyncio.sleep(0.01)
+        release.set()
+        results = await asyncio.gather(first, second, third)
+
+        assert handled == ["Київ", "а завтра?\nа Львів?"]
+        assert results == [True, False, True]
+        assert queue.stats()["cancelled"] == 1
+
+    async def test_handler_error_propagates_and_state_is_dropped(self):
+        queue = ChatQueue(debounce=0.0)
+
+        async def handler(text):
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            await queue.run(1, "Київ", handler)
+        assert queue.stats()["active_chats"] == 0
@@ -0,0 +1,111 @@
+"""Unit tests for the SQLite disk cache tier — no LLM/HTTP."""
+
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from weather_agent.disk_cache import DiskCache
+
+
+@pytest.fixture
+def clock():
+    now = [1_000.0]
+    return now
+
+
+@pytest.fixture
+def disk(tmp_path, clock):
+    cache = DiskCache(tmp_path / "cache.sqlite3", flush_interval=0, clock=lambda: clock[0])
+    yield cache
+    cache.close()
+
+
+def _wait_written(disk: DiskCache, rows: int, timeout: float = 5.0) -> None:
+    """Wait for the background thread to write at least `rows` entries."""
+    deadline = time.monotonic() + timeout
+    while disk.stats()["writes"] < rows and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+class _ConnectionSpy:
+    """Wraps the SQLite connection and records which threads used it."""
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self.conn = conn
+        self.threads: set[str] = set()
+
+    def _seen(self) -> None:
+        self.threads.add(threading.current_thread().name)
+
+    def __getattr__(self, name):
+        self._seen()
+        return getattr(self.conn, name)
+
+    def __enter__(self):
+        self._seen()
+        return self.conn.__enter__()
+
+    def __exit__(self, *exc):
+        return self.conn.__exit__(*exc)
+
+
+@pytest.mark.unit_mock
+class TestDiskCache:
+    def test_round_trip_after_flush(self, disk):
+        disk.put("forecast", [50.45, 30.52, "Europe/Kyiv"], {"current": {"t": 1}}, 2_000.0)
+        disk.put("geocode", "київ", [50.45, 30.52, "Europe/Kyiv"], 2_000.0)
+
+        assert disk.load("geocode") == [("київ", [50.45, 30.52, "Europe/Kyiv"], 2_000.0)]
+        assert disk.load("forecast")[0][0] == [50.45, 30.52, "Europe/Kyiv"]
+
+    def test_writes_are_batched(self, tmp_path):
+        disk = DiskCache(tmp_path / "c.sqlite3", flush_interval=0, batch_size=3)
+        disk.put("geocode", "a", 1, 1e12)
+        disk.put("geocode", "b", 2, 1e12)
+        assert disk.stats() == {"pending": 2, "writes": 0, "flushes": 0}
+
+        disk.put("geocode", "c", 3, 1e12)
+        _wait_written(disk, 3)
+        assert disk.stats() == {"pending": 0, "writes": 3, "flushes": 1}
+        disk.close()
+
+    def test_put_never_touches_sqlite(self, tmp_path):
+        disk = DiskCache(tmp_path / "c.sqlite3", flush_interval=0, batch_size=2)
+        spy = disk._conn = _ConnectionSpy(disk._conn)
+        for i in range(5):
+            disk.put("geocode", str(i), i, 1e12)
+        _wait_written(disk, 4)
+
+        # Full batches are written by the background thread, never by the caller
+        assert spy.threads == {"disk-cache"}
+        disk._conn = spy.conn
+        disk.close()
+        reopened = DiskCache(disk.path, flush_interval=0)
+        assert sorted(key for key, _, _ in reopened.load("geocode")) == list("01234")
+        reopened.close()
+
+    def test_expired_entries_skipped_and_purged(self, disk, clock):
+        disk.put("geocode", "old", 1, 1_500.0)
+        disk.put("geocode", "new", 2, 3_000.0)
+        disk.flush()
+        clock[0] = 2_000.0
+
+        assert [key for key, _, _ in disk.load("geocode")] == ["new"]
+        assert disk.purge_expired() == 1
+
+    def test_close_flushes_and_data_survives_reopen(self, tmp_path):
+        path = tmp_path / "c.sqlite3"
+        disk = DiskCache(path, flush_interval=60)
+        disk.put("geocode", "львів", [49.84, 24.03, "Europe/Kyiv"], 1e12)
+        disk.close()
+
+        reopened = DiskCache(path, flush_interval=0)
+        assert reopened.load("geocode") == [("львів", [49.84, 24.03, "Europe/Kyiv"], 1e12)]
+        reopened.close()
+
+    def test_uses_wal_journal(self, disk):
+        conn = sqlite3.connect(disk.path)
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        conn.close()
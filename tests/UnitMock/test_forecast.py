@@ -0,0 +1,248 @@
+"""Unit tests: forecast-range mode — NumPy windows, vectorized outfit scoring, get_forecast tool."""
+
+import asyncio
+import json
+
+import httpx
+import numpy as np
+import pytest
+
+from weather_agent import forecast as fc
+from weather_agent import weather
+from weather_agent.http_client import use_transport
+from weather_agent.outfit import recommend_outfit
+
+# Friday 2026-10-16, 14:00 in Kyiv (UTC+3)
+NOW = 1792148400.0
+OFFSET = 3 * 3600
+GEO = {"results": [{"latitude": 50.45, "longitude": 30.52, "timezone": "Europe/Kyiv"}]}
+
+
+def _payload(days: int = 4, feels=None, codes=None, probability=None, gusts=None) -> dict:
+    """Open-Meteo-like hourly/daily response starting at 2026-10-16 00:00 local time."""
+    hours = days * 24
+    start = np.datetime64("2026-10-16T00:00")
+    time = [str(start + np.timedelta64(h, "h")) for h in range(hours)]
+    feels = feels or [8.0] * hours
+    return {
+        "utc_offset_seconds": OFFSET,
+        "hourly": {
+            "time": time,
+            "temperature_2m": [f + 2 for f in feels],
+            "apparent_temperature": feels,
+            "precipitation_probability": probability or [10] * hours,
+            "precipitation": [0.0] * hours,
+            "weather_code": codes or [3] * hours,
+            "wind_speed_10m": [10.0] * hours,
+            "wind_gusts_10m": gusts or [20.0] * hours,
+        },
+        "daily": {
+            "time": [str(np.datetime64("2026-10-16") + d) for d in range(days)],
+            "weather_code": [3] * days,
+            "temperature_2m_min": [4.0] * days,
+            "temperature_2m_max": [11.0] * days,
+            "precipitation_probability_max": [20] * days,
+            "precipitation_sum": [0.0] * days,
+            "wind_gusts_10m_max": [25.0] * days,
+        },
+    }
+
+
+def _now_hour() -> np.datetime64:
+    return fc.local_now(NOW, OFFSET)
+
+
+@pytest.mark.unit_mock
+class TestForecastArrays:
+    def test_parse_builds_arrays_and_nan_for_gaps(self):
+        data = _payload(days=1)
+        data["hourly"]["apparent_temperature"][3] = None
+        del data["hourly"]["wind_gusts_10m"]
+        parsed = fc.parse_forecast_range(data)
+        assert parsed.time.dtype == np.dtype("datetime64[h]")
+        assert parsed.hourly["apparent_temperature"].shape == (24,)
+        assert np.isnan(parsed.hourly["apparent_temperature"][3])
+        assert np.isnan(parsed.hourly["wind_gusts_10m"]).all()
+        assert parsed.day[0] == np.datetime64("2026-10-16")
+
+    def test_parse_without_hourly_block(self):
+        assert fc.parse_forecast_range({"current": {}}) is None
+
+    def test_local_now(self):
+        assert _now_hour() == np.datetime64("2026-10-16T14", "h")
+
+    @pytest.mark.parametrize(
+        ("period", "hour", "first", "count"),
+        [
+            ("evening", 14, "2026-10-16", 1),
+            ("evening", 23, "2026-10-17", 1),
+            ("morning", 14, "2026-10-17", 1),
+            ("tomorrow", 14, "2026-10-17", 1),
+            ("weekend", 14, "2026-10-17", 2),
+        ],
+    )
+    def test_period_days(self, period, hour, first, count):
+        now = np.datetime64("2026-10-16T00", "h") + hour
+        assert fc.period_days(period, now) == (np.datetime64(first), count)
+
+    def test_weekend_on_sunday_is_the_rest_of_today(self):
+        assert fc.period_days("weekend", np.datetime64("2026-10-18T10", "h")) == (
+            np.datetime64("2026-10-18"),
+            1,
+        )
+
+    def test_forecast_days_cover_the_window(self):
+        assert fc.forecast_days("evening", _now_hour()) == 1
+        assert fc.forecast_days("tomorrow", _now_hour()) == 2
+        assert fc.forecast_days("weekend", _now_hour()) == 3
+
+    def test_evening_window_skips_past_hours(self):
+        parsed = fc.parse_forecast_range(_payload())
+        mask = fc.window_mask(parsed, "evening", _now_hour())
+        hours = parsed.time[mask]
+        assert hours[0] == np.datetime64("2026-10-16T18", "h")
+        assert hours[-1] == np.datetime64("2026-10-16T23", "h")
+        today = fc.window_mask(parsed, "today", _now_hour())
+        assert int(today.sum()) == 10  # 14:00…23:00
+
+
+@pytest.mark.unit_mock
+class TestOutfitScores:
+    @pytest.mark.parametrize("feels", [-20.0, -15.0, -10.0, 0.0, 5.0, 10.0, 15.0, 20.0, 30.0])
+    def test_layers_match_the_scalar_rules(self, feels):
+        scores = fc.score_outfit(np.array([feels]), np.array([3]), np.array([0.0]), np.array([0.0]))
+        expected = recommend_outfit({"temperature_2m": feels, "apparent_temperature": feels})[0]
+        assert fc._LAYER_ITEMS[int(scores.layer[0])] == expected
+
+    def test_flags_per_hour(self):
+        scores = fc.score_outfit(
+            np.array([5.0, 5.0, 5.0, 5.0]),
+            np.array([3, 63, 73, 95]),
+            np.array([60.0, 0.0, 0.0, 0.0]),
+            np.array([10.0, 10.0, 55.0, 10.0]),
+        )
+        assert scores.wet.tolist() == [True, True, False, True]
+        assert scores.snow.tolist() == [False, False, True, False]
+        assert scores.thunder.tolist() == [False, False, False, True]
+        assert scores.gusty.tolist() == [False, False, True, False]
+
+
+@pytest.mark.unit_mock
+class TestFormatPeriod:
+    def test_evening_summary(self):
+        feels = [8.0] * 96
+        feels[22] = 1.0  # cold late evening
+        probability = [10] * 96
+        probability[20] = 70
+        codes = [3] * 96
+        codes[20] = 61
+        gusts = [20.0] * 96
+        gusts[19] = 55.0
+        parsed = fc.parse_forecast_range(
+            _payload(feels=feels, codes=codes, probability=probability, gusts=gusts)
+        )
+        summary = fc.summarize_window(parsed, "evening", _now_hour())
+        assert summary.hours == 6
+        assert (summary.feels_min, summary.feels_max) == (1.0, 8.0)
+        assert summary.codes == (3, 61)
+        text = fc.format_period(parsed, summary)
+        assert text.startswith("Ввечері (пт 16.10, 18:00–24:00): відчувається від +1 до +8°C")
+        assert "хмарно, часом дощ слабкий" in text
+        assert "ймовірність опадів до 70%" in text
+        assert "тепла куртка або пальто" in text
+        assert "опади ймовірні 1 з 6 год" in text
+        assert "пориви до 55 км/год" in text
+        # compact: a few lines, not hourly rows
+        assert len(text.splitlines()) == 2
+
+    def test_wide_temperature_range_suggests_layers(self):
+        feels = [0.0 if h % 24 < 12 else 20.0 for h in range(96)]
+        parsed = fc.parse_forecast_range(_payload(feels=feels))
+        tips = fc.outfit_tips(fc.summarize_window(parsed, "tomorrow", _now_hour()))
+        assert "тепла куртка" in tips[0]
+        assert any(tip.startswith("одягайтеся шарами") for tip in tips)
+
+    def test_weekend_has_a_line_per_day(self):
+        parsed = fc.parse_forecast_range(_payload())
+        text = fc.format_period(parsed, fc.summarize_window(parsed, "weekend", _now_hour()))
+        assert "сб 17.10: +4…+11°C, хмарно, опади до 20%" in text
+        assert "нд 18.10" in text
+        assert text.startswith("На вихідних (сб 17.10 07:00 – нд 18.10 23:00)")
+
+    def test_window_outside_forecast(self):
+        parsed = fc.parse_forecast_range(_payload(days=1))
+        assert fc.summarize_window(parsed, "tomorrow", _now_hour()) is None
+
+
+def _open_meteo(calls: list[httpx.Request], status: int = 200) -> httpx.MockTransport:
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if "search" in request.url.path:
+            return httpx.Response(200, json=GEO)
+        return httpx.Response(status, json=_payload())
+
+    return httpx.MockTransport(handler)
+
+
+@pytest.mark.unit_mock
+class TestGetForecastTool:
+    @pytest.fixture(autouse=True)
+    def fixed_clock(self, monkeypatch):
+        monkeypatch.setattr(weather, "_wall_clock", lambda: NOW)
+
+    def test_requests_hourly_and_daily_for_the_window_and_caches(self):
+        calls: list[httpx.Request] = []
+        use_transport(_open_meteo(calls))
+        text = weather.get_forecast.invoke({"city": "Київ", "period": "weekend"})
+        assert text.startswith("На вихідних")
+        forecast_call = calls[-1]
+        params = forecast_call.url.params
+        assert params["forecast_days"] == "3"
+        assert "apparent_temperature" in params.get_list("hourly")
+        assert "temperature_2m_max" in params.get_list("daily")
+        assert "current" not in params
+
+        # A shorter window is served from the cached arrays
+        weather.get_forecast.invoke({"city": "Київ", "period": "evening"})
+        assert len(calls) == 2
+        assert weather.cache_stats()["forecast_range"]["hits"] == 1
+
+    def test_cache_does_not_outlive_local_midnight(self, monkeypatch):
+        def at(hours_after_now):
+            monkeypatch.setattr(weather, "_wall_clock", lambda: NOW + hours_after_now * 3600)
+
+        calls: list[httpx.Request] = []
+        use_transport(_open_meteo(calls))
+        at(9.75)  # 23:45 local
+        weather.get_forecast.invoke({"city": "Київ", "period": "weekend"})
+        at(9.9)  # 23:54, the same local day: served from the cached arrays
+        weather.get_forecast.invoke({"city": "Київ", "period": "tomorrow"})
+        assert len(calls) == 2
+        # 00:05 the next local day, well within the TTL: «tomorrow» is another day now
+        at(10.1)
+        weather.get_forecast.invoke({"city": "Київ", "period": "tomorrow"})
+        assert len(calls) == 3
+
+    def test_async_tool(self):
+        use_transport(_open_meteo([]))
+        text = asyncio.run(weather.get_forecast.ainvoke({"city": "Київ", "period": "tomorrow"}))
+        assert text.startswith("Завтра (сб 17.10, 07:00–23:00)")
+        assert "Що вдягнути:" in text
+
+    def test_upstream_error(self):
+        use_transport(_open_meteo([], status=503))
+        text = weather.get_forecast.invoke({"city": "Київ", "period": "evening"})
+        assert text == "Не вдалося отримати прогноз для «Київ». Спробуйте пізніше."
+
+    def test_empty_city(self):
+        assert weather._get_forecast("  ", "evening")[0] == "Помилка: не вказано назву міста."
+
+    def test_compact_format(self, monkeypatch):
+        monkeypatch.setattr(weather, "TOOL_OUTPUT_FORMAT", "compact")
+        use_transport(_open_meteo([]))
+        text = weather.get_forecast.invoke({"city": "Київ", "period": "weekend"})
+        data = json.loads(text)
+        assert data["period"] == "weekend"
+        assert data["feels_c"] == [8, 8]
+        assert [day["day"] for day in data["days"]] == ["сб 17.10", "нд 18.10"]
+        assert data["wear"][0].startswith("демісезонна куртка")
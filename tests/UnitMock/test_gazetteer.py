@@ -0,0 +1,127 @@
+"""Unit tests for the offline city gazetteer — no LLM/HTTP."""
+
+import importlib.util
+from pathlib import Path
+
+import httpx
+import pytest
+
+from weather_agent.gazetteer import DEFAULT_PATH, Gazetteer
+
+_ROOT = Path(__file__).resolve().parent.parent.parent
+
+
+def _load_build_script():
+    spec = importlib.util.spec_from_file_location(
+        "build_gazetteer", _ROOT / "scripts" / "build_gazetteer.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.unit_mock
+class TestGazetteerIndex:
+    def test_bundled_index_matches_source_csv(self):
+        """The committed index must be reproducible from data/places.csv."""
+        build = _load_build_script()
+        rows = build.build_rows(build.DEFAULT_SOURCE)
+        expected = "".join("\t".join(row) + "\n" for row in rows)
+        assert DEFAULT_PATH.read_text(encoding="utf-8") == expected
+
+    def test_conflicting_alias_is_rejected(self, tmp_path):
+        build = _load_build_script()
+        source = tmp_path / "places.csv"
+        source.write_text(
+            "name_uk,name_en,latitude,longitude,timezone,aliases\n"
+            "Київ,Kyiv,50.45,30.52,Europe/Kyiv,\n"
+            "Інше,Other,1,1,UTC,Kyiv\n",
+            encoding="utf-8",
+        )
+        with pytest.raises(SystemExit):
+            build.build_rows(source)
+
+
+@pytest.mark.unit_mock
+class TestGazetteerLookup:
+    @pytest.mark.parametrize("query", ["Київ", "Kyiv", "Києві", "у Києві", "KIEV"])
+    def test_exact_lookup_with_inflected_forms(self, gazetteer, query):
+        lat, _lon, tz, name = gazetteer.lookup(query)
+        assert name == "Київ"
+        assert tz == "Europe/Kyiv"
+        assert round(lat, 1) == 50.5
+
+    def test_unknown_city_is_none(self, gazetteer):
+        assert gazetteer.lookup("Атлантида") is None
+        assert gazetteer.fuzzy("Атлантида") is None
+
+    def test_fuzzy_lookup_handles_typo(self, gazetteer):
+        assert gazetteer.fuzzy("Київв")[3] == "Київ"
+        assert gazetteer.fuzzy("Тернопль")[3] == "Тернопіль"
+
+    def test_prefix_lookup(self, gazetteer):
+        names = gazetteer.prefix("Бер")
+        assert "Берлін" in names
+        assert "Бердянськ" in names
+        assert len(names) == len(set(names))
+
+    def test_small_in_memory_index(self):
+        gaz = Gazetteer([("b", 1.0, 2.0, "UTC", "B"), ("a", 3.0, 4.0, "UTC", "A")])
+        assert len(gaz) == 2
+        assert gaz.lookup("A") == (3.0, 4.0, "UTC", "A")
+
+
+@pytest.mark.unit_mock
+class TestGeocodeUsesGazetteer:
+    def test_known_city_skips_geocoding_api(self, gazetteer):
+        from weather_agent.http_client import use_transport
+        from weather_agent.weather import _geocode, cache_stats
+
+        hosts = []
+
+        def handler(request):
+            hosts.append(request.url.host)
+            return httpx.Response(500)
+
+        use_transport(httpx.MockTransport(handler))
+        assert _geocode("Львові") == (49.8397, 24.0297, "Europe/Kyiv")
+        assert hosts == []
+        assert cache_stats()["gazetteer"]["hits"] == 1
+
+    def test_unknown_city_falls_back_to_api(self, gazetteer):
+        from weather_agent.http_client import use_transport
+        from weather_agent.weather import _geocode
+
+        geo = {"results": [{"latitude": 1.0, "longitude": 2.0, "timezone": "UTC"}]}
+        use_transport(httpx.MockTransport(lambda request: httpx.Response(200, json=geo)))
+        assert _geocode("Маленьке Село") == (1.0, 2.0, "UTC")
+
+    @pytest.mark.parametrize("village", ["Миколаївка", "Полтавка", "Харківка"])
+    def test_village_near_city_name_asks_api(self, gazetteer, village):
+        """A fuzzy match to a big city must not shadow a real settlement the API knows."""
+        from weather_agent.http_client import use_transport
+        from weather_agent.weather import _geocode
+
+        geo = {"results": [{"latitude": 1.0, "longitude": 2.0, "timezone": "Europe/Kyiv"}]}
+        names = []
+
+        def handler(request):
+            names.append(request.url.params["name"])
+            return httpx.Response(200, json=geo)
+
+        use_transport(httpx.MockTransport(handler))
+        assert _geocode(village) == (1.0, 2.0, "Europe/Kyiv")
+        assert names == [village]
+
+    @pytest.mark.parametrize("status", [200, 503])
+    def test_fuzzy_match_when_api_finds_nothing(self, gazetteer, status):
+        from weather_agent.http_client import use_transport
+        from weather_agent.weather import _geocode
+
+        use_transport(httpx.MockTransport(lambda request: httpx.Response(status, json={})))
+        assert _geocode("Тернопль")[:2] == gazetteer.lookup("Тернопіль")[:2]
+
+    async def test_async_geocode_uses_gazetteer(self, gazetteer):
+        from weather_agent.weather import _ageocode
+
+        assert (await _ageocode("Odesa"))[:2] == (46.4825, 30.7233)
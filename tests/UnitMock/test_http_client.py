@@ -0,0 +1,53 @@
+"""Unit tests for the shared HTTP client layer — in-process transport, no network."""
+
+import httpx
+import pytest
+
+from weather_agent import http_client
+from weather_agent.weather import FORECAST_URL, GEOCODING_URL, get_weather
+
+
+@pytest.mark.unit_mock
+class TestSharedClient:
+    def test_client_is_reused_between_calls(self):
+        assert http_client.get_client() is http_client.get_client()
+
+    def test_close_clients_creates_new_client_next_time(self):
+        first = http_client.get_client()
+        http_client.close_clients()
+        assert first.is_closed
+        assert http_client.get_client() is not first
+
+    def test_timeout_for_known_and_unknown_hosts(self):
+        geo = http_client.timeout_for(GEOCODING_URL)
+        other = http_client.timeout_for("https://example.com/x")
+        assert geo.read == http_client.HTTP_HOST_TIMEOUTS["geocoding-api.open-meteo.com"]
+        assert other.read == http_client.HTTP_TIMEOUT
+
+
+@pytest.mark.unit_mock
+class TestUseTransport:
+    def test_get_weather_uses_injected_transport(
+        self, mock_httpx_geocode_kyiv, mock_httpx_forecast
+    ):
+        hosts = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            hosts.append(request.url.host)
+            if str(request.url).startswith(GEOCODING_URL):
+                return httpx.Response(200, json=mock_httpx_geocode_kyiv)
+            assert str(request.url).startswith(FORECAST_URL)
+            return httpx.Response(200, json=mock_httpx_forecast)
+
+        http_client.use_transport(httpx.MockTransport(handler))
+        result = get_weather.invoke({"city": "Kyiv"})
+
+        assert "Температура" in result
+        assert hosts == ["geocoding-api.open-meteo.com", "api.open-meteo.com"]
+
+    def test_transport_error_returns_user_message(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            raise httpx.ConnectError("boom", request=request)
+
+        http_client.use_transport(httpx.MockTransport(handler))
+        assert "Не вдалося" in get_weather.invoke({"city": "Kyiv"})
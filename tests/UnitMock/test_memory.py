@@ -0,0 +1,235 @@
+"""Unit tests: per-chat conversation memory — rolling summary, LRU/TTL eviction, backends."""
+
+import pytest
+
+from weather_agent import memory, tokens
+from weather_agent.memory import (
+    SUMMARY_HEADER,
+    ChatMemory,
+    Conversation,
+    MemoryStore,
+    SQLiteStore,
+    Turn,
+    summary_line,
+)
+from weather_agent.metrics import render
+from weather_agent.tokens import fit_history
+
+
+class Clock:
+    """Test clock that moves a millisecond per reading, so writes are strictly ordered."""
+
+    def __init__(self, now: float = 1000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        self.now += 0.001
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def estimate_only(monkeypatch):
+    """Deterministic counts: the byte-length estimate, never a tiktoken download."""
+    monkeypatch.setattr(tokens, "_encoder", False)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    """Factory for either backend with a controllable clock."""
+    stores = []
+
+    def make(max_chats: int = 100, ttl: float = 60.0, clock: Clock | None = None):
+        clock = clock or Clock()
+        if request.param == "memory":
+            store = MemoryStore(max_chats, ttl, clock=clock)
+        else:
+            store = SQLiteStore(tmp_path / "chats.sqlite3", max_chats, ttl, clock=clock)
+        stores.append(store)
+        return store
+
+    yield make
+    for store in stores:
+        store.close()
+
+
+def _chat(tokens: int = 10) -> Conversation:
+    return Conversation(turns=[Turn("Київ?", "Куртка.", tokens)])
+
+
+@pytest.mark.unit_mock
+class TestChatMemory:
+    def test_turns_become_history(self):
+        chats = ChatMemory(MemoryStore(10, 0), max_turns=4, max_tokens=0)
+        assert chats.history(1) == []
+        chats.add_turn(1, " Що одягнути в Києві? ", "Куртку.")
+        chats.add_turn(1, "а завтра?", "Теж куртку.")
+        assert chats.history(1) == [
+            {"role": "user", "content": "Що одягнути в Києві?"},
+            {"role": "assistant", "content": "Куртку."},
+            {"role": "user", "content": "а завтра?"},
+            {"role": "assistant", "content": "Теж куртку."},
+        ]
+        assert chats.history(2) == []
+
+    def test_oldest_turns_fold_into_summary(self):
+        chats = ChatMemory(MemoryStore(10, 0), max_turns=2, max_tokens=0, summary_tokens=500)
+        for city in ("Києві", "Львові", "Одесі"):
+            chats.add_turn(1, f"Що одягнути в {city}?", f"У {city} холодно. Вдягніть куртку.")
+        history = chats.history(1)
+        assert history[0] == {
+            "role": "system",
+            "content": f"{SUMMARY_HEADER}\n— користувач: «Що одягнути в Києві?»; бот: У Києві холодно.",
+        }
+        assert [m["content"] for m in history[1::2]] == [
+            "Що одягнути в Львові?",
+            "Що одягнути в Одесі?",
+        ]
+        assert chats.stats()["summarized"] == 1
+
+    def test_token_threshold_folds_but_keeps_the_last_turn(self):
+        chats = ChatMemory(MemoryStore(10, 0), max_turns=10, max_tokens=40, summary_tokens=500)
+        long_reply = "Тепла куртка, шапка і шарф. " * 10
+        chats.add_turn(1, "Київ?", long_reply)
+        chats.add_turn(1, "Львів?", long_reply)
+        history = chats.history(1)
+        assert history[0]["role"] == "system"
+        assert history[1:] == [
+            {"role": "user", "content": "Львів?"},
+            {"role": "assistant", "content": long_reply.strip()},
+        ]
+
+    def test_summary_is_bounded(self):
+        chats = ChatMemory(MemoryStore(10, 0), max_turns=1, max_tokens=0, summary_tokens=40)
+        for i in range(20):
+            chats.add_turn(1, f"Питання {i}", f"Відповідь {i}.")
+        chat = chats.store.get(1)
+        assert chat.summary_tokens <= 40
+        assert "Питання 18" in chat.summary[-1][0]
+        assert all("Питання 0»" not in line for line, _ in chat.summary)
+
+    async def test_async_access_runs_off_the_event_loop(self):
+        """ahistory/aadd_turn must not block the loop on a slow (e.g. locked SQLite) store."""
+        import threading
+
+        store = MemoryStore(10, 0)
+        threads = []
+        get, put = store.get, store.put
+        store.get = lambda chat_id: threads.append(threading.current_thread()) or get(chat_id)
+        store.put = lambda chat_id, chat: (
+            threads.append(threading.current_thread()) or put(chat_id, chat)
+        )
+        chats = ChatMemory(store, max_turns=4, max_tokens=0)
+
+        await chats.aadd_turn(1, "Київ?", "Куртка.")
+        assert await chats.ahistory(1) == [
+            {"role": "user", "content": "Київ?"},
+            {"role": "assistant", "content": "Куртка."},
+        ]
+        assert len(threads) == 3
+        assert threading.main_thread() not in threads
+
+    def test_summary_line_clips(self):
+        line = summary_line(Turn("x" * 500, "Перше речення! Друге речення.", 0))
+        assert line.endswith("бот: Перше речення!")
+        assert len(line) < 200
+
+    def test_history_fits_context_with_summary_pinned(self):
+        chats = ChatMemory(MemoryStore(10, 0), max_turns=1, max_tokens=0, summary_tokens=500)
+        chats.add_turn(1, "Київ?", "Куртка.")
+        chats.add_turn(1, "Львів?", "Пальто. " * 50)
+        history = chats.history(1)
+        summary_size = tokens.message_tokens(history[0])
+        kept, dropped = fit_history(history, budget=summary_size + 10)
+        assert kept == history[:1]
+        assert dropped == 2
+
+
+@pytest.mark.unit_mock
+class TestStores:
+    def test_lru_eviction(self, make_store):
+        store = make_store(max_chats=2)
+        store.put(1, _chat())
+        store.put(2, _chat())
+        store.put(1, _chat())  # chat 1 is now the most recent
+        store.put(3, _chat())
+        assert store.get(2) is None
+        assert store.get(1) is not None
+        assert store.get(3) is not None
+        stats = store.stats()
+        assert (stats["chats"], stats["evictions"]) == (2, 1)
+
+    def test_idle_chats_expire(self, make_store):
+        clock = Clock()
+        store = make_store(ttl=60.0, clock=clock)
+        store.put(1, _chat())
+        store.put(2, _chat())
+        clock.now += 30
+        store.put(2, _chat())
+        clock.now += 40
+        # Chat 1 idle for 70 s: gone on read, chat 2 (40 s) still there
+        assert store.get(1) is None
+        assert store.get(2) is not None
+        clock.now += 100
+        store.put(3, _chat())  # a write sweeps expired chats from the cold end
+        assert store.stats()["chats"] == 1
+        assert store.stats()["expirations"] == 2
+
+    def test_tokens_accounting(self, make_store):
+        store = make_store(max_chats=2)
+        store.put(1, _chat(10))
+        store.put(2, _chat(20))
+        store.put(1, _chat(15))
+        assert store.stats()["tokens"] == 35
+        store.put(3, _chat(5))  # evicts chat 2
+        assert store.stats()["tokens"] == 20
+        store.clear()
+        assert store.stats() == {
+            "chats": 0,
+            "max_chats": 2,
+            "tokens": 0,
+            "evictions": 0,
+            "expirations": 0,
+        }
+
+    def test_sqlite_survives_reopen(self, tmp_path):
+        path = tmp_path / "chats.sqlite3"
+        store = SQLiteStore(path, 10, 0)
+        ChatMemory(store, max_turns=1, summary_tokens=500).add_turn(7, "Київ?", "Куртка.")
+        ChatMemory(store, max_turns=1, summary_tokens=500).add_turn(7, "А Львів?", "Пальто.")
+        store.close()
+
+        reopened = SQLiteStore(path, 10, 0)
+        try:
+            history = ChatMemory(reopened).history(7)
+            assert history[0]["content"].endswith("«Київ?»; бот: Куртка.")
+            assert history[1:] == [
+                {"role": "user", "content": "А Львів?"},
+                {"role": "assistant", "content": "Пальто."},
+            ]
+            assert reopened.stats()["chats"] == 1
+            assert reopened.stats()["tokens"] > 0
+        finally:
+            reopened.close()
+
+
+@pytest.mark.unit_mock
+class TestOpenChatMemory:
+    def test_off_and_memory(self):
+        assert memory.open_chat_memory("off") is None
+        opened = memory.open_chat_memory("memory")
+        assert isinstance(opened.store, MemoryStore)
+        assert memory.open_chat_memory("sqlite") is opened
+        assert memory.get_chat_memory() is opened
+
+    def test_sqlite_falls_back_to_memory(self, tmp_path):
+        blocker = tmp_path / "file"
+        blocker.write_text("")
+        opened = memory.open_chat_memory("sqlite", blocker / "chats.sqlite3")
+        assert isinstance(opened.store, MemoryStore)
+
+    def test_metrics(self, chat_memory):
+        chat_memory.add_turn(1, "Київ?", "Куртка.")
+        text = render()
+        assert "weather_agent_chat_memory_chats 1" in text
+        assert 'weather_agent_chat_memory_evicted_total{reason="ttl"} 0' in text
+        assert "weather_agent_chat_memory_tokens " in text
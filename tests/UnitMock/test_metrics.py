@@ -0,0 +1,93 @@
+"""Unit tests for the Prometheus-style metrics registry — no HTTP, no LLM."""
+
+import pytest
+
+from weather_agent.metrics import Counter, Gauge, Histogram, Registry
+
+
+def _lines(registry: Registry) -> list[str]:
+    return registry.render().splitlines()
+
+
+@pytest.mark.unit_mock
+class TestMetricTypes:
+    def test_counter_per_label_set(self):
+        registry = Registry()
+        errors = registry.register(Counter("errors_total", "Errors", ["type"]))
+        errors.inc(type="Timeout")
+        errors.inc(2, type="Timeout")
+        errors.inc(type="HTTPStatusError")
+
+        assert errors.value(type="Timeout") == 3
+        lines = _lines(registry)
+        assert "# TYPE errors_total counter" in lines
+        assert 'errors_total{type="Timeout"} 3' in lines
+        assert 'errors_total{type="HTTPStatusError"} 1' in lines
+
+    def test_counter_rejects_negative_and_wrong_labels(self):
+        errors = Counter("errors_total", "Errors", ["type"])
+        with pytest.raises(ValueError):
+            errors.inc(-1, type="x")
+        with pytest.raises(ValueError):
+            errors.inc(kind="x")
+
+    def test_gauge_track(self):
+        in_flight = Gauge("in_flight", "In flight")
+        with in_flight.track():
+            assert in_flight.value() == 1
+        assert in_flight.value() == 0
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = Registry()
+        latency = registry.register(Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0)))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.observe(value)
+
+        lines = _lines(registry)
+        assert 'latency_seconds_bucket{le="0.1"} 2' in lines
+        assert 'latency_seconds_bucket{le="1"} 3' in lines
+        assert 'latency_seconds_bucket{le="+Inf"} 4' in lines
+        assert "latency_seconds_count 4" in lines
+        assert "latency_seconds_sum 3.65" in lines
+
+    def test_histogram_time_records_on_exception(self):
+        latency = Histogram("latency_seconds", "Latency", ["route"])
+        with pytest.raises(RuntimeError), latency.time(route="llm"):
+            raise RuntimeError
+        assert latency.count(route="llm") == 1
+
+
+@pytest.mark.unit_mock
+class TestRegistry:
+    def test_duplicate_name_rejected(self):
+        registry = Registry()
+        registry.register(Counter("x_total", "X"))
+        with pytest.raises(ValueError):
+            registry.register(Counter("x_total", "X"))
+
+    def test_collectors_extend_one_family(self):
+        registry = Registry()
+        registry.register_collector(
+            lambda: [("hits_total", "counter", "Hits", [({"cache": "geocode"}, 5)])]
+        )
+        registry.register_collector(
+            lambda: [("hits_total", "counter", "Hits", [({"cache": "response"}, 2)])]
+        )
+
+        lines = _lines(registry)
+        assert lines.count("# TYPE hits_total counter") == 1
+        assert 'hits_total{cache="geocode"} 5' in lines
+        assert 'hits_total{cache="response"} 2' in lines
+
+    def test_label_values_escaped(self):
+        registry = Registry()
+        errors = registry.register(Counter("errors_total", "Errors", ["type"]))
+        errors.inc(type='say "hi"\n')
+        assert 'errors_total{type="say \\"hi\\"\\n"} 1' in _lines(registry)
+
+    def test_clear_resets_values(self):
+        registry = Registry()
+        errors = registry.register(Counter("errors_total", "Errors"))
+        errors.inc()
+        registry.clear()
+        assert errors.value() == 0
@@ -0,0 +1,87 @@
+"""Unit tests: micro-benchmark suite for the get_weather hot path (tiny timings, no thresholds)."""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+_ROOT = Path(__file__).resolve().parent.parent.parent
+if str(_ROOT) not in sys.path:
+    sys.path.insert(0, str(_ROOT))
+
+from benchmarks import micro
+
+from weather_agent import weather
+
+
+@pytest.mark.unit_mock
+class TestMicroBench:
+    """Cases run and return what the tool would; compare() flags slowdowns."""
+
+    def test_cases_produce_real_results(self):
+        from weather_agent.http_client import use_transport
+
+        cases = micro.build_cases()
+        assert cases["weather_code_known"]() == "дощ слабкий"
+        assert cases["parse_geocode"]()[0] == (50.45466, 30.5238, "Europe/Kyiv")
+        use_transport(micro._transport())
+        text = cases["get_weather_cold"]()
+        assert "умови: дощ слабкий" in text
+        assert "Температура +11.4°C" in text
+        assert cases["get_weather_cached"]() == text
+
+    def test_run_measures_every_selected_case(self):
+        gazetteer = weather.GAZETTEER_ENABLED
+        report = micro.run(min_time=0.001, repeat=1, only=["format_current", "get_weather_cold"])
+        assert set(report["cases"]) == {"format_current", "get_weather_cold"}
+        assert all(value > 0 for value in report["cases"].values())
+        assert report["calibration_ns"] > 0
+        assert weather.GAZETTEER_ENABLED is gazetteer
+
+    def test_unknown_case_exits(self):
+        with pytest.raises(SystemExit):
+            micro.run(min_time=0.001, repeat=1, only=["nope"])
+
+    def test_compare_normalizes_by_calibration(self):
+        baseline = {"calibration_ns": 100.0, "cases": {"a": 1000.0, "b": 1000.0}}
+        # Machine is 2x slower overall: a is unchanged relative to it, b regressed by 50%
+        report = {"calibration_ns": 200.0, "cases": {"a": 2000.0, "b": 3000.0, "new": 1.0}}
+        rows = {
+            name: (round(change, 3), slow)
+            for name, change, slow in micro.compare(report, baseline, threshold=0.25, noise_floor=0)
+        }
+        assert rows == {"a": (0.0, False), "b": (0.5, True)}
+
+    def test_noise_floor_and_sub_microsecond_cases_do_not_regress(self):
+        baseline = {
+            "calibration_ns": 100.0,
+            "cases": {"tiny": 200.0, "small": 1500.0, "big": 100_000.0},
+        }
+        # +50% everywhere: only "big" is slower by more than the absolute noise floor
+        report = {
+            "calibration_ns": 100.0,
+            "cases": {"tiny": 300.0, "small": 2250.0, "big": 150_000.0},
+        }
+        rows = {name: slow for name, _change, slow in micro.compare(report, baseline, 0.25)}
+        assert rows == {"tiny": False, "small": False, "big": True}
+        # Without the floor the microsecond case regresses, the sub-microsecond one never does
+        rows = {name: slow for name, _change, slow in micro.compare(report, baseline, 0.25, 0)}
+        assert rows == {"tiny": False, "small": True, "big": True}
+
+    def test_noisy_cases_use_their_own_threshold(self):
+        baseline = {
+            "calibration_ns": 100.0,
+            "cases": {"get_weather_cold": 1e6, "parse_geocode": 1e5},
+        }
+        report = {
+            "calibration_ns": 100.0,
+            "cases": {"get_weather_cold": 1.4e6, "parse_geocode": 1.4e5},
+        }
+        rows = {name: slow for name, _change, slow in micro.compare(report, baseline, 0.25)}
+        assert rows == {"get_weather_cold": False, "parse_geocode": True}
+
+    def test_stored_baseline_covers_all_cases(self):
+        baseline = json.loads(micro.BASELINE_PATH.read_text(encoding="utf-8"))
+        assert set(baseline["cases"]) == set(micro.build_cases())
+        assert baseline["calibration_ns"] > 0
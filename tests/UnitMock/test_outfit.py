@@ -0,0 +1,94 @@
+"""Unit tests for the rule-based outfit recommender and the fast-path classifier — no LLM/HTTP."""
+
+import pytest
+
+from weather_agent.outfit import format_outfit_answer, recommend_outfit
+from weather_agent.router import match_outfit_question
+
+
+def _current(temp, feels=None, code=0, wind=5.0, humidity=50):
+    return {
+        "temperature_2m": temp,
+        "apparent_temperature": temp if feels is None else feels,
+        "weather_code": code,
+        "wind_speed_10m": wind,
+        "relative_humidity_2m": humidity,
+    }
+
+
+@pytest.mark.unit_mock
+class TestRecommendOutfit:
+    def test_frost_uses_apparent_temperature(self):
+        tips = recommend_outfit(_current(-10, feels=-18))
+        assert "пуховик" in tips[0]
+        assert "утеплене взуття" in tips[1]
+
+    def test_rain_adds_umbrella_and_waterproof_shoes(self):
+        tips = recommend_outfit(_current(10, code=63))
+        assert "непромокальне взуття" in tips
+        assert any("парасолька" in t for t in tips)
+
+    def test_thunderstorm_advises_staying_inside(self):
+        tips = recommend_outfit(_current(20, code=95))
+        assert any("гроз" in t for t in tips)
+
+    def test_strong_wind_adds_windproof_layer(self):
+        tips = recommend_outfit(_current(8, wind=35))
+        assert any("вітрозахисний" in t for t in tips)
+
+    def test_damp_cold_suggests_extra_layer(self):
+        tips = recommend_outfit(_current(2, humidity=90))
+        assert any("на шар тепліше" in t for t in tips)
+
+    def test_hot_sunny_day(self):
+        tips = recommend_outfit(_current(29, code=0))
+        assert "шорти" in tips[0]
+        assert any("сонцезахисні" in t for t in tips)
+
+    def test_missing_fields_do_not_fail(self):
+        assert recommend_outfit({"temperature_2m": None})
+
+    def test_format_answer(self):
+        out = format_outfit_answer("у Києві", "Температура +1.0°C.", _current(1), warm=False)
+        assert out.startswith("Зараз у Києві: температура +1.0°C.")
+        assert "Що вдягнути:" in out
+        assert "Гарного дня" not in out
+
+
+@pytest.mark.unit_mock
+class TestMatchOutfitQuestion:
+    @pytest.mark.parametrize(
+        "text, city, place",
+        [
+            ("Що одягнути в Києві?", "Києві", "в Києві"),
+            ("Як одягнутися сьогодні у Львові?", "Львові", "у Львові"),
+            ("Погода в Одесі — що вдягнути?", "Одесі", "в Одесі"),
+            ("Порадь, що одягнути в Києві.", "Києві", "в Києві"),
+            ("що вдягти у Кривому Розі", "Кривому Розі", "у Кривому Розі"),
+            ("Що одягнути в Івано-Франківську зараз?", "Івано-Франківську", "в Івано-Франківську"),
+        ],
+    )
+    def test_simple_questions(self, text, city, place):
+        query = match_outfit_question(text)
+        assert query.city == city
+        assert query.place == place
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "Що одягнути в Києві завтра?",
+            "Київ чи Львів — що вдягнути?",
+            "Що одягнути в Києві і Львові?",
+            "Що одягнути на весілля в Києві?",
+            "Що одягнути на вихідні у Львові?",
+            "Привіт",
+            "",
+        ],
+    )
+    def test_everything_else_goes_to_llm(self, text, gazetteer):
+        assert match_outfit_question(text, gazetteer) is None
+
+    def test_bare_city_only_with_gazetteer(self, gazetteer):
+        assert match_outfit_question("Львів?") is None
+        assert match_outfit_question("Львів?", gazetteer).place == "у місті Львів"
+        assert match_outfit_question("Атлантида", gazetteer) is None
@@ -28,3 +28,11 @@ class TestGetSystemPrompt:
         assert isinstance(p, str)
         assert len(p.strip()) > 0
         assert "помічник" in p or "погод" in p
+
+    @pytest.mark.parametrize("version", ["1", "2", "99"])
+    def test_prompt_mentions_multi_city_tool(self, version):
+        assert "get_weather_many" in get_system_prompt(version=version)
+
+    @pytest.mark.parametrize("version", ["1", "2", "99"])
+    def test_prompt_mentions_forecast_tool(self, version):
+        assert "get_forecast" in get_system_prompt(version=version)
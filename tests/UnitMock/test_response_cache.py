@@ -0,0 +1,107 @@
+"""Unit tests for the agent response cache key (place, weather bucket) and history rules."""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from weather_agent.response_cache import (
+    bypass_response_cache,
+    forecast_bucket,
+    place,
+    response_key,
+    weather_bucket,
+)
+
+KYIV = (50.45466, 30.5238, "Europe/Kyiv")
+
+
+def _current(**fields) -> dict:
+    return {
+        "temperature_2m": -2.5,
+        "apparent_temperature": -4.0,
+        "weather_code": 71,
+        "wind_speed_10m": 15.0,
+        **fields,
+    }
+
+
+def _entry(current: dict | None = None, coords=KYIV) -> tuple:
+    return ("get_weather", None, (place(coords), weather_bucket(current or _current())))
+
+
+@pytest.fixture(autouse=True)
+def enabled(monkeypatch):
+    monkeypatch.setattr("weather_agent.response_cache.RESPONSE_CACHE_ENABLED", True)
+
+
+@pytest.mark.unit_mock
+class TestWeatherBucket:
+    def test_nearby_weather_shares_bucket(self):
+        # Та сама смуга відчутної температури, та сама група умов (сніг), той самий вітер
+        assert weather_bucket(_current()) == weather_bucket(
+            _current(apparent_temperature=-1.0, weather_code=73, wind_speed_10m=20.0)
+        )
+
+    @pytest.mark.parametrize(
+        "changed",
+        [
+            {"apparent_temperature": 3.0},
+            {"weather_code": 61},
+            {"wind_speed_10m": 35.0},
+        ],
+    )
+    def test_clothing_relevant_change_differs(self, changed):
+        assert weather_bucket(_current()) != weather_bucket(_current(**changed))
+
+    def test_falls_back_to_air_temperature(self):
+        assert weather_bucket({"temperature_2m": 12.0})[0] == 2
+
+    def test_place_rounds_coordinates(self):
+        assert place(KYIV) == place((50.451, 30.519, "Europe/Kyiv")) == (50.45, 30.52)
+
+    def test_forecast_bucket(self):
+        summary = SimpleNamespace(
+            start=np.datetime64("2026-10-18T08", "h"),
+            feels_min=3.2,
+            feels_max=9.1,
+            codes=(3, 61),
+            gust_max=22.0,
+            precip_probability=60.0,
+        )
+        assert forecast_bucket(summary) == ("2026-10-18", 0, 1, ("cloudy", "rain"), "breezy", 2)
+        summary.start = np.datetime64("2026-10-19T08", "h")
+        assert forecast_bucket(summary)[0] == "2026-10-19"
+
+
+@pytest.mark.unit_mock
+class TestResponseKey:
+    def test_same_place_and_bucket_share_key(self):
+        nearby = _entry(_current(apparent_temperature=-1.0), (50.451, 30.519, "Europe/Kyiv"))
+        assert response_key([_entry()]) == response_key([nearby])
+
+    def test_entry_order_ignored(self):
+        lviv = _entry(coords=(49.8397, 24.0297, "Europe/Kyiv"))
+        assert response_key([_entry(), lviv]) == response_key([lviv, _entry()])
+
+    def test_tool_and_period_are_part_of_key(self):
+        _tool, _period, bucket = _entry()
+        assert response_key([_entry()]) != response_key([("get_weather_many", None, bucket)])
+        assert response_key([("get_forecast", "tomorrow", bucket)]) != response_key(
+            [("get_forecast", "evening", bucket)]
+        )
+
+    def test_includes_prompt_version_and_model(self, monkeypatch):
+        key = response_key([_entry()])
+        monkeypatch.setattr("weather_agent.response_cache.PROMPT_VERSION", "1")
+        assert response_key([_entry()]) != key
+        monkeypatch.setattr("weather_agent.response_cache.DEFAULT_MODEL", "gpt-4o")
+        assert response_key([_entry()])[1:] == ("1", "gpt-4o")
+
+    def test_no_key(self, monkeypatch):
+        assert response_key([]) is None
+        with bypass_response_cache():
+            assert response_key([_entry()]) is None
+        assert response_key([_entry()]) is not None
+        monkeypatch.setattr("weather_agent.response_cache.RESPONSE_CACHE_ENABLED", False)
+        assert response_key([_entry()]) is None
@@ -0,0 +1,167 @@
+"""Unit tests: eval runner — concurrency limit, disk cache, re-running only changed cases."""
+
+import asyncio
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+_ROOT = Path(__file__).resolve().parent.parent.parent
+
+
+def _load_script():
+    spec = importlib.util.spec_from_file_location("run_evals", _ROOT / "scripts" / "run_evals.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+run_evals = _load_script()
+EvalCase = run_evals.EvalCase
+
+
+class FakeAgent:
+    """Async agent stand-in: records calls and the peak number of concurrent calls."""
+
+    def __init__(self, reply: str = "Одягни теплу куртку.", delay: float = 0.01) -> None:
+        self.reply = reply
+        self.delay = delay
+        self.calls: list[str] = []
+        self.active = 0
+        self.peak = 0
+
+    async def __call__(self, text: str) -> tuple[str, list[str]]:
+        self.calls.append(text)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if "boom" in text:
+                raise RuntimeError("agent failed")
+            return self.reply, ["get_weather"]
+        finally:
+            self.active -= 1
+
+
+@pytest.fixture
+def judge(monkeypatch):
+    """Replace the DeepEval judge with a deterministic one; returns the list of judged outputs."""
+    judged: list[str] = []
+
+    async def fake_judge(metric_name, case, output, tools):
+        judged.append(output)
+        return 0.9, True, "relevant", "fake-judge"
+
+    monkeypatch.setattr(run_evals, "_judge", fake_judge)
+    return judged
+
+
+def _cases(n: int = 6) -> list:
+    return [
+        EvalCase(
+            id=f"c{i}",
+            input=f"Що одягнути в місті {i}?",
+            expected_tools=("get_weather",),
+            keywords=("куртк",),
+            forbidden=("system_prompt",),
+            judge=("answer_relevancy",),
+        )
+        for i in range(n)
+    ]
+
+
+@pytest.mark.unit_mock
+class TestRunEvals:
+    def test_local_and_judge_metrics(self, judge):
+        results = asyncio.run(run_evals.run_evals(_cases(2), agent=FakeAgent()))
+        metrics = {m.metric: m for m in results[0].metrics}
+        assert set(metrics) == {"keywords", "forbidden", "tools", "answer_relevancy"}
+        assert all(m.passed for m in metrics.values())
+        assert len(judge) == 2
+
+    def test_agent_calls_respect_concurrency(self, judge):
+        agent = FakeAgent(delay=0.02)
+        asyncio.run(run_evals.run_evals(_cases(8), agent=agent, concurrency=3))
+        assert len(agent.calls) == 8
+        assert agent.peak == 3
+
+    def test_second_run_is_served_from_cache(self, judge, tmp_path):
+        cache = run_evals.EvalCache(tmp_path / "evals.sqlite")
+        asyncio.run(run_evals.run_evals(_cases(), agent=FakeAgent(), cache=cache))
+        cache.close()
+
+        agent = FakeAgent()
+        cache = run_evals.EvalCache(tmp_path / "evals.sqlite")
+        results = asyncio.run(run_evals.run_evals(_cases(), agent=agent, cache=cache))
+        cache.close()
+        assert agent.calls == []
+        assert len(judge) == 6
+        assert all(r.cached for r in results)
+        assert all(m.passed for r in results for m in r.metrics)
+
+    def test_only_changed_cases_are_reevaluated(self, judge, tmp_path):
+        cache = run_evals.EvalCache(tmp_path / "evals.sqlite")
+        asyncio.run(run_evals.run_evals(_cases(), agent=FakeAgent(), cache=cache))
+        cases = _cases()
+        cases[2] = cases[2]._replace(input="Що одягнути у Львові?")
+        agent = FakeAgent()
+        asyncio.run(run_evals.run_evals(cases, agent=agent, cache=cache))
+        cache.close()
+        assert agent.calls == ["Що одягнути у Львові?"]
+        assert len(judge) == 7
+
+    def test_prompt_version_is_part_of_the_key(self, monkeypatch):
+        case = _cases(1)[0]
+        before = run_evals.agent_key(case)
+        monkeypatch.setattr("weather_agent.config.PROMPT_VERSION", "1")
+        assert run_evals.agent_key(case) != before
+
+    def test_force_ignores_cache(self, judge, tmp_path):
+        cache = run_evals.EvalCache(tmp_path / "evals.sqlite")
+        asyncio.run(run_evals.run_evals(_cases(2), agent=FakeAgent(), cache=cache))
+        agent = FakeAgent()
+        asyncio.run(run_evals.run_evals(_cases(2), agent=agent, cache=cache, force=True))
+        cache.close()
+        assert len(agent.calls) == 2
+
+    def test_agent_errors_fail_the_case_and_are_not_cached(self, judge, tmp_path):
+        cache = run_evals.EvalCache(tmp_path / "evals.sqlite")
+        cases = [_cases(1)[0]._replace(input="boom")]
+        results = asyncio.run(run_evals.run_evals(cases, agent=FakeAgent(), cache=cache))
+        assert results[0].error == "RuntimeError: agent failed"
+        assert not any(m.passed for m in results[0].metrics if m.metric != "forbidden")
+        agent = FakeAgent()
+        asyncio.run(run_evals.run_evals(cases, agent=agent, cache=cache))
+        cache.close()
+        assert agent.calls == ["boom"]
+        assert judge == []
+
+    def test_judge_errors_fail_the_metric(self, monkeypatch):
+        async def failing_judge(metric_name, case, output, tools):
+            raise RuntimeError("judge unavailable")
+
+        monkeypatch.setattr(run_evals, "_judge", failing_judge)
+        results = asyncio.run(run_evals.run_evals(_cases(1), agent=FakeAgent(), cache=None))
+        judged = [m for m in results[0].metrics if m.metric == "answer_relevancy"]
+        assert [(m.passed, m.reason) for m in judged] == [
+            (False, "RuntimeError: judge unavailable")
+        ]
+
+    def test_summary_per_metric(self, judge):
+        agent = FakeAgent(reply="Сонячно.")
+        results = asyncio.run(run_evals.run_evals(_cases(2), agent=agent))
+        summary = run_evals.summarize(results)
+        assert summary["keywords"]["passed"] == 0
+        assert summary["tools"]["passed"] == 2
+        assert summary["answer_relevancy"]["mean"] == pytest.approx(0.9)
+        text = run_evals.format_summary(results, 0.5)
+        assert "ПРОВАЛ c0" in text
+        assert "answer_relevancy" in text
+
+    def test_bundled_dataset_loads(self):
+        cases = run_evals.load_cases(run_evals.DEFAULT_CASES)
+        assert cases
+        assert all(
+            case.judge or case.keywords or case.forbidden or case.expected_tools for case in cases
+        )
+        assert {name for case in cases for name in case.judge} <= set(run_evals.JUDGE_METRICS)
@@ -0,0 +1,121 @@
+"""Unit tests for single-flight request coalescing — no LLM/HTTP."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from weather_agent.singleflight import SingleFlight
+
+
+@pytest.mark.unit_mock
+class TestSingleFlightThreads:
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        executions = []
+        started = threading.Event()
+
+        def slow():
+            executions.append(1)
+            started.set()
+            time.sleep(0.1)
+            return "result"
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            leader = pool.submit(flight.do, "kyiv", slow)
+            started.wait(1)
+            followers = [pool.submit(flight.do, "kyiv", slow) for _ in range(7)]
+            results = [leader.result()] + [f.result() for f in followers]
+
+        assert results == ["result"] * 8
+        assert len(executions) == 1
+        assert flight.stats()["deduplicated"] == 7
+
+    def test_different_keys_are_not_merged(self):
+        flight = SingleFlight()
+        assert flight.do("a", lambda: 1) == 1
+        assert flight.do("b", lambda: 2) == 2
+        assert flight.stats()["executions"] == 2
+
+    def test_exception_propagates_and_key_is_released(self):
+        flight = SingleFlight()
+
+        def boom():
+            raise ValueError("upstream down")
+
+        with pytest.raises(ValueError):
+            flight.do("k", boom)
+        assert flight.do("k", lambda: "ok") == "ok"
+        assert flight.stats()["inflight"] == 0
+
+
+@pytest.mark.unit_mock
+@pytest.mark.asyncio
+class TestSingleFlightAsync:
+    async def test_async_callers_share_one_execution(self):
+        flight = SingleFlight()
+        executions = []
+
+        async def slow():
+            executions.append(1)
+            await asyncio.sleep(0.05)
+            return 42
+
+        results = await asyncio.gather(*(flight.do_async("k", slow) for _ in range(5)))
+        assert results == [42] * 5
+        assert len(executions) == 1
+        assert flight.stats()["deduplicated"] == 4
+
+    async def test_async_caller_joins_thread_leader(self):
+        flight = SingleFlight()
+        started = threading.Event()
+
+        def slow():
+            started.set()
+            time.sleep(0.1)
+            return "from-thread"
+
+        leader = asyncio.create_task(asyncio.to_thread(flight.do, "k", slow))
+        await asyncio.to_thread(started.wait, 1)
+
+        async def never():
+            raise AssertionError("follower must not execute")
+
+        assert await flight.do_async("k", never) == "from-thread"
+        assert await leader == "from-thread"
+
+    async def test_cancelled_follower_does_not_cancel_leader(self):
+        flight = SingleFlight()
+
+        async def slow():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        leader = asyncio.create_task(flight.do_async("k", slow))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do_async("k", slow))
+        await asyncio.sleep(0)
+        follower.cancel()
+        assert await leader == "done"
+
+    async def test_cancelled_leader_does_not_fail_followers(self):
+        flight = SingleFlight()
+        executions = []
+
+        async def slow():
+            executions.append(1)
+            await asyncio.sleep(0.05)
+            return "done"
+
+        leader = asyncio.create_task(flight.do_async("k", slow))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do_async("k", slow))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        assert await follower == "done"
+        assert leader.cancelled()
+        assert executions == [1]
+        assert flight.stats()["inflight"] == 0
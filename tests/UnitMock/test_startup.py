@@ -0,0 +1,40 @@
+"""Unit tests for startup cost — heavy imports stay deferred, no LLM."""
+
+import subprocess
+import sys
+
+import pytest
+
+HEAVY_MODULES = ("langchain.agents", "langchain_openai", "langchain_core.tools", "numpy")
+
+
+def _loaded_after_import(module: str) -> list[str]:
+    """Heavy modules present in sys.modules after importing `module` in a fresh interpreter."""
+    code = (
+        f"import sys, {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True, timeout=60
+    )
+    return [m for m in out.stdout.strip().split(",") if m]
+
+
+@pytest.mark.unit_mock
+class TestLazyImports:
+    def test_bot_import_does_not_load_langchain(self):
+        assert _loaded_after_import("weather_agent.bot") == []
+
+    def test_weather_tools_built_on_first_access(self):
+        from langchain_core.tools import BaseTool
+
+        from weather_agent import weather
+
+        assert isinstance(weather.get_weather, BaseTool)
+        assert weather.get_weather is weather.get_weather
+        assert weather.get_weather.name == "get_weather"
+
+    def test_unknown_attribute_still_raises(self):
+        from weather_agent import weather
+
+        with pytest.raises(AttributeError):
+            weather.no_such_tool  # noqa: B018
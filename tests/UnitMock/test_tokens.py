@@ -0,0 +1,193 @@
+"""Unit tests: prompt token counting, history budget, compact tool output and the token report."""
+
+import importlib.util
+import json
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from weather_agent import agent, tokens, weather
+from weather_agent.metrics import HISTORY_TRIMMED, PROMPT_TOKENS
+from weather_agent.tokens import PromptTokens, count_tokens, fit_history, prompt_breakdown
+
+_ROOT = Path(__file__).resolve().parent.parent.parent
+CURRENT = {
+    "temperature_2m": 3.4,
+    "apparent_temperature": -0.6,
+    "weather_code": 61,
+    "wind_speed_10m": 18.0,
+    "relative_humidity_2m": 87,
+}
+
+
+def _load_report():
+    spec = importlib.util.spec_from_file_location(
+        "token_report", _ROOT / "scripts" / "token_report.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(autouse=True)
+def estimate_only(monkeypatch):
+    """Deterministic counts: the byte-length estimate, never a tiktoken download."""
+    monkeypatch.setattr(tokens, "_encoder", False)
+    monkeypatch.setattr(agent, "_fixed_tokens", {})
+
+
+def _turn(i: int) -> list[dict]:
+    return [
+        {"role": "user", "content": f"Що одягнути в місті номер {i}?"},
+        {"role": "assistant", "content": "Тепла куртка і шапка. " * 5},
+    ]
+
+
+@pytest.mark.unit_mock
+class TestCounting:
+    def test_estimate_counts_utf8_bytes(self):
+        assert count_tokens("") == 0
+        assert count_tokens("abcd") == 1
+        assert count_tokens("Київ") == 2  # 8 bytes
+
+    def test_encoder_used_once_loaded(self, monkeypatch):
+        class Encoder:
+            name = "fake"
+
+            def encode(self, text, disallowed_special=()):
+                return text.split()
+
+        monkeypatch.setattr(tokens, "_encoder", Encoder())
+        assert count_tokens("три слова тут") == 3
+        assert tokens.encoder_name() == "fake"
+
+    def test_breakdown_by_part(self):
+        messages = [
+            SystemMessage("system prompt"),
+            HumanMessage("old question"),
+            AIMessage("old answer"),
+            HumanMessage("Що вдягнути?"),
+            AIMessage(
+                "", tool_calls=[{"name": "get_weather", "args": {"city": "Київ"}, "id": "1"}]
+            ),
+            ToolMessage("Температура +3°C", tool_call_id="1"),
+        ]
+        tools = [{"type": "function", "function": {"name": "get_weather"}}]
+        parts = prompt_breakdown(messages, tools)
+        assert parts.system == tokens.message_tokens(messages[0])
+        assert parts.history == tokens.message_tokens(messages[1]) + tokens.message_tokens(
+            messages[2]
+        )
+        assert parts.user == tokens.message_tokens(messages[3])
+        assert parts.tool_results > tokens.message_tokens(messages[5])
+        assert parts.tools == tokens.tools_tokens(tools) > 0
+        assert parts.total == sum(parts)
+
+    def test_dict_messages_use_roles(self):
+        parts = prompt_breakdown([{"role": "user", "content": "hi"}])
+        assert parts == PromptTokens(user=tokens.MESSAGE_OVERHEAD + 1)
+
+
+@pytest.mark.unit_mock
+class TestFitHistory:
+    def test_unlimited_budget_keeps_everything(self):
+        history = _turn(1) + _turn(2)
+        assert fit_history(history, budget=0) == (history, 0)
+
+    def test_drops_oldest_and_starts_with_user(self):
+        history = _turn(1) + _turn(2) + _turn(3)
+        per_turn = sum(tokens.message_tokens(m) for m in _turn(3))
+        # Room for the last turn and a half: the dangling assistant reply is dropped too
+        kept, dropped = fit_history(history, budget=per_turn + 30, reserved=0)
+        assert kept == _turn(3)
+        assert dropped == 4
+
+    def test_reserved_tokens_count_against_budget(self):
+        history = _turn(1)
+        size = sum(tokens.message_tokens(m) for m in history)
+        assert fit_history(history, budget=size, reserved=0)[0] == history
+        assert fit_history(history, budget=size, reserved=1) == ([], 2)
+
+    def test_user_messages_enforce_max_context(self, monkeypatch):
+        monkeypatch.setattr(tokens, "MAX_CONTEXT_TOKENS", agent._fixed_prompt_tokens() + 150)
+        history = [message for i in range(10) for message in _turn(i)]
+        messages = agent._user_messages("А завтра?", history)["messages"]
+        assert messages[-1] == {"role": "user", "content": "А завтра?"}
+        assert messages[0]["role"] == "user"
+        assert 0 < len(messages) - 1 < len(history)
+        assert HISTORY_TRIMMED.value() == len(history) - (len(messages) - 1)
+
+    def test_no_history_is_a_single_message(self):
+        assert agent._user_messages(" Київ ") == {"messages": [{"role": "user", "content": "Київ"}]}
+
+
+@pytest.mark.unit_mock
+class TestCompactToolOutput:
+    def test_compact_current_is_json_and_shorter(self):
+        compact = weather.compact_current(CURRENT)
+        assert json.loads(compact) == {
+            "temp_c": 3.4,
+            "feels_c": -0.6,
+            "conditions": "дощ слабкий",
+            "wind_kmh": 18.0,
+            "humidity_pct": 87,
+        }
+        assert count_tokens(compact) < count_tokens(weather.format_current(CURRENT))
+
+    def test_format_switch(self, monkeypatch):
+        coords = (50.45, 30.52, "Europe/Kyiv")
+        text, _ = weather._weather_result("Київ", coords, ({"current": CURRENT}, False))
+        assert text.startswith("Температура")
+        monkeypatch.setattr(weather, "TOOL_OUTPUT_FORMAT", "compact")
+        text, meta = weather._weather_result("Київ", coords, ({"current": CURRENT}, False))
+        assert json.loads(text)["conditions"] == "дощ слабкий"
+        assert meta["served_stale"] is False
+
+
+@pytest.mark.unit_mock
+class TestPromptTokenMetric:
+    def test_callback_records_parts_per_model_call(self):
+        from weather_agent.llm_callbacks import LLMCallbackHandler
+
+        handler = LLMCallbackHandler()
+        tools = [{"type": "function", "function": {"name": "get_weather", "parameters": {}}}]
+        handler.on_chat_model_start(
+            {},
+            [[SystemMessage("Ти — помічник."), HumanMessage("Що вдягнути?")]],
+            run_id=uuid4(),
+            invocation_params={"tools": tools},
+        )
+        version = agent.PROMPT_VERSION
+        assert PROMPT_TOKENS.count(part="system", prompt_version=version) == 1
+        assert PROMPT_TOKENS.sum(part="tools", prompt_version=version) == tokens.tools_tokens(tools)
+        assert PROMPT_TOKENS.sum(part="history", prompt_version=version) == 0
+
+
+@pytest.mark.unit_mock
+class TestTokenReport:
+    def test_rows_per_version_and_format(self):
+        report = _load_report()
+        rows = report.build_report(["Що одягнути в Києві?"], versions=["1", "2"])
+        assert [(r["prompt_version"], r["tool_output"]) for r in rows] == [
+            ("1", "text"),
+            ("1", "compact"),
+            ("2", "text"),
+            ("2", "compact"),
+        ]
+        text_row, compact_row = rows[0], rows[1]
+        assert compact_row["tool_results"] < text_row["tool_results"]
+        # System prompt and tool schema are sent with both model calls
+        assert text_row["system"] == 2 * tokens.message_tokens(
+            {"role": "system", "content": report.get_system_prompt(version="1")}
+        )
+        assert "v2  compact" in report.format_report(rows)
+
+    def test_parse_metrics(self):
+        from weather_agent.metrics import record_prompt_tokens, render
+
+        report = _load_report()
+        record_prompt_tokens({"system": 300, "user": 10}, "2")
+        record_prompt_tokens({"system": 400, "user": 30}, "2")
+        assert report.parse_metrics(render()) == {"2": {"calls": 2, "system": 350.0, "user": 20.0}}
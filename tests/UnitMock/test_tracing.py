@@ -0,0 +1,121 @@
+"""Unit tests for request tracing spans and exporters — no HTTP, no LLM."""
+
+import asyncio
+import json
+
+import pytest
+
+from weather_agent.tracing import (
+    NOOP_SPAN,
+    JsonlExporter,
+    current_trace_id,
+    set_exporter,
+    span,
+    start_span,
+)
+
+
+@pytest.mark.unit_mock
+class TestDisabledTracing:
+    def test_shared_noop_span_when_disabled(self):
+        assert span("handle_message", chat_id=1) is NOOP_SPAN
+        assert start_span("llm.call") is NOOP_SPAN
+        with span("ask_agent") as current:
+            current.set(route="llm")
+            assert current_trace_id() is None
+
+
+@pytest.mark.unit_mock
+class TestSpans:
+    def test_children_share_trace_id(self, traced):
+        with span("handle_message", chat_id=1):
+            trace_id = current_trace_id()
+            with span("ask_agent") as current:
+                current.set(route="llm")
+                llm = start_span("llm.call", step=1)
+                llm.end()
+
+        by_name = {s["name"]: s for s in traced}
+        assert [s["name"] for s in traced] == ["llm.call", "ask_agent", "handle_message"]
+        assert {s["trace_id"] for s in traced} == {trace_id}
+        assert by_name["handle_message"]["parent_id"] is None
+        assert by_name["ask_agent"]["parent_id"] == by_name["handle_message"]["span_id"]
+        assert by_name["llm.call"]["parent_id"] == by_name["ask_agent"]["span_id"]
+        assert by_name["ask_agent"]["attributes"] == {"route": "llm"}
+
+    def test_each_root_gets_new_trace(self, traced):
+        with span("handle_message"):
+            pass
+        with span("handle_message"):
+            pass
+        assert traced[0]["trace_id"] != traced[1]["trace_id"]
+
+    def test_exception_marks_span_as_error(self, traced):
+        with pytest.raises(TimeoutError), span("http.forecast"):
+            raise TimeoutError("read timeout")
+        assert traced[0]["status"] == "error"
+        assert traced[0]["error"] == "TimeoutError: read timeout"
+        assert current_trace_id() is None
+
+    async def test_context_follows_tasks_and_threads(self, traced):
+        def in_thread():
+            with span("http.geocode"):
+                pass
+
+        async def in_task():
+            with span("http.forecast"):
+                pass
+
+        with span("tool.get_weather"):
+            await asyncio.to_thread(in_thread)
+            await asyncio.gather(in_task())
+
+        root = traced[-1]
+        assert {s["parent_id"] for s in traced[:-1]} == {root["span_id"]}
+
+
+@pytest.mark.unit_mock
+class TestExporters:
+    def test_jsonl_exporter_writes_line_per_span(self, tmp_path):
+        path = tmp_path / "traces" / "spans.jsonl"
+        set_exporter(JsonlExporter(path))
+        with span("handle_message", chat_id=7), span("ask_agent"):
+            pass
+        set_exporter(None)
+
+        lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+        assert [line["name"] for line in lines] == ["ask_agent", "handle_message"]
+        assert lines[1]["attributes"] == {"chat_id": 7}
+        assert lines[0]["duration_ms"] >= 0
+
+    def test_export_failure_does_not_break_request(self, tmp_path, caplog):
+        exporter = JsonlExporter(tmp_path / "spans.jsonl")
+        exporter.shutdown()  # writes now hit a closed file
+        set_exporter(exporter)
+        with span("handle_message"):
+            pass
+        set_exporter(None)
+
+        assert "Не вдалося експортувати span handle_message" in caplog.text
+
+    def test_otlp_exporter_keeps_ids(self):
+        pytest.importorskip("opentelemetry.sdk")
+        from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+            InMemorySpanExporter,
+        )
+
+        from weather_agent.tracing import OTLPExporter
+
+        memory = InMemorySpanExporter()
+        set_exporter(OTLPExporter(span_exporter=memory))
+        with span("handle_message"):
+            trace_id = current_trace_id()
+            with pytest.raises(ValueError), span("ask_agent", route="error"):
+                raise ValueError("boom")
+        set_exporter(None)
+
+        child, root = memory.get_finished_spans()
+        assert format(root.context.trace_id, "032x") == trace_id
+        assert child.parent.span_id == root.context.span_id
+        assert child.attributes["route"] == "error"
+        assert not child.status.is_ok
@@ -5,7 +5,7 @@ from unittest.mock import patch, MagicMock
 
 from weather_agent.weather import (
     get_weather,
-    _weather_code_to_text,
+    weather_code_to_text,
 )
 
 
@@ -14,26 +14,26 @@ class TestWeatherCodeToText:
     """Test WMO code to Ukrainian text mapping."""
 
     def test_clear_sky(self):
-        assert _weather_code_to_text(0) == "ясно"
+        assert weather_code_to_text(0) == "ясно"
 
     def test_snow(self):
-        assert _weather_code_to_text(71) == "сніг слабкий"
-        assert _weather_code_to_text(75) == "сніг сильний"
+        assert weather_code_to_text(71) == "сніг слабкий"
+        assert weather_code_to_text(75) == "сніг сильний"
 
     def test_rain(self):
-        assert _weather_code_to_text(61) == "дощ слабкий"
-        assert _weather_code_to_text(65) == "дощ сильний"
+        assert weather_code_to_text(61) == "дощ слабкий"
+        assert weather_code_to_text(65) == "дощ сильний"
 
     def test_thunderstorm(self):
-        assert _weather_code_to_text(95) == "гроза"
-        assert _weather_code_to_text(99) == "гроза з сильним градом"
+        assert weather_code_to_text(95) == "гроза"
+        assert weather_code_to_text(99) == "гроза з сильним градом"
 
     def test_high_code_uses_largest_matching(self):
         # Code 100 is above all keys; implementation maps to nearest lower (99)
-        assert _weather_code_to_text(99) == "гроза з сильним градом"
+        assert weather_code_to_text(99) == "гроза з сильним градом"
 
     def test_negative_returns_unknown(self):
-        assert _weather_code_to_text(-1) == "невідомо"
+        assert weather_code_to_text(-1) == "невідомо"
 
 
 @pytest.mark.unit_mock
@@ -95,3 +95,385 @@ class TestGetWeatherWithMockedHttp:
     def test_empty_city_returns_error(self):
         result = get_weather.invoke({"city": ""})
         assert "Помилка" in result or "назву міста" in result
+
+
+@pytest.mark.unit_mock
+class TestGeocodeCache:
+    """Geocoding results are cached by normalized city name."""
+
+    def test_second_lookup_skips_geocoding(self, open_meteo):
+        from weather_agent.weather import cache_stats
+
+        requests = open_meteo()
+        get_weather.invoke({"city": "Києві"})
+        get_weather.invoke({"city": " київ "})
+
+        assert [r.url.host for r in requests].count("geocoding-api.open-meteo.com") == 1
+        assert cache_stats()["geocode"]["hits"] == 1
+
+    def test_resolved_name_is_cached_as_alias(self, open_meteo):
+        from weather_agent.weather import _geocode
+
+        geocode = {"results": [{"latitude": 49.84, "longitude": 24.03, "name": "Львів"}]}
+        requests = open_meteo(geocode)
+        assert _geocode("Lviv") == _geocode("у Львові")
+        assert [r.url.host for r in requests] == ["geocoding-api.open-meteo.com"]
+
+    def test_unknown_city_is_negatively_cached(self, open_meteo, mock_httpx_empty_geocode):
+        from weather_agent.weather import _geocode
+
+        requests = open_meteo(mock_httpx_empty_geocode)
+        assert _geocode("NonExistentCity123") is None
+        assert _geocode("nonexistentcity123") is None
+        assert len(requests) == 1
+
+    @pytest.mark.parametrize("use_async", [False, True])
+    def test_inflected_miss_does_not_hide_nominative(self, use_async, open_meteo):
+        """A miss for «у Фастові» is cached under the query text, not under «фастів»."""
+        import asyncio
+
+        from weather_agent.weather import _ageocode, _geocode
+
+        found = {"results": [{"latitude": 50.08, "longitude": 29.92, "timezone": "Europe/Kyiv"}]}
+
+        def geocode(city):
+            return asyncio.run(_ageocode(city)) if use_async else _geocode(city)
+
+        requests = open_meteo(lambda name: found if name == "Фастів" else {"results": []})
+        assert geocode("у Фастові") is None
+        assert geocode("у Фастові") is None
+        assert geocode("Фастів") == (50.08, 29.92, "Europe/Kyiv")
+        assert [r.url.params["name"] for r in requests] == ["у Фастові", "Фастів"]
+
+    def test_http_error_is_not_cached(self):
+        import httpx
+
+        from weather_agent.http_client import use_transport
+        from weather_agent.weather import _geocode
+
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.host)
+            return httpx.Response(503)
+
+        use_transport(httpx.MockTransport(handler))
+        assert _geocode("Kyiv") is None
+        assert _geocode("Kyiv") is None
+        assert len(calls) == 2
+
+
+@pytest.mark.unit_mock
+class TestUpstreamMetrics:
+    """Each Open-Meteo call is timed per endpoint; failures are counted by exception type."""
+
+    def test_geocode_and_forecast_timed_separately(self, open_meteo):
+        from weather_agent.metrics import UPSTREAM_SECONDS
+
+        open_meteo()
+        get_weather.invoke({"city": "Київ"})
+        get_weather.invoke({"city": "Київ"})
+
+        assert UPSTREAM_SECONDS.count(endpoint="geocode") == 1
+        assert UPSTREAM_SECONDS.count(endpoint="forecast") == 1
+
+    def test_http_error_counted_by_type(self):
+        import httpx
+
+        from weather_agent.http_client import use_transport
+        from weather_agent.metrics import ERRORS
+        from weather_agent.weather import _geocode
+
+        use_transport(httpx.MockTransport(lambda request: httpx.Response(503)))
+        assert _geocode("Kyiv") is None
+        assert ERRORS.value(component="geocode", type="HTTPStatusError") == 1
+
+    def test_cache_hits_exposed(self, open_meteo):
+        from weather_agent.metrics import render
+
+        open_meteo()
+        get_weather.invoke({"city": "Київ"})
+        get_weather.invoke({"city": "Київ"})
+
+        text = render()
+        assert 'weather_agent_cache_hits_total{cache="geocode"} 1' in text
+        assert 'weather_agent_cache_misses_total{cache="forecast"} 1' in text
+
+
+@pytest.mark.unit_mock
+class TestDiskCacheTier:
+    """Geocode and forecast results survive a restart through the SQLite tier."""
+
+    def test_restart_warms_memory_from_disk(
+        self, tmp_path, open_meteo, mock_httpx_geocode_kyiv, mock_httpx_empty_geocode
+    ):
+        from weather_agent.weather import (
+            _geocode,
+            cache_stats,
+            clear_caches,
+            close_disk_cache,
+            warm_caches,
+        )
+
+        path = tmp_path / "weather.sqlite3"
+        requests = open_meteo(
+            lambda name: mock_httpx_geocode_kyiv if name == "Kyiv" else mock_httpx_empty_geocode
+        )
+        assert warm_caches(path) == {"geocode": 0, "forecast": 0}
+        get_weather.invoke({"city": "Kyiv"})
+        _geocode("Nowhere123")
+        # «Перезапуск»: пам'ять порожня, дисковий рівень дописано й закрито
+        close_disk_cache()
+        clear_caches()
+        requests.clear()
+
+        assert warm_caches(path) == {"geocode": 2, "forecast": 1}
+        result = get_weather.invoke({"city": "Kyiv"})
+        assert _geocode("Nowhere123") is None
+
+        assert "-2.5" in result
+        assert requests == []
+        assert cache_stats()["forecast"]["hits"] == 1
+
+    def test_unwritable_path_disables_tier(self, tmp_path):
+        from weather_agent.weather import cache_stats, warm_caches
+
+        blocker = tmp_path / "file"
+        blocker.write_text("")
+        assert warm_caches(blocker / "weather.sqlite3") == {"geocode": 0, "forecast": 0}
+        assert "disk" not in cache_stats()
+
+
+@pytest.mark.unit_mock
+class TestForecastCache:
+    """Forecast is cached until the next Open-Meteo update boundary, then served stale."""
+
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        from weather_agent import weather
+
+        now = {"t": 900.0 * 1000 + 10}
+        monkeypatch.setattr(weather, "_wall_clock", lambda: now["t"])
+        return now
+
+    @pytest.fixture
+    def forecast_calls(self, open_meteo):
+        """Number of forecast requests so far (geocoding is not counted)."""
+        requests = open_meteo()
+        return lambda: sum(r.url.host == "api.open-meteo.com" for r in requests)
+
+    @staticmethod
+    def _invoke(city="Kyiv"):
+        msg = get_weather.invoke(
+            {"name": "get_weather", "args": {"city": city}, "id": "1", "type": "tool_call"}
+        )
+        return msg.content, msg.artifact
+
+    @staticmethod
+    def _wait_refresh():
+        import time
+
+        from weather_agent import weather
+
+        for _ in range(200):
+            if not weather._refreshing:
+                return
+            time.sleep(0.01)
+
+    def test_fresh_entry_served_without_fetch(self, clock, forecast_calls):
+        self._invoke()
+        clock["t"] += 600
+        content, artifact = self._invoke()
+        assert "Температура" in content
+        assert artifact["served_stale"] is False
+        assert forecast_calls() == 1
+
+    def test_after_boundary_serves_stale_and_refreshes_once(self, clock, forecast_calls):
+        self._invoke()
+        clock["t"] += 900
+        _, first = self._invoke()
+        _, second = self._invoke()
+        self._wait_refresh()
+
+        assert first["served_stale"] is True
+        assert second["served_stale"] in (True, False)
+        assert forecast_calls() == 2
+        _, after = self._invoke()
+        assert after["served_stale"] is False
+
+    def test_beyond_max_stale_fetches_synchronously(self, clock, forecast_calls):
+        from weather_agent.config import FORECAST_MAX_STALE
+
+        self._invoke()
+        clock["t"] += 900 + FORECAST_MAX_STALE + 1
+        _, artifact = self._invoke()
+        assert artifact["served_stale"] is False
+        assert forecast_calls() == 2
+
+    def test_nearby_coordinates_share_entry(self, clock, forecast_calls):
+        from weather_agent.weather import _cached_forecast
+
+        _cached_forecast(50.4501, 30.5234, "Europe/Kyiv")
+        _cached_forecast(50.4498, 30.5241, "Europe/Kyiv")
+        assert forecast_calls() == 1
+
+
+@pytest.mark.unit_mock
+class TestConcurrentLookups:
+    def test_concurrent_get_weather_shares_upstream_requests(
+        self, mock_httpx_geocode_kyiv, mock_httpx_forecast
+    ):
+        import threading
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+
+        import httpx
+
+        from weather_agent.http_client import use_transport
+        from weather_agent.weather import singleflight_stats
+
+        hosts = []
+        lock = threading.Lock()
+
+        def handler(request):
+            with lock:
+                hosts.append(request.url.host)
+            time.sleep(0.1)
+            if request.url.host.startswith("geocoding"):
+                return httpx.Response(200, json=mock_httpx_geocode_kyiv)
+            return httpx.Response(200, json=mock_httpx_forecast)
+
+        use_transport(httpx.MockTransport(handler))
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            results = list(pool.map(lambda _: get_weather.invoke({"city": "Kyiv"}), range(10)))
+
+        assert all("Температура" in r for r in results)
+        assert hosts.count("geocoding-api.open-meteo.com") == 1
+        assert hosts.count("api.open-meteo.com") == 1
+        assert singleflight_stats()["deduplicated"] > 0
+
+
+@pytest.mark.unit_mock
+@pytest.mark.asyncio
+class TestAsyncGetWeather:
+    """get_weather.ainvoke runs on httpx.AsyncClient with the same caches."""
+
+    async def test_ainvoke_returns_weather_string(self, open_meteo):
+        open_meteo()
+        result = await get_weather.ainvoke({"city": "Kyiv"})
+        assert "Температура" in result
+        assert "сніг" in result
+
+    async def test_concurrent_ainvoke_shares_requests(
+        self, mock_httpx_geocode_kyiv, mock_httpx_forecast
+    ):
+        import asyncio
+
+        import httpx
+
+        from weather_agent.http_client import use_transport
+
+        hosts = []
+
+        async def handler(request):
+            hosts.append(request.url.host)
+            await asyncio.sleep(0.05)
+            if request.url.host.startswith("geocoding"):
+                return httpx.Response(200, json=mock_httpx_geocode_kyiv)
+            return httpx.Response(200, json=mock_httpx_forecast)
+
+        use_transport(httpx.MockTransport(handler))
+        results = await asyncio.gather(*(get_weather.ainvoke({"city": "Kyiv"}) for _ in range(20)))
+        assert all("Температура" in r for r in results)
+        assert hosts == ["geocoding-api.open-meteo.com", "api.open-meteo.com"]
+
+    async def test_ainvoke_unknown_city(self, open_meteo, mock_httpx_empty_geocode):
+        open_meteo(mock_httpx_empty_geocode)
+        result = await get_weather.ainvoke({"city": "NonExistentCity123"})
+        assert "Не вдалося знайти місто" in result
+
+
+# Geocoding results served to the get_weather_many tests, by lower-cased name
+MANY_CITIES = {
+    "київ": {"latitude": 50.45, "longitude": 30.52, "timezone": "Europe/Kyiv"},
+    "львів": {"latitude": 49.84, "longitude": 24.03, "timezone": "Europe/Kyiv"},
+}
+
+
+@pytest.mark.unit_mock
+class TestGetWeatherMany:
+    """get_weather_many geocodes each city and fetches all forecasts in one request."""
+
+    @staticmethod
+    def _transport(forecast_requests):
+        import httpx
+
+        def current(temp):
+            return {"current": {"temperature_2m": temp, "weather_code": 0}}
+
+        def handler(request):
+            if request.url.host.startswith("geocoding"):
+                hit = MANY_CITIES.get(request.url.params["name"].lower())
+                return httpx.Response(200, json={"results": [hit] if hit else []})
+            forecast_requests.append(request.url.params)
+            lats = request.url.params["latitude"].split(",")
+            items = [current(float(i)) for i, _ in enumerate(lats)]
+            return httpx.Response(200, json=items if len(items) > 1 else items[0])
+
+        return httpx.MockTransport(handler)
+
+    def test_single_forecast_request_for_all_cities(self):
+        from weather_agent.http_client import use_transport
+        from weather_agent.weather import get_weather_many
+
+        requests = []
+        use_transport(self._transport(requests))
+        out = get_weather_many.invoke({"cities": ["Київ", "Львів"]})
+
+        assert len(requests) == 1
+        assert requests[0]["latitude"] == "50.45,49.84"
+        assert requests[0]["timezone"] == "Europe/Kyiv,Europe/Kyiv"
+        lines = out.splitlines()
+        assert lines[0].startswith("Київ: Температура +0.0°C")
+        assert lines[1].startswith("Львів: Температура +1.0°C")
+
+    def test_unknown_city_reported_per_block(self):
+        from weather_agent.http_client import use_transport
+        from weather_agent.weather import get_weather_many
+
+        requests = []
+        use_transport(self._transport(requests))
+        out = get_weather_many.invoke({"cities": ["Київ", "Атлантида"]})
+
+        assert "Київ: Температура" in out
+        assert "Атлантида: Не вдалося знайти місто" in out
+        assert requests[0]["latitude"] == "50.45"
+
+    def test_cached_cities_are_not_refetched(self):
+        from weather_agent.http_client import use_transport
+        from weather_agent.weather import get_weather_many
+
+        requests = []
+        use_transport(self._transport(requests))
+        get_weather.invoke({"city": "Київ"})
+        get_weather_many.invoke({"cities": ["Київ", "Львів", "київ"]})
+
+        assert [r["latitude"] for r in requests] == ["50.45", "49.84"]
+
+    def test_empty_and_too_many_cities(self):
+        from weather_agent.weather import MAX_BATCH_CITIES, get_weather_many
+
+        assert "Помилка" in get_weather_many.invoke({"cities": []})
+        many = [f"Місто{i}" for i in range(MAX_BATCH_CITIES + 1)]
+        assert "не більше" in get_weather_many.invoke({"cities": many})
+
+    async def test_ainvoke_single_forecast_request(self):
+        from weather_agent.http_client import use_transport
+        from weather_agent.weather import get_weather_many
+
+        requests = []
+        use_transport(self._transport(requests))
+        out = await get_weather_many.ainvoke({"cities": ["Київ", "Львів"]})
+
+        assert len(requests) == 1
+        assert out.count("Температура") == 2
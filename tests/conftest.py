@@ -1,5 +1,6 @@
 """Shared pytest fixtures for weather agent tests."""
 
+import os
 import sys
 from pathlib import Path
 
@@ -11,6 +12,8 @@ _SRC = _ROOT / "src"
 if str(_SRC) not in sys.path:
     sys.path.insert(0, str(_SRC))
 
+CASSETTES = _ROOT / "tests" / "cassettes"
+
 
 @pytest.fixture
 def mock_httpx_geocode_kyiv():
@@ -46,9 +49,172 @@ def mock_httpx_empty_geocode():
     return {"results": []}
 
 
+@pytest.fixture
+def open_meteo(mock_httpx_geocode_kyiv, mock_httpx_forecast):
+    """
+    Route Open-Meteo calls through an httpx.MockTransport. open_meteo() serves Kyiv
+    geocoding and the default current weather; `geocode` and `forecast` replace the
+    bodies (`geocode` may be a callable taking the requested city name). Returns the
+    list of requests the transport received.
+    """
+    import httpx
+
+    from weather_agent.http_client import use_transport
+
+    def serve(geocode=None, forecast=None) -> list[httpx.Request]:
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            if not request.url.host.startswith("geocoding"):
+                return httpx.Response(
+                    200, json=mock_httpx_forecast if forecast is None else forecast
+                )
+            body = mock_httpx_geocode_kyiv if geocode is None else geocode
+            if callable(body):
+                body = body(request.url.params["name"])
+            return httpx.Response(200, json=body)
+
+        use_transport(httpx.MockTransport(handler))
+        return requests
+
+    return serve
+
+
 @pytest.fixture(autouse=True)
 def env_isolate(monkeypatch):
     """Set safe defaults for optional vars. Do not delete OPENAI_API_KEY so IntegrationLLM/SystemLLM can run when set."""
     monkeypatch.delenv("TELEGRAM_BOT_TOKEN", raising=False)
     monkeypatch.setenv("PROMPT_VERSION", "2")
     monkeypatch.setenv("DEFAULT_MODEL", "gpt-4o-mini")
+
+
+@pytest.fixture(autouse=True)
+def reset_weather_client(monkeypatch):
+    """
+    Each test starts with a fresh shared HTTP client and empty weather caches.
+    The offline gazetteer, the no-LLM fast path, the agent response cache and streamed
+    Telegram replies are off so existing tests exercise the Geocoding API, agent and
+    one-shot reply paths; tests turn them on with the `gazetteer`, `fast_path` and
+    `reply_cache` fixtures (streaming: patch weather_agent.bot.STREAMING_ENABLED).
+    Bot messages go through a fresh per-chat queue without a debounce delay, and
+    post_init starts neither the background agent prewarm nor the metrics server.
+    Per-chat conversation memory is closed (the bot is stateless) unless a test opens it
+    with the `chat_memory` fixture.
+    Metrics recorded by the process-wide registry start from zero.
+    """
+    from weather_agent.chat_queue import ChatQueue
+    from weather_agent.http_client import use_transport
+    from weather_agent.memory import close_chat_memory
+    from weather_agent.metrics import REGISTRY
+    from weather_agent.response_cache import response_cache
+    from weather_agent.tracing import set_exporter
+    from weather_agent.weather import clear_caches, close_disk_cache
+
+    monkeypatch.setattr("weather_agent.weather.GAZETTEER_ENABLED", False)
+    monkeypatch.setattr("weather_agent.agent.GAZETTEER_ENABLED", False)
+    monkeypatch.setattr("weather_agent.agent.FAST_PATH_ENABLED", False)
+    monkeypatch.setattr("weather_agent.response_cache.RESPONSE_CACHE_ENABLED", False)
+    monkeypatch.setattr("weather_agent.bot.STREAMING_ENABLED", False)
+    monkeypatch.setattr("weather_agent.bot._chats", ChatQueue(debounce=0.0))
+    monkeypatch.setattr("weather_agent.bot.AGENT_PREWARM", False)
+    monkeypatch.setattr("weather_agent.bot.METRICS_PORT", 0)
+
+    use_transport(None)
+    close_chat_memory()
+    clear_caches()
+    response_cache.clear()
+    REGISTRY.clear()
+    yield
+    use_transport(None)
+    close_disk_cache()
+    close_chat_memory()
+    clear_caches()
+    response_cache.clear()
+    REGISTRY.clear()
+    set_exporter(None)
+
+
+@pytest.fixture
+def gazetteer(monkeypatch):
+    """Enable the bundled offline gazetteer for this test."""
+    from weather_agent.gazetteer import get_gazetteer
+
+    monkeypatch.setattr("weather_agent.weather.GAZETTEER_ENABLED", True)
+    monkeypatch.setattr("weather_agent.agent.GAZETTEER_ENABLED", True)
+    return get_gazetteer()
+
+
+@pytest.fixture
+def fast_path(monkeypatch, gazetteer):
+    """Enable the deterministic no-LLM fast path (with the gazetteer) for this test."""
+    monkeypatch.setattr("weather_agent.agent.FAST_PATH_ENABLED", True)
+    monkeypatch.setattr("weather_agent.agent._fast_path_counts", {"hits": 0, "fallthrough": 0})
+
+
+@pytest.fixture
+def chat_memory():
+    """Open the in-memory per-chat conversation memory for this test and return it."""
+    from weather_agent.memory import open_chat_memory
+
+    return open_chat_memory("memory")
+
+
+@pytest.fixture
+def reply_cache(monkeypatch):
+    """Enable the agent response cache for this test and return it."""
+    from weather_agent.response_cache import response_cache
+
+    monkeypatch.setattr("weather_agent.response_cache.RESPONSE_CACHE_ENABLED", True)
+    return response_cache
+
+
+class _ListExporter:
+    """Tracing exporter that keeps finished spans in memory."""
+
+    def __init__(self) -> None:
+        self.spans = []
+
+    def export(self, span) -> None:
+        self.spans.append(span.to_dict())
+
+    def shutdown(self) -> None:
+        pass
+
+
+@pytest.fixture
+def traced():
+    """Enable tracing for this test; returns the list of finished spans (as dicts)."""
+    from weather_agent.tracing import set_exporter
+
+    exporter = _ListExporter()
+    set_exporter(exporter)
+    yield exporter.spans
+    set_exporter(None)
+
+
+@pytest.fixture
+def llm_cassette(request):
+    """
+    Record/replay Open-Meteo and OpenAI exchanges in tests/cassettes/<module>/<test>.json.
+    An existing cassette is replayed offline (no network, no OPENAI_API_KEY); a missing one
+    is recorded when OPENAI_API_KEY is set, otherwise the test is skipped.
+    CASSETTE_MODE=once|record forces recording of new or all exchanges.
+    """
+    from weather_agent import agent
+    from weather_agent.cassette import Cassette, CassetteTransport
+    from weather_agent.http_client import use_transport
+
+    path = CASSETTES / request.node.module.__name__.rsplit(".", 1)[-1] / f"{request.node.name}.json"
+    mode = os.getenv("CASSETTE_MODE") or ("replay" if path.exists() else "once")
+    if mode != "replay" and not os.getenv("OPENAI_API_KEY"):
+        pytest.skip(
+            f"no committed cassette {path.relative_to(_ROOT)} and OPENAI_API_KEY not set to record it"
+        )
+
+    cassette = Cassette(path, mode)
+    use_transport(CassetteTransport(cassette))
+    agent.use_cassette(cassette)
+    yield cassette
+    agent.use_cassette(None)
+    cassette.save()